@@ -1,25 +1,34 @@
 import os
-from typing import Optional, Set, Tuple, List, Dict
+from typing import Callable, Iterable, Optional, Set, Tuple, List, Dict
 from .languages import LANGUAGES
 
-def detect_language(directory: str) -> Tuple[Optional[str], List[Dict[str, float]]]:
+def detect_language(directory: str, walk: Optional[Callable[[str], Iterable[Tuple]]] = None) -> Tuple[Optional[str], List[Dict[str, float]]]:
     """
     Detect the dominant programming language in the given directory.
     Returns a tuple of (language_key, detected_languages_with_confidence).
+    walk replaces os.walk; it is called with the directory and must yield
+    tuples whose last element is the list of file names (e.g. a parallel walker).
+    """
+    entries = walk(directory) if walk is not None else os.walk(directory)
+    return detect_language_from_names(file for entry in entries for file in entry[-1])
+
+def detect_language_from_names(file_names: Iterable[str]) -> Tuple[Optional[str], List[Dict[str, float]]]:
+    """
+    Like detect_language, but for a list of file names (without directories),
+    e.g. the members of an archive.
     """
     # Count occurrences of marker files and extensions
     language_scores = {lang: 0 for lang in LANGUAGES.keys()}
     
-    for root, _, files in os.walk(directory):
-        for file in files:
-            # Check marker files
-            for lang_key, lang_info in LANGUAGES.items():
-                if file in lang_info.marker_files:
-                    language_scores[lang_key] += 2  # Marker files count double
-                
-                # Check file extensions
-                if any(file.endswith(ext) for ext in lang_info.extensions):
-                    language_scores[lang_key] += 1
+    for file in file_names:
+        # Check marker files
+        for lang_key, lang_info in LANGUAGES.items():
+            if file in lang_info.marker_files:
+                language_scores[lang_key] += 2  # Marker files count double
+            
+            # Check file extensions
+            if any(file.endswith(ext) for ext in lang_info.extensions):
+                language_scores[lang_key] += 1
     
     # Calculate total score
     total_score = sum(language_scores.values())
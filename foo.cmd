@@ -109,11 +109,13 @@ reg add "HKCR\Directory\shell\%CREATE_VERB%" /v "" /t REG_SZ /d "%CREATE_TEXT%"
 reg add "HKCR\Directory\shell\%CREATE_VERB%\command" /v "" /t REG_SZ /d "\"%PYTHON_EXE%\" \"%CREATE_DUMP_SCRIPT%\" \"%%V\"" /f || set ACTION_SUCCESS=0
 
 :: --- Ignore for dump ---
+:: Explorer startet pro markiertem Element einen Prozess; --collect sammelt alle Pfade
+:: und fuegt sie in einem einzigen Prozess hinzu (ein Schreibvorgang pro Projekt).
 echo Fuege %IGNORE_TEXT% hinzu...
 reg add "HKCR\*\shell\%IGNORE_VERB%" /v "" /t REG_SZ /d "%IGNORE_TEXT%" /f || set ACTION_SUCCESS=0
-reg add "HKCR\*\shell\%IGNORE_VERB%\command" /v "" /t REG_SZ /d "\"%PYTHON_EXE%\" \"%ADD_IGNORE_SCRIPT%\" \"%%1\"" /f || set ACTION_SUCCESS=0
+reg add "HKCR\*\shell\%IGNORE_VERB%\command" /v "" /t REG_SZ /d "\"%PYTHON_EXE%\" \"%ADD_IGNORE_SCRIPT%\" --collect \"%%1\"" /f || set ACTION_SUCCESS=0
 reg add "HKCR\Directory\shell\%IGNORE_VERB%" /v "" /t REG_SZ /d "%IGNORE_TEXT%" /f || set ACTION_SUCCESS=0
-reg add "HKCR\Directory\shell\%IGNORE_VERB%\command" /v "" /t REG_SZ /d "\"%PYTHON_EXE%\" \"%ADD_IGNORE_SCRIPT%\" \"%%V\"" /f || set ACTION_SUCCESS=0
+reg add "HKCR\Directory\shell\%IGNORE_VERB%\command" /v "" /t REG_SZ /d "\"%PYTHON_EXE%\" \"%ADD_IGNORE_SCRIPT%\" --collect \"%%V\"" /f || set ACTION_SUCCESS=0
 
 if !ACTION_SUCCESS! equ 1 (
     echo.
@@ -1,9 +1,12 @@
 # scripts/add_to_ignore.py (ÜBERARBEITET)
 
+import argparse
 import os
 import sys
+import tempfile
+import time
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Iterable, List, Optional, Tuple, Union
 
 # Add project root to Python path - BEIBEHALTEN wegen Kontextmenü-Ausführung
 # Annahme: Das Skript liegt in /scripts, Projekt-Root ist eine Ebene höher.
@@ -12,8 +15,10 @@ sys.path.append(str(project_root_script_location))
 
 try:
     from utils.config_manager import ConfigManager
+    from utils.ignore_manager import IgnoreManager
     # Importiere den Error Logger (Pfad relativ zum project_root_script_location)
     from utils.error_logger import log_error
+    from utils.file_lock import FileLock
 except ImportError as e:
     print(f"Error: Could not import necessary modules. Ensure the script is run correctly within the project structure.")
     print(f"Details: {e}")
@@ -47,133 +52,236 @@ def find_project_root(start_path: Path) -> Path:
     # If no marker found up to the root
     raise FileNotFoundError(f"Could not find project root (.git or .dump_config) starting from {start_path}")
 
-def add_single_path_to_ignore(file_or_dir_path: str, globally: bool) -> None:
-    """
-    Adds a single file or directory path to the appropriate ignore list.
+def _resolve_input_path(file_or_dir_path: str) -> Path:
+    """Resolve a path given on the command line (relative to CWD or absolute)."""
+    path_to_add = Path(file_or_dir_path.strip().strip('"'))
+    if not path_to_add.is_absolute():
+        # If run from context menu, CWD might be weird. Assume path is relative to CWD
+        path_to_add = Path.cwd() / path_to_add
+    return path_to_add.resolve() # Ensure it's resolved and clean
 
-    Args:
-        file_or_dir_path: The path string of the item to ignore (can be relative to CWD or absolute).
-        globally: True to add to global list, False for local list relative to project root.
-    """
-    project_root: Optional[Path] = None # Initialize for logging in case of early error
-    log_dir_fallback = str(Path.cwd()) # Fallback logging directory
 
-    try:
-        # 1. Resolve the input path to an absolute path
-        path_to_add = Path(file_or_dir_path)
-        if not path_to_add.is_absolute():
-             # If run from context menu, CWD might be weird. Assume path is relative to CWD
-             # or it's an absolute path provided.
-            path_to_add = Path.cwd() / path_to_add
-        abs_path = path_to_add.resolve() # Ensure it's resolved and clean
-
-        # Check if path actually exists (optional, but good practice)
+def read_path_list(list_file) -> List[str]:
+    """Read one path per line from an open text file (empty lines and # comments are skipped)."""
+    return [line.strip() for line in list_file if line.strip() and not line.lstrip().startswith('#')]
+
+
+def _group_by_project_root(paths: Iterable[str]) -> Tuple[Dict[Path, List[Path]], int]:
+    """
+    Resolve the paths and group them by project root. The root lookup is done
+    once per parent directory, so a multi-selection in one folder costs a single
+    upward search.
+    Returns (groups, number of paths without a project root).
+    """
+    groups: Dict[Path, List[Path]] = {}
+    unresolved = 0
+    roots_by_dir: Dict[Path, Optional[Path]] = {}
+    for file_or_dir_path in paths:
+        abs_path = _resolve_input_path(file_or_dir_path)
         if not abs_path.exists():
             print(f"Warning: Path does not exist: {abs_path}. Adding it anyway.")
-            # log_error? Maybe not, user might intend to ignore a path before creating it.
+        # Find the project root, starting from the directory containing the item
+        # or the item itself if it's a directory.
+        search_start_dir = abs_path if abs_path.is_dir() else abs_path.parent
+        if search_start_dir not in roots_by_dir:
+            try:
+                roots_by_dir[search_start_dir] = find_project_root(search_start_dir)
+            except FileNotFoundError as e_root:
+                print(f"Error: {e_root}")
+                print("Could not determine the project's root directory. Please ensure you are running this command within a project containing a '.git' folder or a '.dump_config' file.")
+                log_error(str(Path.cwd()), f"Failed to find project root when adding '{file_or_dir_path}': {e_root}")
+                roots_by_dir[search_start_dir] = None
+        project_root = roots_by_dir[search_start_dir]
+        if project_root is None:
+            unresolved += 1
+        else:
+            groups.setdefault(project_root, []).append(abs_path)
+    return groups, unresolved
+
+
+def _add_local(project_root: Path, abs_paths: List[Path]) -> bool:
+    """Add paths of one project to .dump/.dump_ignore (one locked write). Returns False on errors."""
+    ok = True
+    rel_paths = []
+    for abs_path in abs_paths:
+        try:
+            # Calculate the path relative to the project root (forward slashes)
+            rel_path_str = abs_path.relative_to(project_root).as_posix().strip('/')
+        except ValueError:
+            # This happens if abs_path is not within project_root
+            print(f"Error: Path {abs_path} is outside the project directory {project_root}. Cannot add to local ignore list (.dump_ignore).")
+            log_error(str(project_root), f"Cannot add path {abs_path} to local ignore list: it is outside the project root {project_root}.")
+            ok = False
+            continue
+        if not rel_path_str or rel_path_str == '.':
+            print(f"Cannot add project root directory itself to local ignore list.")
+            continue
+        rel_paths.append(rel_path_str)
+    if not rel_paths:
+        return ok
+
+    # The local list only needs the IgnoreManager; no ConfigManager (and no config write)
+    ignore_manager = IgnoreManager(str(project_root))
+    added, skipped = ignore_manager.add_paths(rel_paths)
+    for rel_path_str in added:
+        print(f"Added to local ignore list (.dump_ignore): {rel_path_str}")
+    for rel_path_str in skipped:
+        print(f"Already covered by local ignore list (.dump_ignore): {rel_path_str}")
+    print(f"Ignore file: {ignore_manager.ignore_path} ({len(added)} added, {len(skipped)} already covered)")
+    return ok
 
-        # 2. Find the project root, starting from the directory containing the item
-        #    or the item itself if it's a directory.
-        search_start_dir = abs_path.parent if abs_path.is_file() else abs_path
-        project_root = find_project_root(search_start_dir)
-        log_dir_fallback = str(project_root) # Use project root for logging once found
 
-        # 3. Initialize ConfigManager
+def _add_global(project_root: Path, abs_paths: List[Path]) -> bool:
+    """Add paths of one project to ignored_paths in .dump/.dump_config (one locked write)."""
+    # Lock before the ConfigManager exists: creating it may already write the config
+    config_lock_path = project_root / ConfigManager.DUMP_SUBDIR / (ConfigManager.CONFIG_FILENAME + ".lock")
+    with FileLock(config_lock_path):
         config_manager = ConfigManager(str(project_root))
+        added, skipped = config_manager.add_ignored_paths([str(p) for p in abs_paths], lock_held=True)
+    for abs_path_str in added:
+        print(f"Added to global ignore list (.dump_config): {abs_path_str}")
+    for abs_path_str in skipped:
+        print(f"Already covered by global ignore list (.dump_config): {abs_path_str}")
+    print(f"Config file: {config_manager.config_path} ({len(added)} added, {len(skipped)} already covered)")
+    return True
 
-        # 4. Handle Global Ignore
-        if globally:
-            abs_path_str = str(abs_path)
-            if abs_path_str in config_manager.get_ignored_paths():
-                print(f"Path already in global ignore list (.dump_config): {abs_path_str}")
-                return
 
-            config_manager.add_to_ignore(abs_path_str, globally=True)
-            print(f"Added to global ignore list (.dump_config): {abs_path_str}")
-            print(f"Config file: {config_manager.config_path}")
+def add_to_ignore(paths: Union[str, Iterable[str]], globally: bool = False) -> bool:
+    """
+    Adds files or directories to the appropriate ignore lists.
 
-        # 5. Handle Local Ignore
-        else:
+    Paths are grouped by project root and each ignore file is updated in a
+    single locked read-modify-write, so a multi-selection is handled by one
+    process and concurrent invocations do not lose entries. Paths already
+    covered by an existing (parent) entry are skipped.
+
+    Args:
+        paths: One path or many paths (relative to CWD or absolute).
+        globally: True to add absolute paths to the global list in .dump_config,
+                  False for the local list (.dump_ignore) relative to the project root.
+    Returns:
+        True if all paths were handled without errors.
+    """
+    if isinstance(paths, (str, Path)):
+        paths = [str(paths)]
+    try:
+        groups, unresolved = _group_by_project_root(paths)
+    except Exception as e_group:
+        print(f"An unexpected error occurred: {e_group}")
+        log_error(str(Path.cwd()), f"Unexpected error resolving paths for add_to_ignore: {e_group}")
+        return False
+    ok = unresolved == 0
+
+    for project_root, abs_paths in groups.items():
+        try:
+            if globally:
+                ok = _add_global(project_root, abs_paths) and ok
+            else:
+                ok = _add_local(project_root, abs_paths) and ok
+        except TimeoutError as e_lock:
+            print(f"Error: {e_lock}")
+            log_error(str(project_root), f"Could not update ignore list (globally={globally}): {e_lock}")
+            ok = False
+        except Exception as e_main:
+            # Catch any other unexpected errors
+            print(f"An unexpected error occurred: {e_main}")
+            log_error(str(project_root), f"Unexpected error in add_to_ignore for {len(abs_paths)} path(s), globally={globally}: {e_main}")
+            ok = False
+    return ok
+
+
+# Queue of the Explorer context menu, which starts one process per selected item
+COLLECT_DIR = Path(tempfile.gettempdir()) / "grebber_for_ai"
+COLLECT_SETTLE_SECONDS = 0.3 # Wait this long for more selected items before adding the queue
+
+
+def collect_and_add(paths: Iterable[str], globally: bool = False) -> bool:
+    """
+    Single-instance handoff for the context menu: every process appends its
+    (absolute) paths to a queue file; the first one becomes the leader, waits
+    until no more paths arrive and adds the whole queue with one
+    add_to_ignore() call, so a multi-selection costs one root lookup and one
+    locked write per project. The other processes exit right after queueing.
+    Returns False if this process was the leader and a batch had errors.
+    """
+    COLLECT_DIR.mkdir(parents=True, exist_ok=True)
+    mode = "global" if globally else "local"
+    queue_path = COLLECT_DIR / f"ignore_queue_{mode}.txt"
+    queue_lock = FileLock(COLLECT_DIR / f"ignore_queue_{mode}.lock")
+    leader_lock = FileLock(COLLECT_DIR / f"ignore_leader_{mode}.lock")
+
+    with queue_lock:
+        with open(queue_path, 'a', encoding='utf-8') as queue_file:
+            for path in paths:
+                queue_file.write(str(_resolve_input_path(path)) + "\n")
+    if not leader_lock.try_acquire():
+        # The leader re-reads the queue under queue_lock before it gives up leadership
+        print("Queued for the running ignore process.")
+        return True
+
+    ok = True
+    while True:
+        # Settle: wait until the queue stops growing (Explorer starts the processes one by one)
+        size = -1
+        while True:
+            time.sleep(COLLECT_SETTLE_SECONDS)
+            current = queue_path.stat().st_size if queue_path.exists() else 0
+            if current == size:
+                break
+            size = current
+        with queue_lock:
             try:
-                # Calculate the path relative to the project root
-                rel_path = abs_path.relative_to(project_root)
-                # Normalize: forward slashes, strip surrounding slashes
-                rel_path_str = str(rel_path).replace('\\', '/').strip('/')
-
-                if not rel_path_str: # Ignore if it results in an empty string (e.g., ignoring the root itself locally?)
-                     print(f"Cannot add project root directory itself to local ignore list.")
-                     return
-
-                # Check if this specific relative path is already in .dump_ignore
-                # We access the manager directly for this check for clarity
-                if config_manager.local_ignore.is_ignored(rel_path_str):
-                     # Check if it was ignored directly or via parent
-                     if rel_path_str in config_manager.local_ignore.ignored_paths:
-                         print(f"Path already explicitly in local ignore list (.dump_ignore): {abs_path} (as '{rel_path_str}')")
-                     else:
-                         print(f"Path is already covered by a parent entry in local ignore list (.dump_ignore): {abs_path} (covered by pattern matching '{rel_path_str}')")
-                     return
-
-                # Add the normalized relative path
-                config_manager.add_to_ignore(rel_path_str, globally=False)
-                print(f"Added to local ignore list (.dump_ignore): {abs_path} (as '{rel_path_str}')")
-                print(f"Ignore file: {config_manager.local_ignore.ignore_path}")
-
-            except ValueError:
-                # This happens if abs_path is not within project_root
-                print(f"Error: Path {abs_path} is outside the project directory {project_root}. Cannot add to local ignore list (.dump_ignore).")
-                log_error(str(project_root), f"Cannot add path {abs_path} to local ignore list: it is outside the project root {project_root}.")
-            except Exception as e_local:
-                 # Catch other potential errors during local add
-                 print(f"Error adding path {abs_path} to local ignore list: {e_local}")
-                 log_error(str(project_root), f"Error adding path {abs_path} as relative path to local ignore list: {e_local}")
-
-    except FileNotFoundError as e_root:
-        # Error from find_project_root
-        print(f"Error: {e_root}")
-        print("Could not determine the project's root directory. Please ensure you are running this command within a project containing a '.git' folder or a '.dump_config' file.")
-        log_error(log_dir_fallback, f"Failed to find project root when adding '{file_or_dir_path}': {e_root}")
-    except ImportError:
-         # Already handled above, but catch again just in case.
-         print("Error: Core modules could not be imported.")
-         sys.exit(1)
-    except Exception as e_main:
-        # Catch any other unexpected errors
-        print(f"An unexpected error occurred: {e_main}")
-        log_dir = str(project_root) if project_root else log_dir_fallback
-        log_error(log_dir, f"Unexpected error in add_single_path_to_ignore for '{file_or_dir_path}', globally={globally}: {e_main}")
-        # Optional: Exit with error code?
-        # sys.exit(1)
+                with open(queue_path, 'r', encoding='utf-8') as queue_file:
+                    batch = read_path_list(queue_file)
+            except FileNotFoundError:
+                batch = []
+            if not batch:
+                leader_lock.release() # Under queue_lock: later writers see the lock free and take over
+                return ok
+            os.remove(queue_path)
+        ok = add_to_ignore(list(dict.fromkeys(batch)), globally=globally) and ok
 
 
-if __name__ == "__main__":
-    # Argument parsing needs refinement if multiple paths can be passed via context menu
-    # Assuming for now it's called with one path and optional --global flag
+def add_single_path_to_ignore(file_or_dir_path: str, globally: bool) -> None:
+    """
+    Adds a single file or directory path to the appropriate ignore list.
+    Kept for callers of the single-path API; see add_to_ignore().
+    """
+    add_to_ignore([file_or_dir_path], globally=globally)
 
-    args = sys.argv[1:]
-    if not args:
-        print("Usage: python add_to_ignore.py <file_or_directory> [--global]")
-        sys.exit(1)
 
-    # Determine if --global is present
-    globally = "--global" in args
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Add files or directories to the dump ignore lists.")
+    parser.add_argument("paths", nargs="*",
+                        help="Files or directories to ignore. '-' reads one path per line from stdin.")
+    parser.add_argument("--global", dest="globally", action="store_true",
+                        help="Add absolute paths to ignored_paths in .dump/.dump_config instead of .dump/.dump_ignore.")
+    parser.add_argument("--from-file", action="append", default=[], metavar="FILE",
+                        help="Read paths from FILE (one per line). Can be given several times.")
+    parser.add_argument("--collect", action="store_true",
+                        help="Queue the paths for one shared process (used by the Explorer context menu, which "
+                             "starts a process per selected item).")
+    args = parser.parse_args()
 
-    # Find the path argument (assume it's the first argument that isn't '--global')
-    path_arg = None
-    for arg in args:
-        if arg != "--global":
-            path_arg = arg
-            break
+    all_paths: List[str] = []
+    for path_arg in args.paths:
+        if path_arg == '-':
+            all_paths.extend(read_path_list(sys.stdin))
+        else:
+            all_paths.append(path_arg)
+    for list_file_path in args.from_file:
+        try:
+            with open(list_file_path, 'r', encoding='utf-8') as list_file:
+                all_paths.extend(read_path_list(list_file))
+        except OSError as e_list:
+            print(f"Error: Could not read path list {list_file_path}: {e_list}")
+            sys.exit(1)
 
-    if path_arg is None:
+    if not all_paths:
         print("Error: No file or directory path specified.")
-        print("Usage: python add_to_ignore.py <file_or_directory> [--global]")
+        parser.print_usage()
         sys.exit(1)
 
-    # Call the main function
-    add_single_path_to_ignore(path_arg, globally=globally)
-
-    # Add a small pause if run from context menu? Sometimes useful for user to see output.
-    # import time
-    # print("\nOperation finished. Closing in 3 seconds...")
-    # time.sleep(3)
\ No newline at end of file
+    if args.collect:
+        sys.exit(0 if collect_and_add(all_paths, globally=args.globally) else 1)
+    sys.exit(0 if add_to_ignore(all_paths, globally=args.globally) else 1)
@@ -0,0 +1,121 @@
+# --- START OF FILE scripts/benchmark_walker.py ---
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add project root to Python path
+project_root_script_location = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root_script_location))
+
+try:
+    from utils.file_walker import _scan_raw, walk_directory
+except ImportError as e:
+    print(f"Error: Could not import necessary modules. Ensure the script is run correctly.")
+    print(f"Details: {e}")
+    sys.exit(1)
+
+
+def build_deep_tree(root: Path, depth: int, fanout: int, files_per_dir: int) -> int:
+    """Directory tree with `fanout` subdirectories per level down to `depth`. Returns the number of directories."""
+    count = 0
+    stack = [(root, 0)]
+    while stack:
+        dir_path, level = stack.pop()
+        dir_path.mkdir(parents=True, exist_ok=True)
+        count += 1
+        for i in range(files_per_dir):
+            (dir_path / f"f{i}.py").touch()
+        if level < depth:
+            stack.extend((dir_path / f"d{i}", level + 1) for i in range(fanout))
+    return count
+
+
+def build_wide_tree(root: Path, dirs: int, files_per_dir: int) -> int:
+    """Flat tree: `dirs` sibling directories directly below the root. Returns the number of directories."""
+    root.mkdir(parents=True, exist_ok=True)
+    for i in range(dirs):
+        sub = root / f"d{i}"
+        sub.mkdir()
+        for j in range(files_per_dir):
+            (sub / f"f{j}.py").touch()
+    return dirs + 1
+
+
+def _os_walk(root: Path):
+    return [(Path(r), files) for r, _, files in os.walk(root)]
+
+
+def _timed(label: str, func, repeat: int):
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    print(f"  {label:<34} {best * 1000:9.1f} ms")
+    return result
+
+
+def run_benchmark(name: str, root: Path, workers: int, latency_ms: float, repeat: int) -> bool:
+    """Compare os.walk with walk_directory (1 and N workers). Returns True if all orders match."""
+    print(f"\n{name}: {root}")
+    reference = _timed("os.walk", lambda: _os_walk(root), repeat)
+    ok = True
+    for n in sorted({1, workers}):
+        result = _timed(f"walk_directory (workers={n})", lambda: list(walk_directory(str(root), workers=n)), repeat)
+        if result != reference:
+            print(f"  ERROR: order or content differs from os.walk (workers={n})")
+            ok = False
+
+    if latency_ms > 0:
+        # Simulated metadata latency per directory listing (NFS/SMB)
+        def slow_scan(dir_path: Path):
+            time.sleep(latency_ms / 1000.0)
+            return _scan_raw(dir_path)
+        print(f"  with {latency_ms:g} ms simulated latency per directory:")
+        for n in sorted({1, workers}):
+            result = _timed(f"walk_directory (workers={n})",
+                            lambda: list(walk_directory(str(root), workers=n, scan=slow_scan)), 1)
+            if result != reference:
+                print(f"  ERROR: order or content differs from os.walk (workers={n}, latency)")
+                ok = False
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the parallel directory walker against os.walk "
+                                                 "on synthetic deep and wide trees.")
+    parser.add_argument("--workers", type=int, default=8, help="Parallel walker threads (default 8).")
+    parser.add_argument("--depth", type=int, default=6, help="Depth of the deep tree (default 6).")
+    parser.add_argument("--fanout", type=int, default=3, help="Subdirectories per level in the deep tree (default 3).")
+    parser.add_argument("--wide", type=int, default=2000, help="Sibling directories in the wide tree (default 2000).")
+    parser.add_argument("--files", type=int, default=5, help="Files per directory (default 5).")
+    parser.add_argument("--latency-ms", type=float, default=1.0,
+                        help="Simulated per-directory latency for the slow file system run (0 disables, default 1).")
+    parser.add_argument("--repeat", type=int, default=3, help="Repetitions per measurement, best is reported.")
+    parser.add_argument("--keep", action="store_true", help="Keep the generated trees.")
+    args = parser.parse_args()
+
+    base = Path(tempfile.mkdtemp(prefix="walker_bench_"))
+    try:
+        print("Building synthetic trees...")
+        deep_dirs = build_deep_tree(base / "deep", args.depth, args.fanout, args.files)
+        wide_dirs = build_wide_tree(base / "wide", args.wide, args.files)
+        print(f"  deep: {deep_dirs} directories, wide: {wide_dirs} directories, {args.files} files each")
+
+        ok = run_benchmark("Deep tree", base / "deep", args.workers, args.latency_ms, args.repeat)
+        ok = run_benchmark("Wide tree", base / "wide", args.workers, args.latency_ms, args.repeat) and ok
+        print("\nAll walks produced the os.walk order." if ok else "\nMismatch detected!")
+        sys.exit(0 if ok else 1)
+    finally:
+        if args.keep:
+            print(f"Trees kept in {base}")
+        else:
+            shutil.rmtree(base, ignore_errors=True)
+
+# --- END OF FILE scripts/benchmark_walker.py ---
@@ -1,16 +1,44 @@
 # --- START OF FILE scripts/create_dump.py ---
+import argparse
 import os
+import re
 import sys
+from contextlib import ExitStack
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Callable, List, Optional, Tuple
 
 # Add project root to Python path
 project_root_script_location = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root_script_location))
 
 try:
-    from detectors.language_detector import detect_language
+    from detectors.language_detector import detect_language, detect_language_from_names
+    from utils.archive_source import ArchiveSource
     from utils.config_manager import ConfigManager
-    from utils.file_utils import get_relative_path
+    from utils.content_filter import ContentFilter
+    from utils.delta import DeltaResult, compute_git_delta, compute_manifest_delta
+    from utils.dump_index import DumpIndexWriter
+    from utils.dump_pipeline import (
+        AsyncDumpPipeline, DumpPipeline, DumpStats, DumpWriter, FilterStage, PathListSource, ReadStage,
+        TransformStage, WalkStage, WriteStage
+    )
+    from utils.git_source import GitObjectCache, GitRevisionSource
+    from utils.ignore_cache import IgnoreDecisionCache
+    from utils.manifest import DumpManifest
+    from utils.near_duplicates import NearDuplicateIndex
+    from utils.search_index import SearchIndex, select_within_budget
+    from utils.import_graph import ImportGraph
+    from utils.extractors import ExtractorRegistry
+    from utils.file_walker import find_ignored_ancestor, normalize_scopes, walk_directory
+    from utils.generated_files import GeneratedFileDetector
+    from utils.ordering import ORDER_MODES, OutputOrder
+    from utils.outline import Outliner
+    from utils.plan import DumpPlan, PlanSource
+    from utils.progress import ProgressReporter
+    from utils.profiles import DumpProfile, ProfileFanOutStage, ProfileSource
+    from utils.secret_scanner import SecretScanner
+    from utils.single_flight import DumpSingleFlight, dump_request_key
     # comment_utils are not directly used anymore for header generation
     # from utils.comment_utils import get_file_comment, ensure_file_comment
     from utils.error_logger import log_error
@@ -20,36 +48,714 @@ except ImportError as e:
     def log_error(directory, message): print(f"Fallback Log in {directory}: {message}")
     sys.exit(1)
 
-def create_dump(directory: str) -> None:
+def _rev_dump_filename(rev: str) -> str:
+    """Output file name for a revision or archive dump, e.g. 'v1.2/rc' -> 'dump_v1.2_rc.txt'."""
+    return f"dump_{re.sub(r'[^A-Za-z0-9._-]+', '_', rev)}.txt"
+
+def _resolve_scopes(config_manager: "ConfigManager", paths: List[str], log_dir: str) -> List[str]:
+    """
+    Turn the --path arguments into subtree scopes relative to the project root.
+    Paths outside the project or missing are fatal; paths the root's ignore
+    rules exclude (directly or via an ancestor) are reported and dropped.
+    """
+    project_dir_path = config_manager.project_dir
+    scopes = []
+    for raw in paths:
+        candidate = Path(raw) if os.path.isabs(raw) else project_dir_path / raw
+        if not candidate.exists() and Path(raw).exists():
+            candidate = Path(raw) # Relative to the current directory
+        try:
+            rel = candidate.resolve().relative_to(project_dir_path).as_posix() if candidate.exists() else None
+        except ValueError:
+            rel = None # Outside the project
+        if rel is None:
+            print(f"Fatal Error: Path '{raw}' not found in project {project_dir_path}.")
+            log_error(log_dir, f"Fatal Error: scope path '{raw}' not found")
+            sys.exit(1)
+        scopes.append('' if rel == '.' else rel)
+    scopes = normalize_scopes(scopes)
+    included = []
+    for scope in scopes:
+        ignored = find_ignored_ancestor(config_manager, scope)
+        if ignored is not None:
+            print(f"Warning: '{scope}' is excluded by the ignore rules (via '{ignored}'), skipping it.")
+            log_error(log_dir, f"Scope path '{scope}' is ignored (matched at '{ignored}')")
+            continue
+        included.append(scope)
+    if not included:
+        print("Fatal Error: All given paths are excluded by the ignore rules. Nothing to dump.")
+        log_error(log_dir, f"Fatal Error: every scope path is ignored ({paths})")
+        sys.exit(1)
+    return included
+
+def _build_plan(config_manager: "ConfigManager", scopes: Optional[List[str]], output_settings: dict, comment_prefix: str,
+                extractors, generated, ignore_cache, progress: "ProgressReporter") -> "DumpPlan":
+    """Walk with stat only (no file is read), estimate the dump and save the plan to .dump/plan.inv."""
+    plan = DumpPlan(config_manager, scopes)
+    progress.set_phase("planning", lambda: {'files_done': len(plan.inventory)})
+    plan.build(output_settings, comment_prefix, extractors=extractors, generated=generated, ignore_cache=ignore_cache,
+               workers=config_manager.get_pipeline_settings()['walk_workers'])
+    progress.stop()
+    plan.save()
+    return plan
+
+def _exceeds_ceiling(plan: "DumpPlan", plan_settings: dict) -> bool:
+    """True if [plan] max_tokens is set and the plan's estimate is above it."""
+    return bool(plan_settings['max_tokens']) and plan.estimated_tokens(plan_settings['bytes_per_token']) > plan_settings['max_tokens']
+
+def _stop_at_ceiling(plan: "DumpPlan", plan_settings: dict, log_dir: str) -> None:
+    """Print the plan summary and exit with status 2, before anything is read or written."""
+    for line in plan.report(plan_settings['bytes_per_token'], plan_settings['max_tokens']):
+        print(f"  {line}" if line else "")
+    tokens = plan.estimated_tokens(plan_settings['bytes_per_token'])
+    print(f"Fatal Error: The projected dump (~{tokens} tokens) exceeds [plan] max_tokens ({plan_settings['max_tokens']}). "
+          "Nothing was written; narrow it down with --path or the ignore rules.")
+    log_error(log_dir, f"Dump stopped: projected ~{tokens} tokens exceed plan.max_tokens {plan_settings['max_tokens']}")
+    sys.exit(2)
+
+def _run_plan(config_manager: "ConfigManager", scopes: Optional[List[str]], flight: "DumpSingleFlight",
+              progress: "ProgressReporter", log_dir: str) -> None:
+    """--plan: write dump_plan.txt and .dump/plan.inv from directory entries and stat alone."""
+    output_settings = config_manager.get_output_settings()
+    plan_settings = config_manager.get_plan_settings()
+    # No language detection walk: the header prefix of the last detection is close enough for an estimate
+    language_key = config_manager.config.get('language', {}).get('primary_language')
+    lang_settings = config_manager.get_language_settings(language_key) if language_key else None
+    comment_prefix = (lang_settings or {}).get('comment_prefix') or "#"
+    extractor_settings = config_manager.get_extractor_settings()
+    extractors = None
+    if extractor_settings['enabled']:
+        extractors = ExtractorRegistry(extractor_settings, output_settings['max_file_size'], log_dir)
+    generated_settings = config_manager.get_generated_settings()
+    generated = None
+    if generated_settings['action'] != 'off':
+        generated = GeneratedFileDetector(generated_settings, config_manager.dump_dir_path, log_dir)
+    ignore_cache = None
+    if config_manager.get_cache_settings()['ignore_decisions']:
+        ignore_cache = IgnoreDecisionCache(config_manager)
+
+    print("Planning the dump (directory entries and stat only, no file is read)...")
+    plan = _build_plan(config_manager, scopes, output_settings, comment_prefix, extractors, generated, ignore_cache, progress)
+    if ignore_cache is not None:
+        ignore_cache.save(prune_untouched=scopes is None)
+    report_path = config_manager.project_dir / "dump_plan.txt"
+    try:
+        plan.write_report(report_path, plan_settings['bytes_per_token'], plan_settings['max_tokens'])
+    except OSError as e_report:
+        print(f"Fatal Error: Could not write the plan report {report_path}: {e_report}")
+        log_error(log_dir, f"Fatal Error writing plan report {report_path}: {e_report}")
+        sys.exit(1)
+    flight.finish(True, report_path, files_planned=len(plan.inventory))
+
+    print("\nPlan finished.")
+    for line in plan.report(plan_settings['bytes_per_token'], plan_settings['max_tokens']):
+        print(f"  {line}" if line else "")
+    print(f"\n  Report with the full file list: {report_path}")
+    print(f"  Plan for 'create_dump.py --from-plan': {plan.plan_path}")
+    if _exceeds_ceiling(plan, plan_settings):
+        print(f"The projected dump exceeds [plan] max_tokens ({plan_settings['max_tokens']}).")
+        sys.exit(2)
+
+def _select_profiles(config_manager: "ConfigManager", names: List[str], project_dir_path: Path,
+                     output_settings: dict, log_dir: str) -> List["DumpProfile"]:
+    """Resolve the requested profile names (all profiles if names is empty). Exits on unknown names."""
+    configured = config_manager.get_profiles()
+    if not configured:
+        print("Fatal Error: No profiles defined. Add sections like [profiles.backend] to .dump/.dump_config.")
+        log_error(log_dir, "Fatal Error: --profile or --all-profiles used but no [profiles.<name>] sections are configured")
+        sys.exit(1)
+    unknown = [name for name in names if name not in configured]
+    if unknown:
+        print(f"Fatal Error: Unknown profile(s): {', '.join(unknown)}. Configured: {', '.join(sorted(configured))}")
+        log_error(log_dir, f"Fatal Error: unknown profile(s) {unknown}")
+        sys.exit(1)
+    selected = list(dict.fromkeys(names)) or list(configured)
+    return [DumpProfile(name, configured[name], project_dir_path, output_settings) for name in selected]
+
+def _write_profile_dumps(config_manager: "ConfigManager", pipeline: "DumpPipeline", source: "ProfileSource",
+                         dump_profiles: List["DumpProfile"], language_key: Optional[str], lang_settings: Optional[dict],
+                         log_dir: str, progress: "ProgressReporter") -> Tuple["DumpStats", "ProfileFanOutStage"]:
+    """Run the pipeline once and fan every file out to the dump (and index) of each profile that accepts it."""
+    extension_map = config_manager.get_extension_language_map()
+    with ExitStack() as stack:
+        writers = {}
+        index_writers = {}
+        transforms = {}
+        write_stages = {}
+        for profile in dump_profiles:
+            writers[profile.name] = stack.enter_context(DumpWriter(profile.dump_path))
+            if profile.output_settings['write_index']:
+                index_writers[profile.name] = DumpIndexWriter(profile.dump_path, extension_map)
+            transforms[profile.name] = TransformStage(config_manager.project_dir, profile.output_settings, language_key,
+                                                      lang_settings, log_dir)
+            write_stages[profile.name] = WriteStage(writers[profile.name], index_writer=index_writers.get(profile.name))
+        fan_out = ProfileFanOutStage(dump_profiles, transforms, write_stages)
+        stats = DumpStats()
+        progress.set_phase("writing", lambda: {'files_dumped': stats.files_dumped, 'files_done': stats.files_done,
+                                               'bytes_written': sum(w.offset for w in writers.values())})
+        pipeline.run(source, fan_out, stats)
+    # All dumps are in place; indexes refer to the committed files
+    for name, index_writer in index_writers.items():
+        index_writer.save(writers[name].offset)
+    return stats, fan_out
+
+@dataclass
+class _DumpSelection:
+    """What a dump reads and where it goes, chosen from the mode arguments before anything is read."""
+    source: object
+    dump_path: Path
+    manifest: Optional["DumpManifest"] = None # Manifest of the current working tree, saved after the dump
+    delta_result: Optional["DeltaResult"] = None
+    dump_profiles: Optional[List["DumpProfile"]] = None
+    blob_counts_before: Optional[Tuple[int, int]] = None # Revision dumps: object cache counters before the run
+
+    @property
+    def full_walk(self) -> bool:
+        """True if the source visits every file of the project (walk or plan without scopes)."""
+        return isinstance(self.source, (WalkStage, PlanSource)) and self.source.complete
+
+@dataclass
+class _DumpStages:
+    """The pipeline and the stateful stages whose caches and counters are used after the run."""
+    pipeline: "DumpPipeline"
+    transform_stage: "TransformStage"
+    content_filter: Optional["ContentFilter"] = None
+    secret_scanner: Optional["SecretScanner"] = None
+    outliner: Optional["Outliner"] = None
+    near_duplicates: Optional["NearDuplicateIndex"] = None
+    index_writer: Optional["DumpIndexWriter"] = None
+
+def _load_saved_plan(config_manager: "ConfigManager", log_dir: str) -> "DumpPlan":
+    """--from-plan: the plan saved by the last --plan run. Exits if it is missing or the rules changed."""
+    saved_plan = DumpPlan.load(config_manager)
+    if saved_plan is None:
+        print("Fatal Error: No saved plan found. Run create_dump.py with --plan first.")
+        log_error(log_dir, "Fatal Error: --from-plan used but .dump/plan.inv is missing or unreadable")
+        sys.exit(1)
+    if saved_plan.rules != config_manager.get_rules_fingerprint():
+        saved_plan.close()
+        print("Fatal Error: The ignore rules changed since the plan was made. Run --plan again.")
+        log_error(log_dir, "Fatal Error: --from-plan with a plan made under different ignore rules")
+        sys.exit(1)
+    print(f"Using the plan of {saved_plan.created}: {len(saved_plan.inventory)} files"
+          + (f" below {', '.join(scope or '.' for scope in saved_plan.scopes)}" if saved_plan.scopes is not None else ""))
+    return saved_plan
+
+def _open_archive(config_manager: "ConfigManager", archive: str, log_dir: str) -> "ArchiveSource":
+    """--archive: open the archive for reading its members in place. Exits if it cannot be read."""
+    try:
+        archive_source = ArchiveSource(config_manager, Path(archive).resolve(),
+                                       config_manager.get_output_settings()['max_file_size'])
+    except Exception as e_archive:
+        print(f"Fatal Error: Cannot read archive '{archive}': {e_archive}")
+        log_error(log_dir, f"Fatal Error opening archive '{archive}': {e_archive}")
+        sys.exit(1)
+    print(f"Reading {archive_source.total} files from archive {archive_source.archive_path.name} without extraction"
+          + (f" (top-level directory '{archive_source.prefix}' stripped)" if archive_source.prefix else ""))
+    return archive_source
+
+def _detect_dump_language(config_manager: "ConfigManager", archive_source: Optional["ArchiveSource"],
+                          saved_plan: Optional["DumpPlan"], scopes: Optional[List[str]],
+                          progress: "ProgressReporter", log_dir: str) -> Optional[str]:
+    """
+    Primary language of what is dumped. Only a detection over the whole working
+    tree (or a plan of it) is stored as the project language.
+    """
+    project_dir_path = config_manager.project_dir
+    walk_workers = config_manager.get_pipeline_settings()['walk_workers']
+    if walk_workers > 1:
+        print(f"Using parallel directory walker ({walk_workers} workers)")
+    stored_language = config_manager.config.get('language', {}).get('primary_language')
+    if archive_source is not None:
+        # The archive is not the project in 'directory'; detect from its member names, never stored
+        language_key, _detected = detect_language_from_names(archive_source.file_names())
+        print(f"Detected language of the archive: {language_key or 'none'}")
+    elif saved_plan is not None and (scopes is None or not stored_language):
+        # The plan already lists the files; no second walk
+        language_key, detected_languages = detect_language_from_names(
+            rel.rsplit('/', 1)[-1] for rel in saved_plan.inventory.paths())
+        print(f"Detected language of the planned files: {language_key or 'none'}")
+        if language_key and scopes is None:
+            config_manager.update_language_info(language_key, detected_languages)
+    elif scopes is not None and stored_language:
+        # Scoped dumps must not walk the whole tree; use the project language of the last full detection
+        language_key = stored_language
+        print(f"Primary language (from the last full detection): {language_key}")
+    elif scopes is not None:
+        # Never detected yet: detect below the scopes only, without storing it as the project language
+        progress.set_phase("detecting language")
+        scope_root = os.path.commonpath([str(project_dir_path / scope) for scope in scopes])
+        if not os.path.isdir(scope_root):
+            scope_root = os.path.dirname(scope_root)
+        language_key, _detected = detect_language(scope_root, walk=lambda d: walk_directory(d, workers=walk_workers))
+        print(f"Detected language of the selected paths: {language_key or 'none'}")
+    else:
+        print("Detecting language...")
+        progress.set_phase("detecting language")
+        language_key, detected_languages = detect_language(str(project_dir_path),
+                                                           walk=lambda d: walk_directory(d, workers=walk_workers))
+        if not language_key:
+            print("Warning: No supported primary programming language detected.")
+            log_error(log_dir, "Language detection did not identify a primary language.")
+        else:
+            print(f"Detected primary language: {language_key}")
+            config_manager.update_language_info(language_key, detected_languages)
+    return language_key
+
+def _dump_file_path(project_dir_path: Path, rev: Optional[str], archive_source: Optional["ArchiveSource"],
+                    delta_mode: bool, query: Optional[str], imports: Optional[List[str]], scopes: Optional[List[str]],
+                    content_filtered: bool, outline: bool) -> Path:
+    """Output file of a single dump (remains in the project root); the first matching mode names it."""
+    if rev is not None:
+        return project_dir_path / _rev_dump_filename(rev)
+    if archive_source is not None:
+        return project_dir_path / _rev_dump_filename(archive_source.archive_path.name)
+    if delta_mode:
+        return project_dir_path / "dump_delta.txt"
+    if query is not None:
+        return project_dir_path / "dump_query.txt"
+    if imports:
+        return project_dir_path / "dump_imports.txt"
+    if scopes is not None:
+        return project_dir_path / "dump_scope.txt"
+    if content_filtered:
+        return project_dir_path / "dump_grep.txt"
+    if outline:
+        return project_dir_path / "dump_outline.txt"
+    return project_dir_path / "dump.txt"
+
+def _delta_result(config_manager: "ConfigManager", since: Optional[str], ignore_cache: Optional["IgnoreDecisionCache"],
+                  log_dir: str) -> "DeltaResult":
+    """Changed files against a git ref (--since) or the manifest of the last dump (--delta). Exits on errors."""
+    try:
+        if since is not None:
+            print(f"Computing changes against git ref '{since}'...")
+            delta_result = compute_git_delta(config_manager, since)
+        else:
+            previous = DumpManifest.load(config_manager.dump_dir_path, config_manager.project_dir)
+            if previous is None:
+                print("Warning: No manifest from a previous dump found. All files are reported as added.")
+                previous = DumpManifest(config_manager.dump_dir_path, config_manager.project_dir)
+            print("Computing changes since the last dump...")
+            delta_result = compute_manifest_delta(config_manager, previous, ignore_cache=ignore_cache)
+    except Exception as e_delta:
+        print(f"Fatal Error: Could not determine changed files: {e_delta}")
+        log_error(log_dir, f"Fatal Error computing delta (since={since}): {e_delta}")
+        sys.exit(1)
+    print(f"Changes: {len(delta_result.added)} added, {len(delta_result.modified)} modified, {len(delta_result.deleted)} deleted")
+    return delta_result
+
+def _query_paths(config_manager: "ConfigManager", query: str, budget: Optional[int], top: Optional[int],
+                 max_file_size: int, ignore_cache: Optional["IgnoreDecisionCache"]) -> List[str]:
+    """--query: update the search index and pick the best matching files within the budget."""
+    query_settings = config_manager.get_query_settings()
+    budget_bytes = budget if budget is not None else query_settings['budget_bytes']
+    max_files = top if top is not None else query_settings['max_files']
+    print("Updating search index...")
+    search_index = SearchIndex(config_manager)
+    reindexed, removed = search_index.update(max_file_size, ignore_cache=ignore_cache)
+    search_index.save()
+    print(f"Search index: {len(search_index)} files ({reindexed} re-indexed, {removed} removed)")
+    hits = select_within_budget(search_index.search(query), budget_bytes, max_files or None)
+    print(f"Selected {len(hits)} files for query '{query}' (budget {budget_bytes} bytes):")
+    for hit in hits:
+        print(f"  {hit.score:8.3f}  {hit.rel_path} ({hit.size} bytes)")
+    return [hit.rel_path for hit in hits]
+
+def _import_closure_paths(config_manager: "ConfigManager", imports: List[str], depth: Optional[int],
+                          ignore_cache: Optional["IgnoreDecisionCache"], log_dir: str) -> List[str]:
+    """--imports: the seed files and everything they import transitively. Exits on a missing seed."""
+    project_dir_path = config_manager.project_dir
+    import_graph = ImportGraph(config_manager, ignore_cache=ignore_cache)
+    seeds = []
+    for seed in imports:
+        seed_path = Path(seed) if os.path.isabs(seed) else project_dir_path / seed
+        if not seed_path.is_file() and Path(seed).is_file():
+            seed_path = Path(seed).resolve() # Relative to the current directory
+        try:
+            seed_rel = seed_path.resolve().relative_to(project_dir_path).as_posix() if seed_path.is_file() else None
+        except ValueError:
+            seed_rel = None # Outside the project
+        if seed_rel is None:
+            print(f"Fatal Error: Seed file '{seed}' not found in project {project_dir_path}.")
+            log_error(log_dir, f"Fatal Error: import seed '{seed}' not found")
+            sys.exit(1)
+        seeds.append(seed_rel)
+    closure = import_graph.closure(seeds, max_depth=depth)
+    import_graph.save()
+    depth_note = f", depth <= {depth}" if depth is not None else ""
+    print(f"Import closure: {len(closure)} files from {len(seeds)} seed(s){depth_note} "
+          f"({import_graph.parsed} parsed, {import_graph.reused} from cache, {import_graph.unresolved} external or unresolved imports)")
+    return [rel for rel, _depth in closure]
+
+def _select_source(config_manager: "ConfigManager", dump_path: Path, output_settings: dict, comment_prefix: str,
+                   rev: Optional[str], git_object_cache: Optional["GitObjectCache"], delta_mode: bool, since: Optional[str],
+                   query: Optional[str], budget: Optional[int], top: Optional[int],
+                   imports: Optional[List[str]], depth: Optional[int], profiles: Optional[List[str]],
+                   scopes: Optional[List[str]], archive_source: Optional["ArchiveSource"], saved_plan: Optional["DumpPlan"],
+                   extractors, generated, ignore_cache: Optional["IgnoreDecisionCache"], output_order: "OutputOrder",
+                   progress: "ProgressReporter", log_dir: str) -> _DumpSelection:
+    """
+    Pick the file source for the requested mode, first match wins: delta, query,
+    imports, revision, archive, saved plan, profiles, planned walk under a token
+    ceiling, scoped walk, full walk.
+    """
+    project_dir_path = config_manager.project_dir
+    selection = _DumpSelection(source=None, dump_path=dump_path)
+    if profiles is not None:
+        selection.dump_profiles = _select_profiles(config_manager, profiles, project_dir_path, output_settings, log_dir)
+        selection.dump_path = selection.dump_profiles[0].dump_path
+        for profile in selection.dump_profiles:
+            print(f"Creating dump file for profile '{profile.name}' at: {profile.dump_path}")
+    else:
+        print(f"Creating dump file at: {dump_path}")
+
+    progress.set_phase("collecting files")
+    if delta_mode:
+        selection.delta_result = _delta_result(config_manager, since, ignore_cache, log_dir)
+        selection.manifest = selection.delta_result.manifest
+        selection.source = PathListSource([project_dir_path / rel for rel in selection.delta_result.changed], project_dir_path)
+    elif query is not None:
+        rel_paths = _query_paths(config_manager, query, budget, top, output_settings['max_file_size'], ignore_cache)
+        selection.source = PathListSource([project_dir_path / rel for rel in rel_paths], project_dir_path)
+    elif imports:
+        rel_paths = _import_closure_paths(config_manager, imports, depth, ignore_cache, log_dir)
+        selection.source = PathListSource([project_dir_path / rel for rel in rel_paths], project_dir_path)
+    elif rev is not None:
+        try:
+            source = GitRevisionSource(config_manager, rev, object_cache=git_object_cache)
+        except Exception as e_rev:
+            print(f"Fatal Error: Cannot resolve git revision '{rev}': {e_rev}")
+            log_error(log_dir, f"Fatal Error resolving git revision '{rev}': {e_rev}")
+            sys.exit(1)
+        print(f"Reading files from git revision {rev} ({source.commit.hexsha[:12]}) without checkout")
+        selection.source = source
+        selection.blob_counts_before = (source.object_cache.blob_hits, source.object_cache.blob_misses)
+    elif archive_source is not None:
+        selection.source = archive_source
+    elif saved_plan is not None:
+        plan_settings = config_manager.get_plan_settings()
+        if _exceeds_ceiling(saved_plan, plan_settings):
+            _stop_at_ceiling(saved_plan, plan_settings, log_dir)
+        selection.source = PlanSource(saved_plan, order=output_order)
+        if saved_plan.scopes is None:
+            selection.manifest = DumpManifest(config_manager.dump_dir_path, project_dir_path)
+    elif selection.dump_profiles is not None:
+        # One walk for all profiles; files no profile wants are never stat'ed or read
+        selection.source = ProfileSource(WalkStage(config_manager, ignore_cache=ignore_cache, order=output_order),
+                                         selection.dump_profiles)
+    elif config_manager.get_plan_settings()['max_tokens']:
+        # Fail fast: plan from stat alone, then dump the planned files without walking again
+        plan_settings = config_manager.get_plan_settings()
+        print(f"Planning the dump to check the ceiling of {plan_settings['max_tokens']} tokens...")
+        dump_plan = _build_plan(config_manager, scopes, output_settings, comment_prefix, extractors, generated,
+                                ignore_cache, progress)
+        print(f"Plan: {len(dump_plan.inventory)} files, ~{dump_plan.estimated_tokens(plan_settings['bytes_per_token'])} tokens")
+        if _exceeds_ceiling(dump_plan, plan_settings):
+            if ignore_cache is not None:
+                ignore_cache.save(prune_untouched=scopes is None)
+            _stop_at_ceiling(dump_plan, plan_settings, log_dir)
+        selection.source = PlanSource(dump_plan, order=output_order)
+        if scopes is None:
+            selection.manifest = DumpManifest(config_manager.dump_dir_path, project_dir_path)
+    elif scopes is not None:
+        print(f"Dumping {len(scopes)} path(s): {', '.join(scope or '.' for scope in scopes)}")
+        selection.source = WalkStage(config_manager, ignore_cache=ignore_cache, order=output_order, scopes=scopes)
+    else:
+        selection.source = WalkStage(config_manager, ignore_cache=ignore_cache, order=output_order)
+        selection.manifest = DumpManifest(config_manager.dump_dir_path, project_dir_path)
+    return selection
+
+def _build_stages(config_manager: "ConfigManager", selection: _DumpSelection, output_settings: dict,
+                  language_key: Optional[str], lang_settings: Optional[dict], extractors, generated,
+                  grep: Optional[List[str]], grep_exclude: Optional[List[str]], excerpt: bool, ignore_case: bool,
+                  outline: bool, log_dir: str) -> _DumpStages:
+    """Stages: filter (size) -> read/decode -> transform (secrets, outline, header) -> write, and the pipeline running them."""
+    # Only a full walk produces a complete manifest; delta mode saves its own
+    filter_stage = FilterStage(output_settings, log_dir, manifest=selection.manifest if selection.full_walk else None,
+                               extractors=extractors)
+    # Only files whose raw content matches --grep (and not --grep-exclude), scanned before decoding
+    content_filter = None
+    if grep or grep_exclude:
+        filter_settings = config_manager.get_content_filter_settings()
+        filter_settings['ignore_case'] = filter_settings['ignore_case'] or ignore_case
+        try:
+            content_filter = ContentFilter(grep or [], grep_exclude or [], filter_settings, excerpt=excerpt)
+        except ValueError as e_pattern:
+            print(f"Fatal Error: {e_pattern}")
+            log_error(log_dir, f"Fatal Error: {e_pattern}")
+            sys.exit(1)
+    read_stage = ReadStage(generated, content_filter=content_filter)
+    # Redact (or drop) secrets before anything leaves the machine
+    secret_settings = config_manager.get_secret_settings()
+    secret_scanner = None
+    if secret_settings['action'] != 'off':
+        secret_scanner = SecretScanner(secret_settings, config_manager.dump_dir_path, log_dir)
+    # Signatures instead of bodies, for all files (--outline, [outline] enabled) or matching patterns
+    outline_settings = config_manager.get_outline_settings()
+    outline_settings['enabled'] = outline_settings['enabled'] or outline
+    outliner = None
+    if outline_settings['enabled'] or outline_settings['patterns']:
+        outliner = Outliner(outline_settings, config_manager.dump_dir_path, log_dir)
+    # Near-identical files (migrations, DTOs, fixtures) as diffs against the first one; not per profile
+    near_settings = config_manager.get_near_duplicate_settings()
+    near_duplicates = None
+    if near_settings['enabled'] and selection.dump_profiles is None:
+        near_duplicates = NearDuplicateIndex(near_settings, log_dir)
+    transform_stage = TransformStage(config_manager.project_dir, output_settings, language_key, lang_settings, log_dir,
+                                     secret_scanner=secret_scanner, outliner=outliner, near_duplicates=near_duplicates)
+    pipeline_settings = config_manager.get_pipeline_settings()
+    if pipeline_settings['mode'] == 'async':
+        print(f"Using async pipeline (queue_size={pipeline_settings['queue_size']}, read_workers={pipeline_settings['read_workers']})")
+        pipeline = AsyncDumpPipeline(filter_stage, read_stage, transform_stage, log_dir,
+                                     queue_size=pipeline_settings['queue_size'],
+                                     filter_workers=pipeline_settings['filter_workers'],
+                                     read_workers=pipeline_settings['read_workers'])
+    else:
+        pipeline = DumpPipeline(filter_stage, read_stage, transform_stage, log_dir)
+
+    # Sidecar index (<dump>.idx) for random access to single files
+    index_writer = None
+    if output_settings['write_index'] and selection.dump_profiles is None:
+        index_writer = DumpIndexWriter(selection.dump_path, config_manager.get_extension_language_map())
+    return _DumpStages(pipeline, transform_stage, content_filter=content_filter, secret_scanner=secret_scanner,
+                       outliner=outliner, near_duplicates=near_duplicates, index_writer=index_writer)
+
+def _expected_files(config_manager: "ConfigManager", source) -> Optional[Callable[[], Optional[int]]]:
+    """Expected number of files for the ETA: exact for file lists and ordered walks, else from the last manifest."""
+    if isinstance(source, PathListSource):
+        return lambda: len(source.paths)
+    if isinstance(source, PlanSource):
+        return lambda: source.total
+    if isinstance(source, ArchiveSource):
+        return lambda: source.total - source.members_ignored
+    if isinstance(source, WalkStage):
+        previous_manifest = DumpManifest.load(config_manager.dump_dir_path, config_manager.project_dir)
+        previous_count = len(previous_manifest.files) if previous_manifest is not None else None
+        if previous_manifest is not None and source.scopes is not None:
+            previous_count = sum(1 for rel in previous_manifest.files
+                                 if any(not scope or rel == scope or rel.startswith(scope + '/') for scope in source.scopes))
+        if previous_manifest is not None:
+            previous_manifest.close() # Mapped; this dump saves a new manifest over it
+        return lambda: source.total or previous_count
+    return None
+
+def _write_dump(config_manager: "ConfigManager", selection: _DumpSelection, stages: _DumpStages,
+                language_key: Optional[str], lang_settings: Optional[dict], progress: "ProgressReporter",
+                log_dir: str) -> Tuple["DumpStats", Optional["DumpWriter"], Optional["ProfileFanOutStage"]]:
+    """Run the pipeline into the dump file (or the profile dumps). Returns the stats and the writer or fan-out stage."""
+    dump_path = selection.dump_path
+    try:
+        if selection.dump_profiles is not None:
+            stats, fan_out = _write_profile_dumps(config_manager, stages.pipeline, selection.source, selection.dump_profiles,
+                                                  language_key, lang_settings, log_dir, progress)
+            return stats, None, fan_out
+        expected_files = _expected_files(config_manager, selection.source)
+        with DumpWriter(dump_path) as dump_file:
+            prefix = stages.transform_stage.comment_prefix
+            if selection.delta_result is not None:
+                selection.delta_result.write_header(dump_file, prefix)
+            stats = DumpStats()
+            progress.set_phase("writing", lambda: {'files_dumped': stats.files_dumped, 'files_done': stats.files_done,
+                                                   'bytes_written': dump_file.offset}, expected_files)
+            stages.pipeline.run(selection.source, WriteStage(dump_file, index_writer=stages.index_writer,
+                                                             near_duplicates=stages.near_duplicates), stats)
+            if selection.delta_result is not None:
+                selection.delta_result.write_deleted(dump_file, prefix)
+        if stages.index_writer is not None:
+            stages.index_writer.save(dump_file.offset)
+        return stats, dump_file, None
+    except IOError as e_dump:
+        progress.stop()
+        print(f"Fatal Error: Could not write to dump file {dump_path}: {e_dump}")
+        log_error(log_dir, f"Fatal Error writing to dump file {dump_path}: {e_dump}")
+        sys.exit(1)
+    finally:
+        progress.stop()
+
+def _print_summary(config_manager: "ConfigManager", stats: "DumpStats", selection: _DumpSelection, stages: _DumpStages,
+                   dump_file: Optional["DumpWriter"], fan_out: Optional["ProfileFanOutStage"],
+                   ignore_cache: Optional["IgnoreDecisionCache"], generated, output_order: "OutputOrder") -> None:
+    """Print the counters of a finished dump and where its files are."""
+    source = selection.source
+    print(f"\nDump creation finished.")
+    print(f"  Processed: {stats.files_processed} files found (after ignore rules)")
+    if ignore_cache is not None:
+        print(f"  Ignore cache: {ignore_cache.hits} directories replayed, {ignore_cache.misses} scanned")
+    if selection.blob_counts_before is not None:
+        blob_hits = source.object_cache.blob_hits - selection.blob_counts_before[0]
+        blob_reads = source.object_cache.blob_misses - selection.blob_counts_before[1]
+        print(f"  Blob cache: {blob_hits} hits, {blob_reads} reads from object database")
+    if isinstance(source, ArchiveSource):
+        print(f"  Archive: {source.total} files, {source.members_ignored} excluded by the ignore rules"
+              + (f", {source.members_skipped} links or unsafe paths skipped" if source.members_skipped else ""))
+    print(f"  Included in dump: {stats.files_dumped} files")
+    if stats.files_skipped_large:
+        print(f"  Skipped (larger than max_file_size): {stats.files_skipped_large} files")
+    if stats.files_truncated:
+        print(f"  Truncated by size policy: {stats.files_truncated} files")
+    if stats.files_generated:
+        reasons = ", ".join(f"{reason}: {count}" for reason, count in sorted(stats.generated_reasons.items()))
+        verb = "Skipped" if generated.action == 'skip' else "Summarized"
+        print(f"  {verb} (generated/minified/vendored): {stats.files_generated} files ({reasons})")
+    if stats.files_dropped_secrets:
+        print(f"  Skipped (contain secrets): {stats.files_dropped_secrets} files")
+    if stages.content_filter is not None:
+        print(f"  Content filter: {stats.files_no_match} files without a match, {stats.files_binary} binary files skipped"
+              + (f", {stats.files_excerpted} files as excerpts" if stages.content_filter.excerpt_mode else ""))
+    if stats.files_failed:
+        print(f"  Failed: {stats.files_failed} files (see dump_error.log)")
+    if isinstance(source, (WalkStage, PlanSource)) and output_order.mode != 'walk':
+        print(f"  Order: {output_order.basis}")
+    if dump_file is not None and dump_file.common_prefix is not None:
+        share = dump_file.common_prefix * 100 // max(1, dump_file.offset)
+        print(f"  Identical prefix with the previous dump: {dump_file.common_prefix} of {dump_file.offset} bytes ({share}%)")
+    if stats.files_extracted:
+        print(f"  Extracted (notebooks, data files): {stats.files_extracted} files")
+    if stages.secret_scanner is not None:
+        print(f"  Secret scan: {stages.secret_scanner.files_scanned} files scanned, {stages.secret_scanner.files_cached} known clean")
+        stages.secret_scanner.print_report()
+    near_duplicates = stages.near_duplicates
+    if near_duplicates is not None and near_duplicates.files_collapsed:
+        verb = "diffs against" if near_duplicates.mode == 'diff' else "references to"
+        print(f"  Near-duplicates: {near_duplicates.files_collapsed} files written as {verb} a similar file "
+              f"({near_duplicates.bytes_saved} characters saved)")
+    outliner = stages.outliner
+    if outliner is not None:
+        print(f"  Outline: {outliner.files_outlined} files ({outliner.cached} from cache), "
+              f"{outliner.bytes_in} -> {outliner.bytes_out} characters")
+    if fan_out is not None:
+        for profile in selection.dump_profiles:
+            print(f"  Profile '{profile.name}': {fan_out.stats[profile.name].files_dumped} files -> {profile.dump_path}")
+    else:
+        print(f"  Dump file location: {selection.dump_path}")
+    if stages.index_writer is not None:
+        print(f"  Index file location: {stages.index_writer.index_path}")
+
+    # Check if errors were logged in the new location
+    error_log_path = config_manager.project_dir / ConfigManager.DUMP_SUBDIR / "dump_error.log"
+    if error_log_path.exists():
+         print(f"  NOTE: Errors occurred during the process. See {error_log_path} for details.")
+
+def create_dump(directory: str, rev: Optional[str] = None, git_object_cache: Optional["GitObjectCache"] = None,
+                delta: bool = False, since: Optional[str] = None,
+                query: Optional[str] = None, budget: Optional[int] = None, top: Optional[int] = None,
+                imports: Optional[List[str]] = None, depth: Optional[int] = None,
+                profiles: Optional[List[str]] = None, outline: bool = False, order: Optional[str] = None,
+                paths: Optional[List[str]] = None, archive: Optional[str] = None,
+                plan: bool = False, from_plan: bool = False,
+                grep: Optional[List[str]] = None, grep_exclude: Optional[List[str]] = None,
+                excerpt: bool = False, ignore_case: bool = False) -> None:
     """
     Create a dump.txt file containing relevant code files from the directory.
     Assumes 'directory' is the root of the project. Generated config/log files
     will be placed inside a '.dump' subdirectory within this root.
+
+    Args:
+        directory: The project root directory.
+        rev: Optional git commit-ish. If given, the files are read from that revision's
+             tree object (no checkout) and written to dump_<rev>.txt.
+        git_object_cache: Optional GitObjectCache shared between several revision dumps.
+        delta: Only dump files added or modified since the last dump (manifest comparison)
+               and list deleted files. Written to dump_delta.txt.
+        since: Like delta, but compared against a git ref (git diff --name-status <ref>).
+        query: Only dump the files most relevant to this query (BM25 over a persistent
+               local index), best first, within a byte budget. Written to dump_query.txt.
+        budget: Byte budget for query mode (default [query] budget_bytes).
+        top: Maximum number of files in query mode (default [query] max_files, 0 = no limit).
+        imports: Seed files (relative to the project root or absolute). Only the seeds and
+                 the files they transitively import are dumped, into dump_imports.txt.
+        depth: Maximum import depth from the seeds in imports mode (None = unlimited).
+        profiles: Names of [profiles.<name>] sections to dump in one walk, each into
+                  dump_<name>.txt. An empty list selects all profiles; None disables profiles.
+        outline: Dump signatures instead of full bodies for all supported files (Python,
+                 JS/TS, Java), like [outline] enabled. A full dump goes to dump_outline.txt.
+        order: File order of walked dumps ('walk', 'sorted', 'stability'), default [output] order.
+        paths: Sub-paths (directories or files, relative to the project root or absolute) to
+               dump instead of the whole project, with the root's ignore rules. Only these
+               subtrees are walked. Written to dump_scope.txt.
+        archive: Path of a zip or tar archive (.tar.gz, .tgz, .tar.bz2, .tar.xz) to dump
+                 instead of the working tree, without extracting it. The rules of the project
+                 in 'directory' apply to the member paths. Written to dump_<archive name>.txt.
+        plan: Only plan the dump (combines with paths): walk and apply the ignore rules using
+              directory entries and stat alone, write a report to dump_plan.txt and the plan to
+              .dump/plan.inv. Exits with status 2 if the estimate exceeds [plan] max_tokens.
+        from_plan: Dump exactly the files of the last saved plan (no walk, no ignore evaluation),
+                   into dump.txt or, for a plan of some paths, dump_scope.txt.
+        grep: Content patterns (literals, or regexes as 're:<regex>'); only files matching one
+              of them are dumped. Combines with the modes above; a full dump goes to dump_grep.txt.
+        grep_exclude: Content patterns; files matching any of them are left out.
+        excerpt: Emit only the matching line ranges of each file plus [content_filter] context_lines.
+        ignore_case: Match the content patterns case-insensitively, like [content_filter] ignore_case.
     """
     project_dir_path = Path(directory).resolve()
+
+    # Single-flight: only one dump per project runs at a time. A concurrent request
+    # with identical parameters and configuration waits for it and reuses its result.
+    request_key = dump_request_key(project_dir_path, rev=rev, delta=delta, since=since,
+                                   query=query, budget=budget, top=top, imports=imports, depth=depth,
+                                   profiles=profiles, outline=outline, order=order, paths=paths,
+                                   archive=str(Path(archive).resolve()) if archive else None,
+                                   plan=plan, from_plan=from_plan, grep=grep, grep_exclude=grep_exclude,
+                                   excerpt=excerpt, ignore_case=ignore_case)
+    flight = DumpSingleFlight(project_dir_path / ConfigManager.DUMP_SUBDIR, request_key)
+    try:
+        reused = flight.acquire_or_wait()
+    except OSError as e_lock:
+        print(f"Fatal Error: Could not acquire the dump lock in {flight.dump_dir_path}: {e_lock}")
+        log_error(str(project_dir_path), f"Fatal Error acquiring dump lock: {e_lock}")
+        sys.exit(1)
+    if reused is not None:
+        print(f"Reusing the result of the identical dump that just finished (PID {reused.get('pid')}).")
+        print(f"  Dump file location: {reused.get('dump_path')}")
+        return
+
+    try:
+        _create_dump(project_dir_path, flight, directory, rev=rev, git_object_cache=git_object_cache,
+                     delta=delta, since=since, query=query, budget=budget, top=top, imports=imports, depth=depth,
+                     profiles=profiles, outline=outline, order=order, paths=paths, archive=archive,
+                     plan=plan, from_plan=from_plan, grep=grep, grep_exclude=grep_exclude,
+                     excerpt=excerpt, ignore_case=ignore_case)
+    finally:
+        flight.release()
+
+def _create_dump(project_dir_path: Path, flight: "DumpSingleFlight", directory: str, rev: Optional[str] = None,
+                 git_object_cache: Optional["GitObjectCache"] = None, delta: bool = False, since: Optional[str] = None,
+                 query: Optional[str] = None, budget: Optional[int] = None, top: Optional[int] = None,
+                 imports: Optional[List[str]] = None, depth: Optional[int] = None,
+                 profiles: Optional[List[str]] = None, outline: bool = False, order: Optional[str] = None,
+                 paths: Optional[List[str]] = None, archive: Optional[str] = None,
+                 plan: bool = False, from_plan: bool = False,
+                 grep: Optional[List[str]] = None, grep_exclude: Optional[List[str]] = None,
+                 excerpt: bool = False, ignore_case: bool = False) -> None:
+    """Body of create_dump(), run while holding the project's dump lock."""
     log_dir = str(project_dir_path) # Base directory for logging context
+    progress = ProgressReporter(flight)
 
     try:
         # Initialize config manager (will handle .dump subdirectory internally)
         print(f"Initializing ConfigManager for project root: {project_dir_path}")
         config_manager = ConfigManager(str(project_dir_path))
-
     except Exception as e_cfg_init:
         print(f"Fatal Error: Failed to initialize ConfigManager for directory '{directory}'. Cannot proceed.")
         # Use log_dir which is project_dir_path here, as config_manager might not be fully initialized
         log_error(log_dir, f"Fatal Error initializing ConfigManager: {e_cfg_init}")
         sys.exit(1)
 
+    archive_source = None
+    saved_plan = None
     try:
-        # Detect language
-        print("Detecting language...")
-        language_key, detected_languages = detect_language(str(project_dir_path))
-        if not language_key:
-            print("Warning: No supported primary programming language detected.")
-            log_error(log_dir, "Language detection did not identify a primary language.")
-        else:
-            print(f"Detected primary language: {language_key}")
-            config_manager.update_language_info(language_key, detected_languages)
+        scopes = _resolve_scopes(config_manager, paths, log_dir) if paths else None
+        if plan:
+            _run_plan(config_manager, scopes, flight, progress, log_dir)
+            return
+        if from_plan:
+            saved_plan = _load_saved_plan(config_manager, log_dir)
+            scopes = saved_plan.scopes
+        if archive is not None:
+            archive_source = _open_archive(config_manager, archive, log_dir)
+
+        language_key = _detect_dump_language(config_manager, archive_source, saved_plan, scopes, progress, log_dir)
 
         # Clean global ignore list
         print("Cleaning global ignore list (removing non-existent paths)...")
@@ -63,146 +769,167 @@ def create_dump(directory: str) -> None:
         if not output_settings['include_line_numbers']:
              print("Line numbers will not be included in the dump.")
 
-        # Dump file path (remains in the project root)
-        dump_path = project_dir_path / "dump.txt"
-        print(f"Creating dump file at: {dump_path}")
+        # Persistent per-directory ignore decisions (.dump/ignore_cache.json), working tree only
+        ignore_cache = None
+        if rev is None and archive_source is None and config_manager.get_cache_settings()['ignore_decisions']:
+            ignore_cache = IgnoreDecisionCache(config_manager)
+        # Deterministic file order for walked dumps (stable prefixes for prompt caching)
+        output_order = OutputOrder(order or output_settings['order'], config_manager, log_dir)
+        # Notebooks and data files are reduced to what is worth reading (cells, schema and first rows)
+        extractor_settings = config_manager.get_extractor_settings()
+        extractors = None
+        if extractor_settings['enabled']:
+            extractors = ExtractorRegistry(extractor_settings, output_settings['max_file_size'], log_dir)
+        # Generated, minified and vendored files are skipped or replaced by a one-line summary
+        generated_settings = config_manager.get_generated_settings()
+        generated = None
+        if generated_settings['action'] != 'off':
+            generated = GeneratedFileDetector(generated_settings, config_manager.dump_dir_path, log_dir)
 
         # --- File Collection and Writing ---
-        total_files_processed = 0
-        total_files_dumped = 0
-        try:
-            with open(dump_path, "w", encoding="utf-8") as dump_file:
-                # Walk through the project directory
-                for root, dirs, files in os.walk(str(project_dir_path)):
-                    current_root_path = Path(root).resolve()
-
-                    # Filter ignored directories before recursing
-                    original_dirs = dirs[:]
-                    dirs[:] = []
-                    for d in original_dirs:
-                        dir_path_abs = current_root_path / d
-                        if not config_manager.is_ignored(str(dir_path_abs)):
-                             dirs.append(d)
-                        # else: print(f"Ignoring directory: {dir_path_abs}") # Optional
-
-                    # Process files in the current directory
-                    for file in files:
-                        total_files_processed += 1
-                        file_path_abs = current_root_path / file
-                        file_path_str = str(file_path_abs)
-
-                        # 1. Skip ignored files/dirs based on ConfigManager rules
-                        if config_manager.is_ignored(file_path_str):
-                            continue
-
-                        # 2. Skip if language detected and file doesn't match extensions
-                        # ----- START OF MODIFICATION -----
-                        # We DON'T filter by extension anymore based on detected language.
-                        # Language detection is primarily used for setting the correct comment prefix in headers.
-                        # File exclusion should be managed solely by the ignore rules handled by ConfigManager.
-                        # if lang_settings and 'extensions' in lang_settings:
-                        #     if not any(file.lower().endswith(ext.lower()) for ext in lang_settings['extensions']):
-                        #         continue
-                        # elif language_key and not lang_settings:
-                        #     # Language detected, but no settings found - don't filter by extension
-                        #     log_error(log_dir, f"Language '{language_key}' detected but settings missing, not filtering by extension.")
-                        #     pass # Proceed without extension filtering
-                        # ----- END OF MODIFICATION -----
-
-                        try:
-                            # 3. Check file size
-                            file_size = file_path_abs.stat().st_size
-                            if file_size > output_settings['max_file_size']:
-                                print(f"Skipping file (too large: {file_size} bytes > {output_settings['max_file_size']}): {file_path_str}")
-                                log_error(log_dir, f"Skipped large file {file_path_str} ({file_size} bytes)")
-                                continue
-
-                            # 4. Read file content
-                            with open(file_path_abs, "r", encoding="utf-8") as source_file:
-                                content = source_file.read()
-
-                            # 5. Generate file header (if enabled)
-                            header = ""
-                            if output_settings['include_file_headers']:
-                                try:
-                                    rel_path_for_header = get_relative_path(str(project_dir_path), file_path_str).replace('\\', '/')
-
-                                    # Determine comment prefix based on detected language
-                                    comment_prefix = "#" # Default comment prefix
-                                    if lang_settings and lang_settings.get('comment_prefix'):
-                                        comment_prefix = lang_settings['comment_prefix']
-                                    elif language_key:
-                                        # If language was detected but settings (incl. comment_prefix) are missing
-                                        log_error(log_dir, f"Comment prefix missing for language '{language_key}', using default '#'.")
-                                    # If no language was detected (language_key is None), default '#' is used.
-
-                                    header = f"{comment_prefix} FILE: {rel_path_for_header}\n\n"
-
-                                except ValueError as e_relpath:
-                                     print(f"Warning: Could not get relative path for file header: {file_path_str}. Error: {e_relpath}")
-                                     log_error(log_dir, f"Failed to get relative path for header for {file_path_str}: {e_relpath}")
-                                     header = f"# FILE: {file_path_abs.name} (error getting relative path)\n\n" # Fallback header
-                                except Exception as e_header:
-                                     print(f"Warning: Could not generate header for file: {file_path_str}. Error: {e_header}")
-                                     log_error(log_dir, f"Failed to generate header for {file_path_str}: {e_header}")
-                                     header = f"# FILE: {file_path_abs.name} (error generating header)\n\n" # Fallback header
-
-                            # 6. Combine header and content (No line numbers logic here anymore, as per config default/value)
-                            processed_content = f"{header}{content}"
-
-                            # 7. Write to dump file
-                            dump_file.write(processed_content)
-                            dump_file.write("\n\n---\n\n") # File separator
-                            total_files_dumped += 1
-
-                        except OSError as e_os:
-                             print(f"Error processing file {file_path_str} (OS Error): {e_os}")
-                             log_error(log_dir, f"OS Error processing file {file_path_str}: {e_os}")
-                        except UnicodeDecodeError as e_unicode:
-                             print(f"Error processing file {file_path_str} (Encoding Error): Likely not UTF-8. Skipping.")
-                             log_error(log_dir, f"Encoding Error (not UTF-8?) processing file {file_path_str}: {e_unicode}")
-                        except Exception as e_file:
-                            print(f"Error processing file {file_path_str}: {e_file}")
-                            log_error(log_dir, f"Failed processing file {file_path_str}: {e_file}")
-
-        except IOError as e_dump:
-            print(f"Fatal Error: Could not write to dump file {dump_path}: {e_dump}")
-            log_error(log_dir, f"Fatal Error writing to dump file {dump_path}: {e_dump}")
-            sys.exit(1)
+        delta_mode = delta or since is not None
+        dump_path = _dump_file_path(project_dir_path, rev, archive_source, delta_mode, query, imports, scopes,
+                                    bool(grep or grep_exclude), outline)
+        selection = _select_source(config_manager, dump_path, output_settings,
+                                   (lang_settings or {}).get('comment_prefix') or "#",
+                                   rev, git_object_cache, delta_mode, since, query, budget, top, imports, depth, profiles,
+                                   scopes, archive_source, saved_plan, extractors, generated, ignore_cache, output_order,
+                                   progress, log_dir)
+        stages = _build_stages(config_manager, selection, output_settings, language_key, lang_settings, extractors,
+                               generated, grep, grep_exclude, excerpt, ignore_case, outline, log_dir)
+        stats, dump_file, fan_out = _write_dump(config_manager, selection, stages, language_key, lang_settings,
+                                                progress, log_dir)
+
+        if ignore_cache is not None:
+            # A git delta or a saved plan does not walk the tree, so unvisited entries are still valid
+            ignore_cache.save(prune_untouched=since is None and scopes is None and saved_plan is None)
+        if selection.manifest is not None:
+            selection.manifest.save()
+        # Files left out by the content filter never reach these caches; keep their entries
+        all_read = selection.full_walk and stages.content_filter is None
+        if stages.secret_scanner is not None:
+            stages.secret_scanner.save(prune_unseen=all_read)
+        if stages.outliner is not None:
+            stages.outliner.save(prune_unseen=all_read)
+        if generated is not None:
+            generated.save(prune_unseen=all_read)
 
         # Update last dump time
         config_manager.update_last_dump_time()
+        flight.finish(True, selection.dump_path, files_dumped=stats.files_dumped)
 
-        print(f"\nDump creation finished.")
-        print(f"  Processed: {total_files_processed} files found")
-        print(f"  Included in dump: {total_files_dumped} files")
-        print(f"  Dump file location: {dump_path}")
-
-        # Check if errors were logged in the new location
-        error_log_path = project_dir_path / ConfigManager.DUMP_SUBDIR / "dump_error.log"
-        if error_log_path.exists():
-             print(f"  NOTE: Errors occurred during the process. See {error_log_path} for details.")
-
+        _print_summary(config_manager, stats, selection, stages, dump_file, fan_out, ignore_cache, generated, output_order)
 
+    except KeyboardInterrupt:
+        # The dump is written to a temp file that DumpWriter removed; the previous dump stays intact
+        progress.stop()
+        print("\nDump cancelled. The previous dump file (if any) is unchanged, the partial output was discarded.")
+        log_error(log_dir, "Dump cancelled by the user (KeyboardInterrupt)")
+        sys.exit(130)
     except Exception as e_main:
+        progress.stop()
         print(f"An unexpected error occurred during dump creation: {e_main}")
         # Use log_dir, as config_manager might not be fully available if error happened early
         log_error(log_dir, f"Unexpected error in create_dump for directory '{directory}': {e_main}")
         sys.exit(1)
+    finally:
+        if archive_source is not None:
+            archive_source.close()
+        if saved_plan is not None:
+            saved_plan.close()
 
 
 if __name__ == "__main__":
-    if len(sys.argv) != 2:
-        print("Usage: python create_dump.py <directory>")
-        print("  <directory>: The root directory of the project to dump.")
-        sys.exit(1)
-
-    target_directory = sys.argv[1]
+    parser = argparse.ArgumentParser(description="Create a dump.txt of a project for AI analysis.")
+    parser.add_argument("directory", help="The root directory of the project to dump.")
+    mode_group = parser.add_mutually_exclusive_group()
+    mode_group.add_argument("--rev", action="append", metavar="COMMIT-ISH",
+                            help="Dump a git revision (branch, tag, commit) straight from the object database "
+                                 "into dump_<rev>.txt. Can be given several times; unchanged blobs are read only once.")
+    mode_group.add_argument("--archive", action="append", metavar="FILE",
+                            help="Dump a .zip/.tar(.gz/.bz2/.xz) archive without extracting it into dump_<archive>.txt, "
+                                 "with the ignore rules of the project directory. Can be given several times.")
+    mode_group.add_argument("--delta", action="store_true",
+                            help="Only dump files added or modified since the last dump and list deleted files "
+                                 "(dump_delta.txt).")
+    mode_group.add_argument("--since", metavar="REF",
+                            help="Like --delta, but compare the working tree with a git ref (git diff --name-status).")
+    mode_group.add_argument("--query", metavar="TEXT",
+                            help="Only dump the files most relevant to TEXT (BM25, local index in .dump/), "
+                                 "best first, into dump_query.txt.")
+    mode_group.add_argument("--imports", action="append", metavar="FILE",
+                            help="Dump FILE and everything it transitively imports (Python, JS/TS, Java) "
+                                 "into dump_imports.txt. Can be given several times.")
+    mode_group.add_argument("--path", action="append", dest="paths", metavar="PATH",
+                            help="Only dump this directory or file (relative to the project root or absolute) with the "
+                                 "root's ignore rules, into dump_scope.txt. Only these subtrees are walked. "
+                                 "Can be given several times.")
+    mode_group.add_argument("--profile", action="append", dest="profile_names", metavar="NAME",
+                            help="Dump the [profiles.NAME] section of .dump_config into dump_NAME.txt. Can be given "
+                                 "several times; all named profiles share one walk and every file is read at most once.")
+    mode_group.add_argument("--all-profiles", action="store_true",
+                            help="Like --profile for every [profiles.<name>] section of .dump_config.")
+    mode_group.add_argument("--from-plan", action="store_true",
+                            help="Dump exactly the files of the last --plan (no walk, no ignore evaluation), "
+                                 "into dump.txt or dump_scope.txt.")
+    parser.add_argument("--plan", action="store_true",
+                        help="Only plan the dump from directory entries and stat (no file is read): report files, "
+                             "bytes and estimated tokens by extension and directory, the largest files and the rules "
+                             "that excluded the most into dump_plan.txt. Combines with --path. Exits with status 2 "
+                             "if the estimate exceeds [plan] max_tokens.")
+    parser.add_argument("--outline", action="store_true",
+                        help="Dump imports, signatures and the first docstring line instead of full bodies "
+                             "(Python, JS/TS, Java). Combines with the modes above; a full dump goes to dump_outline.txt.")
+    parser.add_argument("--grep", action="append", metavar="PATTERN",
+                        help="Only dump files whose content contains PATTERN (repeatable, any of them matches). "
+                             "PATTERN is a literal, or a regular expression if written as 're:<regex>'. Combines with "
+                             "the modes above; a full dump goes to dump_grep.txt.")
+    parser.add_argument("--grep-exclude", action="append", metavar="PATTERN",
+                        help="Leave out files whose content contains PATTERN (repeatable, same syntax as --grep).")
+    parser.add_argument("--excerpt", action="store_true",
+                        help="With --grep: write only the matching line ranges of each file plus "
+                             "[content_filter] context_lines of context.")
+    parser.add_argument("--ignore-case", action="store_true",
+                        help="Match --grep and --grep-exclude patterns case-insensitively (ASCII letters).")
+    parser.add_argument("--order", choices=ORDER_MODES,
+                        help="File order of the dump: walk (filesystem order), sorted (by path) or stability "
+                             "(rarely changed files first, for prompt caching). Default: [output] order.")
+    parser.add_argument("--depth", type=int, metavar="N", help="Maximum import depth for --imports.")
+    parser.add_argument("--budget", type=int, metavar="BYTES", help="Byte budget for --query.")
+    parser.add_argument("--top", type=int, metavar="N", help="Maximum number of files for --query (0 = no limit).")
+    args = parser.parse_args()
+    # Option values only, so a profile list can never swallow the positional directory
+    args.profiles = [] if args.all_profiles else args.profile_names
+    if args.plan and any(value is not None and value is not False for value in
+                         (args.rev, args.archive, args.delta, args.since, args.query, args.imports, args.profiles,
+                          args.from_plan, args.grep, args.grep_exclude)):
+        parser.error("--plan only combines with --path")
+    if args.excerpt and not args.grep:
+        parser.error("--excerpt needs --grep")
+    if args.ignore_case and not (args.grep or args.grep_exclude):
+        parser.error("--ignore-case needs --grep or --grep-exclude")
+    content_args = dict(grep=args.grep, grep_exclude=args.grep_exclude, excerpt=args.excerpt, ignore_case=args.ignore_case)
+
+    target_directory = args.directory
 
     if not os.path.isdir(target_directory):
          print(f"Error: Provided path '{target_directory}' is not a valid directory.")
          sys.exit(1)
 
-    create_dump(target_directory)
+    if args.rev:
+        shared_git_cache = GitObjectCache()
+        for revision in args.rev:
+            create_dump(target_directory, rev=revision, git_object_cache=shared_git_cache, outline=args.outline,
+                        order=args.order, **content_args)
+    elif args.plan:
+        create_dump(target_directory, paths=args.paths, plan=True)
+    elif args.archive:
+        for archive_file in args.archive:
+            create_dump(target_directory, archive=archive_file, outline=args.outline, **content_args)
+    else:
+        create_dump(target_directory, delta=args.delta, since=args.since,
+                    query=args.query, budget=args.budget, top=args.top,
+                    imports=args.imports, depth=args.depth, profiles=args.profiles, outline=args.outline,
+                    order=args.order, paths=args.paths, from_plan=args.from_plan, **content_args)
 
 # --- END OF FILE scripts/create_dump.py ---
\ No newline at end of file
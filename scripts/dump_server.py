@@ -0,0 +1,59 @@
+# --- START OF FILE scripts/dump_server.py ---
+import argparse
+import os
+import sys
+from pathlib import Path
+
+# Add project root to Python path
+project_root_script_location = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root_script_location))
+
+try:
+    from utils.dump_server import make_server
+except ImportError as e:
+    print(f"Error: Could not import necessary modules. Ensure the script is run correctly.")
+    print(f"Details: {e}")
+    sys.exit(1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve dumps of local projects over HTTP, keeping configuration, "
+                                                 "ignore decisions and file contents warm between requests.")
+    parser.add_argument("--project", action="append", required=True, metavar="DIR",
+                        help="Project to serve (loaded at startup). Can be given several times; the first one is the "
+                             "default for requests without a 'project' parameter. No other directory is served.")
+    parser.add_argument("--host", default="127.0.0.1",
+                        help="Address to listen on (default 127.0.0.1). A non-local address needs --token.")
+    parser.add_argument("--token", default=os.environ.get("DUMP_SERVER_TOKEN"),
+                        help="Require 'Authorization: Bearer <token>' on every request "
+                             "(default: environment variable DUMP_SERVER_TOKEN).")
+    parser.add_argument("--port", type=int, default=8765, help="TCP port (default 8765).")
+    parser.add_argument("--socket", metavar="PATH", help="Listen on a Unix domain socket instead of TCP.")
+    parser.add_argument("--cache-mb", type=int, default=256,
+                        help="Maximum size of the in-memory content cache per project in MB (default 256).")
+    args = parser.parse_args()
+
+    for project in args.project:
+        if not os.path.isdir(project):
+            print(f"Error: Provided path '{project}' is not a valid directory.")
+            sys.exit(1)
+
+    try:
+        server = make_server(args.host, args.port, unix_socket=args.socket, cache_bytes=args.cache_mb * 1024 * 1024,
+                             projects=[Path(project) for project in args.project], token=args.token)
+    except ValueError as e:
+        print(f"Error: {e}. Pass --token (or set DUMP_SERVER_TOKEN), or listen on 127.0.0.1.")
+        sys.exit(1)
+    server.RequestHandlerClass.dump_server.load_projects() # Warm up before the first request
+    where = args.socket or f"http://{args.host}:{args.port}"
+    print(f"Dump server listening on {where} (endpoints: /dump, /delta, /file, /status). Press Ctrl+C to stop.")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nStopping dump server.")
+    finally:
+        server.server_close()
+        if args.socket and os.path.exists(args.socket):
+            os.remove(args.socket)
+
+# --- END OF FILE scripts/dump_server.py ---
@@ -0,0 +1,70 @@
+# --- START OF FILE scripts/lookup_dump.py ---
+import argparse
+import os
+import sys
+from pathlib import Path
+
+# Add project root to Python path
+project_root_script_location = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root_script_location))
+
+try:
+    from utils.dump_index import DumpIndex, index_path_for
+except ImportError as e:
+    print(f"Error: Could not import necessary modules. Ensure the script is run correctly.")
+    print(f"Details: {e}")
+    sys.exit(1)
+
+
+def lookup_dump(dump_file: str, rel_paths, include_header: bool = False, list_files: bool = False) -> int:
+    """
+    Print single files from a dump using its sidecar index (<dump>.idx).
+    Returns the process exit code (0 if every requested file was found).
+    """
+    dump_path = Path(dump_file).resolve()
+    index_path = index_path_for(dump_path)
+    if not index_path.exists():
+        print(f"Error: No index found for {dump_path} (expected {index_path}).", file=sys.stderr)
+        print("Create the dump again with [output] write_index = true.", file=sys.stderr)
+        return 1
+
+    try:
+        with DumpIndex.open(dump_path) as index:
+            if list_files:
+                for entry in sorted(index, key=lambda e: e.rel_path):
+                    print(f"{entry.rel_path}\t{entry.length}\t{entry.language or '-'}\t{entry.content_hash}")
+                return 0
+
+            exit_code = 0
+            for rel_path in rel_paths:
+                entry = index.lookup(rel_path)
+                if entry is None:
+                    print(f"Error: '{rel_path}' is not contained in {dump_path.name}.", file=sys.stderr)
+                    exit_code = 1
+                    continue
+                sys.stdout.write(index.read_block(entry, include_header=include_header))
+                if not sys.stdout.isatty():
+                    sys.stdout.flush()
+            return exit_code
+    except ValueError as e_index:
+        print(f"Error: {e_index}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Print single files from a dump.txt via its sidecar index.")
+    parser.add_argument("dump_file", help="Path to the dump file (e.g. <project>/dump.txt).")
+    parser.add_argument("paths", nargs="*", help="Relative paths (as in the FILE: headers) to print.")
+    parser.add_argument("--header", action="store_true", help="Include the FILE: header of each block.")
+    parser.add_argument("--list", action="store_true", help="List all indexed files (path, bytes, language, hash).")
+    args = parser.parse_args()
+
+    if not os.path.isfile(args.dump_file):
+        print(f"Error: Provided path '{args.dump_file}' is not a file.")
+        sys.exit(1)
+    if not args.paths and not args.list:
+        parser.error("give at least one path or --list")
+
+    sys.exit(lookup_dump(args.dump_file, args.paths, include_header=args.header, list_files=args.list))
+
+# --- END OF FILE scripts/lookup_dump.py ---
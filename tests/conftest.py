@@ -0,0 +1,36 @@
+# --- START OF FILE tests/conftest.py ---
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add project root to Python path (like the scripts do)
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.config_manager import ConfigManager
+
+
+def write_files(root: Path, files: dict) -> None:
+    """Create files below root from {relative path: str or bytes content}."""
+    for rel_path, content in files.items():
+        path = root / rel_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if isinstance(content, bytes):
+            path.write_bytes(content)
+        else:
+            path.write_text(content, encoding='utf-8', newline='')
+
+
+@pytest.fixture
+def project(tmp_path):
+    """An empty project directory with its .dump config."""
+    root = tmp_path / "project"
+    root.mkdir()
+    return root
+
+
+@pytest.fixture
+def config_manager(project):
+    return ConfigManager(str(project))
+
+# --- END OF FILE tests/conftest.py ---
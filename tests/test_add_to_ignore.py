@@ -0,0 +1,94 @@
+# --- START OF FILE tests/test_add_to_ignore.py ---
+import importlib.util
+import os
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+import toml
+
+from conftest import write_files
+from utils.file_lock import FileLock
+from utils.ignore_manager import IgnoreManager
+
+SCRIPT = Path(__file__).parent.parent / "scripts" / "add_to_ignore.py"
+
+
+def _load_script():
+    spec = importlib.util.spec_from_file_location("add_to_ignore_script", SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture
+def git_project(project):
+    (project / ".git").mkdir()
+    write_files(project, {"a.txt": "", "build/x.o": "", "src/b.py": ""})
+    return project
+
+
+def _local_entries(project: Path):
+    return IgnoreManager(str(project)).ignored_paths
+
+
+def test_file_lock_is_exclusive_and_reusable(tmp_path):
+    first = FileLock(tmp_path / "x.lock")
+    second = FileLock(tmp_path / "x.lock", timeout=0.1)
+    assert first.try_acquire()
+    assert not second.try_acquire()
+    with pytest.raises(TimeoutError):
+        second.acquire()
+    first.release()
+    with second:
+        assert not first.try_acquire()
+    assert first.try_acquire()
+    first.release()
+
+
+def test_local_paths_are_grouped_and_deduplicated(git_project):
+    script = _load_script()
+    assert script.add_to_ignore([str(git_project / "build"), str(git_project / "build/x.o"), str(git_project / "a.txt")])
+    assert sorted(_local_entries(git_project)) == ["a.txt", "build"]
+    assert script.add_to_ignore([str(git_project / "a.txt")]) # Already covered
+    assert sorted(_local_entries(git_project)) == ["a.txt", "build"]
+
+
+def test_global_paths_are_added(git_project):
+    script = _load_script()
+    assert script.add_to_ignore([str(git_project / "build"), str(git_project / "build/x.o")], globally=True)
+    config = toml.load(git_project / ".dump" / ".dump_config")
+    assert config['ignore']['ignored_paths'] == [str((git_project / "build").resolve())]
+
+
+def test_global_update_takes_the_config_lock_before_loading_the_config(git_project):
+    script = _load_script()
+    holder = FileLock(git_project / ".dump" / ".dump_config.lock")
+    holder.acquire()
+    result = {}
+    worker = threading.Thread(target=lambda: result.setdefault('ok', script.add_to_ignore([str(git_project / "src")], globally=True)))
+    worker.start()
+    time.sleep(0.3)
+    # Still waiting for the lock: the ConfigManager has not created the config yet
+    assert not (git_project / ".dump" / ".dump_config").exists()
+    holder.release()
+    worker.join(10)
+    assert result['ok']
+    assert toml.load(git_project / ".dump" / ".dump_config")['ignore']['ignored_paths'] == [str((git_project / "src").resolve())]
+
+
+def test_collect_adds_a_multi_selection_in_one_process(git_project, tmp_path):
+    env = dict(os.environ, TMPDIR=str(tmp_path), TEMP=str(tmp_path), TMP=str(tmp_path))
+    targets = ["a.txt", "build", "src/b.py", "src"]
+    processes = [subprocess.Popen([sys.executable, str(SCRIPT), "--collect", str(git_project / target)],
+                                  env=env, stdout=subprocess.PIPE, text=True) for target in targets]
+    outputs = [process.communicate(timeout=30)[0] for process in processes]
+    assert all(process.returncode == 0 for process in processes)
+    assert sorted(_local_entries(git_project)) == ["a.txt", "build", "src"]
+    assert sum("Queued for the running ignore process" in output for output in outputs) >= 1
+    assert not (tmp_path / "grebber_for_ai" / "ignore_queue_local.txt").exists()
+
+# --- END OF FILE tests/test_add_to_ignore.py ---
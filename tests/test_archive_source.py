@@ -0,0 +1,89 @@
+# --- START OF FILE tests/test_archive_source.py ---
+import io
+import tarfile
+import zipfile
+from pathlib import Path
+
+import pytest
+
+from utils.archive_source import ArchiveSource, _member_path, is_archive
+
+MEMBERS = {
+    "proj-1.0/app.py": b"app = 1\n",
+    "proj-1.0/pkg/util.py": b"util = 1\n",
+    "proj-1.0/node_modules/lib/index.js": b"ignored\n",
+    "proj-1.0/big.txt": b"x" * 200,
+}
+
+
+def _make_zip(path, members, extra=()):
+    with zipfile.ZipFile(path, "w") as archive:
+        for name, data in list(members.items()) + list(extra):
+            archive.writestr(name, data)
+    return path
+
+
+def _make_tar(path, members, extra=()):
+    with tarfile.open(path, "w:gz") as archive:
+        for name, data in list(members.items()) + list(extra):
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            archive.addfile(info, io.BytesIO(data))
+    return path
+
+
+def _read(source):
+    return {item.rel_path: item.reader(item) for item in source.iter_items()}
+
+
+def test_member_paths_are_normalized_or_rejected():
+    assert _member_path("./a/./b.py") == "a/b.py"
+    assert _member_path("a\\b.py") == "a/b.py"
+    assert _member_path("../evil.py") is None
+    assert _member_path("/etc/passwd") is None
+    assert _member_path("a/../../evil.py") is None
+    assert is_archive(Path("p-1.0.TAR.GZ")) and is_archive(Path("p.zip")) and not is_archive(Path("p.gz"))
+
+
+@pytest.mark.parametrize("make", [_make_zip, _make_tar])
+def test_members_are_read_with_the_project_rules(project, config_manager, tmp_path, make):
+    archive = make(tmp_path / ("a.zip" if make is _make_zip else "a.tar.gz"), MEMBERS)
+    source = ArchiveSource(config_manager, archive, max_file_size=100)
+    try:
+        assert source.prefix == "proj-1.0/" and source.total == 4
+        items = _read(source)
+        assert items == {"app.py": b"app = 1\n", "pkg/util.py": b"util = 1\n", "big.txt": b"x" * 200}
+        assert source.members_ignored == 1
+        assert sorted(source.file_names()) == ["app.py", "big.txt", "index.js", "util.py"]
+    finally:
+        source.close()
+
+
+def test_tar_members_above_the_size_limit_are_read_on_demand(config_manager, tmp_path):
+    source = ArchiveSource(config_manager, _make_tar(tmp_path / "a.tgz", MEMBERS), max_file_size=100)
+    try:
+        items = {item.rel_path: item for item in source.iter_items()}
+        assert items["big.txt"].reader == source._read_tar
+        assert items["big.txt"].reader(items["big.txt"]) == b"x" * 200
+    finally:
+        source.close()
+
+
+def test_unsafe_and_duplicate_members(config_manager, tmp_path):
+    members = {"a.py": b"first\n", "b.py": b"b\n"}
+    archive = _make_tar(tmp_path / "a.tar.gz", members, extra=[("../evil.py", b"x"), ("a.py", b"second\n")])
+    source = ArchiveSource(config_manager, archive, max_file_size=100)
+    try:
+        assert source.prefix == "" and source.members_skipped == 1
+        assert _read(source) == {"b.py": b"b\n", "a.py": b"second\n"} # The last copy wins, like extraction
+    finally:
+        source.close()
+
+
+def test_other_files_are_rejected(config_manager, tmp_path):
+    path = tmp_path / "notes.zip"
+    path.write_bytes(b"not an archive")
+    with pytest.raises(ValueError):
+        ArchiveSource(config_manager, path, max_file_size=100)
+
+# --- END OF FILE tests/test_archive_source.py ---
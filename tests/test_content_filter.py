@@ -0,0 +1,81 @@
+# --- START OF FILE tests/test_content_filter.py ---
+from pathlib import Path
+
+import pytest
+
+from utils.content_filter import ContentFilter
+from utils.dump_pipeline import DumpItem, DumpStats
+
+SETTINGS = {'ignore_case': False, 'context_lines': 1, 'binary_probe_bytes': 8192}
+
+
+def _filter(include=(), exclude=(), excerpt=False, **settings):
+    return ContentFilter(list(include), list(exclude), dict(SETTINGS, **settings), excerpt=excerpt)
+
+
+def _item():
+    return DumpItem(index=0, path=Path("a.py"), rel_path="a.py")
+
+
+def _keeps(content_filter, data: bytes, stats=None):
+    return content_filter.process(_item(), data, stats or DumpStats())
+
+
+def test_literals_and_regexes():
+    content_filter = _filter(include=["TODO", r"re:def \w+_test\("])
+    assert _keeps(content_filter, b"# TODO: later\n")
+    assert _keeps(content_filter, b"def parse_test(x):\n")
+    assert not _keeps(content_filter, b"def parse(x):\n")
+    assert not _keeps(content_filter, b"# todo\n")
+    assert _keeps(_filter(include=["TODO"], ignore_case=True), b"# todo\n")
+    assert _keeps(_filter(include=[r"re:^import"], ignore_case=True), b"x = 1\nIMPORT os\n") # Multiline anchors
+
+
+def test_exclude_wins_and_binary_files_are_skipped():
+    stats = DumpStats()
+    content_filter = _filter(include=["config"], exclude=["re:generated by"])
+    assert not _keeps(content_filter, b"config = 1\n# generated by tool\n", stats)
+    assert not _keeps(content_filter, b"config\0\x01\x02", stats)
+    assert _keeps(_filter(exclude=["secret"]), b"anything else\n")
+    assert (stats.files_no_match, stats.files_binary) == (1, 1)
+
+
+def test_invalid_patterns_raise_value_error():
+    with pytest.raises(ValueError):
+        _filter(include=["re:(unclosed"])
+    with pytest.raises(ValueError):
+        _filter(include=[""])
+
+
+def test_excerpt_keeps_hit_ranges_with_context():
+    content_filter = _filter(include=["HIT"], excerpt=True)
+    item = _item()
+    text = "".join(f"line {i}{' HIT' if i in (3, 4, 10) else ''}\n" for i in range(1, 15))
+    stats = DumpStats()
+    assert content_filter.process(item, text.encode('utf-8'), stats)
+    item.content = text
+    content_filter.excerpt(item, stats)
+    assert item.content == ("[lines 2-5 of 14]\nline 2\nline 3 HIT\nline 4 HIT\nline 5\n"
+                            "[lines 9-11 of 14]\nline 9\nline 10 HIT\nline 11\n")
+    assert item.excerpt_lines == 3 and stats.files_excerpted == 1 and item.content_hash
+
+
+def test_excerpt_lines_follow_universal_newlines_and_multiline_hits():
+    content_filter = _filter(include=[r"re:start\r?\nend"], excerpt=True, context_lines=0)
+    item = _item()
+    data = b"a\r\nb\r\nstart\r\nend\r\nc\r\nd\r\n"
+    assert content_filter.process(item, data, DumpStats())
+    item.content = "a\nb\nstart\nend\nc\nd\n"
+    content_filter.excerpt(item, DumpStats())
+    assert item.content == "[lines 3-4 of 6]\nstart\nend\n"
+
+
+def test_excerpt_of_the_whole_file_keeps_the_content():
+    content_filter = _filter(include=["x"], excerpt=True)
+    item = _item()
+    assert content_filter.process(item, b"x\ny\n", DumpStats())
+    item.content = "x\ny\n"
+    content_filter.excerpt(item, DumpStats())
+    assert item.content == "x\ny\n"
+
+# --- END OF FILE tests/test_content_filter.py ---
@@ -0,0 +1,45 @@
+# --- START OF FILE tests/test_delta.py ---
+import git
+
+from conftest import write_files
+from utils.config_manager import ConfigManager
+from utils.delta import compute_git_delta, compute_manifest_delta
+from utils.manifest import DumpManifest
+
+
+def _commit_all(repo: git.Repo) -> None:
+    repo.git.add(A=True)
+    repo.index.commit("snapshot")
+
+
+def test_manifest_delta_reports_added_modified_deleted(project, config_manager):
+    write_files(project, {"a.py": "a = 1\n", "b.py": "b = 1\n"})
+    previous = compute_manifest_delta(config_manager, DumpManifest(config_manager.dump_dir_path, project)).manifest
+    previous.save()
+
+    write_files(project, {"a.py": "a = 2  # changed size\n", "c.py": "c = 1\n"})
+    (project / "b.py").unlink()
+    result = compute_manifest_delta(config_manager, DumpManifest.load(config_manager.dump_dir_path, project))
+
+    assert result.added == ["c.py"]
+    assert result.modified == ["a.py"]
+    assert result.deleted == ["b.py"]
+
+
+def test_git_delta_applies_rules_to_ancestor_directories(project):
+    repo = git.Repo.init(project)
+    with repo.config_writer() as writer:
+        writer.set_value("user", "name", "test")
+        writer.set_value("user", "email", "test@example.com")
+    write_files(project, {"src/app.py": "x = 1\n", "src/build/gen.py": "y = 1\n"})
+    _commit_all(repo)
+    write_files(project, {"src/app.py": "x = 2\n", "src/build/gen.py": "y = 2\n", "src/build/new.py": "z\n",
+                          "src/new.py": "n\n"})
+    config_manager = ConfigManager(str(project))
+
+    result = compute_git_delta(config_manager, "HEAD")
+
+    assert result.modified == ["src/app.py"] # 'build' excludes src/build like a full walk does
+    assert result.added == ["src/new.py"]
+
+# --- END OF FILE tests/test_delta.py ---
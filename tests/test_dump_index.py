@@ -0,0 +1,87 @@
+# --- START OF FILE tests/test_dump_index.py ---
+import pytest
+
+import utils.dump_index as dump_index_module
+from conftest import write_files
+from utils.dump_index import DumpIndex, DumpIndexWriter, index_path_for
+from utils.dump_pipeline import DumpPipeline, DumpWriter, FilterStage, ReadStage, TransformStage, WalkStage, WriteStage
+
+FILES = {
+    "app.py": "def main():\n    return 1\n",
+    "pkg/util.js": "export const x = 1;\n",
+    "docs/Grüße.md": "Hallo Welt\n",
+    "empty.txt": "",
+}
+
+
+def _dump_with_index(project, config_manager, dump_path):
+    output_settings = config_manager.get_output_settings()
+    log_dir = str(project)
+    pipeline = DumpPipeline(FilterStage(output_settings, log_dir), ReadStage(),
+                            TransformStage(project, output_settings, None, None, log_dir), log_dir)
+    index_writer = DumpIndexWriter(dump_path, {'.py': 'python', '.js': 'javascript'})
+    with DumpWriter(dump_path) as writer:
+        pipeline.run(WalkStage(config_manager), WriteStage(writer, index_writer=index_writer))
+    index_writer.save(writer.offset)
+
+
+def test_round_trip_through_the_dump(project, config_manager, tmp_path):
+    write_files(project, FILES)
+    dump_path = tmp_path / "dump.txt"
+    _dump_with_index(project, config_manager, dump_path)
+
+    with DumpIndex.open(dump_path) as index:
+        assert len(index) == len(FILES)
+        assert sorted(entry.rel_path for entry in index) == sorted(FILES)
+        for rel_path in FILES:
+            content = index.read_content(rel_path)
+            assert FILES[rel_path].strip() in content
+        entry = index.lookup("app.py")
+        assert entry.language == 'python' and index.lookup("docs/Grüße.md").language is None
+        block = index.read_block(entry)
+        assert "app.py" in block[:entry.header_len] and block[entry.header_len:] == index.read_content("app.py")
+        assert dump_path.read_bytes()[entry.offset:entry.offset + entry.length].decode('utf-8') == block
+        assert index.lookup("missing.py") is None
+        assert index.lookup("pkg\\util.js").rel_path == "pkg/util.js" # Backslashes are normalized
+
+
+def test_hash_collisions_are_resolved_by_path(tmp_path, monkeypatch):
+    monkeypatch.setattr(dump_index_module, "path_hash", lambda rel_path: b"\x00" * 8)
+    dump_path = tmp_path / "dump.txt"
+    dump_path.write_bytes(b"aaabbbbcc")
+    writer = DumpIndexWriter(dump_path)
+    writer.add("c.txt", 7, 2, 0, None)
+    writer.add("a.txt", 0, 3, 0, "ff" * 16)
+    writer.add("b.txt", 3, 4, 0, None)
+    writer.save(9)
+    with DumpIndex.open(dump_path) as index:
+        assert [index.read_content(name) for name in ("a.txt", "b.txt", "c.txt")] == ["aaa", "bbbb", "cc"]
+        assert index.lookup("a.txt").content_hash == "ff" * 8
+        assert index.lookup("d.txt") is None
+
+
+def test_empty_dump(tmp_path):
+    dump_path = tmp_path / "dump.txt"
+    dump_path.write_bytes(b"")
+    DumpIndexWriter(dump_path).save(0)
+    with DumpIndex.open(dump_path) as index:
+        assert len(index) == 0 and index.lookup("a.py") is None and list(index) == []
+
+
+def test_stale_or_foreign_index_is_rejected(tmp_path):
+    dump_path = tmp_path / "dump.txt"
+    dump_path.write_bytes(b"abc")
+    writer = DumpIndexWriter(dump_path)
+    writer.add("a.txt", 0, 3, 0, None)
+    writer.save(3)
+    dump_path.write_bytes(b"abcd") # Rewritten after indexing
+    with pytest.raises(ValueError, match="does not match"):
+        DumpIndex.open(dump_path)
+
+    dump_path.write_bytes(b"abc")
+    index_path = index_path_for(dump_path)
+    index_path.write_bytes(b"NOTANIDX" + index_path.read_bytes()[8:])
+    with pytest.raises(ValueError, match="not a dump index"):
+        DumpIndex.open(dump_path)
+
+# --- END OF FILE tests/test_dump_index.py ---
@@ -0,0 +1,120 @@
+# --- START OF FILE tests/test_dump_pipeline.py ---
+import threading
+import time
+
+from conftest import write_files
+from utils.dump_pipeline import (AsyncDumpPipeline, DumpItem, DumpPipeline, DumpStats, DumpWriter, FilterStage,
+                                 PathListSource, ReadStage, TransformStage, WalkStage, WriteStage)
+
+
+def _stages(config_manager):
+    output_settings = config_manager.get_output_settings()
+    log_dir = str(config_manager.project_dir)
+    return (FilterStage(output_settings, log_dir), ReadStage(),
+            TransformStage(config_manager.project_dir, output_settings, None, None, log_dir))
+
+
+def _dump(pipeline, source, path):
+    with DumpWriter(path) as writer:
+        stats = pipeline.run(source, WriteStage(writer))
+    return path.read_bytes(), stats
+
+
+def test_sync_and_async_runs_write_the_same_dump(project, config_manager, tmp_path):
+    write_files(project, {f"pkg{i % 7}/m{i}.py": f"value = {i}\n" * (i % 5 + 1) for i in range(300)})
+    stages = _stages(config_manager)
+    sync_bytes, sync_stats = _dump(DumpPipeline(*stages, str(project)), WalkStage(config_manager), tmp_path / "a.txt")
+    async_bytes, async_stats = _dump(AsyncDumpPipeline(*stages, str(project), queue_size=4),
+                                     WalkStage(config_manager), tmp_path / "b.txt")
+    assert sync_bytes == async_bytes
+    assert sync_stats.files_dumped == async_stats.files_dumped == 300
+    assert async_stats.files_done == 300
+
+
+def test_large_files_are_skipped(project, config_manager, tmp_path):
+    max_size = config_manager.get_output_settings()['max_file_size']
+    write_files(project, {"big.txt": "x" * (max_size + 1), "small.txt": "y\n"})
+    paths = [project / "big.txt", project / "small.txt"]
+    data, stats = _dump(DumpPipeline(*_stages(config_manager), str(project)),
+                        PathListSource(paths, project), tmp_path / "out.txt")
+    assert stats.files_skipped_large == 1 and stats.files_dumped == 1
+    assert b"small.txt" in data and b"big.txt" not in data
+
+
+class _Source:
+    def __init__(self, count):
+        self.count = count
+
+    def iter_items(self):
+        return (DumpItem(index=i, path=None, rel_path=str(i)) for i in range(self.count))
+
+
+class _SlowFirst:
+    """Holds back item 0 so every later item piles up in front of the writer."""
+
+    def __init__(self):
+        self.entered = 0
+        self.lock = threading.Lock()
+
+    def process(self, item, stats):
+        with self.lock:
+            self.entered += 1
+        if item.index == 0:
+            time.sleep(0.3)
+        return True
+
+
+class _Pass:
+    def process(self, item, stats):
+        return True
+
+
+class _Recorder:
+    def __init__(self, counter):
+        self.counter = counter
+        self.order = []
+        self.max_in_flight = 0
+
+    def process(self, item, stats):
+        self.order.append(item.index)
+        self.max_in_flight = max(self.max_in_flight, self.counter.entered - len(self.order) + 1)
+        return True
+
+
+def test_async_reorder_buffer_is_bounded():
+    slow = _SlowFirst()
+    pipeline = AsyncDumpPipeline(slow, _Pass(), _Pass(), "", queue_size=2, filter_workers=4, reorder_window=10)
+    recorder = _Recorder(slow)
+    stats = pipeline.run(_Source(200), recorder)
+    assert recorder.order == list(range(200))
+    assert stats.files_done == 200
+    assert recorder.max_in_flight <= 10
+
+
+def test_dump_writer_keeps_previous_dump_on_error_and_reports_common_prefix(tmp_path):
+    path = tmp_path / "dump.txt"
+    with DumpWriter(path) as writer:
+        writer.write("abc")
+    try:
+        with DumpWriter(path) as writer:
+            writer.write("zzz")
+            raise RuntimeError()
+    except RuntimeError:
+        pass
+    assert path.read_bytes() == b"abc"
+    assert not (tmp_path / "dump.txt.tmp").exists()
+    with DumpWriter(path) as writer:
+        writer.write("abd")
+    assert writer.common_prefix == 2
+
+
+def test_stats_add_is_thread_safe():
+    stats = DumpStats()
+    threads = [threading.Thread(target=lambda: [stats.add('files_done') for _ in range(1000)]) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert stats.files_done == 8000
+
+# --- END OF FILE tests/test_dump_pipeline.py ---
@@ -0,0 +1,127 @@
+# --- START OF FILE tests/test_dump_server.py ---
+import threading
+import urllib.error
+import urllib.parse
+import urllib.request
+
+import git
+import pytest
+import toml
+
+import utils.dump_server as dump_server
+from conftest import write_files
+from utils.dump_server import ContentCache, is_loopback_host, make_server
+
+AWS_KEY = "AKIA" + "Q7XK2M9PLR4TZW8N"
+
+
+@pytest.fixture
+def serve(project):
+    """Start a server on a free port; returns get(path, token=None) -> (status, body)."""
+    servers = []
+
+    def start(projects=(project,), token=None):
+        server = make_server("127.0.0.1", 0, projects=list(projects), token=token)
+        server.RequestHandlerClass.dump_server.load_projects()
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        base = f"http://127.0.0.1:{server.server_address[1]}"
+
+        def get(path, token=None):
+            request = urllib.request.Request(base + path)
+            if token:
+                request.add_header("Authorization", f"Bearer {token}")
+            try:
+                with urllib.request.urlopen(request, timeout=30) as response:
+                    return response.status, response.read().decode('utf-8')
+            except urllib.error.HTTPError as e:
+                return e.code, e.read().decode('utf-8')
+        return get
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def _query(**params) -> str:
+    return urllib.parse.urlencode(params)
+
+
+def test_content_cache_evicts_least_recently_used():
+    cache = ContentCache(max_bytes=10)
+    cache.put("a", 1, 1, "aaaa", None, 0)
+    cache.put("b", 1, 1, "bbbb", None, 0)
+    assert cache.get("a", 1, 1) is not None # a is now the most recent
+    cache.put("c", 1, 1, "cccc", None, 0)
+    assert cache.get("b", 1, 1) is None and cache.get("a", 1, 1) is not None
+    assert cache.get("a", 2, 1) is None # Changed size: stale
+    cache.put("big", 1, 1, "x" * 11, None, 0)
+    assert cache.get("big", 1, 1) is None and cache.total_bytes <= 10
+
+
+def test_non_local_address_needs_a_token(project):
+    assert is_loopback_host("localhost") and is_loopback_host("127.0.0.2") and is_loopback_host("::1")
+    assert not is_loopback_host("0.0.0.0") and not is_loopback_host("example.com")
+    with pytest.raises(ValueError):
+        make_server("0.0.0.0", 0, projects=[project])
+    server = make_server("0.0.0.0", 0, projects=[project], token="t0k3n")
+    server.server_close()
+
+
+def test_token_is_required_when_configured(project, serve):
+    write_files(project, {"a.py": "a = 1\n"})
+    get = serve(token="s3cr3t-token")
+    assert get("/status")[0] == 401
+    assert get("/status", token="wrong")[0] == 401
+    assert get("/status", token="s3cr3t-token")[0] == 200
+
+
+def test_only_configured_projects_are_served(project, tmp_path, serve):
+    other = tmp_path / "other"
+    other.mkdir()
+    get = serve()
+    status, body = get("/dump?" + _query(project=str(other)))
+    assert status == 400 and "not a served project" in body
+    assert not (other / ".dump").exists()
+
+
+def test_file_goes_through_the_dump_stages(project, serve):
+    write_files(project, {"config.py": f"key = '{AWS_KEY}'\n", "big.txt": "x" * 50, "ok.py": "ok = 1\n"})
+    get = serve()
+    status, body = get("/file?" + _query(path="config.py"))
+    assert status == 200 and AWS_KEY not in body and "[REDACTED:aws_access_key_id]" in body
+    assert get("/file?" + _query(path="ok.py")) == (200, "ok = 1\n")
+    assert get("/file?" + _query(path="../outside.py"))[0] == 404
+
+    config_path = project / ".dump" / ".dump_config"
+    config = toml.load(config_path)
+    config['secrets']['action'] = 'drop'
+    config['output']['max_file_size'] = 40
+    config_path.write_text(toml.dumps(config), encoding='utf-8')
+    status, body = get("/file?" + _query(path="config.py"))
+    assert status == 403 and "secrets" in body
+    status, body = get("/file?" + _query(path="big.txt"))
+    assert status == 403 and "max_file_size" in body
+
+
+def test_delta_since_a_ref_is_computed_once(project, serve, monkeypatch):
+    repo = git.Repo.init(project)
+    with repo.config_writer() as writer:
+        writer.set_value("user", "name", "test")
+        writer.set_value("user", "email", "test@example.com")
+    write_files(project, {"a.py": "a = 1\n", "b.py": "b = 1\n"})
+    repo.git.add(A=True)
+    repo.index.commit("snapshot")
+    write_files(project, {"a.py": "a = 2\n"})
+
+    calls = []
+    compute_git_delta = dump_server.compute_git_delta
+    monkeypatch.setattr(dump_server, "compute_git_delta", lambda *args: calls.append(args) or compute_git_delta(*args))
+    get = serve()
+    status, body = get("/delta?" + _query(since="HEAD"))
+    assert status == 200 and "a = 2" in body and "b = 1" not in body
+    assert len(calls) == 1
+    assert get("/delta?" + _query(since="no-such-ref"))[0] == 400
+
+# --- END OF FILE tests/test_dump_server.py ---
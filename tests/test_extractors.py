@@ -0,0 +1,115 @@
+# --- START OF FILE tests/test_extractors.py ---
+import io
+import json
+from pathlib import Path
+
+import pytest
+
+from utils.dump_pipeline import DumpItem, DumpStats, ReadStage
+from utils.extractors import (CsvExtractor, ExtractorRegistry, JsonExtractor, JsonLinesExtractor, JsonStream,
+                              NotebookExtractor)
+
+SETTINGS = {'enabled': True, 'max_rows': 3, 'json_min_bytes': 10, 'disabled': []}
+BOM = b"\xef\xbb\xbf"
+
+
+def _extract(extractor_class, data: bytes) -> str:
+    return extractor_class(SETTINGS, 1024 * 1024, "").extract(io.BytesIO(data), len(data))
+
+
+def _notebook(cells) -> bytes:
+    return json.dumps({"cells": cells, "metadata": {"widgets": {"state": "x" * 1000}}, "nbformat": 4}).encode()
+
+
+class SmallChunks(JsonStream):
+    CHUNK_SIZE = 7 # Values and strings cross chunk boundaries
+
+
+def test_stream_loads_values_across_chunks():
+    value = {"a": [1, 2.5, -3e2, True, None], "b": {"c": "x\\u00e9\"y"}, "long": "z" * 500}
+    parser = SmallChunks(io.BytesIO(json.dumps(value).encode()))
+    loaded = parser.load(max_items=10)
+    assert loaded["a"] == [1, 2.5, -300.0, True, None]
+    assert loaded["b"] == {"c": "x\\u00e9\"y"}
+    assert loaded["long"].endswith("...") and len(loaded["long"]) < 500
+    assert parser.peek() is None
+
+
+def test_stream_skips_leading_bom():
+    parser = JsonStream(io.BytesIO(BOM + b'{"k": 1}'))
+    assert parser.load(max_items=10) == {"k": 1}
+
+
+def test_stream_reads_nan_and_infinity():
+    assert JsonStream(io.BytesIO(b"[NaN, Infinity, -Infinity]")).load(max_items=10)[1] == float("inf")
+
+
+@pytest.mark.parametrize("data", [b'// comment\n{"a": 1}', b'{"a": @}', b'{"a": 1', b'["open', b'{"a" 1}', b''])
+def test_stream_raises_value_error_on_malformed_input(data):
+    with pytest.raises(ValueError):
+        JsonStream(io.BytesIO(data)).load(max_items=10)
+
+
+def test_notebook_emits_cells_and_counts_outputs():
+    text = _extract(NotebookExtractor, _notebook([
+        {"cell_type": "markdown", "source": ["# Title\n", "text"]},
+        {"cell_type": "code", "source": "print(1)\n", "outputs": [{"data": {"image/png": "AAAA" * 1000}}]},
+    ]))
+    assert text.startswith("[extracted: notebook, 1 code and 1 markdown cells, 1 output(s) omitted]")
+    assert "# %% [markdown]\n# Title\ntext" in text
+    assert "# %%\nprint(1)\n[1 output(s) omitted]" in text
+    assert "AAAA" not in text
+
+
+def test_notebook_with_bom():
+    text = _extract(NotebookExtractor, BOM + _notebook([{"cell_type": "code", "source": "x = 1"}]))
+    assert "# %%\nx = 1" in text
+
+
+def test_notebook_without_cells_is_rejected():
+    with pytest.raises(ValueError):
+        _extract(NotebookExtractor, b'{"nbformat": 3, "worksheets": []}')
+
+
+def test_json_array_shows_schema_and_first_items():
+    text = _extract(JsonExtractor, BOM + json.dumps([{"id": i, "name": None if i else "a"} for i in range(10)]).encode())
+    assert text.startswith("[extracted: JSON array, first 3 items]")
+    assert 'schema: {"id": "int", "name": "str|null"}' in text
+    assert "[... more items not shown ...]" in text
+
+
+def test_json_lines_counts_records():
+    text = _extract(JsonLinesExtractor, b'{"a": 1}\n{"a": 2}\n')
+    assert text.startswith("[extracted: JSON Lines, 2 records]")
+
+
+def test_csv_infers_column_types_and_strips_bom():
+    text = _extract(CsvExtractor, BOM + b"id,price,name\n1,2.5,a\n2,3,b\n")
+    assert "schema: id (int), price (float), name (str)" in text
+
+
+def test_read_stage_dumps_unparsable_json_in_full(tmp_path):
+    path = tmp_path / "data.json"
+    path.write_bytes(b'// generated\n{"a": NaN, "b": [1, 2]}\n')
+    registry = ExtractorRegistry(SETTINGS, 1024 * 1024, str(tmp_path))
+    item = DumpItem(index=0, path=path, rel_path="data.json", size=path.stat().st_size)
+    item.extractor = registry.find(item.rel_path, item.size)
+    assert item.extractor is not None
+
+    assert ReadStage().process(item, DumpStats())
+    assert item.extractor is None
+    assert item.content == path.read_text()
+
+
+def test_read_stage_extracts_bom_json(tmp_path):
+    path = tmp_path / "bom.json"
+    path.write_bytes(BOM + json.dumps({"rows": list(range(100))}).encode())
+    item = DumpItem(index=0, path=path, rel_path="bom.json", size=path.stat().st_size)
+    item.extractor = ExtractorRegistry(SETTINGS, 1024 * 1024, str(tmp_path)).find(item.rel_path, item.size)
+    stats = DumpStats()
+
+    assert ReadStage().process(item, stats)
+    assert stats.files_extracted == 1
+    assert item.content.startswith("[extracted: JSON object")
+
+# --- END OF FILE tests/test_extractors.py ---
@@ -0,0 +1,121 @@
+# --- START OF FILE tests/test_file_walker.py ---
+import os
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+from conftest import write_files
+from detectors.language_detector import detect_language
+from utils.file_walker import (_ordered_walk, _scan_raw, _WorkStealingScanner, find_ignored_ancestor,
+                               normalize_scopes, walk_directory, walk_project, walk_subtrees)
+
+CREATE_DUMP = Path(__file__).parent.parent / "scripts" / "create_dump.py"
+
+
+def _tree(root: Path) -> None:
+    write_files(root, {f"d{i}/s{j}/f{k}.py": "" for i in range(6) for j in range(4) for k in range(3)})
+    write_files(root, {"top.txt": "", "d0/extra.md": ""})
+
+
+def test_walk_directory_matches_os_walk(tmp_path):
+    _tree(tmp_path)
+    expected = [(Path(root), files) for root, _dirs, files in os.walk(tmp_path)]
+    assert list(walk_directory(str(tmp_path))) == expected
+    assert list(walk_directory(str(tmp_path), workers=4)) == expected
+
+
+def test_parallel_walk_stays_bounded_ahead_of_a_slow_consumer(tmp_path):
+    _tree(tmp_path)
+    seen_ahead = []
+    original_result = _WorkStealingScanner.result
+
+    def result(self, dir_path):
+        time.sleep(0.002) # Slow consumer
+        seen_ahead.append(len(self.results))
+        return original_result(self, dir_path)
+
+    scanner_init = _WorkStealingScanner.__init__
+
+    def init(self, scan, workers, max_ahead=256):
+        scanner_init(self, scan, workers, max_ahead=3)
+
+    _WorkStealingScanner.result, _WorkStealingScanner.__init__ = result, init
+    try:
+        walked = [dir_path for dir_path, _dirs, _files in _ordered_walk(tmp_path, _scan_raw, workers=4)]
+    finally:
+        _WorkStealingScanner.result, _WorkStealingScanner.__init__ = original_result, scanner_init
+    assert walked == [Path(root) for root, _dirs, _files in os.walk(tmp_path)]
+    assert max(seen_ahead) <= 3 + 4
+
+
+def test_parallel_walk_stops_when_the_consumer_stops(tmp_path):
+    _tree(tmp_path)
+    before = threading.active_count()
+    walk = walk_directory(str(tmp_path), workers=4)
+    next(walk)
+    walk.close()
+    assert threading.active_count() == before
+
+
+def test_walk_project_applies_ignore_rules(project, config_manager):
+    write_files(project, {"src/a.py": "", "node_modules/x/y.js": "", "src/b.pyc": ""})
+    for workers in (1, 3):
+        files = [(d.relative_to(project).as_posix(), sorted(names))
+                 for d, names in walk_project(config_manager, workers=workers)]
+        rel = {f"{d}/{n}" if d != '.' else n for d, names in files for n in names}
+        assert "src/a.py" in rel
+        assert not any(r.startswith("node_modules/") or r.endswith(".pyc") for r in rel)
+
+
+def test_find_ignored_ancestor(project, config_manager):
+    assert find_ignored_ancestor(config_manager, "node_modules/x/y.js") == "node_modules"
+    assert find_ignored_ancestor(config_manager, "src/a.py") is None
+
+
+def test_normalize_scopes():
+    assert normalize_scopes(["src/", "src/a", "docs", "src"]) == ["src", "docs"]
+    assert normalize_scopes(["src", ""]) == [""]
+
+
+def test_walk_subtrees_matches_the_full_walk(project, config_manager):
+    write_files(project, {"src/a.py": "", "src/sub/b.py": "", "src/c.pyc": "", "docs/d.md": "", "top.py": ""})
+
+    def rel_files(walk):
+        return sorted((d / name).relative_to(project).as_posix() for d, names in walk for name in names)
+
+    full = rel_files(walk_project(config_manager, workers=1))
+    scoped = rel_files(walk_subtrees(config_manager, ["src", "top.py", "missing"], workers=1))
+    assert scoped == [rel for rel in full if rel.startswith("src/") or rel == "top.py"]
+    assert "src/c.pyc" not in scoped
+
+
+def test_create_dump_with_paths(project):
+    write_files(project, {"src/a.py": "a = 1\n", "docs/d.md": "doc\n", "node_modules/x.js": "x\n"})
+    result = subprocess.run([sys.executable, str(CREATE_DUMP), str(project), "--path", "src", "--path", "node_modules"],
+                            capture_output=True, text=True)
+    assert result.returncode == 0, result.stdout
+    assert "'node_modules' is excluded by the ignore rules" in result.stdout
+    dump = (project / "dump_scope.txt").read_text(encoding="utf-8")
+    assert "a = 1" in dump and "doc" not in dump
+    assert not (project / "dump.txt").exists()
+
+    result = subprocess.run([sys.executable, str(CREATE_DUMP), str(project), "--path", "../elsewhere"],
+                            capture_output=True, text=True)
+    assert result.returncode == 1 and "not found" in result.stdout
+
+
+def test_language_detector_takes_a_walker(tmp_path):
+    write_files(tmp_path, {"setup.py": "", "pkg/a.py": "", "pkg/b.py": ""})
+    assert detect_language(str(tmp_path))[0] == "python"
+    walked = []
+
+    def walk(directory):
+        walked.append(directory)
+        return walk_directory(directory, workers=2)
+
+    assert detect_language(str(tmp_path), walk=walk)[0] == "python"
+    assert walked == [str(tmp_path)]
+
+# --- END OF FILE tests/test_file_walker.py ---
@@ -0,0 +1,86 @@
+# --- START OF FILE tests/test_generated_files.py ---
+from pathlib import Path
+
+import pytest
+
+from utils.dump_pipeline import DumpItem, DumpStats
+from utils.generated_files import GeneratedFileDetector, classify_head, header_comments, probe_hash
+
+SETTINGS = {'action': 'summarize', 'vendored_hashes': [], 'allow_paths': []}
+
+
+@pytest.mark.parametrize("rel_path, head, reason", [
+    ("gen/api_pb2.py", "# -*- coding: utf-8 -*-\n# Generated by the protocol buffer compiler.  DO NOT EDIT!\nimport x\n",
+     "generated-marker"),
+    ("model.go", "// Code generated by sqlc. DO NOT EDIT.\npackage db\n", "generated-marker"),
+    ("Api.cs", "/*\n  <auto-generated>\n  This code was generated by a tool.\n*/\nclass A {}\n", "generated-marker"),
+    ("schema.ts", "/**\n * @generated\n */\nexport type A = 1;\n", "generated-marker"),
+    ("static/app.min.js", "var a=1;\n", "minified-name"),
+    ("bundle.js.map", '{"version":3,"mappings":"AAAA"}', "source-map"),
+    ("lib/jquery.js", "/*! jQuery v3.7.1 | (c) OpenJS Foundation */\n", "vendored:jquery"),
+    ("app2.js", "var a=function(b){return b+1};" * 40, "minified-lines"),
+])
+def test_classify_head_reasons(rel_path, head, reason):
+    assert classify_head(rel_path, head) == reason
+
+
+@pytest.mark.parametrize("head", [
+    "import os\n\ndef render():\n    # generated from the template below\n    return TEMPLATE\n",
+    "x = 1  # DO NOT EDIT this constant by hand\n",
+    '"""Module doc."""\nSTUB = "@generated"\n',
+])
+def test_markers_outside_the_header_comment_are_ignored(head):
+    assert classify_head("module.py", head) is None
+
+
+def test_prose_is_never_marked():
+    assert classify_head("README.md", "<!-- Generated by docs tool -->\n# Title\n") is None
+
+
+def test_header_comments_stop_at_the_first_code_line():
+    head = "#!/usr/bin/env python\n\n/* open\nstill comment\n*/\ncode()\n# later\n"
+    assert header_comments(head) == "#!/usr/bin/env python\n\n/* open\nstill comment\n*/"
+
+
+def test_vendored_hash_matches_the_probe():
+    head = "function vendored() {}\n"
+    assert classify_head("third_party/lib.js", head, {probe_hash(head)}) == "vendored-hash"
+
+
+def _item(path: Path) -> DumpItem:
+    st = path.stat()
+    return DumpItem(index=0, path=path, rel_path=path.name, size=st.st_size, mtime_ns=st.st_mtime_ns,
+                    content=path.read_text())
+
+
+def test_detector_caches_verdicts_and_does_not_log(tmp_path):
+    generated = tmp_path / "api_pb2.py"
+    generated.write_text("# Generated by the protocol buffer compiler.  DO NOT EDIT!\nX = 1\n")
+    detector = GeneratedFileDetector(SETTINGS, tmp_path, str(tmp_path))
+    item = _item(generated)
+    stats = DumpStats()
+
+    assert detector.classify(item) == "generated-marker"
+    assert detector.apply(item, "generated-marker", stats)
+    assert item.content == f"[generated file omitted (generated-marker): {item.size} bytes]\n"
+    assert stats.generated_reasons == {"generated-marker": 1}
+    detector.save()
+    assert not (tmp_path / ".dump" / "dump_error.log").exists()
+
+    reloaded = GeneratedFileDetector(SETTINGS, tmp_path, str(tmp_path))
+    assert reloaded.cached_verdict(_item(generated)) == "generated-marker"
+    generated.write_text("X = 2\n")
+    assert reloaded.cached_verdict(_item(generated)) is None # Changed since
+
+
+def test_skip_action_drops_the_file(tmp_path):
+    detector = GeneratedFileDetector(dict(SETTINGS, action='skip'), tmp_path, str(tmp_path))
+    assert not detector.apply(DumpItem(index=0, path=tmp_path / "a.min.js", size=3), "minified-name", DumpStats())
+
+
+def test_allow_paths_are_never_generated(tmp_path):
+    detector = GeneratedFileDetector(dict(SETTINGS, allow_paths=['keep/*']), tmp_path, str(tmp_path))
+    item = DumpItem(index=0, path=tmp_path / "keep" / "x.min.js", rel_path="keep/x.min.js", content="a")
+    assert detector.classify(item) == ''
+
+# --- END OF FILE tests/test_generated_files.py ---
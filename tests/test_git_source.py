@@ -0,0 +1,93 @@
+# --- START OF FILE tests/test_git_source.py ---
+import os
+from pathlib import Path
+
+import git
+import pytest
+
+from conftest import write_files
+from utils.config_manager import ConfigManager
+from utils.git_source import GitObjectCache, GitRevisionSource
+
+
+def _commit(repo, files, message):
+    write_files(Path(repo.working_tree_dir), files)
+    repo.git.add(A=True)
+    return repo.index.commit(message)
+
+
+@pytest.fixture
+def repo(project):
+    repo = git.Repo.init(project)
+    with repo.config_writer() as writer:
+        writer.set_value("user", "name", "test")
+        writer.set_value("user", "email", "test@example.com")
+    return repo
+
+
+def _contents(source):
+    return {item.rel_path: item.reader(item).decode('utf-8') for item in source.iter_items()}
+
+
+def test_blob_cache_evicts_least_recently_used():
+    cache = GitObjectCache(max_blob_bytes=8)
+    cache.put_blob("a", b"aaaa")
+    cache.put_blob("b", b"bbbb")
+    assert cache.get_blob("a") == b"aaaa" # a is now the most recent
+    cache.put_blob("c", b"cccc")
+    assert cache.get_blob("b") is None and cache.get_blob("c") == b"cccc"
+    cache.put_blob("big", b"x" * 9) # Larger than the whole cache: not kept
+    assert cache.get_blob("big") is None and cache.blob_bytes <= 8
+    assert (cache.blob_hits, cache.blob_misses) == (2, 2)
+
+
+def test_revision_is_read_without_checkout(project, config_manager, repo):
+    first = _commit(repo, {"a.py": "a = 1\n", "pkg/b.py": "b = 1\n", "node_modules/x.js": "x\n"}, "first")
+    _commit(repo, {"a.py": "a = 2\n", "pkg/c.py": "c = 1\n"}, "second")
+    write_files(project, {"a.py": "uncommitted\n"})
+
+    source = GitRevisionSource(config_manager, first.hexsha)
+    items = list(source.iter_items())
+    assert [item.rel_path for item in items] == ["a.py", "pkg/b.py"] # Files first, then subtrees; ignore rules apply
+    assert items[0].size == len("a = 1\n")
+    assert _contents(GitRevisionSource(config_manager, "HEAD")) == {"a.py": "a = 2\n", "pkg/b.py": "b = 1\n",
+                                                                   "pkg/c.py": "c = 1\n"}
+
+
+def test_unchanged_blobs_are_shared_between_revisions(config_manager, repo):
+    _commit(repo, {"a.py": "a = 1\n", "b.py": "b = 1\n"}, "first")
+    _commit(repo, {"a.py": "a = 2\n"}, "second")
+    cache = GitObjectCache()
+    _contents(GitRevisionSource(config_manager, "HEAD~1", object_cache=cache))
+    assert (cache.blob_hits, cache.blob_misses) == (0, 2)
+    _contents(GitRevisionSource(config_manager, "HEAD", object_cache=cache))
+    assert (cache.blob_hits, cache.blob_misses) == (1, 3) # b.py is the same blob
+
+
+def test_project_below_the_repository_root(tmp_path):
+    repo = git.Repo.init(tmp_path)
+    with repo.config_writer() as writer:
+        writer.set_value("user", "name", "test")
+        writer.set_value("user", "email", "test@example.com")
+    write_files(tmp_path, {"other/x.py": "x\n", "app/main.py": "main\n"})
+    repo.git.add(A=True)
+    repo.index.commit("snapshot")
+    source = GitRevisionSource(ConfigManager(str(tmp_path / "app")), "HEAD")
+    assert _contents(source) == {"main.py": "main\n"}
+
+
+@pytest.mark.skipif(not hasattr(os, "symlink"), reason="needs symlinks")
+def test_symlinks_are_skipped(project, config_manager, repo):
+    write_files(project, {"a.py": "a\n"})
+    os.symlink("a.py", project / "link.py")
+    repo.git.add(A=True)
+    repo.index.commit("snapshot")
+    assert list(_contents(GitRevisionSource(config_manager, "HEAD"))) == ["a.py"]
+
+
+def test_unknown_revision_raises(config_manager, repo):
+    _commit(repo, {"a.py": "a\n"}, "first")
+    with pytest.raises(Exception):
+        GitRevisionSource(config_manager, "no-such-ref")
+
+# --- END OF FILE tests/test_git_source.py ---
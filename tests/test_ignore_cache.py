@@ -0,0 +1,88 @@
+# --- START OF FILE tests/test_ignore_cache.py ---
+import os
+import shutil
+
+from conftest import write_files
+from utils.file_walker import walk_project
+from utils.ignore_cache import IgnoreDecisionCache
+
+FILES = {
+    "app.py": "",
+    "src/a.py": "",
+    "src/gen/out.py": "",
+    "docs/index.md": "",
+    "node_modules/x/y.js": "",
+}
+
+
+def _walk(config_manager, ignore_cache):
+    return sorted((d / name).relative_to(config_manager.project_dir).as_posix()
+                  for d, names in walk_project(config_manager, ignore_cache=ignore_cache, workers=1) for name in names)
+
+
+def test_unchanged_directories_are_replayed(project, config_manager):
+    write_files(project, FILES)
+    cache = IgnoreDecisionCache(config_manager)
+    expected = _walk(config_manager, cache)
+    assert cache.hits == 0 and "node_modules/x/y.js" not in expected
+    cache.save()
+
+    reloaded = IgnoreDecisionCache(config_manager)
+    assert _walk(config_manager, reloaded) == expected
+    assert reloaded.misses == 0 and reloaded.hits == len(reloaded.entries)
+
+
+def test_changed_directory_is_scanned_again(project, config_manager):
+    write_files(project, FILES)
+    cache = IgnoreDecisionCache(config_manager)
+    _walk(config_manager, cache)
+    cache.save()
+
+    write_files(project, {"docs/new.md": ""})
+    os.utime(project / "docs", ns=(1, 1)) # mtime_ns differs from the cached one on any filesystem
+    reloaded = IgnoreDecisionCache(config_manager)
+    assert "docs/new.md" in _walk(config_manager, reloaded)
+    assert reloaded.misses == 1
+
+
+def test_path_scoped_rule_invalidates_only_its_parent(project, config_manager):
+    write_files(project, FILES)
+    cache = IgnoreDecisionCache(config_manager)
+    _walk(config_manager, cache)
+    cache.save()
+
+    config_manager.add_ignored_paths([str(project / "src" / "gen")])
+    reloaded = IgnoreDecisionCache(config_manager)
+    walked = _walk(config_manager, reloaded)
+    assert not any("gen/" in rel for rel in walked)
+    assert reloaded.misses == 1 # Only 'src'; the root, 'docs' and 'src/gen' are unaffected or not visited
+
+
+def test_global_pattern_invalidates_every_entry(project, config_manager):
+    write_files(project, FILES)
+    cache = IgnoreDecisionCache(config_manager)
+    _walk(config_manager, cache)
+    cache.save()
+
+    config_manager.config['ignore']['custom_patterns'] = ["*.md"]
+    reloaded = IgnoreDecisionCache(config_manager)
+    assert not any(rel.endswith(".md") for rel in _walk(config_manager, reloaded))
+    assert reloaded.hits == 0
+
+
+def test_save_prunes_directories_not_visited(project, config_manager):
+    write_files(project, FILES)
+    cache = IgnoreDecisionCache(config_manager)
+    _walk(config_manager, cache)
+    cache.save()
+    assert "docs" in cache.entries
+
+    shutil.rmtree(project / "docs")
+    reloaded = IgnoreDecisionCache(config_manager)
+    _walk(config_manager, reloaded)
+    reloaded.save(prune_untouched=False) # A partial walk keeps what it did not see
+    assert "docs" in IgnoreDecisionCache(config_manager).entries
+    reloaded.save()
+    assert "docs" not in IgnoreDecisionCache(config_manager).entries
+
+# --- END OF FILE tests/test_ignore_cache.py ---
@@ -0,0 +1,71 @@
+# --- START OF FILE tests/test_import_graph.py ---
+from conftest import write_files
+from utils.import_graph import ImportGraph, parse_imports
+
+
+def test_python_imports_including_nested_and_relative():
+    text = "import os, pkg.mod\nfrom . import sibling\nfrom ..base import Base\n\ndef f():\n    from lazy import x\n"
+    assert sorted(parse_imports("a/b.py", text), key=str) == sorted(
+        [[0, "os", []], [0, "pkg.mod", []], [1, "", ["sibling"]], [2, "base", ["Base"]], [0, "lazy", ["x"]]], key=str)
+
+
+def test_js_scanner_skips_comments_and_strings():
+    text = (
+        "import a from './a';\n"
+        "import './side-effect.css';\n"
+        "export { b } from \"./b\";\n"
+        "const c = require('./c');\n"
+        "const d = await import('./d');\n"
+        "// import x from './commented';\n"
+        "/* require('./block') */\n"
+        "const s = \"import y from './in-string'\";\n"
+        "const t = `require('./in-template')`;\n"
+    )
+    assert parse_imports("src/main.ts", text) == ["./a", "./side-effect.css", "./b", "./c", "./d"]
+
+
+def test_java_scanner_ignores_commented_imports():
+    text = "package a;\n// import x.Commented;\n/* import y.Block; */\nimport a.b.C;\nimport static a.b.C.member;\nimport a.d.*;\n"
+    assert parse_imports("A.java", text) == ["a.b.C", "a.b.C.member", "a.d.*"]
+
+
+def test_unknown_extension_has_no_imports():
+    assert parse_imports("notes.md", "import x from './y'") == []
+
+
+def test_closure_resolves_across_languages_and_respects_depth(project, config_manager):
+    write_files(project, {
+        "app.py": "from pkg import service\n",
+        "pkg/__init__.py": "",
+        "pkg/service.py": "from .models import User\nimport requests\n",
+        "pkg/models.py": "",
+        "unused.py": "",
+        "web/main.ts": "import { x } from './util.js';\nimport React from 'react';\n",
+        "web/util.ts": "export const x = 1;\n",
+        "src/main/java/com/app/Main.java": "import com.app.model.User;\n",
+        "src/main/java/com/app/model/User.java": "",
+    })
+    graph = ImportGraph(config_manager)
+    assert graph.closure(["app.py"]) == [("app.py", 0), ("pkg/__init__.py", 1), ("pkg/service.py", 1),
+                                         ("pkg/models.py", 2)]
+    assert graph.closure(["app.py"], max_depth=1)[-1] == ("pkg/service.py", 1)
+    assert graph.closure(["web/main.ts"]) == [("web/main.ts", 0), ("web/util.ts", 1)] # ESM '.js' names the .ts file
+    assert [rel for rel, _depth in graph.closure(["src/main/java/com/app/Main.java"])] == \
+           ["src/main/java/com/app/Main.java", "src/main/java/com/app/model/User.java"]
+    assert graph.unresolved == 1 # requests; JS package imports are skipped, not resolved
+
+
+def test_raw_imports_are_cached(project, config_manager):
+    write_files(project, {"a.py": "import b\n", "b.py": "", "gone.py": "import a\n"})
+    graph = ImportGraph(config_manager)
+    graph.closure(["a.py", "gone.py"])
+    graph.save()
+
+    (project / "gone.py").unlink()
+    reloaded = ImportGraph(config_manager)
+    assert reloaded.closure(["a.py"]) == [("a.py", 0), ("b.py", 1)]
+    assert (reloaded.parsed, reloaded.reused) == (0, 2)
+    reloaded.save()
+    assert "gone.py" not in ImportGraph(config_manager)._cache
+
+# --- END OF FILE tests/test_import_graph.py ---
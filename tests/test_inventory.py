@@ -0,0 +1,131 @@
+# --- START OF FILE tests/test_inventory.py ---
+import json
+
+import pytest
+
+from utils.inventory import FileInventory, InventoryStats
+from utils.manifest import DumpManifest
+
+FILES = [
+    ("src/b.py", 10, 1_700_000_000_123_456_789, 7, 1, "note", 99),
+    ("a.py", 0, -5, 0, 0, "", 0),
+    ("src/a.py", 2**40, 2, 2**63, 255, "other", 2**64 - 1),
+    ("src/deep/ünïcode.py", 3, 3, 3, 0, "note", 3),
+    ("b.py", 1, 1, 1, 0, "", 1),
+]
+
+
+def _build():
+    inventory = FileInventory(meta={'owner': 'test'})
+    for row in FILES:
+        inventory.add(*row)
+    return inventory
+
+
+def _rows(inventory):
+    return [(inventory.rel_path(i), inventory.sizes[i], inventory.mtimes[i], inventory.inodes[i],
+             inventory.flags[i], inventory.tag(i), inventory.values[i]) for i in range(len(inventory))]
+
+
+def test_round_trip_keeps_order_columns_and_meta(tmp_path):
+    path = tmp_path / "x.inv"
+    _build().save(path)
+    loaded = FileInventory.load(path)
+    try:
+        assert _rows(loaded) == FILES
+        assert list(loaded.paths()) == [row[0] for row in FILES]
+        assert loaded.meta == {'owner': 'test'}
+        assert (path.stat().st_size % 8) == 0
+    finally:
+        loaded.close()
+    assert len(loaded) == 0 # Closed: the mapping is released
+
+
+@pytest.mark.parametrize("saved", [False, True])
+def test_find(tmp_path, saved):
+    inventory = _build()
+    if saved:
+        inventory.save(tmp_path / "x.inv")
+        inventory = FileInventory.load(tmp_path / "x.inv")
+    for i, row in enumerate(FILES):
+        assert inventory.find(row[0]) == i
+    assert inventory.find("src/c.py") is None
+    assert inventory.find("missing/a.py") is None
+    assert inventory.find("src") is None
+    inventory.close()
+
+
+def test_empty_inventory(tmp_path):
+    FileInventory().save(tmp_path / "empty.inv")
+    loaded = FileInventory.load(tmp_path / "empty.inv")
+    assert len(loaded) == 0 and loaded.find("a.py") is None and loaded.meta == {}
+    loaded.close()
+
+
+def test_loaded_inventory_is_read_only(tmp_path):
+    _build().save(tmp_path / "x.inv")
+    loaded = FileInventory.load(tmp_path / "x.inv")
+    with pytest.raises(ValueError):
+        loaded.add("c.py", 1, 1)
+    loaded.close()
+
+
+def test_foreign_and_truncated_files_are_rejected(tmp_path):
+    path = tmp_path / "x.inv"
+    _build().save(path)
+    data = path.read_bytes()
+    path.write_bytes(data[:len(data) // 2])
+    with pytest.raises(ValueError, match="truncated"):
+        FileInventory.load(path)
+    path.write_bytes(b"NOTANINV" + data[8:])
+    with pytest.raises(ValueError, match="not an inventory"):
+        FileInventory.load(path)
+    path.write_bytes(b"")
+    with pytest.raises(ValueError):
+        FileInventory.load(path)
+
+
+def test_inventory_stats_mapping():
+    stats = InventoryStats(_build())
+    assert stats["src/b.py"] == (10, 1_700_000_000_123_456_789)
+    assert "nope.py" not in stats and len(stats) == len(FILES)
+    assert list(stats)[:2] == ["src/b.py", "a.py"]
+
+
+def test_manifest_round_trip(project):
+    dump_dir = project / ".dump"
+    manifest = DumpManifest(dump_dir, project)
+    manifest.record("a.py", 1, 2, 3)
+    manifest.record_path(project / "pkg" / "b.py", 4, 5)
+    manifest.record_path(project.parent / "outside.py", 6, 7) # Not below the project: ignored
+    manifest.save()
+
+    loaded = DumpManifest.load(dump_dir, project)
+    assert dict(loaded.files) == {"a.py": (1, 2), "pkg/b.py": (4, 5)}
+    assert loaded.created == manifest.created
+    loaded.close()
+
+
+def test_manifest_reads_the_legacy_json_once(project):
+    dump_dir = project / ".dump"
+    dump_dir.mkdir()
+    (dump_dir / DumpManifest.LEGACY_FILENAME).write_text(
+        json.dumps({'version': 1, 'created': "2024-01-01", 'files': {"a.py": [1, 2]}}), encoding='utf-8')
+    legacy = DumpManifest.load(dump_dir, project)
+    assert dict(legacy.files) == {"a.py": (1, 2)} and legacy.created == "2024-01-01"
+    legacy.save()
+    assert (dump_dir / DumpManifest.MANIFEST_FILENAME).exists()
+    reloaded = DumpManifest.load(dump_dir, project)
+    assert dict(reloaded.files) == {"a.py": (1, 2)}
+    reloaded.close()
+
+
+def test_manifest_of_another_version_is_ignored(project):
+    dump_dir = project / ".dump"
+    dump_dir.mkdir()
+    inventory = FileInventory(meta={'version': 1})
+    inventory.add("a.py", 1, 1)
+    inventory.save(dump_dir / DumpManifest.MANIFEST_FILENAME)
+    assert DumpManifest.load(dump_dir, project) is None
+
+# --- END OF FILE tests/test_inventory.py ---
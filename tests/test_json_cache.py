@@ -0,0 +1,49 @@
+# --- START OF FILE tests/test_json_cache.py ---
+import json
+
+from utils.json_cache import JsonCacheFile, drop_unseen
+
+
+def test_round_trip(tmp_path):
+    cache = JsonCacheFile(tmp_path / ".dump" / "x.json", 1, str(tmp_path), "x cache", "abc")
+    assert cache.load() is None
+    assert cache.save({'a': [1, 2]})
+    assert cache.load() == {'a': [1, 2]}
+    assert not (tmp_path / ".dump" / "x.tmp").exists()
+
+
+def test_other_version_or_fingerprint_is_discarded(tmp_path):
+    path = tmp_path / "x.json"
+    JsonCacheFile(path, 1, str(tmp_path), "x cache", "abc").save({'a': 1})
+    assert JsonCacheFile(path, 2, str(tmp_path), "x cache", "abc").load() is None
+    assert JsonCacheFile(path, 1, str(tmp_path), "x cache", "def").load() is None
+    assert JsonCacheFile(path, 1, str(tmp_path), "x cache").load() is None
+
+
+def test_wrong_entry_type_is_discarded(tmp_path):
+    cache = JsonCacheFile(tmp_path / "x.json", 1, str(tmp_path), "x cache")
+    cache.save(['a'])
+    assert cache.load() is None
+    assert cache.load(list) == ['a']
+
+
+def test_corrupt_file_is_logged_and_discarded(tmp_path):
+    path = tmp_path / "x.json"
+    path.write_text("{not json", encoding='utf-8')
+    assert JsonCacheFile(path, 1, str(tmp_path), "x cache").load() is None
+    assert "Failed to load x cache" in (tmp_path / ".dump" / "dump_error.log").read_text(encoding='utf-8')
+
+
+def test_file_layout(tmp_path):
+    path = tmp_path / "x.json"
+    JsonCacheFile(path, 3, str(tmp_path), "x cache", "fp").save({'k': 'v'})
+    assert json.loads(path.read_text(encoding='utf-8')) == {'version': 3, 'fingerprint': 'fp', 'entries': {'k': 'v'}}
+
+
+def test_drop_unseen():
+    entries = {'a': 1, 'b': 2, 'c': 3}
+    assert drop_unseen(entries, ['a', 'c'])
+    assert entries == {'a': 1, 'c': 3}
+    assert not drop_unseen(entries, {'a', 'c', 'd'})
+
+# --- END OF FILE tests/test_json_cache.py ---
@@ -0,0 +1,107 @@
+# --- START OF FILE tests/test_near_duplicates.py ---
+import hashlib
+from pathlib import Path
+
+from conftest import write_files
+from utils.dump_index import DumpIndex, DumpIndexWriter
+from utils.dump_pipeline import (DumpItem, DumpPipeline, DumpStats, DumpWriter, FilterStage, ReadStage, TransformStage,
+                                 WalkStage, WriteStage)
+from utils.near_duplicates import (NearDuplicateIndex, estimate_similarity, exact_similarity,
+                                   minhash_signature)
+
+SETTINGS = {'threshold': 0.8, 'mode': 'diff', 'min_lines': 5, 'max_diff_ratio': 0.5, 'memory_mb': 1}
+
+
+def _migration(number: int, changed: str = "") -> str:
+    lines = [f"    op.add_column('table_{i}', sa.Column('col_{i}', sa.Integer()))" for i in range(40)]
+    if changed:
+        lines[20] = changed
+    return f"revision = '{number}'\n" + "\n".join(lines) + "\n"
+
+
+def _process(index, rel_path, content, stats):
+    item = DumpItem(index=0, path=Path(rel_path), rel_path=rel_path, content=content)
+    index.signature(item)
+    index.process(item, stats)
+    return item.content
+
+
+def test_signature_estimates_line_similarity():
+    a, _lines = minhash_signature(_migration(1))
+    b, _lines = minhash_signature(_migration(2, changed="    pass"))
+    c, _lines = minhash_signature("\n".join(f"unrelated line {i}" for i in range(40)))
+    assert estimate_similarity(a, a) == 1.0
+    assert estimate_similarity(a, b) > 0.8
+    assert estimate_similarity(a, c) < 0.2
+    # Whitespace and blank lines do not count
+    assert minhash_signature("a  b\n\n  c\n")[0] == minhash_signature("a b\nc\n")[0]
+    assert minhash_signature("")[0] is None
+
+
+def test_exact_similarity():
+    assert exact_similarity("a\nb\n", "b\na\n") == 1.0
+    assert exact_similarity("a\nb\n", "a\nc\n") == 1 / 3
+    assert exact_similarity("", "\n") == 1.0
+
+
+def test_near_duplicates_become_diffs_against_the_first_file():
+    index = NearDuplicateIndex(SETTINGS, "/tmp")
+    stats = DumpStats()
+    first = _migration(1)
+    assert _process(index, "m/0001.py", first, stats) == first
+    second = _process(index, "m/0002.py", _migration(2, changed="    op.drop_table('old')"), stats)
+    assert second.startswith("[near-duplicate of m/0001.py, similarity ")
+    assert "-revision = '1'" in second and "+    op.drop_table('old')" in second
+    assert _process(index, "m/copy.py", first, stats).endswith("; identical]\n")
+    other = "\n".join(f"def handler_{i}(): return {i}" for i in range(40)) + "\n"
+    assert _process(index, "api.py", other, stats) == other
+    assert index.files_collapsed == 2 and stats.files_near_duplicate == 2 and index.bytes_saved > 0
+
+
+def test_reference_mode_and_small_files():
+    index = NearDuplicateIndex(dict(SETTINGS, mode='reference'), "/tmp")
+    stats = DumpStats()
+    _process(index, "a.py", _migration(1), stats)
+    assert _process(index, "b.py", _migration(1), stats).endswith("; content omitted]\n")
+    assert _process(index, "tiny1.py", "x = 1\n", stats) == "x = 1\n" # Below min_lines: never collapsed
+    assert _process(index, "tiny2.py", "x = 1\n", stats) == "x = 1\n"
+
+
+def test_large_diffs_are_written_in_full():
+    index = NearDuplicateIndex(dict(SETTINGS, threshold=0.5, max_diff_ratio=0.01), "/tmp")
+    stats = DumpStats()
+    _process(index, "a.py", _migration(1), stats)
+    changed = _migration(2, changed="    op.execute('x')")
+    assert _process(index, "b.py", changed, stats) == changed
+    assert index.files_collapsed == 0
+
+
+def _digest(text: str) -> str:
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()[:16]
+
+
+def test_index_hash_describes_the_collapsed_block(project, config_manager, tmp_path):
+    files = {"m/0001.py": _migration(1), "m/0002.py": _migration(2, changed="    op.drop_table('old')")}
+    write_files(project, files)
+    collapsed = NearDuplicateIndex(SETTINGS, "/tmp")
+    emitted = {rel_path: _process(collapsed, rel_path, content, DumpStats()) for rel_path, content in files.items()}
+
+    output_settings = config_manager.get_output_settings()
+    near_duplicates = NearDuplicateIndex(SETTINGS, str(project))
+    pipeline = DumpPipeline(FilterStage(output_settings, str(project)), ReadStage(),
+                            TransformStage(project, output_settings, None, None, str(project),
+                                           near_duplicates=near_duplicates), str(project))
+    dump_path = tmp_path / "dump.txt"
+    index_writer = DumpIndexWriter(dump_path, {})
+    with DumpWriter(dump_path) as writer:
+        pipeline.run(WalkStage(config_manager), WriteStage(writer, index_writer=index_writer,
+                                                           near_duplicates=near_duplicates))
+    index_writer.save(writer.offset)
+
+    assert near_duplicates.files_collapsed == 1
+    with DumpIndex.open(dump_path) as index:
+        for rel_path, content in emitted.items():
+            assert index.lookup(rel_path).content_hash == _digest(content)
+        assert index.lookup("m/0002.py").content_hash != _digest(files["m/0002.py"])
+
+# --- END OF FILE tests/test_near_duplicates.py ---
@@ -0,0 +1,66 @@
+# --- START OF FILE tests/test_ordering.py ---
+import os
+
+import git
+
+from conftest import write_files
+from utils.dump_pipeline import DumpItem
+from utils.manifest import DumpManifest
+from utils.ordering import OutputOrder, path_sort_key
+
+
+def _items(project, rel_paths):
+    return [DumpItem(index=i, path=project / rel, rel_path=rel) for i, rel in enumerate(rel_paths)]
+
+
+def _order(config_manager, mode, rel_paths):
+    order = OutputOrder(mode, config_manager, str(config_manager.project_dir))
+    items = order.sort(_items(config_manager.project_dir, rel_paths))
+    assert [item.index for item in items] == list(range(len(items)))
+    return [item.rel_path for item in items], order.basis
+
+
+def test_sorted_keeps_directories_together(config_manager):
+    assert sorted(["a.b/c.py", "a/b.py", "a/a/z.py"], key=path_sort_key) == ["a/a/z.py", "a/b.py", "a.b/c.py"]
+    assert _order(config_manager, 'sorted', ["b.py", "a/z.py", "a.py"])[0] == ["a/z.py", "a.py", "b.py"]
+    assert _order(config_manager, 'walk', ["b.py", "a.py"])[0] == ["b.py", "a.py"]
+
+
+def test_stability_from_git_history(project, config_manager):
+    repo = git.Repo.init(project)
+    with repo.config_writer() as writer:
+        writer.set_value("user", "name", "test")
+        writer.set_value("user", "email", "test@example.com")
+    write_files(project, {"hot.py": "1\n", "cold.py": "1\n", "warm.py": "1\n"})
+    repo.git.add("hot.py", "cold.py", "warm.py")
+    repo.index.commit("first")
+    for i in range(2):
+        write_files(project, {"hot.py": f"{i + 2}\n"})
+        repo.git.add("hot.py")
+        repo.index.commit(f"hot {i}")
+    write_files(project, {"warm.py": "changed\n", "new.py": "1\n"})
+
+    rel_paths, basis = _order(config_manager, 'stability', ["new.py", "hot.py", "warm.py", "cold.py"])
+    assert basis == "stability (git history)"
+    # Committed files by change count, then working tree changes (by count, then path)
+    assert rel_paths == ["cold.py", "hot.py", "new.py", "warm.py"]
+    assert (project / ".dump" / "change_counts.json").exists()
+
+
+def test_stability_from_the_last_manifest_without_git(project, config_manager):
+    write_files(project, {"old.py": "1\n", "young.py": "1\n", "changed.py": "1\n"})
+    os.utime(project / "old.py", ns=(10**18, 10**18))
+    os.utime(project / "young.py", ns=(2 * 10**18, 2 * 10**18))
+    manifest = DumpManifest(config_manager.dump_dir_path, project)
+    for rel in ("old.py", "young.py", "changed.py"):
+        st = os.stat(project / rel)
+        manifest.record(rel, st.st_size, st.st_mtime_ns)
+    manifest.save()
+    write_files(project, {"changed.py": "different size\n"})
+
+    rel_paths, basis = _order(config_manager, 'stability', ["changed.py", "young.py", "new.py", "old.py"])
+    assert basis == "stability (last manifest)"
+    assert rel_paths[:2] == ["old.py", "young.py"]
+    assert sorted(rel_paths[2:]) == ["changed.py", "new.py"]
+
+# --- END OF FILE tests/test_ordering.py ---
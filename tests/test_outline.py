@@ -0,0 +1,114 @@
+# --- START OF FILE tests/test_outline.py ---
+from pathlib import Path
+
+from utils.dump_pipeline import DumpItem, DumpStats
+from utils.outline import Outliner, outline_braces, outline_python, outline_text
+
+
+def test_braces_collapse_bodies_and_keep_members():
+    text = outline_braces(
+        "/** Greets people.\n * More text. */\n"
+        "export class Greeter extends Base {\n"
+        "  private name: string = 'x';\n"
+        "  greet(who: string): string { if (who) { return `hi ${who}`; } return ''; }\n"
+        "}\n"
+        "function helper() { const o = { a: '}' }; return o; }\n")
+    assert text == ("/** Greets people. */\n"
+                    "export class Greeter extends Base {\n"
+                    "  private name: string = 'x';\n"
+                    "  greet(who: string): string { ... }\n"
+                    "}\n"
+                    "function helper() { ... }\n")
+
+
+def test_braces_regex_literals_do_not_count():
+    text = outline_braces("const re = /[{]/g;\n"
+                          "function strip(s) { return s.replace(/\\}+$/, \"\"); }\n"
+                          "function after() { return 1; }\n")
+    assert text == ("const re = /[{]/g;\n"
+                    "function strip(s) { ... }\n"
+                    "function after() { ... }\n")
+
+
+def test_braces_division_is_not_a_regex():
+    text = outline_braces("const a = total / 2 / count;\nfunction f(x) { return (x) / 2; }\nfunction g() { }\n")
+    assert text == "const a = total / 2 / count;\nfunction f(x) { ... }\nfunction g() { ... }\n"
+
+
+def test_braces_keep_import_and_export_lists():
+    source = ('import { a, b as c } from "./m";\n'
+              'import type { T } from "./types";\n'
+              'import D, {\n  x,\n} from "./n"\n'
+              'export { a, c };\n'
+              'export default { key: 1 };\n')
+    assert outline_braces(source) == source.replace("{ key: 1 }", "{ ... }")
+
+
+def test_python_outline():
+    text = outline_python(
+        '"""Module doc.\n\nMore."""\n'
+        'import os\n'
+        'LIMIT = 3\n'
+        'counter = 0\n'
+        '\n'
+        '@decorator\n'
+        'def run(a: int,\n'
+        '        b: int = 2) -> int:\n'
+        '    """Run it.\n\n    Details."""\n'
+        '    return a + b\n'
+        '\n'
+        'class Box(Base):\n'
+        '    size: int = 1\n'
+        '    def area(self):\n'
+        '        return self.size ** 2\n')
+    assert text == ('"""Module doc."""\n'
+                    '\n'
+                    'import os\n'
+                    'LIMIT = 3\n'
+                    '\n'
+                    '@decorator\n'
+                    'def run(a: int,\n'
+                    '        b: int = 2) -> int:\n'
+                    '    """Run it."""\n'
+                    '    ...\n'
+                    '\n'
+                    'class Box(Base):\n'
+                    '    size: int = 1\n'
+                    '    def area(self):\n'
+                    '        ...\n')
+
+
+def test_outline_text_by_extension():
+    assert outline_text("a.md", "# x\n") is None
+    assert outline_text("A.JAVA", "class A { void f() { g(); } }\n") == "class A { void f() { ... } }\n"
+
+
+def _item(rel_path: str, content: str, content_hash: str) -> DumpItem:
+    return DumpItem(index=0, path=Path(rel_path), rel_path=rel_path, content=content, content_hash=content_hash)
+
+
+def test_outliner_caches_by_content_hash(tmp_path):
+    settings = {'enabled': True, 'patterns': []}
+    outliner = Outliner(settings, tmp_path, str(tmp_path))
+    item = _item("m.py", "def f():\n    return 1\n", "h1")
+    outliner.process(item, DumpStats())
+    assert item.outlined and item.content == "def f():\n    ...\n"
+    outliner.save()
+
+    reloaded = Outliner(settings, tmp_path, str(tmp_path))
+    cached = _item("m.py", "not parsed, served from the cache", "h1")
+    reloaded.process(cached, DumpStats())
+    assert cached.content == "def f():\n    ...\n"
+    assert reloaded.cached == 1 and reloaded.parsed == 0
+
+    Outliner(settings, tmp_path, str(tmp_path)).save(prune_unseen=True) # Saw nothing: entry pruned
+    assert Outliner(settings, tmp_path, str(tmp_path))._cache == {}
+
+
+def test_outliner_keeps_unparsable_files(tmp_path):
+    outliner = Outliner({'enabled': False, 'patterns': ['*.py']}, tmp_path, str(tmp_path))
+    item = _item("bad.py", "def (:\n", "h2")
+    outliner.process(item, DumpStats())
+    assert not item.outlined and item.content == "def (:\n"
+
+# --- END OF FILE tests/test_outline.py ---
@@ -0,0 +1,97 @@
+# --- START OF FILE tests/test_plan.py ---
+import subprocess
+import sys
+from pathlib import Path
+
+import toml
+
+from conftest import write_files
+from utils.ordering import OutputOrder
+from utils.plan import DumpPlan, PlanSource
+
+CREATE_DUMP = Path(__file__).parent.parent / "scripts" / "create_dump.py"
+
+
+def _output_settings(config_manager, **overrides):
+    settings = config_manager.get_output_settings()
+    settings.update(overrides)
+    return settings
+
+
+def test_plan_estimates_without_reading_and_counts_exclusions(project, config_manager):
+    write_files(project, {"a.py": "a" * 100, "pkg/b.py": "b" * 50, "big.txt": "x" * 5000,
+                          "node_modules/x.js": "x" * 10, "c.pyc": "c"})
+    settings = _output_settings(config_manager, max_file_size=1000, include_file_headers=False)
+    plan = DumpPlan(config_manager).build(settings)
+    entries = {rel: (size, estimate, note) for rel, size, estimate, note in plan.entries()}
+    separator = entries["a.py"][1] - 100 - len("a.py")
+    assert entries["pkg/b.py"] == (50, 50 + separator + len("pkg/b.py"), '')
+    assert entries["big.txt"] == (5000, 0, 'skipped:large')
+    assert "node_modules/x.js" not in entries and "c.pyc" not in entries
+    assert sum(counts[1] for counts in plan.excluded.values()) >= 1 # node_modules as a directory
+    assert sum(counts[0] for counts in plan.excluded.values()) >= 1 # c.pyc as a file
+    assert plan.estimated_tokens(4) == plan.estimated_bytes // 4
+    assert plan.report(4)[0] == f"Files: 3 ({100 + 50 + 5000} bytes on disk)"
+
+
+def test_size_policies_are_estimated(project, config_manager):
+    write_files(project, {"app.log.txt": "x" * 5000})
+    policy = {'pattern': "*.log.txt", 'mode': 'head_tail', 'head_bytes': 100, 'tail_bytes': 200}
+    settings = _output_settings(config_manager, max_file_size=1000, size_policies=[policy], include_file_headers=False)
+    (_rel, _size, estimate, note), = DumpPlan(config_manager).build(settings).entries()
+    assert note == "truncated:head_tail" and estimate > 300 and estimate < 400
+
+
+def test_saved_plan_round_trip(project, config_manager):
+    write_files(project, {"a.py": "a\n", "src/b.py": "b\n", "src/c.py": "c\n"})
+    plan = DumpPlan(config_manager, scopes=["src"]).build(config_manager.get_output_settings())
+    plan.save()
+
+    loaded = DumpPlan.load(config_manager)
+    try:
+        assert list(loaded.entries()) == list(plan.entries())
+        assert loaded.scopes == ["src"] and loaded.rules == config_manager.get_rules_fingerprint()
+        assert loaded.created == plan.created and loaded.excluded == plan.excluded
+        source = PlanSource(loaded)
+        assert not source.complete and source.total == 2
+        assert [item.rel_path for item in source.iter_items()] == list(loaded.inventory.paths()) # Walk order
+        sorted_source = PlanSource(loaded, order=OutputOrder('sorted', config_manager, str(project)))
+        assert [(item.index, item.rel_path) for item in sorted_source.iter_items()] == [(0, "src/b.py"), (1, "src/c.py")]
+    finally:
+        loaded.close()
+
+
+def test_missing_or_other_version_plan_is_not_loaded(project, config_manager):
+    assert DumpPlan.load(config_manager) is None
+    plan = DumpPlan(config_manager)
+    plan.save()
+    plan.inventory.meta['version'] = DumpPlan.PLAN_VERSION - 1
+    plan.inventory.save(plan.plan_path)
+    assert DumpPlan.load(config_manager) is None
+
+
+def test_plan_and_from_plan_cli(project):
+    write_files(project, {"a.py": "a = 1\n", "b.py": "b = 2\n"})
+    result = subprocess.run([sys.executable, str(CREATE_DUMP), str(project), "--plan"], capture_output=True, text=True)
+    assert result.returncode == 0, result.stdout
+    assert (project / "dump_plan.txt").exists() and not (project / "dump.txt").exists()
+
+    write_files(project, {"late.py": "late = 3\n"}) # Not in the plan
+    result = subprocess.run([sys.executable, str(CREATE_DUMP), str(project), "--from-plan"], capture_output=True, text=True)
+    assert result.returncode == 0, result.stdout
+    dump = (project / "dump.txt").read_text(encoding="utf-8")
+    assert "a = 1" in dump and "b = 2" in dump and "late = 3" not in dump
+
+
+def test_ceiling_stops_before_anything_is_written(project):
+    write_files(project, {"a.py": "a = 1\n" * 1000})
+    subprocess.run([sys.executable, str(CREATE_DUMP), str(project), "--plan"], check=True, capture_output=True)
+    config_path = project / ".dump" / ".dump_config"
+    config = toml.load(config_path)
+    config['plan']['max_tokens'] = 10
+    config_path.write_text(toml.dumps(config), encoding='utf-8')
+    result = subprocess.run([sys.executable, str(CREATE_DUMP), str(project)], capture_output=True, text=True)
+    assert result.returncode == 2 and "exceeds [plan] max_tokens" in result.stdout
+    assert not (project / "dump.txt").exists()
+
+# --- END OF FILE tests/test_plan.py ---
@@ -0,0 +1,66 @@
+# --- START OF FILE tests/test_profiles.py ---
+import subprocess
+import sys
+from pathlib import Path
+
+from conftest import write_files
+from utils.dump_pipeline import DumpItem
+from utils.profiles import DumpProfile, ProfileSource, profile_dump_filename
+
+CREATE_DUMP = Path(__file__).parent.parent / "scripts" / "create_dump.py"
+OUTPUT = {'max_file_size': 1000, 'include_file_headers': True}
+
+
+def _profile(name="p", include=(), exclude=(), max_file_size=None, headers=None):
+    settings = {'include': list(include), 'exclude': list(exclude), 'max_file_size': max_file_size,
+                'include_file_headers': headers}
+    return DumpProfile(name, settings, Path("/project"), OUTPUT)
+
+
+def test_dump_filename_is_sanitized():
+    assert profile_dump_filename("back end/x") == "dump_back_end_x.txt"
+
+
+def test_include_and_exclude_patterns():
+    profile = _profile(include=["backend/", "*.md"], exclude=["test_*.py"])
+    assert profile.wants_path("backend/app/main.py")
+    assert profile.wants_path("docs/readme.md")
+    assert not profile.wants_path("backend/test_main.py")
+    assert not profile.wants_path("frontend/app.js")
+    assert _profile().wants_path("anything.txt")
+
+
+def test_size_limit_only_narrows_the_global_one():
+    assert _profile(max_file_size=5000).max_file_size is None
+    small = _profile(max_file_size=10)
+    assert small.accepts(DumpItem(index=0, path=Path("/project/a.py"), rel_path="a.py", size=10))
+    assert not small.accepts(DumpItem(index=0, path=Path("/project/a.py"), rel_path="a.py", size=11))
+    assert _profile(headers=False).output_settings['include_file_headers'] is False
+
+
+def test_profile_source_drops_unwanted_files_and_renumbers():
+    class Source:
+        def iter_items(self):
+            return iter([DumpItem(index=i, path=Path(rel), rel_path=rel)
+                         for i, rel in enumerate(["a/x.py", "b/y.py", "a/z.py"])])
+
+    items = list(ProfileSource(Source(), [_profile(include=["a/"])]).iter_items())
+    assert [(item.index, item.rel_path) for item in items] == [(0, "a/x.py"), (1, "a/z.py")]
+
+
+def _configure_profiles(project: Path) -> None:
+    subprocess.run([sys.executable, str(CREATE_DUMP), str(project)], check=True, capture_output=True)
+    with open(project / ".dump" / ".dump_config", "a", encoding="utf-8") as f:
+        f.write('\n[profiles.backend]\ninclude = ["backend/"]\n\n[profiles.web]\ninclude = ["web/"]\n')
+
+
+def test_profile_options_do_not_swallow_the_directory(project):
+    write_files(project, {"backend/a.py": "x = 1\n", "web/b.js": "let y;\n"})
+    _configure_profiles(project)
+    subprocess.run([sys.executable, str(CREATE_DUMP), "--profile", "web", str(project)], check=True, capture_output=True)
+    assert (project / "dump_web.txt").exists() and not (project / "dump_backend.txt").exists()
+    subprocess.run([sys.executable, str(CREATE_DUMP), "--all-profiles", str(project)], check=True, capture_output=True)
+    assert "a.py" in (project / "dump_backend.txt").read_text(encoding="utf-8")
+    assert "b.js" not in (project / "dump_backend.txt").read_text(encoding="utf-8")
+
+# --- END OF FILE tests/test_profiles.py ---
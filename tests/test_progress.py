@@ -0,0 +1,78 @@
+# --- START OF FILE tests/test_progress.py ---
+import io
+import time
+
+import utils.progress as progress_module
+from utils.progress import ProgressReporter, _format_duration
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class _Flight:
+    def __init__(self):
+        self.phases = []
+
+    def set_phase(self, phase, progress):
+        self.phases.append(phase)
+
+
+def test_format_duration():
+    assert _format_duration(5) == "0:05"
+    assert _format_duration(125.9) == "2:05"
+    assert _format_duration(3725) == "1:02:05"
+
+
+def test_render_rates_and_eta(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(progress_module.time, "monotonic", clock)
+    counters = {'files_done': 0, 'bytes_written': 0}
+    reporter = ProgressReporter(enabled=False)
+    reporter.set_phase("writing", lambda: dict(counters), lambda: 100)
+    clock.now += 3
+    assert reporter.render() == "writing | collecting files (0:03)"
+
+    counters.update(files_done=10, bytes_written=0)
+    reporter.render() # Rates are measured from the first finished file
+    clock.now += 10
+    counters.update(files_done=50, bytes_written=20 * 1024 * 1024)
+    assert reporter.render() == "writing | 50/100 files (50%) | 5 files/s | 2.0 MB/s | ETA 0:10"
+
+
+def test_unknown_total_has_no_eta(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(progress_module.time, "monotonic", clock)
+    reporter = ProgressReporter(enabled=False)
+    reporter.set_phase("writing", lambda: {'files_done': 4}, lambda: None)
+    assert reporter.render() == "writing | 4 files | 16 files/s"
+
+
+def test_disabled_reporter_draws_nothing_but_publishes_phases():
+    stream = io.StringIO()
+    flight = _Flight()
+    reporter = ProgressReporter(flight, stream=stream)
+    reporter.set_phase("collecting files")
+    reporter.set_phase("writing", lambda: {'files_done': 1})
+    reporter.stop()
+    assert stream.getvalue() == "" and flight.phases == ["collecting files", "writing"]
+
+
+def test_enabled_reporter_redraws_and_clears_the_line(monkeypatch):
+    monkeypatch.setattr(ProgressReporter, "UPDATE_INTERVAL", 0.01)
+    stream = io.StringIO()
+    reporter = ProgressReporter(stream=stream, enabled=True)
+    reporter.set_phase("writing", lambda: {'files_done': 3}, lambda: 6)
+    deadline = time.monotonic() + 5
+    while "3/6 files" not in stream.getvalue() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    reporter.stop()
+    assert "\rwriting | 3/6 files (50%)" in stream.getvalue()
+    assert stream.getvalue().endswith("\r")
+    reporter.stop() # Idempotent
+
+# --- END OF FILE tests/test_progress.py ---
@@ -0,0 +1,177 @@
+# --- START OF FILE tests/test_search_index.py ---
+import os
+
+import git
+import pytest
+
+import utils.search_index as search_index_module
+from conftest import write_files
+from utils.manifest import DumpManifest
+from utils.search_index import SearchHit, SearchIndex, select_within_budget, tokenize
+
+FILES = {
+    "users.py": "def get_user_name(user):\n    return user.name\n",
+    "cache.py": "class IgnoreCache:\n    def prune(self):\n        pass\n",
+    "docs/readme.md": "The ignore cache stores decisions per directory.\n",
+}
+
+
+def _search(index, query):
+    return [hit.rel_path for hit in index.search(query)]
+
+
+def _record_dump(project, config_manager):
+    """Write a manifest like a full dump does."""
+    manifest = DumpManifest(config_manager.dump_dir_path, project)
+    for root, _dirs, files in os.walk(project):
+        for name in files:
+            path = os.path.join(root, name)
+            rel_path = os.path.relpath(path, project).replace(os.sep, '/')
+            if not rel_path.startswith(".dump/"):
+                st = os.stat(path)
+                manifest.record(rel_path, st.st_size, st.st_mtime_ns)
+    manifest.save()
+
+
+def _forbid_walk(monkeypatch):
+    monkeypatch.setattr(search_index_module, "walk_project", lambda *args, **kwargs: pytest.fail("walked the tree"))
+
+
+def test_tokenize_splits_identifiers():
+    assert tokenize("getUserName") == ["getusername", "get", "user", "name"]
+    assert tokenize("HTTPServer_v2 x 42") == ["httpserver_v2", "http", "server"]
+    assert tokenize("ignore_cache") == ["ignore_cache", "ignore", "cache"]
+
+
+def test_select_within_budget():
+    hits = [SearchHit("a", 3.0, 60), SearchHit("b", 2.0, 50), SearchHit("c", 1.0, 30)]
+    assert [h.rel_path for h in select_within_budget(hits, 100)] == ["a", "c"]
+    assert [h.rel_path for h in select_within_budget(hits, 100, max_files=1)] == ["a"]
+
+
+def test_search_ranks_and_persists(project, config_manager):
+    write_files(project, FILES)
+    index = SearchIndex(config_manager)
+    assert index.update(10_000) == (3, 0)
+    index.save()
+    assert sorted(_search(index, "ignore cache")) == ["cache.py", "docs/readme.md"]
+    assert _search(index, "user name") == ["users.py"]
+    assert index.search("unknownterm") == []
+
+    reloaded = SearchIndex(config_manager)
+    assert len(reloaded) == 3
+    assert _search(reloaded, "ignore cache") == _search(index, "ignore cache")
+
+
+@pytest.mark.parametrize("merge_min_docs", [1000, 1])
+def test_base_and_delta_give_the_same_ranking(project, config_manager, monkeypatch, merge_min_docs):
+    monkeypatch.setattr(SearchIndex, "MERGE_MIN_DOCS", merge_min_docs)
+    write_files(project, FILES)
+    index = SearchIndex(config_manager)
+    index.update(10_000)
+    index.save()
+    write_files(project, {"users.py": "def rename_user(): pass\n", "more.py": "cache = IgnoreCache()\n"})
+    os.remove(project / "docs" / "readme.md")
+    assert index.update(10_000) == (2, 1)
+    index.save()
+
+    reloaded = SearchIndex(config_manager)
+    if merge_min_docs == 1:
+        assert (project / ".dump" / SearchIndex.POSTINGS_FILENAME).exists() and not reloaded.delta_files
+    fresh_dir = project / ".dump" / "fresh"
+    config_manager.dump_dir_path, original = fresh_dir, config_manager.dump_dir_path
+    fresh = SearchIndex(config_manager)
+    fresh.update(10_000)
+    config_manager.dump_dir_path = original
+    for query in ("ignore cache", "user", "rename"):
+        assert [(h.rel_path, round(h.score, 9)) for h in reloaded.search(query)] == \
+               [(h.rel_path, round(h.score, 9)) for h in fresh.search(query)]
+    assert sorted(reloaded.paths()) == ["cache.py", "more.py", "users.py"]
+
+
+def test_changes_are_taken_from_the_manifest_of_the_last_dump(project, config_manager, monkeypatch):
+    write_files(project, FILES)
+    index = SearchIndex(config_manager)
+    index.update(10_000)
+    index.save()
+
+    write_files(project, {"new.py": "def fresh_feature(): pass\n"})
+    os.remove(project / "cache.py")
+    _record_dump(project, config_manager)
+    _forbid_walk(monkeypatch)
+    index = SearchIndex(config_manager)
+    assert index.update(10_000) == (1, 1)
+    assert _search(index, "fresh feature") == ["new.py"]
+    monkeypatch.undo()
+    assert index.update(10_000) == (0, 0) # Same manifest, no git: walked and stat'ed, nothing changed
+
+
+def test_changes_without_git_or_a_new_manifest_are_found_by_stat(project, config_manager):
+    write_files(project, FILES)
+    _record_dump(project, config_manager)
+    index = SearchIndex(config_manager)
+    index.update(10_000)
+    index.save()
+
+    write_files(project, {"users.py": "def renamed_account(): pass\n", "new.py": "def fresh_feature(): pass\n"})
+    os.remove(project / "cache.py")
+    index = SearchIndex(config_manager)
+    assert index.update(10_000) == (2, 1) # --query runs write no manifest
+    index.save()
+    assert _search(index, "renamed account") == ["users.py"]
+    assert _search(index, "fresh feature") == ["new.py"]
+    assert sorted(index.paths()) == ["docs/readme.md", "new.py", "users.py"]
+    assert SearchIndex(config_manager).update(10_000) == (0, 0)
+
+
+def test_changes_are_taken_from_git(project, config_manager, monkeypatch):
+    repo = git.Repo.init(project)
+    with repo.config_writer() as writer:
+        writer.set_value("user", "name", "test")
+        writer.set_value("user", "email", "test@example.com")
+    write_files(project, FILES)
+    repo.git.add("users.py", "cache.py", "docs/readme.md")
+    repo.index.commit("snapshot")
+    index = SearchIndex(config_manager)
+    index.update(10_000)
+    index.save()
+
+    _forbid_walk(monkeypatch)
+    write_files(project, {"users.py": "def renamed_account(): pass\n", "untracked.py": "brand_new = 1\n"})
+    index = SearchIndex(config_manager)
+    assert index.update(10_000) == (2, 0)
+    index.save()
+    assert _search(index, "renamed account") == ["users.py"]
+    assert _search(index, "brand new") == ["untracked.py"]
+
+    repo.git.checkout("--", "users.py") # Reverted: git no longer reports it, the index still has to
+    index = SearchIndex(config_manager)
+    assert index.update(10_000) == (1, 0)
+    assert _search(index, "user name") == ["users.py"]
+
+
+def test_changed_ignore_rules_rebuild_from_a_walk(project, config_manager):
+    write_files(project, FILES)
+    index = SearchIndex(config_manager)
+    index.update(10_000)
+    index.save()
+    config_manager.add_ignored_paths([str(project / "docs")])
+    index = SearchIndex(config_manager)
+    assert index.update(10_000) == (0, 1)
+    assert "docs/readme.md" not in index.paths()
+
+
+def test_mismatching_base_files_are_rebuilt(project, config_manager, monkeypatch):
+    monkeypatch.setattr(SearchIndex, "MERGE_MIN_DOCS", 1)
+    write_files(project, FILES)
+    index = SearchIndex(config_manager)
+    index.update(10_000)
+    index.save()
+    index.close()
+    postings = project / ".dump" / SearchIndex.POSTINGS_FILENAME
+    postings.write_bytes(postings.read_bytes()[:8] + b"\0" * 8) # Other generation
+    index = SearchIndex(config_manager)
+    assert len(index) == 0
+    assert index.update(10_000) == (3, 0)
+
+# --- END OF FILE tests/test_search_index.py ---
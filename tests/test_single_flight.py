@@ -0,0 +1,75 @@
+# --- START OF FILE tests/test_single_flight.py ---
+import os
+import socket
+import threading
+import time
+
+from conftest import write_files
+from utils.single_flight import DumpSingleFlight, config_fingerprint, dump_request_key
+
+
+def test_request_key_is_stable_and_covers_parameters(tmp_path):
+    assert dump_request_key(tmp_path, rev="HEAD", paths=["a", "b"]) == dump_request_key(tmp_path, paths=["a", "b"], rev="HEAD")
+    assert dump_request_key(tmp_path, rev="HEAD") != dump_request_key(tmp_path, rev="HEAD~1")
+    assert dump_request_key(tmp_path, rev="HEAD") != dump_request_key(tmp_path / "other", rev="HEAD")
+
+
+def test_request_key_covers_config_and_ignore_rules(tmp_path):
+    before = dump_request_key(tmp_path, rev=None)
+    for rel_path, content in ((".dump/.dump_config", "[output]\n"), (".dump/.dump_ignore", "build\n"), (".gitignore", "*.log\n")):
+        fingerprint = config_fingerprint(tmp_path)
+        write_files(tmp_path, {rel_path: content})
+        assert config_fingerprint(tmp_path) != fingerprint
+    assert dump_request_key(tmp_path, rev=None) != before
+
+
+def test_config_fingerprint_tells_empty_from_missing(tmp_path):
+    missing = config_fingerprint(tmp_path)
+    write_files(tmp_path, {".gitignore": ""})
+    assert config_fingerprint(tmp_path) != missing
+
+
+def test_owner_records_result_and_waiter_reuses_it(tmp_path):
+    dump_dir = tmp_path / ".dump"
+    dump_path = tmp_path / "dump.txt"
+    owner = DumpSingleFlight(dump_dir, "k")
+    assert owner.acquire_or_wait() is None
+    assert owner.read_status()['state'] == 'running'
+
+    waiter = DumpSingleFlight(dump_dir, "k")
+    waiter.POLL_SECONDS = 0.01
+    reused = {}
+    thread = threading.Thread(target=lambda: reused.setdefault('status', waiter.acquire_or_wait()))
+    thread.start()
+    time.sleep(0.05)
+    dump_path.write_text("x", encoding='utf-8')
+    owner.finish(True, dump_path, files=1)
+    owner.release()
+    thread.join(5)
+    assert reused['status']['state'] == 'done'
+    assert reused['status']['dump_path'] == str(dump_path)
+    assert not waiter.lock._fd # Reusing does not keep the lock
+
+
+def test_other_request_does_not_reuse(tmp_path):
+    dump_dir = tmp_path / ".dump"
+    owner = DumpSingleFlight(dump_dir, "a")
+    owner.acquire_or_wait()
+    (tmp_path / "dump.txt").write_text("x", encoding='utf-8')
+    owner.finish(True, tmp_path / "dump.txt")
+    owner.release()
+    other = DumpSingleFlight(dump_dir, "b")
+    assert other.acquire_or_wait() is None
+    other.release()
+    assert other.read_status()['state'] == 'failed' # Released without finish()
+
+
+def test_running_status_of_a_dead_owner_is_stale(tmp_path):
+    flight = DumpSingleFlight(tmp_path, "k")
+    status = {'state': 'running', 'pid': 2 ** 22 + 12345, 'host': socket.gethostname(), 'heartbeat': time.time()}
+    assert flight.is_stale(status)
+    assert not flight.is_stale(dict(status, pid=os.getpid()))
+    assert flight.is_stale(dict(status, pid=os.getpid(), heartbeat=0))
+    assert not flight.is_stale(dict(status, state='done'))
+
+# --- END OF FILE tests/test_single_flight.py ---
@@ -0,0 +1,62 @@
+# --- START OF FILE tests/test_truncation.py ---
+import io
+
+import pytest
+
+from utils.truncation import find_size_policy, read_truncated, render_truncated
+
+LINES = b"".join(b"line %03d\n" % i for i in range(100)) # 9 bytes per line, 900 bytes
+
+
+def _render(data: bytes, **policy):
+    pieces = read_truncated(io.BytesIO(data), len(data), policy)
+    return pieces, render_truncated(pieces, len(data))
+
+
+def test_first_matching_policy_wins():
+    policies = [{'pattern': "logs/*.log", 'mode': 'head'}, {'pattern': "*.log", 'mode': 'head_tail'}]
+    assert find_size_policy(policies, "logs/app.log")['mode'] == 'head'
+    assert find_size_policy(policies, "deep/dir/app.log")['mode'] == 'head_tail' # File name match
+    assert find_size_policy(policies, "app.txt") is None
+
+
+def test_head_cuts_after_the_last_complete_line():
+    pieces, (text, omitted) = _render(LINES, mode='head', head_bytes=25)
+    assert pieces == [(0, b"line 000\nline 001\n")]
+    assert text == "line 000\nline 001\n[... 882 bytes omitted ...]\n" and omitted == 882
+
+
+def test_head_tail_keeps_whole_lines_at_both_ends():
+    pieces, (text, omitted) = _render(LINES, mode='head_tail', head_bytes=20, tail_bytes=22)
+    assert pieces == [(0, b"line 000\nline 001\n"), (882, b"line 098\nline 099\n")]
+    assert text == "line 000\nline 001\n[... 864 bytes omitted ...]\nline 098\nline 099\n" and omitted == 864
+
+
+def test_head_tail_overlap_is_not_duplicated():
+    data = b"a\nb\nc\n"
+    pieces, (text, omitted) = _render(data, mode='head_tail', head_bytes=4, tail_bytes=100)
+    assert text == "a\nb\nc\n" and omitted == 0
+    assert b"".join(piece for _offset, piece in pieces) == data
+
+
+def test_sample_reads_evenly_spaced_lines():
+    pieces, (text, _omitted) = _render(LINES, mode='sample', sample_lines=4)
+    # Each sample starts at the first line beginning after its offset (0, 225, 450, 675)
+    assert [offset for offset, _data in pieces] == [0, 234, 459, 684]
+    assert text.splitlines()[0::2] == ["line 000", "line 026", "line 051", "line 076"]
+    assert text.count("omitted") == 4
+
+
+@pytest.mark.parametrize("cut", range(1, 8))
+def test_multibyte_characters_are_never_split(cut):
+    data = "äöü€𝄞".encode('utf-8') * 3 # No newline: cuts fall on byte positions
+    _pieces, (text, omitted) = _render(data, mode='head_tail', head_bytes=cut, tail_bytes=cut)
+    assert "�" not in text
+    assert omitted + len(text.replace("\n", "").split("[...")[0].encode('utf-8')) <= len(data)
+
+
+def test_unknown_mode_raises():
+    with pytest.raises(ValueError):
+        read_truncated(io.BytesIO(b"x"), 1, {'mode': 'middle'})
+
+# --- END OF FILE tests/test_truncation.py ---
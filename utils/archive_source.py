@@ -0,0 +1,208 @@
+# --- START OF FILE utils/archive_source.py ---
+import posixpath
+import stat
+import tarfile
+import threading
+import zipfile
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .dump_pipeline import DumpItem
+from .error_logger import log_error
+
+ARCHIVE_SUFFIXES = ('.zip', '.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tbz2', '.tar.xz', '.txz')
+
+
+def is_archive(path: Path) -> bool:
+    """True if the file name has a supported archive suffix (zip or tar, optionally compressed)."""
+    return path.name.lower().endswith(ARCHIVE_SUFFIXES)
+
+
+def _member_path(name: str) -> Optional[str]:
+    """Normalized relative member path, None for names that escape the archive root ('..', absolute)."""
+    name = name.replace('\\', '/')
+    while name.startswith('./'):
+        name = name[2:]
+    if name.startswith('/') or not name:
+        return None
+    normalized = posixpath.normpath(name)
+    if normalized == '.' or normalized.startswith('../') or normalized == '..':
+        return None
+    return normalized
+
+
+class ArchiveSource:
+    """
+    Pipeline source that reads the files of a zip or tar archive (also .tar.gz,
+    .tar.bz2, .tar.xz) without extracting it. Like GitRevisionSource, item
+    paths are virtual (project root / member path), so the project's ignore
+    rules, size limits and file headers apply exactly as for the working tree.
+
+    Members are listed from the headers first (the zip central directory; for
+    tar a header pass, which for compressed tars decompresses the stream once
+    without keeping any data). Sizes come from the headers, so FilterStage
+    drops large members before anything is decompressed. Directories matched
+    by the rules are pruned like in a walk. If all members share one top-level
+    directory (e.g. 'project-1.2/'), it is stripped so that root-anchored
+    rules match.
+
+    Files are produced in archive order. Zip members are read on demand; tar
+    members are read during a single streaming pass, up to max_file_size each
+    (larger members that a size policy or extractor keeps are read again by
+    random access).
+    """
+
+    def __init__(self, config_manager, archive_path: Path, max_file_size: int):
+        self.config_manager = config_manager
+        self.project_dir: Path = config_manager.project_dir
+        self.archive_path = archive_path
+        self.max_file_size = max_file_size
+        self.is_zip = zipfile.is_zipfile(archive_path)
+        self._lock = threading.Lock() # Members are read from pipeline worker threads in async mode
+        self._zip: Optional[zipfile.ZipFile] = None
+        self._tar: Optional[tarfile.TarFile] = None # Random access handle for the rare re-reads
+        self._dir_ignored: Dict[str, bool] = {'': False}
+        self.members_ignored = 0
+        self.members_skipped = 0 # Links, special files and unsafe names
+
+        if self.is_zip:
+            self._zip = zipfile.ZipFile(archive_path)
+            listing = self._list_zip()
+        elif tarfile.is_tarfile(archive_path):
+            listing = self._list_tar()
+        else:
+            raise ValueError(f"not a zip or tar archive: {archive_path}")
+        # Later members with the same name replace earlier ones (tar appends, like extraction does)
+        self._last: Dict[str, int] = {name: position for position, (name, _size) in enumerate(listing)}
+        self.prefix = self._common_prefix([name for name, _size in listing])
+        self.members: List[Tuple[str, int]] = listing
+        self.total = len(self._last) # Regular files (before the ignore rules)
+
+    def _list_zip(self) -> List[Tuple[str, int]]:
+        listing = []
+        for info in self._zip.infolist():
+            if info.is_dir():
+                continue
+            name = _member_path(info.filename)
+            if name is None or stat.S_ISLNK(info.external_attr >> 16):
+                self.members_skipped += 1
+                continue
+            listing.append((name, info.file_size))
+        return listing
+
+    def _list_tar(self) -> List[Tuple[str, int]]:
+        listing = []
+        with tarfile.open(self.archive_path, 'r:*') as tar:
+            for member in tar:
+                if member.isdir():
+                    continue
+                name = _member_path(member.name)
+                if name is None or not member.isfile():
+                    self.members_skipped += 1
+                    continue
+                listing.append((name, member.size))
+        return listing
+
+    @staticmethod
+    def _common_prefix(names: List[str]) -> str:
+        """'top/' if every member is below the same top-level directory, else ''."""
+        if not names or '/' not in names[0]:
+            return ''
+        top = names[0].split('/', 1)[0] + '/'
+        return top if all(name.startswith(top) for name in names) else ''
+
+    def file_names(self) -> List[str]:
+        """Base names of all members (for language detection)."""
+        return [posixpath.basename(name) for name, _size in self.members]
+
+    def _dir_is_ignored(self, rel_dir: str) -> bool:
+        """Ignore verdict of a virtual directory, including its ancestors (memoized, like walker pruning)."""
+        verdict = self._dir_ignored.get(rel_dir)
+        if verdict is None:
+            parent = posixpath.dirname(rel_dir)
+            verdict = self._dir_is_ignored(parent) or self.config_manager.is_ignored(str(self.project_dir / rel_dir))
+            self._dir_ignored[rel_dir] = verdict
+        return verdict
+
+    def _included(self, rel_path: str) -> bool:
+        if self._dir_is_ignored(posixpath.dirname(rel_path)):
+            return False
+        return not self.config_manager.is_ignored(str(self.project_dir / rel_path))
+
+    def _wanted(self, position: int, name: str) -> Optional[str]:
+        """Relative path of the member if it is dumped, None if it is replaced or ignored."""
+        if self._last.get(name) != position:
+            return None
+        rel_path = name[len(self.prefix):]
+        if not self._included(rel_path):
+            self.members_ignored += 1
+            return None
+        return rel_path
+
+    def iter_items(self) -> Iterator[DumpItem]:
+        """Yield one DumpItem per member that passes the ignore rules, in archive order."""
+        if self.is_zip:
+            yield from self._iter_zip()
+        else:
+            yield from self._iter_tar()
+
+    def _iter_zip(self) -> Iterator[DumpItem]:
+        index = 0
+        for position, (name, size) in enumerate(self.members):
+            rel_path = self._wanted(position, name)
+            if rel_path is None:
+                continue
+            yield DumpItem(index=index, path=self.project_dir / rel_path, size=size, rel_path=rel_path,
+                           reader=self._read_zip, source_key=name)
+            index += 1
+
+    def _read_zip(self, item: DumpItem) -> bytes:
+        with self._lock:
+            return self._zip.read(item.source_key)
+
+    def _iter_tar(self) -> Iterator[DumpItem]:
+        index = 0
+        position = 0
+        # Streaming mode: one sequential pass, data of skipped members is never kept
+        with tarfile.open(self.archive_path, 'r|*') as tar:
+            for member in tar:
+                if member.isdir():
+                    continue
+                name = _member_path(member.name)
+                if name is None or not member.isfile():
+                    continue
+                rel_path = self._wanted(position, name)
+                position += 1
+                if rel_path is None:
+                    continue
+                if member.size <= self.max_file_size:
+                    data = tar.extractfile(member).read()
+                    reader = lambda _item, data=data: data
+                else:
+                    reader = self._read_tar # Only read if a size policy or extractor keeps it
+                yield DumpItem(index=index, path=self.project_dir / rel_path, size=member.size, rel_path=rel_path,
+                               reader=reader, source_key=member.name)
+                index += 1
+
+    def _read_tar(self, item: DumpItem) -> bytes:
+        """Random access read of one tar member (for compressed tars this decompresses up to the member)."""
+        with self._lock:
+            if self._tar is None:
+                self._tar = tarfile.open(self.archive_path, 'r:*')
+            source_file = self._tar.extractfile(item.source_key)
+            if source_file is None:
+                raise OSError(f"Member {item.source_key} of {self.archive_path} is not a regular file")
+            with source_file:
+                return source_file.read()
+
+    def close(self) -> None:
+        for handle in (self._zip, self._tar):
+            if handle is not None:
+                try:
+                    handle.close()
+                except Exception as e:
+                    log_error(str(self.project_dir), f"Failed to close archive {self.archive_path}: {e}")
+        self._zip = None
+        self._tar = None
+
+# --- END OF FILE utils/archive_source.py ---
@@ -1,12 +1,17 @@
 # --- START OF FILE utils/config_manager.py ---
+import hashlib
 import os
 import toml
 import git # Make sure gitpython is installed if using this actively
+from contextlib import nullcontext
 from datetime import datetime
 from typing import Dict, List, Optional, Set, Tuple
 from pathlib import Path
 import fnmatch
+from .file_lock import FileLock
 from .ignore_manager import IgnoreManager
+from .ordering import ORDER_MODES
+from .truncation import SIZE_POLICY_MODES
 from .error_logger import log_error
 
 # --- Definition der Standard-Ignore-Patterns als Konstante ---
@@ -37,6 +42,13 @@ DEFAULT_STANDARD_IGNORE_PATTERNS: Tuple[str, ...] = (
     '.gitignore',    # Usually not needed in the dump itself
     'dump.txt'       # Ignore the tool's output file
 )
+
+# Outputs written by the tool itself into the project root. Always applied, also
+# for configs created before these outputs existed.
+TOOL_OUTPUT_PATTERNS: Tuple[str, ...] = (
+    '/dump_*.txt',   # Revision dumps (dump_<rev>.txt) and other named dumps
+    '/dump*.txt.idx',  # Sidecar indexes of the dumps
+)
 # --------------------------------------------------------------
 
 class ConfigManager:
@@ -111,7 +123,61 @@ class ConfigManager:
                 'format': 'text',
                 'include_line_numbers': False,
                 'include_file_headers': True,
-                'max_file_size': 1024 * 1024
+                'max_file_size': 1024 * 1024,
+                'write_index': True,
+                'size_policies': [],
+                'order': 'sorted'
+            },
+            'cache': {
+                'ignore_decisions': True
+            },
+            'pipeline': {
+                'mode': 'sync',
+                'queue_size': 64,
+                'filter_workers': 2,
+                'read_workers': 4,
+                'walk_workers': 1
+            },
+            'query': {
+                'budget_bytes': 200 * 1024,
+                'max_files': 50
+            },
+            'secrets': {
+                'action': 'redact',
+                'entropy_threshold': 3.0,
+                'allow_paths': []
+            },
+            'outline': {
+                'enabled': False,
+                'patterns': []
+            },
+            'extractors': {
+                'enabled': True,
+                'max_rows': 20,
+                'json_min_bytes': 64 * 1024,
+                'disabled': []
+            },
+            'generated': {
+                'action': 'summarize',
+                'vendored_hashes': [],
+                'allow_paths': []
+            },
+            'near_duplicates': {
+                'enabled': False,
+                'threshold': 0.8,
+                'mode': 'diff',
+                'min_lines': 20,
+                'max_diff_ratio': 0.5,
+                'memory_mb': 64
+            },
+            'plan': {
+                'max_tokens': 0,
+                'bytes_per_token': 4.0
+            },
+            'content_filter': {
+                'context_lines': 3,
+                'ignore_case': False,
+                'binary_probe_bytes': 8000
             }
         }
         if save:
@@ -162,10 +228,13 @@ class ConfigManager:
 
         self._ensure_dump_dir_exists()
         try:
-            with open(self.config_path, 'w', encoding='utf-8') as f:
+            # Write to a temp file and swap it in, so readers never see a partial config
+            tmp_path = self.config_path.with_name(f"{self.CONFIG_FILENAME}.{os.getpid()}.tmp")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
                 f.write("# Configuration for Grebber for AI\n")
                 f.write("# You can modify settings here, especially ignore patterns.\n\n")
                 toml.dump(config_to_save, f)
+            os.replace(tmp_path, self.config_path)
             # If we just saved a config passed as argument, update instance config?
             # Yes, makes sense if _create_default_config passes 'config' to save it.
             if config_to_save is not self.config:
@@ -222,6 +291,47 @@ class ConfigManager:
             # Path is expected to be relative to project root already
             self.local_ignore.add_path(path) # Delegate directly
 
+    def add_ignored_paths(self, paths: List[str], lock_held: bool = False) -> Tuple[List[str], List[str]]:
+        """
+        Add many absolute paths to the global ignore list in one locked
+        read-modify-write of .dump_config. The config is reloaded under the lock,
+        so entries added by concurrent processes are kept. Paths that are already
+        listed, or lie below a listed directory, are skipped.
+
+        Args:
+            paths: Paths to add (absolute, or relative to the project root).
+            lock_held: The caller already holds .dump/.dump_config.lock.
+        Returns:
+            (added, skipped) absolute path strings.
+        """
+        candidates = sorted({str(self._get_absolute_path(p)) for p in paths}, key=lambda p: (len(Path(p).parts), p))
+        added: List[str] = []
+        skipped: List[str] = []
+        config_lock = nullcontext() if lock_held else FileLock(self.dump_dir_path / (self.CONFIG_FILENAME + ".lock"))
+        with config_lock:
+            if self.config_path.exists():
+                try:
+                    with open(self.config_path, 'r', encoding='utf-8') as f:
+                        self.config = toml.load(f)
+                except Exception as e:
+                    log_error(str(self.project_dir), f"Failed to reload config file {self.config_path} before update: {e}")
+            ignore_section = self.config.setdefault('ignore', {})
+            if not isinstance(ignore_section.get('ignored_paths'), list):
+                ignore_section['ignored_paths'] = []
+            ignored_paths = ignore_section['ignored_paths']
+            listed = {Path(p) for p in ignored_paths}
+            for abs_path_str in candidates:
+                abs_path = Path(abs_path_str)
+                if abs_path in listed or any(parent in listed for parent in abs_path.parents):
+                    skipped.append(abs_path_str)
+                    continue
+                ignored_paths.append(abs_path_str)
+                listed.add(abs_path)
+                added.append(abs_path_str)
+            if added:
+                self.save_config()
+        return added, skipped
+
     def add_global_pattern(self, pattern: str) -> None:
         """Add a global ignore pattern (fnmatch style) to custom_patterns."""
         # Ensure ignore section and custom_patterns list exist
@@ -262,14 +372,23 @@ class ConfigManager:
         standard = set(self.config.get('ignore', {}).get('standard_patterns', []))
         custom = set(self.config.get('ignore', {}).get('custom_patterns', []))
         gitignore = set(self.gitignore_patterns) # Loaded during init
-        return standard.union(custom).union(gitignore)
+        return standard.union(custom).union(gitignore).union(TOOL_OUTPUT_PATTERNS)
 
     def get_ignored_paths(self) -> Set[str]:
         """Get all globally ignored absolute paths from config."""
         return set(self.config.get('ignore', {}).get('ignored_paths', []))
 
+    def get_rules_fingerprint(self) -> str:
+        """Hash of the effective rule set (patterns, .gitignore, .dump_ignore, ignored_paths)."""
+        parts = sorted(self.get_ignore_patterns()) + ['|'] + sorted(self.local_ignore.ignored_paths) + ['|'] + sorted(self.get_ignored_paths())
+        return hashlib.sha1("\n".join(parts).encode('utf-8')).hexdigest()
+
     def _matches_pattern(self, path_to_check: Path, relative_path_str: str) -> bool:
         """Checks if the path matches any ignore pattern (standard, custom, gitignore)."""
+        return self._matching_pattern(path_to_check, relative_path_str) is not None
+
+    def _matching_pattern(self, path_to_check: Path, relative_path_str: str) -> Optional[str]:
+        """Returns the first ignore pattern (standard, custom, gitignore) the path matches, or None."""
         file_name = path_to_check.name
         patterns = self.get_ignore_patterns()
         relative_path_str_norm = relative_path_str.replace('\\', '/')
@@ -283,48 +402,55 @@ class ConfigManager:
             if clean_pattern.endswith('/'):
                 pattern_base = clean_pattern.rstrip('/')
                 if path_to_check.is_dir() and (relative_path_str_norm == pattern_base or relative_path_str_norm.startswith(pattern_base + '/')):
-                     return True
+                     return pattern
                 # Check if item is within a dir matching the pattern
                 if relative_path_str_norm.startswith(pattern_base + '/'):
-                     return True
+                     return pattern
 
             # Handle root patterns (starting with /)
             elif clean_pattern.startswith('/'):
                  pattern_base = clean_pattern.lstrip('/')
                  # Match only from the root
                  if fnmatch.fnmatch(relative_path_str_norm, pattern_base):
-                      return True
+                      return pattern
 
             # Handle ** patterns (recursive matching)
             elif '**' in clean_pattern:
                 # Convert ** to proper fnmatch pattern
                 fnmatch_pattern = clean_pattern.replace('**', '*')
                 if fnmatch.fnmatch(relative_path_str_norm, fnmatch_pattern) or fnmatch.fnmatch(file_name, fnmatch_pattern):
-                    return True
+                    return pattern
 
             # General pattern matching (applies anywhere)
             else:
                 # Try matching the full relative path first
                 if fnmatch.fnmatch(relative_path_str_norm, clean_pattern):
-                    return True
+                    return pattern
                 # Then try matching just the filename
                 if fnmatch.fnmatch(file_name, clean_pattern):
-                    return True
+                    return pattern
                 # For directory patterns without trailing slash, check if path starts with pattern
                 if clean_pattern and not clean_pattern.endswith('*') and relative_path_str_norm.startswith(clean_pattern + '/'):
-                    return True
-        return False
+                    return pattern
+        return None
 
 
     def is_ignored(self, path: str) -> bool:
         """Check if a given path should be ignored based on all rules."""
+        return self.ignore_reason(path) is not None
+
+    def ignore_reason(self, path: str) -> Optional[str]:
+        """
+        Like is_ignored, but returns the rule that excludes the path ('ignored_paths',
+        '.dump_ignore', "pattern '<pattern>'" or 'error'), None if it is not ignored.
+        """
         try:
             abs_path_obj = self._get_absolute_path(path)
             abs_path_str = str(abs_path_obj)
 
             # 1. Check global absolute ignored paths
             if abs_path_str in self.get_ignored_paths():
-                return True
+                return 'ignored_paths'
 
             # Calculate relative path for local and pattern checks
             rel_path_str = abs_path_obj.name # Default to filename if outside project
@@ -339,21 +465,22 @@ class ConfigManager:
 
             # 2. Check local .dump_ignore (only if path is inside project)
             if is_within_project and self.local_ignore.is_ignored(rel_path_str):
-                return True
+                return '.dump_ignore'
 
             # 3. Check all patterns (Standard, Custom, .gitignore)
             # Use the relative path string (or filename if outside project)
-            if self._matches_pattern(abs_path_obj, rel_path_str):
-                 return True
+            pattern = self._matching_pattern(abs_path_obj, rel_path_str)
+            if pattern is not None:
+                 return f"pattern '{pattern}'"
 
         except OSError as e:
             log_error(str(self.project_dir), f"Cannot process path due to OS error: '{path}'. Error: {e}")
-            return True # Treat inaccessible/invalid paths as ignored
+            return 'error' # Treat inaccessible/invalid paths as ignored
         except Exception as e:
             log_error(str(self.project_dir), f"Unexpected error checking ignore status for path '{path}': {e}")
-            return True # Treat errors conservatively as ignored
+            return 'error' # Treat errors conservatively as ignored
 
-        return False # Not ignored by any rule
+        return None # Not ignored by any rule
 
     def get_language_settings(self, language_key: str) -> Optional[Dict]:
         """Get settings for a specific language from config."""
@@ -361,13 +488,54 @@ class ConfigManager:
         if 'languages' not in self.config: self.config['languages'] = {}
         return self.config.get('languages', {}).get(language_key)
 
+    def get_extension_language_map(self) -> Dict[str, str]:
+        """Map of lower-case file extension (e.g. '.py') to language key, from the [languages] section."""
+        extension_map = {}
+        for language_key, settings in self.config.get('languages', {}).items():
+            if not isinstance(settings, dict):
+                continue
+            for ext in settings.get('extensions', []):
+                extension_map.setdefault(str(ext).lower(), language_key)
+        return extension_map
+
+    def _normalize_size_policies(self, policies) -> List[Dict]:
+        """
+        Validate [output] size_policies. Each entry is a table like
+        { pattern = "*.sql", mode = "head_tail", head_bytes = 8192, tail_bytes = 8192 }
+        with mode one of skip / head / head_tail / sample (sample uses sample_lines).
+        """
+        normalized = []
+        if not isinstance(policies, list):
+            log_error(str(self.project_dir), f"Config Error: output.size_policies is not a list. Ignoring it.")
+            return normalized
+        for policy in policies:
+            if not isinstance(policy, dict) or not policy.get('pattern'):
+                log_error(str(self.project_dir), f"Config Error: invalid size policy {policy!r} (needs 'pattern'). Ignoring it.")
+                continue
+            mode = str(policy.get('mode', 'skip')).lower()
+            if mode not in SIZE_POLICY_MODES:
+                log_error(str(self.project_dir), f"Config Error: unknown size policy mode '{mode}' for pattern '{policy['pattern']}'. Using 'skip'.")
+                mode = 'skip'
+            entry = {'pattern': str(policy['pattern']).replace('\\', '/'), 'mode': mode}
+            for key, default in (('head_bytes', 8192), ('tail_bytes', 8192), ('sample_lines', 100)):
+                try:
+                    entry[key] = max(0, int(policy.get(key, default)))
+                except (ValueError, TypeError):
+                    log_error(str(self.project_dir), f"Config Error: invalid '{key}' in size policy for '{policy['pattern']}'. Using {default}.")
+                    entry[key] = default
+            normalized.append(entry)
+        return normalized
+
     def get_output_settings(self) -> Dict:
         """Get output settings, ensuring correct types and providing defaults."""
         defaults = {
             'format': 'text',
             'include_line_numbers': False,
             'include_file_headers': True,
-            'max_file_size': 1024 * 1024
+            'max_file_size': 1024 * 1024,
+            'write_index': True,
+            'size_policies': [],
+            'order': 'sorted'
         }
         output_cfg = self.config.get('output', {}) # Already ensured output exists minimally
         defaults.update(output_cfg)
@@ -380,7 +548,262 @@ class ConfigManager:
 
         defaults['include_line_numbers'] = str(defaults.get('include_line_numbers', False)).lower() == 'true'
         defaults['include_file_headers'] = str(defaults.get('include_file_headers', True)).lower() == 'true'
+        defaults['write_index'] = str(defaults.get('write_index', True)).lower() == 'true'
+        defaults['size_policies'] = self._normalize_size_policies(defaults.get('size_policies'))
+        defaults['order'] = str(defaults['order']).lower()
+        if defaults['order'] not in ORDER_MODES:
+            log_error(str(self.project_dir), f"Invalid 'order' in config ({output_cfg.get('order')}). Using 'sorted'.")
+            defaults['order'] = 'sorted'
+
+        return defaults
+
+    def get_cache_settings(self) -> Dict:
+        """Get cache settings (section [cache]), providing defaults for older configs."""
+        defaults = {
+            'ignore_decisions': True
+        }
+        defaults.update(self.config.get('cache', {}))
+        defaults['ignore_decisions'] = str(defaults.get('ignore_decisions', True)).lower() == 'true'
+        return defaults
+
+    def get_pipeline_settings(self) -> Dict:
+        """Get dump pipeline settings (section [pipeline]), ensuring correct types."""
+        defaults = {
+            'mode': 'sync',
+            'queue_size': 64,
+            'filter_workers': 2,
+            'read_workers': 4,
+            'walk_workers': 1
+        }
+        pipeline_cfg = self.config.get('pipeline', {})
+        defaults.update(pipeline_cfg)
+
+        defaults['mode'] = str(defaults['mode']).lower()
+        if defaults['mode'] not in ('sync', 'async'):
+            log_error(str(self.project_dir), f"Invalid 'pipeline.mode' in config ({pipeline_cfg.get('mode')}). Using 'sync'.")
+            defaults['mode'] = 'sync'
+        for key, default in (('queue_size', 64), ('filter_workers', 2), ('read_workers', 4), ('walk_workers', 1)):
+            try:
+                defaults[key] = max(1, int(defaults[key]))
+            except (ValueError, TypeError):
+                log_error(str(self.project_dir), f"Invalid 'pipeline.{key}' in config ({pipeline_cfg.get(key)}). Using {default}.")
+                defaults[key] = default
+        return defaults
+
+    def get_query_settings(self) -> Dict:
+        """Get settings for query-based file selection (section [query])."""
+        defaults = {
+            'budget_bytes': 200 * 1024,
+            'max_files': 50
+        }
+        query_cfg = self.config.get('query', {})
+        defaults.update(query_cfg)
+        for key, default in (('budget_bytes', 200 * 1024), ('max_files', 50)):
+            try:
+                defaults[key] = max(0, int(defaults[key]))
+            except (ValueError, TypeError):
+                log_error(str(self.project_dir), f"Invalid 'query.{key}' in config ({query_cfg.get(key)}). Using {default}.")
+                defaults[key] = default
+        return defaults
 
+    def get_profiles(self) -> Dict[str, Dict]:
+        """
+        Get the named dump profiles (sections [profiles.<name>]). Each profile has
+        include / exclude pattern lists and optional max_file_size and
+        include_file_headers overrides (None = use [output]).
+        """
+        profiles = {}
+        profiles_cfg = self.config.get('profiles', {})
+        if not isinstance(profiles_cfg, dict):
+            log_error(str(self.project_dir), "Config Error: [profiles] must contain tables like [profiles.backend]. Ignoring it.")
+            return profiles
+        for name, profile_cfg in profiles_cfg.items():
+            if not isinstance(profile_cfg, dict):
+                log_error(str(self.project_dir), f"Config Error: profile '{name}' is not a table. Ignoring it.")
+                continue
+            entry = {'include': [], 'exclude': [], 'max_file_size': None, 'include_file_headers': None}
+            for key in ('include', 'exclude'):
+                patterns = profile_cfg.get(key, [])
+                if isinstance(patterns, str):
+                    patterns = [patterns]
+                if not isinstance(patterns, list):
+                    log_error(str(self.project_dir), f"Config Error: 'profiles.{name}.{key}' is not a list. Ignoring it.")
+                    patterns = []
+                entry[key] = [str(p).replace('\\', '/') for p in patterns]
+            if 'max_file_size' in profile_cfg:
+                try:
+                    entry['max_file_size'] = int(profile_cfg['max_file_size'])
+                except (ValueError, TypeError):
+                    log_error(str(self.project_dir), f"Invalid 'profiles.{name}.max_file_size' in config ({profile_cfg['max_file_size']}). Using [output] max_file_size.")
+            if 'include_file_headers' in profile_cfg:
+                entry['include_file_headers'] = str(profile_cfg['include_file_headers']).lower() == 'true'
+            profiles[str(name)] = entry
+        return profiles
+
+    def get_secret_settings(self) -> Dict:
+        """Get settings for the secret scanner (section [secrets])."""
+        defaults = {
+            'action': 'redact',
+            'entropy_threshold': 3.0,
+            'allow_paths': []
+        }
+        secrets_cfg = self.config.get('secrets', {})
+        defaults.update(secrets_cfg)
+
+        defaults['action'] = str(defaults['action']).lower()
+        if defaults['action'] not in ('redact', 'drop', 'report', 'off'):
+            log_error(str(self.project_dir), f"Invalid 'secrets.action' in config ({secrets_cfg.get('action')}). Using 'redact'.")
+            defaults['action'] = 'redact'
+        try:
+            defaults['entropy_threshold'] = float(defaults['entropy_threshold'])
+        except (ValueError, TypeError):
+            log_error(str(self.project_dir), f"Invalid 'secrets.entropy_threshold' in config ({secrets_cfg.get('entropy_threshold')}). Using 3.0.")
+            defaults['entropy_threshold'] = 3.0
+        if not isinstance(defaults['allow_paths'], list):
+            log_error(str(self.project_dir), "Invalid 'secrets.allow_paths' in config (must be a list). Ignoring it.")
+            defaults['allow_paths'] = []
+        defaults['allow_paths'] = [str(p).replace('\\', '/') for p in defaults['allow_paths']]
+        return defaults
+
+    def get_outline_settings(self) -> Dict:
+        """Get settings for outline mode (section [outline])."""
+        defaults = {
+            'enabled': False,
+            'patterns': []
+        }
+        outline_cfg = self.config.get('outline', {})
+        defaults.update(outline_cfg)
+
+        defaults['enabled'] = str(defaults['enabled']).lower() == 'true'
+        if not isinstance(defaults['patterns'], list):
+            log_error(str(self.project_dir), "Invalid 'outline.patterns' in config (must be a list). Ignoring it.")
+            defaults['patterns'] = []
+        defaults['patterns'] = [str(p).replace('\\', '/') for p in defaults['patterns']]
+        return defaults
+
+    def get_extractor_settings(self) -> Dict:
+        """Get settings for the format-specific extractors (section [extractors])."""
+        defaults = {
+            'enabled': True,
+            'max_rows': 20,
+            'json_min_bytes': 64 * 1024,
+            'disabled': []
+        }
+        extractors_cfg = self.config.get('extractors', {})
+        defaults.update(extractors_cfg)
+
+        defaults['enabled'] = str(defaults['enabled']).lower() == 'true'
+        for key, fallback in (('max_rows', 20), ('json_min_bytes', 64 * 1024)):
+            try:
+                defaults[key] = int(defaults[key])
+                if defaults[key] < 0:
+                    raise ValueError
+            except (ValueError, TypeError):
+                log_error(str(self.project_dir), f"Invalid 'extractors.{key}' in config ({extractors_cfg.get(key)}). Using {fallback}.")
+                defaults[key] = fallback
+        if not isinstance(defaults['disabled'], list):
+            log_error(str(self.project_dir), "Invalid 'extractors.disabled' in config (must be a list). Ignoring it.")
+            defaults['disabled'] = []
+        defaults['disabled'] = [str(ext).lower() if str(ext).startswith('.') else '.' + str(ext).lower()
+                                for ext in defaults['disabled']]
+        return defaults
+
+    def get_generated_settings(self) -> Dict:
+        """Get settings for the detection of generated, minified and vendored files (section [generated])."""
+        defaults = {
+            'action': 'summarize',
+            'vendored_hashes': [],
+            'allow_paths': []
+        }
+        generated_cfg = self.config.get('generated', {})
+        defaults.update(generated_cfg)
+
+        defaults['action'] = str(defaults['action']).lower()
+        if defaults['action'] not in ('summarize', 'skip', 'off'):
+            log_error(str(self.project_dir), f"Invalid 'generated.action' in config ({generated_cfg.get('action')}). Using 'summarize'.")
+            defaults['action'] = 'summarize'
+        for key in ('vendored_hashes', 'allow_paths'):
+            if not isinstance(defaults[key], list):
+                log_error(str(self.project_dir), f"Invalid 'generated.{key}' in config (must be a list). Ignoring it.")
+                defaults[key] = []
+        defaults['vendored_hashes'] = [str(h).lower() for h in defaults['vendored_hashes']]
+        defaults['allow_paths'] = [str(p).replace('\\', '/') for p in defaults['allow_paths']]
+        return defaults
+
+    def get_near_duplicate_settings(self) -> Dict:
+        """Get settings for collapsing near-duplicate files (section [near_duplicates])."""
+        defaults = {
+            'enabled': False,
+            'threshold': 0.8,
+            'mode': 'diff',
+            'min_lines': 20,
+            'max_diff_ratio': 0.5,
+            'memory_mb': 64
+        }
+        near_cfg = self.config.get('near_duplicates', {})
+        defaults.update(near_cfg)
+
+        defaults['enabled'] = str(defaults['enabled']).lower() == 'true'
+        defaults['mode'] = str(defaults['mode']).lower()
+        if defaults['mode'] not in ('diff', 'reference'):
+            log_error(str(self.project_dir), f"Invalid 'near_duplicates.mode' in config ({near_cfg.get('mode')}). Using 'diff'.")
+            defaults['mode'] = 'diff'
+        for key, fallback in (('threshold', 0.8), ('max_diff_ratio', 0.5)):
+            try:
+                defaults[key] = float(defaults[key])
+                if not 0 < defaults[key] <= 1:
+                    raise ValueError
+            except (ValueError, TypeError):
+                log_error(str(self.project_dir), f"Invalid 'near_duplicates.{key}' in config ({near_cfg.get(key)}). Using {fallback}.")
+                defaults[key] = fallback
+        for key, fallback in (('min_lines', 20), ('memory_mb', 64)):
+            try:
+                defaults[key] = max(0, int(defaults[key]))
+            except (ValueError, TypeError):
+                log_error(str(self.project_dir), f"Invalid 'near_duplicates.{key}' in config ({near_cfg.get(key)}). Using {fallback}.")
+                defaults[key] = fallback
+        return defaults
+
+    def get_plan_settings(self) -> Dict:
+        """Get settings for dump plans and the output ceiling (section [plan])."""
+        defaults = {
+            'max_tokens': 0,
+            'bytes_per_token': 4.0
+        }
+        plan_cfg = self.config.get('plan', {})
+        defaults.update(plan_cfg)
+
+        try:
+            defaults['max_tokens'] = max(0, int(defaults['max_tokens']))
+        except (ValueError, TypeError):
+            log_error(str(self.project_dir), f"Invalid 'plan.max_tokens' in config ({plan_cfg.get('max_tokens')}). Using 0 (no limit).")
+            defaults['max_tokens'] = 0
+        try:
+            defaults['bytes_per_token'] = float(defaults['bytes_per_token'])
+            if defaults['bytes_per_token'] <= 0:
+                raise ValueError
+        except (ValueError, TypeError):
+            log_error(str(self.project_dir), f"Invalid 'plan.bytes_per_token' in config ({plan_cfg.get('bytes_per_token')}). Using 4.0.")
+            defaults['bytes_per_token'] = 4.0
+        return defaults
+
+    def get_content_filter_settings(self) -> Dict:
+        """Get settings for content-filtered dumps (--grep, section [content_filter])."""
+        defaults = {
+            'context_lines': 3,
+            'ignore_case': False,
+            'binary_probe_bytes': 8000
+        }
+        filter_cfg = self.config.get('content_filter', {})
+        defaults.update(filter_cfg)
+
+        defaults['ignore_case'] = str(defaults['ignore_case']).lower() == 'true'
+        for key, fallback in (('context_lines', 3), ('binary_probe_bytes', 8000)):
+            try:
+                defaults[key] = max(0, int(defaults[key]))
+            except (ValueError, TypeError):
+                log_error(str(self.project_dir), f"Invalid 'content_filter.{key}' in config ({filter_cfg.get(key)}). Using {fallback}.")
+                defaults[key] = fallback
         return defaults
 
 # --- END OF FILE utils/config_manager.py ---
\ No newline at end of file
@@ -0,0 +1,137 @@
+# --- START OF FILE utils/content_filter.py ---
+import hashlib
+import re
+from typing import Dict, List, Optional, Tuple
+
+REGEX_PREFIX = "re:" # Patterns with this prefix are regular expressions, all others literals
+
+
+class ContentFilter:
+    """
+    Keeps only files whose content matches one of the include patterns and
+    none of the exclude patterns (--grep / --grep-exclude). Patterns are
+    literals, or regular expressions if written as 're:<regex>'.
+
+    The scan runs in ReadStage on the raw bytes, before the file is decoded:
+    files with a NUL byte in the first binary_probe_bytes are skipped as binary,
+    literals are found with native substring search and all regular expressions
+    of a list are combined into one alternation, so every list is one pass that
+    stops at the first hit. Files whose content was truncated or extracted are
+    scanned on the emitted text.
+
+    With excerpt, a matching file is emitted as its matching line ranges plus
+    context_lines of context; this needs every hit, so the include scan runs
+    to the end of such files.
+    """
+
+    def __init__(self, include: List[str], exclude: List[str], settings: Dict, excerpt: bool = False):
+        self.ignore_case = settings['ignore_case']
+        self.context_lines = settings['context_lines']
+        self.binary_probe_bytes = settings['binary_probe_bytes']
+        self.excerpt_mode = excerpt and bool(include)
+        self.include = self._compile(include) if include else None
+        self.exclude = self._compile(exclude) if exclude else None
+        # All include patterns as one alternation, for the positions of every hit in excerpt mode
+        self._include_all = self._combine(include, literal=True) if self.excerpt_mode else None
+
+    def _combine(self, patterns: List[str], literal: bool) -> Optional["re.Pattern"]:
+        """One bytes regex over the regex patterns (and, if literal, the escaped literals)."""
+        parts = []
+        for pattern in patterns:
+            if pattern.startswith(REGEX_PREFIX):
+                parts.append(f"(?:{pattern[len(REGEX_PREFIX):]})")
+            elif literal:
+                parts.append(re.escape(pattern))
+        if not parts:
+            return None
+        try:
+            return re.compile("|".join(parts).encode('utf-8'), re.MULTILINE | (re.IGNORECASE if self.ignore_case else 0))
+        except re.error as e:
+            raise ValueError(f"Invalid regular expression in content patterns {patterns}: {e}") from e
+
+    def _compile(self, patterns: List[str]) -> Tuple[List[bytes], Optional["re.Pattern"]]:
+        """(literals as bytes, lower-cased if ignore_case; combined regex of the 're:' patterns or None)."""
+        literals = []
+        for pattern in patterns:
+            if pattern.startswith(REGEX_PREFIX):
+                continue
+            if not pattern:
+                raise ValueError("Empty content pattern")
+            literal = pattern.encode('utf-8')
+            literals.append(literal.lower() if self.ignore_case else literal)
+        return literals, self._combine(patterns, literal=False)
+
+    def _search(self, compiled: Tuple[List[bytes], Optional["re.Pattern"]], data: bytes, folded: Optional[bytes]) -> bool:
+        literals, regex = compiled
+        haystack = folded if folded is not None else data
+        if any(literal in haystack for literal in literals):
+            return True
+        return regex is not None and regex.search(data) is not None
+
+    def _matched_lines(self, data: bytes) -> List[Tuple[int, int]]:
+        """(first, last) 0-based line of every include hit, with universal newlines like decode_text."""
+        if b'\r' in data:
+            data = data.replace(b'\r\n', b'\n').replace(b'\r', b'\n')
+        lines = []
+        line, position = 0, 0
+        for match in self._include_all.finditer(data):
+            line += data.count(b'\n', position, match.start())
+            position = match.start()
+            last = line + data.count(b'\n', match.start(), max(match.start(), match.end() - 1))
+            lines.append((line, last))
+        return lines
+
+    def process(self, item, data: bytes, stats) -> bool:
+        """
+        Decide on a read file from its raw bytes (or its emitted text, encoded).
+        Returns False if the file is left out; in excerpt mode the hit lines
+        are kept on the item for excerpt().
+        """
+        if b'\0' in data[:self.binary_probe_bytes]:
+            stats.add('files_binary')
+            return False
+        folded = data.lower() if self.ignore_case else None
+        if self.exclude is not None and self._search(self.exclude, data, folded):
+            stats.add('files_no_match')
+            return False
+        if self.include is None:
+            return True
+        if not self._search(self.include, data, folded):
+            stats.add('files_no_match')
+            return False
+        if self.excerpt_mode:
+            item.matched_lines = self._matched_lines(data)
+        return True
+
+    def excerpt(self, item, stats) -> None:
+        """Replace the decoded content of a matching file by its hit line ranges plus context."""
+        hits = item.matched_lines
+        item.matched_lines = None
+        if not hits or item.content is None:
+            return
+        lines = item.content.split('\n')
+        if lines[-1] == '':
+            lines.pop() # Trailing newline, not a line of its own
+        if not lines:
+            return
+        ranges: List[List[int]] = []
+        for first, last in hits:
+            first = min(first, len(lines) - 1) # An empty match after the last newline
+            start = max(0, first - self.context_lines)
+            end = min(len(lines) - 1, last + self.context_lines)
+            if ranges and start <= ranges[-1][1] + 1:
+                ranges[-1][1] = max(ranges[-1][1], end)
+            else:
+                ranges.append([start, end])
+        if len(ranges) == 1 and ranges[0] == [0, len(lines) - 1]:
+            return # The excerpt would be the whole file
+        blocks = []
+        for start, end in ranges:
+            blocks.append(f"[lines {start + 1}-{end + 1} of {len(lines)}]\n" + "".join(line + "\n" for line in lines[start:end + 1]))
+        item.content = "".join(blocks)
+        item.excerpt_lines = len({line for first, last in hits for line in range(first, last + 1)})
+        # Hash of the emitted text: caches keyed by it follow the excerpt
+        item.content_hash = hashlib.blake2b(item.content.encode('utf-8'), digest_size=16).hexdigest()
+        stats.add('files_excerpted')
+
+# --- END OF FILE utils/content_filter.py ---
@@ -0,0 +1,118 @@
+# --- START OF FILE utils/delta.py ---
+import os
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+import git
+
+from .dump_pipeline import FILE_SEPARATOR
+from .file_walker import find_ignored_ancestor, walk_project
+from .manifest import DumpManifest
+
+
+@dataclass
+class DeltaResult:
+    """Changed files (relative paths with forward slashes) and a description of the comparison basis."""
+    basis: str
+    added: List[str] = field(default_factory=list)
+    modified: List[str] = field(default_factory=list)
+    deleted: List[str] = field(default_factory=list)
+    manifest: Optional[DumpManifest] = None # Current state (manifest mode only)
+
+    @property
+    def changed(self) -> List[str]:
+        """Added and modified files, in the order they should be dumped."""
+        return self.added + self.modified
+
+    def write_header(self, writer, prefix: str) -> None:
+        """Write the summary block that opens a delta dump."""
+        writer.write(f"{prefix} DELTA since {self.basis}: {len(self.added)} added, "
+                     f"{len(self.modified)} modified, {len(self.deleted)} deleted")
+        writer.write(FILE_SEPARATOR)
+
+    def write_deleted(self, writer, prefix: str) -> None:
+        """Write the list of deleted files that closes a delta dump (nothing if none were deleted)."""
+        if not self.deleted:
+            return
+        writer.write(f"{prefix} DELETED FILES:\n")
+        for rel_path in self.deleted:
+            writer.write(f"{prefix} DELETED: {rel_path}\n")
+        writer.write(FILE_SEPARATOR)
+
+
+def compute_manifest_delta(config_manager, previous: DumpManifest, ignore_cache=None) -> DeltaResult:
+    """
+    Compare the working tree with the manifest of the previous dump.
+
+    Only directory listings (replayed from the ignore decision cache where
+    possible) and one stat per file are needed; unchanged files are never read.
+    The previous manifest is closed afterwards, so the current one can be saved
+    over its file.
+    """
+    project_dir = config_manager.project_dir
+    result = DeltaResult(basis=f"last dump ({previous.created})")
+    current = DumpManifest(config_manager.dump_dir_path, project_dir)
+
+    for dir_path, files in walk_project(config_manager, ignore_cache=ignore_cache):
+        for file in files:
+            file_path = dir_path / file
+            try:
+                st = os.stat(file_path)
+            except OSError:
+                continue # Vanished during the walk; reported as deleted below if it was known
+            rel_path = file_path.relative_to(project_dir).as_posix()
+            current.record(rel_path, st.st_size, st.st_mtime_ns, st.st_ino)
+            old = previous.files.get(rel_path)
+            if old is None:
+                result.added.append(rel_path)
+            elif old != (st.st_size, st.st_mtime_ns):
+                result.modified.append(rel_path)
+
+    result.deleted = sorted(rel for rel in previous.files if rel not in current.files)
+    previous.close()
+    result.manifest = current
+    return result
+
+
+def compute_git_delta(config_manager, ref: str) -> DeltaResult:
+    """
+    Compare the working tree with a git ref, like `git diff --name-status <ref>`
+    plus untracked files. Only paths reported by git are considered, so the cost
+    scales with the number of changes, not with the repository size.
+    """
+    project_dir = config_manager.project_dir
+    result = DeltaResult(basis=f"git ref {ref}")
+    # Run git inside the project directory; --relative limits the diff to it and
+    # reports paths relative to it (the project may be a subdirectory of the repo)
+    git_cmd = git.Git(str(project_dir))
+
+    def include(rel_path: str) -> bool:
+        # Like a walk: the path and every directory above it must pass the rules
+        return find_ignored_ancestor(config_manager, rel_path) is None
+
+    diff_output = git_cmd.diff('--name-status', '-z', '--relative', '--no-renames', ref)
+    fields = diff_output.split('\0')
+    i = 0
+    while i + 1 < len(fields):
+        status, rel_path = fields[i], fields[i + 1]
+        i += 2
+        if not status:
+            continue
+        if status[0] == 'D':
+            if include(rel_path):
+                result.deleted.append(rel_path)
+        elif status[0] == 'A':
+            if include(rel_path):
+                result.added.append(rel_path)
+        elif include(rel_path): # M, T (type change), U (unmerged)
+            result.modified.append(rel_path)
+
+    untracked = git_cmd.ls_files('--others', '--exclude-standard', '-z')
+    for rel_path in untracked.split('\0'):
+        if rel_path and include(rel_path):
+            result.added.append(rel_path)
+
+    result.deleted.sort()
+    return result
+
+# --- END OF FILE utils/delta.py ---
@@ -0,0 +1,216 @@
+# --- START OF FILE utils/dump_index.py ---
+import hashlib
+import mmap
+import os
+import struct
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .file_utils import decode_text
+
+# Binary sidecar index (<dump>.idx), little endian:
+#
+#   header   : magic(8) version(u32) entry_count(u32) dump_size(u64) language_count(u16)
+#   languages: language_count x [len(u8) name(utf-8)]
+#   entries  : entry_count x ENTRY (sorted by path_hash, then path)
+#   paths    : concatenated utf-8 relative paths (referenced by path_ptr/path_len)
+#
+#   ENTRY    : path_hash(8) offset(u64) length(u64) content_hash(8)
+#              path_ptr(u32) header_len(u32) path_len(u16) language_id(u16)
+#
+# offset/length cover the block "header + content" (without the separator),
+# header_len is the byte length of the header at the start of the block.
+
+INDEX_SUFFIX = ".idx"
+INDEX_MAGIC = b"GRBIDX\x00\x01"
+INDEX_VERSION = 1
+_HEADER = struct.Struct("<8sIIQH")
+_ENTRY = struct.Struct("<8sQQ8sIIHH")
+NO_LANGUAGE = 0xFFFF
+
+
+def path_hash(rel_path: str) -> bytes:
+    """8 byte hash of a relative path (forward slashes) used as the index key."""
+    return hashlib.blake2b(rel_path.encode('utf-8'), digest_size=8).digest()
+
+
+def index_path_for(dump_path: Path) -> Path:
+    """Location of the sidecar index for a dump file (dump.txt -> dump.txt.idx)."""
+    return dump_path.with_name(dump_path.name + INDEX_SUFFIX)
+
+
+@dataclass
+class IndexEntry:
+    """One dumped file as recorded in the index."""
+    rel_path: str
+    offset: int
+    length: int
+    header_len: int
+    content_hash: str       # First 8 bytes of the content hash, hex
+    language: Optional[str]
+
+
+class DumpIndexWriter:
+    """Collects block positions while the dump is written and saves the sorted index."""
+
+    def __init__(self, dump_path: Path, extension_languages: Optional[Dict[str, str]] = None):
+        """
+        Args:
+            dump_path: The dump file the index belongs to.
+            extension_languages: Map of lower-case file extension ('.py') to language key.
+        """
+        self.dump_path = dump_path
+        self.index_path = index_path_for(dump_path)
+        self.extension_languages = extension_languages or {}
+        self._languages: List[str] = []
+        self._language_ids: Dict[str, int] = {}
+        self._entries: List[Tuple[bytes, str, int, int, int, bytes, int]] = []
+
+    def _language_id(self, rel_path: str) -> int:
+        language = self.extension_languages.get(os.path.splitext(rel_path)[1].lower())
+        if language is None:
+            return NO_LANGUAGE
+        if language not in self._language_ids:
+            self._language_ids[language] = len(self._languages)
+            self._languages.append(language)
+        return self._language_ids[language]
+
+    def add(self, rel_path: str, offset: int, length: int, header_len: int, content_hash: Optional[str]) -> None:
+        """Record the byte range of one block (called by WriteStage in output order)."""
+        digest = bytes.fromhex(content_hash)[:8] if content_hash else b"\x00" * 8
+        self._entries.append((path_hash(rel_path), rel_path, offset, length, header_len, digest, self._language_id(rel_path)))
+
+    def save(self, dump_size: int) -> None:
+        """Write the index atomically next to the dump file."""
+        self._entries.sort(key=lambda e: (e[0], e[1]))
+        path_blob = bytearray()
+        entry_bytes = bytearray()
+        for key, rel_path, offset, length, header_len, digest, language_id in self._entries:
+            encoded = rel_path.encode('utf-8')
+            entry_bytes += _ENTRY.pack(key, offset, length, digest, len(path_blob), header_len, len(encoded), language_id)
+            path_blob += encoded
+
+        language_bytes = bytearray()
+        for language in self._languages:
+            encoded = language.encode('utf-8')[:255]
+            language_bytes += bytes([len(encoded)]) + encoded
+
+        tmp_path = self.index_path.with_name(self.index_path.name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(_HEADER.pack(INDEX_MAGIC, INDEX_VERSION, len(self._entries), dump_size, len(self._languages)))
+            f.write(language_bytes)
+            f.write(entry_bytes)
+            f.write(path_blob)
+        os.replace(tmp_path, self.index_path)
+
+
+class DumpIndex:
+    """
+    Random access to a dump file through its sidecar index. Both files are
+    memory mapped; a lookup is a binary search over the fixed-size entries,
+    the rest of the dump is never parsed.
+
+    Usage:
+        with DumpIndex.open(Path("dump.txt")) as index:
+            text = index.read_content("src/app.py")
+    """
+
+    def __init__(self, dump_path: Path, index_path: Path):
+        self.dump_path = dump_path
+        self.index_path = index_path
+        self._index_file = open(index_path, "rb")
+        self._dump_file = open(dump_path, "rb")
+        try:
+            self._index = mmap.mmap(self._index_file.fileno(), 0, access=mmap.ACCESS_READ)
+            dump_size = os.fstat(self._dump_file.fileno()).st_size
+            self._dump = mmap.mmap(self._dump_file.fileno(), 0, access=mmap.ACCESS_READ) if dump_size else b""
+            self._parse_header(dump_size)
+        except Exception:
+            self.close()
+            raise
+
+    @classmethod
+    def open(cls, dump_path: Path) -> "DumpIndex":
+        return cls(dump_path, index_path_for(dump_path))
+
+    def _parse_header(self, dump_size: int) -> None:
+        magic, version, count, indexed_dump_size, language_count = _HEADER.unpack_from(self._index, 0)
+        if magic != INDEX_MAGIC or version != INDEX_VERSION:
+            raise ValueError(f"{self.index_path} is not a dump index (version {INDEX_VERSION})")
+        if indexed_dump_size != dump_size:
+            raise ValueError(f"Index {self.index_path} does not match {self.dump_path} (dump was rewritten after indexing)")
+        pos = _HEADER.size
+        self.languages: List[str] = []
+        for _ in range(language_count):
+            length = self._index[pos]
+            self.languages.append(self._index[pos + 1:pos + 1 + length].decode('utf-8'))
+            pos += 1 + length
+        self.count = count
+        self._entries_start = pos
+        self._paths_start = pos + count * _ENTRY.size
+
+    def close(self) -> None:
+        for name in ('_index', '_dump'):
+            mapped = getattr(self, name, None)
+            if isinstance(mapped, mmap.mmap):
+                mapped.close()
+        self._index_file.close()
+        self._dump_file.close()
+
+    def __enter__(self) -> "DumpIndex":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _entry(self, i: int) -> IndexEntry:
+        key, offset, length, digest, path_ptr, header_len, path_len, language_id = _ENTRY.unpack_from(
+            self._index, self._entries_start + i * _ENTRY.size)
+        start = self._paths_start + path_ptr
+        rel_path = self._index[start:start + path_len].decode('utf-8')
+        language = self.languages[language_id] if language_id != NO_LANGUAGE else None
+        return IndexEntry(rel_path, offset, length, header_len, digest.hex(), language)
+
+    def _key(self, i: int) -> bytes:
+        start = self._entries_start + i * _ENTRY.size
+        return self._index[start:start + 8]
+
+    def lookup(self, rel_path: str) -> Optional[IndexEntry]:
+        """Find a file by its relative path (forward slashes) in O(log n)."""
+        rel_path = rel_path.replace('\\', '/').strip('/')
+        key = path_hash(rel_path)
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        # Entries with the same hash are adjacent; compare the stored paths
+        while lo < self.count and self._key(lo) == key:
+            entry = self._entry(lo)
+            if entry.rel_path == rel_path:
+                return entry
+            lo += 1
+        return None
+
+    def read_block(self, entry: IndexEntry, include_header: bool = True) -> str:
+        """Return the dumped block (header + content, or content only) of an entry."""
+        start = entry.offset if include_header else entry.offset + entry.header_len
+        return decode_text(bytes(self._dump[start:entry.offset + entry.length]))
+
+    def read_content(self, rel_path: str) -> Optional[str]:
+        """Return the dumped content of a file without its header, or None if it is not in the dump."""
+        entry = self.lookup(rel_path)
+        return self.read_block(entry, include_header=False) if entry else None
+
+    def __iter__(self) -> Iterator[IndexEntry]:
+        """Iterate over all entries (in hash order)."""
+        for i in range(self.count):
+            yield self._entry(i)
+
+# --- END OF FILE utils/dump_index.py ---
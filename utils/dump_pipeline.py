@@ -0,0 +1,645 @@
+# --- START OF FILE utils/dump_pipeline.py ---
+import asyncio
+import hashlib
+import io
+import os
+import threading
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import BinaryIO, Callable, Dict, Iterator, List, Optional
+
+from .error_logger import log_error
+from .extractors import Extractor
+from .file_utils import decode_text, get_relative_path
+from .file_walker import walk_project, walk_subtrees
+from .truncation import find_size_policy, read_truncated, render_truncated
+
+FILE_SEPARATOR = "\n\n---\n\n"
+
+
+@dataclass
+class DumpItem:
+    """A single file travelling through the dump pipeline."""
+    index: int                      # Position in walk order, used to keep the output order stable
+    path: Path                      # Absolute path of the file (virtual for non-directory sources)
+    size: Optional[int] = None      # Known up-front for some sources (e.g. git blob headers), else set by FilterStage
+    mtime_ns: Optional[int] = None  # Modification time if FilterStage stat'ed the file
+    reader: Optional[Callable[["DumpItem"], bytes]] = None  # Custom content loader; None reads item.path from disk
+    source_key: Optional[str] = None  # Content identity if the source knows it (e.g. git blob SHA)
+    data: Optional[bytes] = None    # Raw bytes (set by ReadStage)
+    content: Optional[str] = None   # Decoded text (set by ReadStage, may be rewritten by transforms)
+    content_hash: Optional[str] = None  # blake2b hex digest of the raw bytes (set by ReadStage)
+    rel_path: Optional[str] = None  # Path relative to the project root, forward slashes (set by the source or TransformStage)
+    header: str = ""                # Rendered file header (set by TransformStage)
+    size_policy: Optional[Dict] = None  # Size policy for files above max_file_size (set by FilterStage)
+    omitted_bytes: int = 0          # Bytes left out by the size policy (set by ReadStage)
+    extractor: Optional[Extractor] = None # Format-specific extractor replacing the raw content (set by FilterStage)
+    secrets_redacted: int = 0       # Secrets replaced by the secret scanner (set by TransformStage)
+    outlined: bool = False          # Content replaced by its outline (set by TransformStage)
+    generated: Optional[str] = None # Why the file counts as generated/minified/vendored (set by ReadStage)
+    matched_lines: Optional[List] = None # (first, last) line of each content filter hit in excerpt mode (set by ReadStage)
+    excerpt_lines: int = 0          # Matching lines if only their ranges are emitted (set by ReadStage)
+    minhash: Optional[array] = None # MinHash signature for near-duplicate detection (set by TransformStage)
+    skipped: bool = False           # True once a stage dropped the file or an error occurred
+
+
+@dataclass
+class DumpStats:
+    """Counters collected during one pipeline run."""
+    files_processed: int = 0
+    files_dumped: int = 0
+    files_skipped_large: int = 0
+    files_truncated: int = 0
+    files_extracted: int = 0
+    files_failed: int = 0
+    files_done: int = 0             # Files that passed all stages (written or skipped), for progress reporting
+    secrets_found: int = 0
+    files_dropped_secrets: int = 0
+    files_generated: int = 0
+    files_near_duplicate: int = 0
+    files_no_match: int = 0         # Left out by the content filter
+    files_binary: int = 0           # Left out by the content filter as binary
+    files_excerpted: int = 0        # Emitted as matching line ranges only
+    generated_reasons: Dict[str, int] = field(default_factory=dict) # Generated files per reason
+
+    def __post_init__(self):
+        self._lock = threading.Lock()
+
+    def add(self, counter: str, amount: int = 1) -> None:
+        """Increment a counter (thread-safe, stages may run in worker threads)."""
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + amount)
+
+    def add_generated(self, reason: str) -> None:
+        """Count a generated/minified/vendored file and the reason it was detected."""
+        with self._lock:
+            self.files_generated += 1
+            self.generated_reasons[reason] = self.generated_reasons.get(reason, 0) + 1
+
+
+def report_file_error(log_dir: str, item: DumpItem, exc: Exception) -> None:
+    """
+    Log a per-file error the same way for every stage and both pipeline modes.
+    Per-file messages only go to the log (console output per file is slow);
+    the summary reports the number of failed files.
+    """
+    file_path_str = str(item.path)
+    if isinstance(exc, UnicodeDecodeError):
+        log_error(log_dir, f"Encoding Error (not UTF-8?) processing file {file_path_str}: {exc}")
+    elif isinstance(exc, OSError):
+        log_error(log_dir, f"OS Error processing file {file_path_str}: {exc}")
+    else:
+        log_error(log_dir, f"Failed processing file {file_path_str}: {exc}")
+
+
+def _relative_posix(path: Path, project_dir: Path) -> Optional[str]:
+    """Path relative to the project root with forward slashes ('' for the root), None if outside."""
+    try:
+        rel = path.relative_to(project_dir).as_posix()
+    except ValueError:
+        return None
+    return '' if rel == '.' else rel
+
+
+# --- Stages ---
+
+class WalkStage:
+    """
+    Produces DumpItems with ignore rules already applied, in os.walk order or,
+    if an OutputOrder is given, in its order (the walk completes first then).
+    With scopes (see file_walker.normalize_scopes) only those subtrees are
+    walked; the walk is then not complete (no manifest, no cache pruning).
+    """
+
+    def __init__(self, config_manager, ignore_cache=None, order=None, scopes: Optional[List[str]] = None):
+        self.config_manager = config_manager
+        self.ignore_cache = ignore_cache
+        self.order = order
+        self.scopes = scopes
+        self.complete = scopes is None # True if every file of the project is produced
+        self.total: Optional[int] = None # Number of files, known once an ordered walk completed
+
+    def _walk_items(self) -> Iterator[DumpItem]:
+        project_dir = self.config_manager.project_dir
+        index = 0
+        if self.scopes is None:
+            walk = walk_project(self.config_manager, ignore_cache=self.ignore_cache)
+        else:
+            walk = walk_subtrees(self.config_manager, self.scopes, ignore_cache=self.ignore_cache)
+        for dir_path, files in walk:
+            rel_dir = _relative_posix(dir_path, project_dir)
+            for file in files:
+                rel_path = None if rel_dir is None else (f"{rel_dir}/{file}" if rel_dir else file)
+                yield DumpItem(index=index, path=dir_path / file, rel_path=rel_path)
+                index += 1
+
+    def iter_items(self) -> Iterator[DumpItem]:
+        """Yield one DumpItem per included file."""
+        if self.order is None or self.order.mode == 'walk':
+            return self._walk_items()
+        items = self.order.sort(list(self._walk_items()))
+        self.total = len(items)
+        return iter(items)
+
+
+class PathListSource:
+    """Produces DumpItems for an explicit list of files (delta dumps, selections)."""
+
+    def __init__(self, paths: List[Path], project_dir: Path):
+        self.paths = paths
+        self.project_dir = project_dir
+
+    def iter_items(self) -> Iterator[DumpItem]:
+        for index, path in enumerate(self.paths):
+            yield DumpItem(index=index, path=path, rel_path=_relative_posix(path, self.project_dir))
+
+
+class FilterStage:
+    """
+    Handles files that exceed max_file_size (stat only, no reads): they are
+    dropped, unless a size policy ([output] size_policies) keeps part of them.
+    Files with a format-specific extractor (ExtractorRegistry) are kept at any
+    size, the extractor bounds what is read and emitted.
+    If a DumpManifest is given, every stat'ed file is recorded in it.
+    """
+
+    def __init__(self, output_settings: Dict, log_dir: str, manifest=None, extractors=None):
+        self.max_file_size = output_settings['max_file_size']
+        self.size_policies = output_settings.get('size_policies', [])
+        self.log_dir = log_dir
+        self.manifest = manifest
+        self.extractors = extractors
+
+    def process(self, item: DumpItem, stats: DumpStats) -> bool:
+        if item.size is None:
+            st = item.path.stat()
+            item.size = st.st_size
+            item.mtime_ns = st.st_mtime_ns
+            if self.manifest is not None:
+                self.manifest.record_path(item.path, st.st_size, st.st_mtime_ns, st.st_ino)
+        if self.extractors is not None:
+            item.extractor = self.extractors.find(item.rel_path or item.path.name, item.size)
+            if item.extractor is not None:
+                return True
+        if item.size > self.max_file_size:
+            policy = find_size_policy(self.size_policies, item.rel_path or item.path.name)
+            if policy is not None and policy['mode'] != 'skip':
+                item.size_policy = policy
+                log_error(self.log_dir, f"Truncated large file {item.path} ({item.size} bytes, policy '{policy['mode']}' for '{policy['pattern']}')")
+                stats.add('files_truncated')
+                return True
+            log_error(self.log_dir, f"Skipped large file {item.path} ({item.size} bytes > {self.max_file_size})")
+            stats.add('files_skipped_large')
+            return False
+        return True
+
+
+class ReadStage:
+    """
+    Reads and decodes file content (blocking I/O, offloaded to executors in async mode).
+    If a GeneratedFileDetector is given, generated, minified and vendored files
+    are skipped or summarized; files with a cached verdict are not read at all.
+    If a ContentFilter is given, files are kept or dropped by their raw bytes
+    before decoding (cached generated verdicts are then applied after the scan).
+    """
+
+    def __init__(self, generated=None, content_filter=None):
+        self.generated = generated
+        self.content_filter = content_filter
+
+    def _read_truncated(self, item: DumpItem) -> None:
+        """Read only the byte ranges the size policy keeps (seeks, never the whole file)."""
+        if item.reader is not None:
+            source_file = io.BytesIO(item.reader(item))
+        else:
+            source_file = open(item.path, "rb")
+        with source_file:
+            pieces = read_truncated(source_file, item.size, item.size_policy)
+        digest = hashlib.blake2b(digest_size=16)
+        for _, data in pieces:
+            digest.update(data)
+        item.content_hash = digest.hexdigest()
+        item.content, item.omitted_bytes = render_truncated(pieces, item.size)
+
+    def _read_extracted(self, item: DumpItem, stats: DumpStats) -> bool:
+        """Let the extractor read the file; returns False if it failed and the file should be read in full."""
+        if item.reader is not None:
+            source_file = io.BytesIO(item.reader(item))
+        else:
+            source_file = open(item.path, "rb")
+        try:
+            with source_file:
+                item.content = item.extractor.extract(source_file, item.size)
+        except ValueError as e:
+            if item.size is not None and item.size > item.extractor.max_file_size:
+                raise
+            log_error(item.extractor.log_dir, f"{item.extractor.name} extractor failed for {item.path}, dumping it in full: {e}")
+            item.extractor = None
+            return False
+        # Hash of the emitted text: caches keyed by it follow the extractor settings
+        item.content_hash = hashlib.blake2b(item.content.encode('utf-8'), digest_size=16).hexdigest()
+        stats.add('files_extracted')
+        return True
+
+    def process(self, item: DumpItem, stats: DumpStats) -> bool:
+        verdict = None
+        if self.generated is not None and item.extractor is None:
+            verdict = self.generated.cached_verdict(item)
+            if verdict and self.content_filter is None:
+                return self.generated.apply(item, verdict, stats)
+        content_filter = self.content_filter
+        if item.size_policy is not None:
+            self._read_truncated(item)
+            if content_filter is not None and not content_filter.process(item, item.content.encode('utf-8'), stats):
+                return False
+        elif item.extractor is not None and self._read_extracted(item, stats):
+            if content_filter is not None:
+                if not content_filter.process(item, item.content.encode('utf-8'), stats):
+                    return False
+                content_filter.excerpt(item, stats)
+            return True
+        else:
+            if item.reader is not None:
+                item.data = item.reader(item)
+            else:
+                with open(item.path, "rb") as source_file:
+                    item.data = source_file.read()
+            if content_filter is not None and not content_filter.process(item, item.data, stats):
+                return False # Binary or no match, never decoded
+            item.content_hash = hashlib.blake2b(item.data, digest_size=16).hexdigest()
+            item.content = decode_text(item.data)
+        if self.generated is not None:
+            reason = verdict if verdict is not None else self.generated.classify(item)
+            if reason:
+                return self.generated.apply(item, reason, stats)
+        if content_filter is not None:
+            content_filter.excerpt(item, stats)
+        return True
+
+
+class TransformStage:
+    """
+    Prepares the output block for a file: relative path, secret redaction (if a
+    SecretScanner is given), outline (if an Outliner is given), near-duplicate
+    signature (if a NearDuplicateIndex is given) and file header.
+    """
+
+    def __init__(self, project_dir: Path, output_settings: Dict, language_key: Optional[str],
+                 lang_settings: Optional[Dict], log_dir: str, secret_scanner=None, outliner=None,
+                 near_duplicates=None):
+        self.project_dir = project_dir
+        self.secret_scanner = secret_scanner
+        self.outliner = outliner
+        self.near_duplicates = near_duplicates
+        self.include_headers = output_settings['include_file_headers']
+        self.log_dir = log_dir
+
+        # Determine comment prefix based on detected language
+        self.comment_prefix = "#" # Default comment prefix
+        if lang_settings and lang_settings.get('comment_prefix'):
+            self.comment_prefix = lang_settings['comment_prefix']
+        elif language_key and self.include_headers:
+            # If language was detected but settings (incl. comment_prefix) are missing
+            log_error(log_dir, f"Comment prefix missing for language '{language_key}', using default '#'.")
+        # If no language was detected (language_key is None), default '#' is used.
+
+    def relative_path(self, item: DumpItem) -> str:
+        """Relative path with forward slashes, as used in the file header."""
+        return get_relative_path(str(self.project_dir), str(item.path)).replace('\\', '/')
+
+    def make_header(self, item: DumpItem) -> str:
+        if not self.include_headers:
+            return ""
+        try:
+            note = ""
+            if item.omitted_bytes:
+                note = f" (truncated: {item.size_policy['mode']}, {item.omitted_bytes} of {item.size} bytes omitted)"
+            if item.secrets_redacted:
+                note += f" ({item.secrets_redacted} secret(s) redacted)"
+            if item.extractor is not None:
+                note += f" (extracted: {item.extractor.name})"
+            if item.outlined:
+                note += " (outline)"
+            if item.excerpt_lines:
+                note += f" (excerpt: {item.excerpt_lines} matching lines)"
+            if item.generated:
+                note += f" (generated: {item.generated})"
+            return f"{self.comment_prefix} FILE: {item.rel_path or self.relative_path(item)}{note}\n\n"
+        except ValueError as e_relpath:
+            log_error(self.log_dir, f"Failed to get relative path for header for {item.path}: {e_relpath}")
+            return f"# FILE: {item.path.name} (error getting relative path)\n\n" # Fallback header
+        except Exception as e_header:
+            log_error(self.log_dir, f"Failed to generate header for {item.path}: {e_header}")
+            return f"# FILE: {item.path.name} (error generating header)\n\n" # Fallback header
+
+    def process(self, item: DumpItem, stats: DumpStats) -> bool:
+        if item.rel_path is None:
+            try:
+                item.rel_path = self.relative_path(item)
+            except ValueError:
+                pass # make_header reports the problem and falls back to the file name
+        if self.secret_scanner is not None and not self.secret_scanner.process(item, stats):
+            return False
+        if self.outliner is not None and not item.generated and not item.excerpt_lines:
+            self.outliner.process(item, stats)
+        if self.near_duplicates is not None:
+            self.near_duplicates.signature(item)
+        item.header = self.make_header(item)
+        item.data = None # Raw bytes are no longer needed
+        return True
+
+
+class DumpWriter:
+    """
+    Writes text to the dump file and keeps track of the byte offset.
+
+    Produces the same bytes as open(path, "w", encoding="utf-8") (UTF-8, '\n'
+    translated to os.linesep), but encodes itself so that the offset of every
+    block is known exactly (needed for the sidecar index).
+
+    The output goes to <path>.tmp and is renamed over the dump file only when
+    the with-block completes without an exception, so readers never see a
+    half-written dump.
+
+    While writing, the output is compared with the previous dump at the same
+    path: common_prefix is the number of leading bytes both share (None if
+    there was no previous dump). That prefix is what prompt caches can reuse.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.tmp_path = path.with_name(path.name + ".tmp")
+        self.offset = 0
+        self.common_prefix: Optional[int] = None
+        self._translate_newlines = os.linesep != '\n'
+        self._file: Optional[BinaryIO] = None
+        self._previous: Optional[BinaryIO] = None
+
+    def __enter__(self) -> "DumpWriter":
+        try:
+            self._previous = open(self.path, "rb")
+            self.common_prefix = 0
+        except OSError:
+            self._previous = None
+        self._file = open(self.tmp_path, "wb")
+        return self
+
+    def _compare_previous(self, data: bytes) -> None:
+        """Extend common_prefix while the new output matches the previous dump."""
+        old = self._previous.read(len(data))
+        if old == data:
+            self.common_prefix += len(data)
+            return
+        same = 0
+        for old_byte, new_byte in zip(old, data):
+            if old_byte != new_byte:
+                break
+            same += 1
+        self.common_prefix += same
+        self._previous.close()
+        self._previous = None
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close(commit=exc_type is None)
+
+    def close(self, commit: bool = True) -> None:
+        """Close the temp file and move it into place (or discard it if commit is False)."""
+        if self._file is None:
+            return
+        if self._previous is not None:
+            self._previous.close() # Before the rename (Windows cannot replace an open file)
+            self._previous = None
+        self._file.close()
+        self._file = None
+        if commit:
+            os.replace(self.tmp_path, self.path)
+        else:
+            try:
+                os.remove(self.tmp_path)
+            except OSError:
+                pass
+
+    def write(self, text: str) -> int:
+        """Write text and return the number of bytes written."""
+        if self._translate_newlines:
+            text = text.replace('\n', os.linesep)
+        data = text.encode('utf-8')
+        self._file.write(data)
+        if self._previous is not None:
+            self._compare_previous(data)
+        self.offset += len(data)
+        return len(data)
+
+
+class StreamWriter(DumpWriter):
+    """
+    DumpWriter over an already open binary stream (e.g. an HTTP response).
+    Produces the same bytes as a dump file; nothing is renamed or closed.
+    """
+
+    def __init__(self, stream: BinaryIO):
+        super().__init__(Path(os.devnull))
+        self._file = stream
+
+    def __enter__(self) -> "StreamWriter":
+        return self
+
+    def close(self, commit: bool = True) -> None:
+        self._file.flush()
+
+
+class WriteStage:
+    """
+    Writes header + content blocks to the dump file, separated by FILE_SEPARATOR.
+    If an index writer is given, the byte range of every block is recorded in it.
+    If a NearDuplicateIndex is given, near-duplicates of earlier files are
+    collapsed here, where files arrive in output order.
+    """
+
+    def __init__(self, writer: DumpWriter, index_writer=None, near_duplicates=None):
+        self.writer = writer
+        self.index_writer = index_writer
+        self.near_duplicates = near_duplicates
+
+    def process(self, item: DumpItem, stats: DumpStats) -> bool:
+        if self.near_duplicates is not None:
+            self.near_duplicates.process(item, stats)
+        item.minhash = None
+        start = self.writer.offset
+        header_len = self.writer.write(item.header)
+        self.writer.write(item.content)
+        if self.index_writer is not None:
+            self.index_writer.add(item.rel_path or item.path.name, start, self.writer.offset - start, header_len,
+                                  item.content_hash)
+        self.writer.write(FILE_SEPARATOR)
+        stats.add('files_dumped')
+        return True
+
+
+# --- Runners ---
+
+class DumpPipeline:
+    """
+    Synchronous pipeline: every file passes filter -> read -> transform -> write
+    before the next one is started. The stage objects hold no per-run state
+    (except the WriteStage), so they can be reused across runs.
+
+    The input is any object with an iter_items() method yielding DumpItems
+    in output order (e.g. WalkStage).
+    """
+
+    def __init__(self, filter_stage: FilterStage, read_stage: ReadStage, transform_stage: TransformStage, log_dir: str):
+        self.filter_stage = filter_stage
+        self.read_stage = read_stage
+        self.transform_stage = transform_stage
+        self.log_dir = log_dir
+
+    def _run_stage(self, stage, item: DumpItem, stats: DumpStats) -> None:
+        """Run one stage on an item, turning errors into the per-file error report."""
+        if item.skipped:
+            return
+        try:
+            if not stage.process(item, stats):
+                item.skipped = True
+        except Exception as e:
+            report_file_error(self.log_dir, item, e)
+            stats.add('files_failed')
+            item.skipped = True
+
+    def run(self, source, write_stage: WriteStage, stats: Optional[DumpStats] = None) -> DumpStats:
+        """Run all items of the source through the stages. Pass stats to observe progress while running."""
+        stats = stats if stats is not None else DumpStats()
+        for item in source.iter_items():
+            stats.add('files_processed')
+            for stage in (self.filter_stage, self.read_stage, self.transform_stage, write_stage):
+                self._run_stage(stage, item, stats)
+            stats.add('files_done')
+        return stats
+
+
+class AsyncDumpPipeline(DumpPipeline):
+    """
+    Asyncio pipeline with the same stages, connected by bounded queues:
+
+        walk -> [queue] -> filter (N) -> [queue] -> read (N) -> [queue] -> transform -> [queue] -> write
+
+    Blocking work (directory listing, stat, reads, writes) runs in a thread pool.
+    A full queue blocks the upstream stage (backpressure). The writer re-orders
+    items by their index, so output order and per-file error reporting are
+    identical to the synchronous run. At most reorder_window items are between
+    the source and the writer, which bounds the re-order buffer when one slow
+    file holds back everything behind it.
+    """
+
+    _DONE = object() # Queue sentinel
+    WALK_BATCH_SIZE = 256 # Items fetched from the source per executor call
+
+    def __init__(self, filter_stage: FilterStage, read_stage: ReadStage, transform_stage: TransformStage, log_dir: str,
+                 queue_size: int = 64, filter_workers: int = 2, read_workers: int = 4,
+                 executor: Optional[ThreadPoolExecutor] = None, reorder_window: Optional[int] = None):
+        super().__init__(filter_stage, read_stage, transform_stage, log_dir)
+        self.queue_size = max(1, queue_size)
+        self.filter_workers = max(1, filter_workers)
+        self.read_workers = max(1, read_workers)
+        # Default: what the four queues and the workers can hold, so the window only bites on stragglers
+        self.reorder_window = max(1, reorder_window or 4 * self.queue_size + self.filter_workers + self.read_workers)
+        self.executor = executor # Shared executor (e.g. from a long-running service); created per run if None
+
+    @classmethod
+    def _next_batch(cls, items: Iterator[DumpItem]) -> List[DumpItem]:
+        batch = []
+        for item in items:
+            batch.append(item)
+            if len(batch) >= cls.WALK_BATCH_SIZE:
+                break
+        return batch
+
+    async def _produce(self, source, out_q: asyncio.Queue, stats: DumpStats, executor, window: asyncio.Semaphore) -> None:
+        loop = asyncio.get_running_loop()
+        items = source.iter_items()
+        while True:
+            batch = await loop.run_in_executor(executor, self._next_batch, items)
+            if not batch:
+                break
+            for item in batch:
+                stats.add('files_processed')
+                await window.acquire() # Released by the writer once the item is written
+                await out_q.put(item)
+        for _ in range(self.filter_workers):
+            await out_q.put(self._DONE)
+
+    async def _work(self, stage, in_q: asyncio.Queue, out_q: asyncio.Queue, stats: DumpStats, executor) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            item = await in_q.get()
+            if item is self._DONE:
+                return
+            if executor is None or item.skipped:
+                self._run_stage(stage, item, stats)
+            else:
+                await loop.run_in_executor(executor, self._run_stage, stage, item, stats)
+            await out_q.put(item)
+
+    async def _stage(self, stage, workers: int, in_q: asyncio.Queue, out_q: asyncio.Queue,
+                     downstream_workers: int, stats: DumpStats, executor) -> None:
+        """Run a stage with several workers, then send one sentinel per downstream worker."""
+        await asyncio.gather(*(self._work(stage, in_q, out_q, stats, executor) for _ in range(workers)))
+        for _ in range(downstream_workers):
+            await out_q.put(self._DONE)
+
+    def _write_batch(self, write_stage: WriteStage, batch: List[DumpItem], stats: DumpStats) -> None:
+        for item in batch:
+            self._run_stage(write_stage, item, stats)
+            stats.add('files_done')
+
+    async def _write(self, write_stage: WriteStage, in_q: asyncio.Queue, stats: DumpStats, executor,
+                     window: asyncio.Semaphore) -> None:
+        loop = asyncio.get_running_loop()
+        pending: Dict[int, DumpItem] = {}
+        next_index = 0
+        while True:
+            item = await in_q.get()
+            if item is self._DONE:
+                break
+            pending[item.index] = item
+            # Flush everything that is now contiguous in source order
+            batch = []
+            while next_index in pending:
+                batch.append(pending.pop(next_index))
+                next_index += 1
+            if batch:
+                await loop.run_in_executor(executor, self._write_batch, write_stage, batch, stats)
+                for _ in batch:
+                    window.release()
+
+    async def run_async(self, source, write_stage: WriteStage, stats: Optional[DumpStats] = None) -> DumpStats:
+        stats = stats if stats is not None else DumpStats()
+        executor = self.executor or ThreadPoolExecutor(max_workers=self.filter_workers + self.read_workers + 2)
+        try:
+            filter_q: asyncio.Queue = asyncio.Queue(self.queue_size)
+            read_q: asyncio.Queue = asyncio.Queue(self.queue_size)
+            transform_q: asyncio.Queue = asyncio.Queue(self.queue_size)
+            write_q: asyncio.Queue = asyncio.Queue(self.queue_size)
+            window = asyncio.Semaphore(self.reorder_window)
+
+            await asyncio.gather(
+                self._produce(source, filter_q, stats, executor, window),
+                self._stage(self.filter_stage, self.filter_workers, filter_q, read_q, self.read_workers, stats, executor),
+                self._stage(self.read_stage, self.read_workers, read_q, transform_q, 1, stats, executor),
+                # Transform is CPU-only string work and runs on the event loop itself
+                self._stage(self.transform_stage, 1, transform_q, write_q, 1, stats, None),
+                self._write(write_stage, write_q, stats, executor, window),
+            )
+        finally:
+            if self.executor is None:
+                # On cancellation (Ctrl-C) queued work is dropped, running file operations finish
+                executor.shutdown(wait=True, cancel_futures=True)
+        return stats
+
+    def run(self, source, write_stage: WriteStage, stats: Optional[DumpStats] = None) -> DumpStats:
+        """Run the asynchronous pipeline to completion from synchronous code."""
+        return asyncio.run(self.run_async(source, write_stage, stats))
+
+# --- END OF FILE utils/dump_pipeline.py ---
@@ -0,0 +1,509 @@
+# --- START OF FILE utils/dump_server.py ---
+import hmac
+import ipaddress
+import json
+import os
+import socketserver
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from detectors.language_detector import detect_language
+from .config_manager import ConfigManager
+from .delta import DeltaResult, compute_git_delta, compute_manifest_delta
+from .dump_pipeline import (
+    DumpItem, DumpPipeline, DumpStats, FilterStage, PathListSource, ReadStage, StreamWriter, TransformStage,
+    WalkStage, WriteStage
+)
+from .error_logger import log_error
+from .file_lock import FileLock
+from .file_walker import walk_directory
+from .ignore_cache import IgnoreDecisionCache
+from .manifest import DumpManifest
+from .near_duplicates import NearDuplicateIndex
+from .extractors import ExtractorRegistry
+from .generated_files import GeneratedFileDetector
+from .ordering import OutputOrder
+from .outline import Outliner
+from .secret_scanner import SecretScanner
+from .single_flight import DumpSingleFlight
+
+
+class ContentCache:
+    """
+    LRU cache of decoded file contents, keyed by relative path and validated by
+    (size, mtime_ns). Shared by all requests of one project.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Tuple[int, int, str, Optional[str], int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, rel_path: str, size: int, mtime_ns: int) -> Optional[Tuple[str, Optional[str], int]]:
+        """Return (content, content_hash, omitted_bytes) if the cached entry is still valid."""
+        with self._lock:
+            entry = self._entries.get(rel_path)
+            if entry is None or entry[0] != size or entry[1] != mtime_ns:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(rel_path)
+            self.hits += 1
+            return entry[2], entry[3], entry[4]
+
+    def put(self, rel_path: str, size: int, mtime_ns: int, content: str, content_hash: Optional[str], omitted: int) -> None:
+        cost = len(content)
+        if cost > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(rel_path, None)
+            if old is not None:
+                self.total_bytes -= len(old[2])
+            self._entries[rel_path] = (size, mtime_ns, content, content_hash, omitted)
+            self.total_bytes += cost
+            while self.total_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.total_bytes -= len(evicted[2])
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.total_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class CachedReadStage(ReadStage):
+    """
+    ReadStage that serves unchanged files from a ContentCache. The (size,
+    mtime_ns) of each file is the one FilterStage set while stat'ing, so cache
+    hits cost no extra system call. Generated files are not cached, the
+    detector's verdict cache already avoids reading them.
+    """
+
+    def __init__(self, cache: ContentCache, generated=None):
+        super().__init__(generated)
+        self.cache = cache
+
+    def process(self, item: DumpItem, stats: DumpStats) -> bool:
+        stat = (item.size, item.mtime_ns) if item.rel_path and item.mtime_ns is not None else None
+        if stat is not None:
+            cached = self.cache.get(item.rel_path, stat[0], stat[1])
+            if cached is not None:
+                item.content, item.content_hash, item.omitted_bytes = cached
+                return True
+        if not super().process(item, stats):
+            return False
+        if stat is not None and not item.generated:
+            self.cache.put(item.rel_path, stat[0], stat[1], item.content, item.content_hash, item.omitted_bytes)
+        return True
+
+
+class _CollectStage:
+    """Write stage that keeps the items instead of writing them (single-file requests)."""
+
+    def __init__(self):
+        self.items: List[DumpItem] = []
+
+    def process(self, item: DumpItem, stats: DumpStats) -> bool:
+        self.items.append(item)
+        return True
+
+
+class ProjectState:
+    """
+    Warm per-project state of the dump server: ConfigManager (with its loaded
+    patterns), ignore decision cache, detected language and file contents.
+    Rebuilt when .dump/.dump_config, .dump/.dump_ignore or .gitignore change.
+    """
+
+    def __init__(self, project_dir: Path, cache_bytes: int):
+        self.project_dir = project_dir
+        self.lock = threading.Lock() # Serializes dumps of this project
+        self.content_cache = ContentCache(cache_bytes)
+        self.requests = 0
+        self.reloads = 0
+        self._watched_mtimes: Optional[Tuple] = None
+        self._load()
+
+    def _watched_files(self):
+        dump_dir = self.project_dir / ConfigManager.DUMP_SUBDIR
+        return (dump_dir / ConfigManager.CONFIG_FILENAME, dump_dir / ".dump_ignore", self.project_dir / ".gitignore")
+
+    def _snapshot(self) -> Tuple:
+        mtimes = []
+        for path in self._watched_files():
+            try:
+                mtimes.append(os.stat(path).st_mtime_ns)
+            except OSError:
+                mtimes.append(None)
+        return tuple(mtimes)
+
+    def _load(self) -> None:
+        self.config_manager = ConfigManager(str(self.project_dir))
+        self.config_manager.clean_ignore_list()
+        pipeline_settings = self.config_manager.get_pipeline_settings()
+        walk_workers = pipeline_settings['walk_workers']
+        self.language_key, detected_languages = detect_language(str(self.project_dir),
+                                                                walk=lambda d: walk_directory(d, workers=walk_workers))
+        if self.language_key:
+            self.config_manager.update_language_info(self.language_key, detected_languages)
+        self.output_settings = self.config_manager.get_output_settings()
+        self.lang_settings = self.config_manager.get_language_settings(self.language_key) if self.language_key else None
+        secret_settings = self.config_manager.get_secret_settings()
+        self.secret_scanner = None
+        if secret_settings['action'] != 'off':
+            self.secret_scanner = SecretScanner(secret_settings, self.config_manager.dump_dir_path, str(self.project_dir))
+        outline_settings = self.config_manager.get_outline_settings()
+        self.outliner = None
+        if outline_settings['enabled'] or outline_settings['patterns']:
+            self.outliner = Outliner(outline_settings, self.config_manager.dump_dir_path, str(self.project_dir))
+        extractor_settings = self.config_manager.get_extractor_settings()
+        self.extractors = None
+        if extractor_settings['enabled']:
+            self.extractors = ExtractorRegistry(extractor_settings, self.output_settings['max_file_size'], str(self.project_dir))
+        generated_settings = self.config_manager.get_generated_settings()
+        self.generated = None
+        if generated_settings['action'] != 'off':
+            self.generated = GeneratedFileDetector(generated_settings, self.config_manager.dump_dir_path, str(self.project_dir))
+        self.near_settings = self.config_manager.get_near_duplicate_settings()
+        self.ignore_cache = None
+        if self.config_manager.get_cache_settings()['ignore_decisions']:
+            self.ignore_cache = IgnoreDecisionCache(self.config_manager)
+        # Headers and size policies depend on the settings, so cached contents are dropped
+        self.content_cache.clear()
+        self._watched_mtimes = self._snapshot() # After our own config writes above
+
+    def refresh(self) -> bool:
+        """Reload the configuration if one of the rule files changed. Returns True if reloaded."""
+        if self._snapshot() == self._watched_mtimes:
+            return False
+        print(f"[dump-server] Configuration of {self.project_dir} changed, reloading.")
+        self._load()
+        self.reloads += 1
+        return True
+
+    def dump_lock(self) -> FileLock:
+        """
+        .dump/dump.lock, held around a dump like create_dump does, because the
+        manifest and the ignore decision cache are shared with command line runs.
+        """
+        return FileLock(self.config_manager.dump_dir_path / DumpSingleFlight.LOCK_FILENAME, timeout=None)
+
+    def compute_delta(self, delta: bool = False, since: Optional[str] = None) -> Optional[DeltaResult]:
+        """The changes since a git ref (since) or the last dump (delta), None for a full dump. Hold dump_lock()."""
+        if since is not None:
+            return compute_git_delta(self.config_manager, since)
+        if not delta:
+            return None
+        previous = DumpManifest.load(self.config_manager.dump_dir_path, self.project_dir)
+        previous = previous or DumpManifest(self.config_manager.dump_dir_path, self.project_dir)
+        return compute_manifest_delta(self.config_manager, previous, ignore_cache=self.ignore_cache)
+
+    def _reset_transforms(self) -> None:
+        """Forget the findings and counters of the previous request."""
+        if self.secret_scanner is not None:
+            self.secret_scanner.reset()
+        if self.outliner is not None:
+            self.outliner.reset()
+        if self.generated is not None:
+            self.generated.reset()
+
+    def _transform_stage(self, near_duplicates=None) -> TransformStage:
+        return TransformStage(self.project_dir, self.output_settings, self.language_key, self.lang_settings,
+                              str(self.project_dir), secret_scanner=self.secret_scanner, outliner=self.outliner,
+                              near_duplicates=near_duplicates)
+
+    def stream_dump(self, stream, delta_result: Optional[DeltaResult] = None) -> DumpStats:
+        """
+        Write a full dump, or the delta dump of a compute_delta() result, of the
+        working tree to a binary stream. Hold dump_lock().
+        """
+        log_dir = str(self.project_dir)
+        manifest = delta_result.manifest if delta_result is not None else None
+        if delta_result is not None:
+            source = PathListSource([self.project_dir / rel for rel in delta_result.changed], self.project_dir)
+        else:
+            source = WalkStage(self.config_manager, ignore_cache=self.ignore_cache,
+                               order=OutputOrder(self.output_settings['order'], self.config_manager, log_dir))
+            manifest = DumpManifest(self.config_manager.dump_dir_path, self.project_dir) # Recorded by FilterStage
+
+        near_duplicates = NearDuplicateIndex(self.near_settings, log_dir) if self.near_settings['enabled'] else None
+        transform_stage = self._transform_stage(near_duplicates)
+        pipeline = DumpPipeline(FilterStage(self.output_settings, log_dir, manifest=manifest if delta_result is None else None,
+                                            extractors=self.extractors),
+                                CachedReadStage(self.content_cache, self.generated), transform_stage, log_dir)
+        prefix = transform_stage.comment_prefix
+        self._reset_transforms()
+        with StreamWriter(stream) as writer:
+            if delta_result is not None:
+                delta_result.write_header(writer, prefix)
+            stats = pipeline.run(source, WriteStage(writer, near_duplicates=near_duplicates))
+            if delta_result is not None:
+                delta_result.write_deleted(writer, prefix)
+
+        if self.ignore_cache is not None:
+            # A git delta does not walk the tree, so untouched entries are not stale
+            self.ignore_cache.save(prune_untouched=delta_result is None or delta_result.manifest is not None)
+        if manifest is not None:
+            manifest.save()
+        if self.secret_scanner is not None:
+            self.secret_scanner.save(prune_unseen=delta_result is None)
+        if self.outliner is not None:
+            self.outliner.save(prune_unseen=delta_result is None)
+        if self.generated is not None:
+            self.generated.save(prune_unseen=delta_result is None)
+        return stats
+
+    def read_file(self, file_path: Path) -> Tuple[Optional[str], DumpStats]:
+        """
+        Run one file through the same filter, read and transform stages as a
+        dump (size limits and policies, extractors, generated files, secret
+        redaction, outline). Returns (content as it would be dumped, stats);
+        content is None if a stage left the file out.
+        """
+        collect = _CollectStage()
+        log_dir = str(self.project_dir)
+        pipeline = DumpPipeline(FilterStage(self.output_settings, log_dir, extractors=self.extractors),
+                                CachedReadStage(self.content_cache, self.generated), self._transform_stage(), log_dir)
+        self._reset_transforms()
+        stats = pipeline.run(PathListSource([file_path], self.project_dir), collect)
+        return (collect.items[0].content if collect.items else None), stats
+
+    def resolve_file(self, rel_path: str) -> Optional[Path]:
+        """Absolute path of a project file that may be dumped, None if it is outside, missing or ignored."""
+        file_path = (self.project_dir / rel_path.replace('\\', '/').lstrip('/')).resolve()
+        try:
+            file_path.relative_to(self.project_dir)
+        except ValueError:
+            return None
+        if not file_path.is_file() or self.config_manager.is_ignored(str(file_path)):
+            return None
+        return file_path
+
+
+class DumpServer:
+    """
+    Registry of warm projects, shared by all request handler threads. Only the
+    projects given at startup are served (the first one is the default);
+    requests never load, or create a .dump directory in, any other directory.
+    """
+
+    def __init__(self, cache_bytes: int, projects: List[Path]):
+        self.cache_bytes = cache_bytes
+        self.project_dirs = [Path(project).resolve() for project in projects]
+        self.default_project = self.project_dirs[0] if self.project_dirs else None
+        self.started = time.time()
+        self._projects: Dict[Path, ProjectState] = {}
+        self._lock = threading.Lock()
+
+    def load_projects(self) -> None:
+        """Load the warm state of every served project (at startup, before the first request)."""
+        for project_dir in self.project_dirs:
+            self.project(str(project_dir))
+
+    def project(self, project: Optional[str]) -> ProjectState:
+        """Get (or load) the warm state of a served project. Raises ValueError for other directories."""
+        if project:
+            project_dir = Path(project).resolve()
+        elif self.default_project is not None:
+            project_dir = self.default_project
+        else:
+            raise ValueError("missing 'project' parameter")
+        if project_dir not in self.project_dirs:
+            raise ValueError(f"not a served project: {project_dir}")
+        with self._lock:
+            state = self._projects.get(project_dir)
+            if state is None:
+                print(f"[dump-server] Loading project {project_dir}")
+                state = ProjectState(project_dir, self.cache_bytes)
+                self._projects[project_dir] = state
+            return state
+
+    def status(self) -> Dict:
+        with self._lock:
+            projects = {
+                str(path): {
+                    'requests': state.requests,
+                    'reloads': state.reloads,
+                    'language': state.language_key,
+                    'cached_files': len(state.content_cache),
+                    'cached_bytes': state.content_cache.total_bytes,
+                    'cache_hits': state.content_cache.hits,
+                    'cache_misses': state.content_cache.misses,
+                }
+                for path, state in self._projects.items()
+            }
+        return {'pid': os.getpid(), 'uptime_seconds': round(time.time() - self.started, 1), 'projects': projects}
+
+
+class DumpRequestHandler(BaseHTTPRequestHandler):
+    """
+    Local dump protocol (HTTP/1.0, the body is streamed until the connection closes):
+
+        GET /dump?project=<dir>                 full dump (same bytes as dump.txt)
+        GET /delta?project=<dir>[&since=<ref>]  delta dump since the last dump or a git ref
+        GET /file?project=<dir>&path=<rel>      one (not ignored) file, as it would be dumped
+        GET /status                             JSON with the warm projects and cache counters
+
+    project must be one of the served projects. If the server has a token,
+    every request needs the header 'Authorization: Bearer <token>'.
+    """
+
+    server_version = "GrebberDumpServer/1.0"
+    dump_server: DumpServer = None # Set by make_server()
+    token: Optional[str] = None    # Set by make_server()
+
+    def address_string(self) -> str:
+        # Unix socket clients have no (host, port) address
+        return self.client_address[0] if isinstance(self.client_address, tuple) and self.client_address else "local"
+
+    def log_message(self, format: str, *args) -> None:
+        print(f"[dump-server] {self.address_string()} {format % args}")
+
+    def _send_text_headers(self, content_type: str = "text/plain; charset=utf-8") -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+
+    def _send_error_text(self, code: int, message: str) -> None:
+        body = (message + "\n").encode('utf-8')
+        self.send_response(code)
+        self.send_header("Content-Type", "text/plain; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _authorized(self) -> bool:
+        if self.token is None:
+            return True
+        expected = f"Bearer {self.token}".encode('utf-8')
+        return hmac.compare_digest(self.headers.get("Authorization", "").encode('utf-8'), expected)
+
+    def do_GET(self) -> None:
+        if not self._authorized():
+            self._send_error_text(401, "Missing or wrong token (header 'Authorization: Bearer <token>').")
+            return
+        url = urlparse(self.path)
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        route = url.path.rstrip('/') or '/'
+
+        if route == '/status':
+            body = json.dumps(self.dump_server.status(), indent=2).encode('utf-8')
+            self._send_text_headers("application/json")
+            self.wfile.write(body)
+            return
+        if route not in ('/dump', '/delta', '/file'):
+            self._send_error_text(404, f"Unknown endpoint {url.path}. Use /dump, /delta, /file or /status.")
+            return
+
+        try:
+            state = self.dump_server.project(params.get('project'))
+        except ValueError as e:
+            self._send_error_text(400, f"Bad project: {e}")
+            return
+        except Exception as e:
+            log_error(str(Path.cwd()), f"Dump server failed to load project {params.get('project')}: {e}")
+            self._send_error_text(500, f"Failed to load project: {e}")
+            return
+
+        started = time.perf_counter()
+        with state.lock:
+            state.requests += 1
+            try:
+                state.refresh()
+            except Exception as e:
+                log_error(str(state.project_dir), f"Dump server failed to reload config: {e}")
+                self._send_error_text(500, f"Failed to reload configuration: {e}")
+                return
+
+            if route == '/file':
+                self._serve_file(state, params.get('path', ''))
+                return
+
+            with state.dump_lock():
+                # The delta is computed once, before the headers, so a bad ref is a clean 400
+                try:
+                    delta_result = state.compute_delta(delta=(route == '/delta'), since=params.get('since'))
+                except Exception as e:
+                    self._send_error_text(400, f"Cannot compute delta: {e}")
+                    return
+                # Headers are sent before the dump starts; errors afterwards can only be logged
+                self._send_text_headers()
+                try:
+                    stats = state.stream_dump(self.wfile, delta_result)
+                except (BrokenPipeError, ConnectionResetError):
+                    print(f"[dump-server] Client disconnected during {route} of {state.project_dir}")
+                    return
+                except Exception as e:
+                    log_error(str(state.project_dir), f"Dump server failed during {route}: {e}")
+                    return
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        print(f"[dump-server] {route} {state.project_dir}: {stats.files_dumped} files in {elapsed_ms:.0f} ms "
+              f"(content cache {state.content_cache.hits} hits / {state.content_cache.misses} misses total)")
+
+    def _serve_file(self, state: ProjectState, rel_path: str) -> None:
+        """Serve one file exactly as a dump would contain it (without the header), or say why it is left out."""
+        file_path = state.resolve_file(rel_path) if rel_path else None
+        if file_path is None:
+            self._send_error_text(404, f"Not a dumpable file of {state.project_dir}: '{rel_path}'")
+            return
+        content, stats = state.read_file(file_path)
+        if content is None:
+            if stats.files_dropped_secrets:
+                reason = "it contains secrets ([secrets] action 'drop')"
+            elif stats.files_skipped_large:
+                reason = "it exceeds max_file_size"
+            elif stats.files_generated:
+                reason = "it is a generated file ([generated] action 'skip')"
+            else:
+                reason = "it could not be read (see .dump/dump_error.log)"
+            self._send_error_text(403, f"'{rel_path}' is left out of dumps: {reason}")
+            return
+        self._send_text_headers()
+        self.wfile.write(content.encode('utf-8'))
+
+
+class _ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def is_loopback_host(host: str) -> bool:
+    """True for 'localhost' and loopback addresses (127.0.0.0/8, ::1)."""
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False # A host name that may resolve to anything
+
+
+def make_server(host: str = "127.0.0.1", port: int = 8765, unix_socket: Optional[str] = None,
+                cache_bytes: int = 256 * 1024 * 1024, projects: Optional[List[Path]] = None,
+                token: Optional[str] = None):
+    """
+    Create the dump server (not started). Listens on localhost TCP, or on a
+    Unix domain socket if unix_socket is given. Call serve_forever() to run.
+    Serves only the given projects (the first is the default). Listening on a
+    non-loopback address requires a token. Raises ValueError otherwise.
+    """
+    if not unix_socket and not is_loopback_host(host) and not token:
+        raise ValueError(f"Refusing to listen on non-local address {host} without a token")
+    handler = type("BoundDumpRequestHandler", (DumpRequestHandler,),
+                   {'dump_server': DumpServer(cache_bytes, projects or []), 'token': token or None})
+    if unix_socket:
+        if os.path.exists(unix_socket):
+            os.remove(unix_socket) # Left over from a previous run
+        return _ThreadingUnixHTTPServer(unix_socket, handler)
+    return ThreadingHTTPServer((host, port), handler)
+
+# --- END OF FILE utils/dump_server.py ---
@@ -0,0 +1,475 @@
+# --- START OF FILE utils/extractors.py ---
+import codecs
+import csv
+import io
+import json
+import posixpath
+import re
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple, Type
+
+MAX_STRING_CHARS = 200   # Longer JSON strings are cut (and never decoded beyond this)
+MAX_LINE_CHARS = 2000    # Longer emitted rows are cut
+MAX_NESTING = 4          # Deeper JSON values are shown as '{...}' / '[...]'
+MAX_KEYS = 100           # Keys shown per JSON object
+
+_WHITESPACE_RE = re.compile(rb"[ \t\r\n]*")
+_STRING_RUN_RE = re.compile(rb'[^"\\]*(?:\\.[^"\\]*)*', re.S) # Up to the closing quote or a backslash at the buffer end
+_SCALAR_RE = re.compile(rb"[-+0-9.a-zA-Z]+") # Numbers, literals and NaN/Infinity as written by Python
+_INT_RE = re.compile(r"[-+]?\d+$")
+_FLOAT_RE = re.compile(r"[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?$")
+
+
+class JsonStream:
+    """
+    Minimal pull parser over a binary stream. Reads 64 KiB chunks and keeps
+    only the unconsumed tail in memory, so skipped values (notebook outputs,
+    base64 payloads) are scanned but never decoded or held in full.
+    A leading UTF-8 BOM is skipped. Raises ValueError on malformed input.
+    """
+
+    CHUNK_SIZE = 64 * 1024
+
+    def __init__(self, stream: BinaryIO):
+        self.stream = stream
+        self.buf = b""
+        self.pos = 0
+        self.base = 0 # Stream offset of buf[0]
+        self.eof = False
+        self.started = False # BOM checked
+
+    @property
+    def offset(self) -> int:
+        """Bytes consumed so far."""
+        return self.base + self.pos
+
+    def _more(self) -> bool:
+        if self.eof:
+            return False
+        chunk = self.stream.read(self.CHUNK_SIZE)
+        if not chunk:
+            self.eof = True
+            return False
+        self.base += self.pos
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        if not self.started:
+            self.started = True
+            if self.buf.startswith(codecs.BOM_UTF8):
+                self.pos = len(codecs.BOM_UTF8)
+        return True
+
+    def _match(self, pattern: "re.Pattern") -> "re.Match":
+        """Match pattern at the current position; ValueError instead of None."""
+        match = pattern.match(self.buf, self.pos)
+        if match is None:
+            if self.pos < len(self.buf):
+                raise ValueError(f"unexpected byte {self.buf[self.pos:self.pos + 1]!r} at {self.offset}")
+            raise ValueError("unexpected end of data")
+        return match
+
+    def peek(self) -> Optional[int]:
+        """Next non-whitespace byte (not consumed), None at the end of the stream."""
+        while True:
+            self.pos = self._match(_WHITESPACE_RE).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._more():
+                return None
+
+    def _expect(self, char: bytes) -> None:
+        if self.peek() != char[0]:
+            raise ValueError(f"expected '{char.decode()}' at byte {self.offset}")
+        self.pos += 1
+
+    def string(self, limit: Optional[int] = None) -> Tuple[str, bool]:
+        """Read a string, keeping at most limit raw bytes. Returns (text, truncated)."""
+        self._expect(b'"')
+        kept = bytearray()
+        truncated = False
+        while True:
+            end = self._match(_STRING_RUN_RE).end()
+            if limit is None or len(kept) < limit:
+                kept += self.buf[self.pos:end]
+            elif end > self.pos:
+                truncated = True
+            self.pos = end
+            if end < len(self.buf) and self.buf[end] == 0x22:
+                self.pos += 1
+                break
+            if not self._more():
+                raise ValueError("unterminated string")
+        if limit is not None and len(kept) > limit:
+            kept = kept[:limit]
+            truncated = True
+        raw = kept.decode('utf-8', errors='ignore')
+        while True:
+            try:
+                return json.loads(f'"{raw}"', strict=False), truncated
+            except ValueError:
+                if not truncated or '\\' not in raw:
+                    raise
+                raw = raw[:raw.rindex('\\')] # Cut inside an escape sequence
+
+    def _scalar(self):
+        while True:
+            match = self._match(_SCALAR_RE)
+            if match.end() < len(self.buf) or not self._more():
+                break
+        match = self._match(_SCALAR_RE)
+        self.pos = match.end()
+        return json.loads(match.group())
+
+    def iter_object(self) -> Iterator[str]:
+        """Yield the keys of an object; the caller must consume each value (load or skip)."""
+        self._expect(b'{')
+        if self.peek() == 0x7d:
+            self.pos += 1
+            return
+        while True:
+            key, _ = self.string(MAX_STRING_CHARS)
+            self._expect(b':')
+            yield key
+            char = self.peek()
+            self.pos += 1
+            if char == 0x7d:
+                return
+            if char != 0x2c:
+                raise ValueError(f"expected ',' or '}}' at byte {self.offset - 1}")
+
+    def iter_array(self) -> Iterator[int]:
+        """Yield the indexes of an array; the caller must consume each element (load or skip)."""
+        self._expect(b'[')
+        if self.peek() == 0x5d:
+            self.pos += 1
+            return
+        index = 0
+        while True:
+            yield index
+            index += 1
+            char = self.peek()
+            self.pos += 1
+            if char == 0x5d:
+                return
+            if char != 0x2c:
+                raise ValueError(f"expected ',' or ']' at byte {self.offset - 1}")
+
+    def skip(self) -> None:
+        """Consume one value without building it."""
+        char = self.peek()
+        if char == 0x22:
+            self.string(0)
+        elif char == 0x7b:
+            for _ in self.iter_object():
+                self.skip()
+        elif char == 0x5b:
+            for _ in self.iter_array():
+                self.skip()
+        else:
+            self._scalar()
+
+    def load(self, max_items: int, depth: int = MAX_NESTING):
+        """Read one value with long strings cut, arrays limited to max_items and objects to MAX_KEYS entries."""
+        char = self.peek()
+        if char == 0x22:
+            text, truncated = self.string(MAX_STRING_CHARS)
+            return text + "..." if truncated else text
+        if char == 0x7b:
+            if depth <= 0:
+                self.skip()
+                return "{...}"
+            result = {}
+            for key in self.iter_object():
+                if len(result) < MAX_KEYS:
+                    result[key] = self.load(max_items, depth - 1)
+                else:
+                    self.skip()
+                    result["..."] = "more keys"
+            return result
+        if char == 0x5b:
+            if depth <= 0:
+                self.skip()
+                return "[...]"
+            result = []
+            more = 0
+            for index in self.iter_array():
+                if index < max_items:
+                    result.append(self.load(max_items, depth - 1))
+                else:
+                    self.skip()
+                    more += 1
+            if more:
+                result.append(f"... {more} more items")
+            return result
+        if char is None:
+            raise ValueError("unexpected end of data")
+        return self._scalar()
+
+
+def _type_name(value) -> str:
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "bool"
+    if isinstance(value, int):
+        return "int"
+    if isinstance(value, float):
+        return "float"
+    if isinstance(value, str):
+        return "str"
+    return "array" if isinstance(value, list) else "object"
+
+
+def _record_schema(records: List) -> str:
+    """Union of keys and value types over a sample of records ('{"id": "int", "name": "str|null"}')."""
+    if not records or not all(isinstance(record, dict) for record in records):
+        types = sorted({_type_name(record) for record in records})
+        return "|".join(types) or "empty"
+    schema: Dict[str, List[str]] = {}
+    for record in records:
+        for key, value in record.items():
+            types = schema.setdefault(key, [])
+            if _type_name(value) not in types:
+                types.append(_type_name(value))
+    return json.dumps({key: "|".join(types) for key, types in schema.items()}, ensure_ascii=False)
+
+
+def _cut(line: str) -> str:
+    return line if len(line) <= MAX_LINE_CHARS else line[:MAX_LINE_CHARS] + " ..."
+
+
+class Extractor:
+    """
+    Base class of format-specific extractors. extract() gets the open binary
+    file and returns the text for the dump; it should read only what it emits
+    and raise ValueError if the file is not in the expected format. Such files
+    are read in full instead if they are within max_file_size.
+    """
+
+    name = ""
+
+    def __init__(self, settings: Dict, max_file_size: int, log_dir: str):
+        self.max_rows = settings['max_rows']
+        self.max_file_size = max_file_size
+        self.log_dir = log_dir
+
+    def applies(self, size: Optional[int]) -> bool:
+        return True
+
+    def extract(self, stream: BinaryIO, size: Optional[int]) -> str:
+        raise NotImplementedError
+
+
+class NotebookExtractor(Extractor):
+    """Jupyter notebooks: code and markdown cells in percent format; outputs are skipped undecoded."""
+
+    name = "notebook"
+
+    def extract(self, stream: BinaryIO, size: Optional[int]) -> str:
+        parser = JsonStream(stream)
+        blocks: List[str] = []
+        counts = {'code': 0, 'markdown': 0, 'raw': 0}
+        outputs_omitted = 0
+        found_cells = False
+        for key in parser.iter_object():
+            if key != 'cells':
+                parser.skip() # metadata may hold widget state, nbformat is not needed
+                continue
+            found_cells = True
+            for _ in parser.iter_array():
+                cell_type, source, outputs = "code", "", 0
+                for cell_key in parser.iter_object():
+                    if cell_key == 'cell_type':
+                        cell_type, _ = parser.string(MAX_STRING_CHARS)
+                    elif cell_key == 'source':
+                        source = self._source(parser)
+                    elif cell_key == 'outputs':
+                        for _ in parser.iter_array():
+                            parser.skip()
+                            outputs += 1
+                    else:
+                        parser.skip()
+                counts[cell_type] = counts.get(cell_type, 0) + 1
+                marker = "# %%" if cell_type == 'code' else f"# %% [{cell_type}]"
+                block = f"{marker}\n{source.rstrip()}"
+                if outputs:
+                    block += f"\n[{outputs} output(s) omitted]"
+                    outputs_omitted += outputs
+                blocks.append(block)
+        if not found_cells:
+            raise ValueError("no 'cells' array (nbformat 4 expected)")
+        summary = f"[extracted: notebook, {counts['code']} code and {counts['markdown']} markdown cells"
+        summary += f", {outputs_omitted} output(s) omitted]" if outputs_omitted else "]"
+        return "\n\n".join([summary] + blocks) + "\n"
+
+    @staticmethod
+    def _source(parser: JsonStream) -> str:
+        """Cell source: a string or a list of lines. Sources are emitted in full."""
+        if parser.peek() == 0x22:
+            return parser.string()[0]
+        return "".join(parser.string()[0] for _ in parser.iter_array())
+
+
+class CsvExtractor(Extractor):
+    """CSV/TSV: column types inferred from the first rows, then the header and those rows."""
+
+    name = "csv"
+
+    def extract(self, stream: BinaryIO, size: Optional[int]) -> str:
+        text = io.TextIOWrapper(stream, encoding='utf-8-sig', errors='replace', newline='')
+        try:
+            sample = text.read(8192)
+            try:
+                dialect = csv.Sniffer().sniff(sample, delimiters=",;\t|")
+            except csv.Error:
+                dialect = csv.excel_tab if sample.count('\t') > sample.count(',') else csv.excel
+            reader = csv.reader(self._chain(sample, text), dialect)
+            rows: List[List[str]] = []
+            complete = True
+            try:
+                for row in reader:
+                    if len(rows) > self.max_rows: # Header plus max_rows data rows
+                        complete = False
+                        break
+                    rows.append(row)
+            except csv.Error as e:
+                raise ValueError(f"CSV parse error: {e}") from e
+        finally:
+            text.detach() # The caller closes the underlying file
+        if not rows:
+            return "[extracted: CSV, empty]\n"
+        header, data = rows[0], rows[1:]
+        out = io.StringIO()
+        writer = csv.writer(out, dialect, lineterminator='\n')
+        writer.writerows(rows)
+        body = out.getvalue()
+        if complete:
+            count = f"{len(data)} rows"
+        else:
+            row_bytes = max(1, len(body.encode('utf-8')) // len(rows))
+            count = f"first {len(data)} of ~{(size or 0) // row_bytes} rows"
+        schema = ", ".join(f"{name} ({self._column_type([row[i] for row in data if i < len(row)])})"
+                           for i, name in enumerate(header))
+        parts = [f"[extracted: CSV, {len(header)} columns, {count}]", f"schema: {_cut(schema)}",
+                 "\n".join(_cut(line) for line in body.rstrip('\n').split('\n'))]
+        if not complete:
+            parts.append("[... more rows not shown ...]")
+        return "\n".join(parts) + "\n"
+
+    @staticmethod
+    def _chain(sample: str, text: io.TextIOWrapper) -> Iterator[str]:
+        """Lines of the already read sample followed by the rest of the file, read lazily."""
+        lines = sample.splitlines(keepends=True)
+        if lines and not lines[-1].endswith(('\n', '\r')):
+            lines[-1] += text.readline() # Complete the line cut by the sample
+        yield from lines
+        yield from text
+
+    @staticmethod
+    def _column_type(values: List[str]) -> str:
+        values = [v.strip() for v in values if v.strip()]
+        if not values:
+            return "empty"
+        if all(_INT_RE.match(v) for v in values):
+            return "int"
+        if all(_FLOAT_RE.match(v) for v in values):
+            return "float"
+        if all(v.lower() in ('true', 'false') for v in values):
+            return "bool"
+        return "str"
+
+
+class JsonLinesExtractor(Extractor):
+    """JSON Lines: schema over the first records, then those records (long strings cut)."""
+
+    name = "jsonl"
+
+    def extract(self, stream: BinaryIO, size: Optional[int]) -> str:
+        parser = JsonStream(stream)
+        records = []
+        while parser.peek() is not None and len(records) < self.max_rows:
+            records.append(parser.load(self.max_rows))
+        complete = parser.peek() is None
+        if complete:
+            count = f"{len(records)} records"
+        else:
+            count = f"first {len(records)} of ~{(size or 0) * len(records) // max(1, parser.offset)} records"
+        parts = [f"[extracted: JSON Lines, {count}]", f"schema: {_cut(_record_schema(records))}"]
+        parts += [_cut(json.dumps(record, ensure_ascii=False)) for record in records]
+        if not complete:
+            parts.append("[... more records not shown ...]")
+        return "\n".join(parts) + "\n"
+
+
+class JsonExtractor(Extractor):
+    """
+    Large JSON files (json_min_bytes and up): for a top-level array the schema
+    of the first items and those items, for an object its keys with nested
+    arrays cut to the first items. Smaller JSON files are dumped as they are.
+    """
+
+    name = "json"
+
+    def __init__(self, settings: Dict, max_file_size: int, log_dir: str):
+        super().__init__(settings, max_file_size, log_dir)
+        self.min_bytes = settings['json_min_bytes']
+
+    def applies(self, size: Optional[int]) -> bool:
+        return size is not None and size >= self.min_bytes
+
+    def extract(self, stream: BinaryIO, size: Optional[int]) -> str:
+        parser = JsonStream(stream)
+        if parser.peek() == 0x5b:
+            items = []
+            complete = True
+            for index in parser.iter_array():
+                if index >= self.max_rows:
+                    complete = False # The rest is not read at all
+                    break
+                items.append(parser.load(self.max_rows))
+            count = f"{len(items)} items" if complete else f"first {len(items)} items"
+            parts = [f"[extracted: JSON array, {count}]", f"schema: {_cut(_record_schema(items))}",
+                     json.dumps(items, indent=2, ensure_ascii=False)]
+            if not complete:
+                parts.append("[... more items not shown ...]")
+            return "\n".join(parts) + "\n"
+        value = parser.load(self.max_rows)
+        return "\n".join([f"[extracted: JSON {_type_name(value)}, arrays cut to {self.max_rows} items]",
+                          json.dumps(value, indent=2, ensure_ascii=False)]) + "\n"
+
+
+# Extension -> extractor class. register_extractor() adds or replaces entries.
+EXTRACTORS: Dict[str, Type[Extractor]] = {
+    '.ipynb': NotebookExtractor,
+    '.csv': CsvExtractor,
+    '.tsv': CsvExtractor,
+    '.jsonl': JsonLinesExtractor,
+    '.ndjson': JsonLinesExtractor,
+    '.json': JsonExtractor,
+}
+
+
+def register_extractor(extension: str, extractor_class: Type[Extractor]) -> None:
+    """Use extractor_class for files with this extension (e.g. '.parquet-meta')."""
+    EXTRACTORS[extension.lower()] = extractor_class
+
+
+class ExtractorRegistry:
+    """
+    Extractors configured by [extractors] in .dump_config. FilterStage asks
+    find() for every file; files with an extractor are not subject to
+    max_file_size, because the extractor bounds what it reads and emits.
+    """
+
+    def __init__(self, settings: Dict, max_file_size: int, log_dir: str):
+        self.extractors: Dict[str, Extractor] = {
+            ext: extractor_class(settings, max_file_size, log_dir) for ext, extractor_class in EXTRACTORS.items()
+            if ext not in settings['disabled']
+        }
+
+    def find(self, rel_path: str, size: Optional[int]) -> Optional[Extractor]:
+        extractor = self.extractors.get(posixpath.splitext(rel_path)[1].lower())
+        if extractor is not None and extractor.applies(size):
+            return extractor
+        return None
+
+# --- END OF FILE utils/extractors.py ---
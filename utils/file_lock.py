@@ -0,0 +1,93 @@
+# --- START OF FILE utils/file_lock.py ---
+import os
+import time
+from pathlib import Path
+from typing import Optional
+
+if os.name == 'nt':
+    import msvcrt
+else:
+    import fcntl
+
+
+class FileLock:
+    """
+    Exclusive inter-process lock on a sidecar file (e.g. .dump/.dump_ignore.lock),
+    used around read-modify-write cycles of shared files so that concurrent
+    processes (one per Explorer selection) do not lose each other's changes.
+
+    The lock is held by the operating system (fcntl.flock / msvcrt.locking) and
+    released automatically if the process dies, so a lock file left on disk is
+    never stale.
+
+    Usage:
+        with FileLock(path_to_lock_file):
+            ... reload, modify, save ...
+    """
+
+    POLL_INTERVAL = 0.05
+
+    def __init__(self, lock_path: Path, timeout: Optional[float] = 10.0):
+        """
+        Args:
+            lock_path: The lock file (created if missing).
+            timeout: Seconds to wait for the lock, None waits forever.
+        """
+        self.lock_path = Path(lock_path)
+        self.timeout = timeout
+        self._fd: Optional[int] = None
+
+    def _try_lock(self) -> bool:
+        try:
+            if os.name == 'nt':
+                os.lseek(self._fd, 0, os.SEEK_SET)
+                msvcrt.locking(self._fd, msvcrt.LK_NBLCK, 1)
+            else:
+                fcntl.flock(self._fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except OSError:
+            return False
+
+    def try_acquire(self) -> bool:
+        """Take the lock if it is free, without waiting. Returns True on success."""
+        if self._fd is not None:
+            return True
+        self.lock_path.parent.mkdir(parents=True, exist_ok=True)
+        self._fd = os.open(str(self.lock_path), os.O_RDWR | os.O_CREAT, 0o644)
+        if self._try_lock():
+            return True
+        os.close(self._fd)
+        self._fd = None
+        return False
+
+    def acquire(self) -> None:
+        """Wait for the lock. Raises TimeoutError if it is not acquired within the timeout."""
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        while not self.try_acquire():
+            if deadline is not None and time.monotonic() >= deadline:
+                raise TimeoutError(f"Timed out after {self.timeout}s waiting for lock {self.lock_path}")
+            time.sleep(self.POLL_INTERVAL)
+
+    def release(self) -> None:
+        if self._fd is None:
+            return
+        try:
+            if os.name == 'nt':
+                os.lseek(self._fd, 0, os.SEEK_SET)
+                msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+        except OSError:
+            pass # Closing the descriptor releases the lock as well
+        finally:
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self) -> "FileLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.release()
+
+# --- END OF FILE utils/file_lock.py ---
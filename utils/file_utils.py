@@ -24,4 +24,15 @@ def get_relative_path(base_path: str, file_path: str) -> str:
     """
     Get the relative path of a file from the base path.
     """
-    return os.path.relpath(file_path, base_path) 
\ No newline at end of file
+    return os.path.relpath(file_path, base_path)
+
+def decode_text(data: bytes) -> str:
+    """
+    Decode raw file bytes as UTF-8 with universal newlines, i.e. exactly what
+    open(path, "r", encoding="utf-8").read() returns.
+    Raises UnicodeDecodeError for non UTF-8 content.
+    """
+    text = data.decode('utf-8')
+    if '\r' in text:
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+    return text
@@ -0,0 +1,323 @@
+# --- START OF FILE utils/file_walker.py ---
+import os
+import threading
+from collections import deque
+from pathlib import Path
+from typing import Callable, Deque, Dict, Iterator, List, Optional, Tuple
+
+from .error_logger import log_error
+
+# A scan function lists one directory and returns (subdirs to descend into, files)
+ScanFunc = Callable[[Path], Tuple[List[str], List[str]]]
+
+
+def _scan_directory(config_manager, dir_path: Path) -> Tuple[List[str], List[str]]:
+    """
+    List a directory and apply the ignore rules to its direct children.
+    Returns (included_dirs, included_files) in directory listing order,
+    mirroring how os.walk splits entries (symlinked directories are listed
+    as directories but never recursed into, just like os.walk).
+    """
+    dirs: List[str] = []
+    files: List[str] = []
+    with os.scandir(dir_path) as it:
+        for entry in it:
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                is_dir = False
+            if config_manager.is_ignored(str(dir_path / entry.name)):
+                continue
+            if is_dir:
+                if not entry.is_symlink():
+                    dirs.append(entry.name)
+            else:
+                files.append(entry.name)
+    return dirs, files
+
+
+def _scan_raw(dir_path: Path) -> Tuple[List[str], List[str]]:
+    """List a directory without ignore rules, split like os.walk (symlinked dirs are not descended)."""
+    dirs: List[str] = []
+    files: List[str] = []
+    with os.scandir(dir_path) as it:
+        for entry in it:
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                is_dir = False
+            if is_dir:
+                if not entry.is_symlink():
+                    dirs.append(entry.name)
+            else:
+                files.append(entry.name)
+    return dirs, files
+
+
+class _WorkStealingScanner:
+    """
+    Scans directories on a pool of threads. Every worker owns a deque: it pushes
+    the subdirectories it discovers to the tail and pops from the tail (depth
+    first, so results arrive roughly in the order they are consumed), and when
+    its own deque is empty it steals from the head of another worker's deque
+    (the oldest, usually largest subtrees). Directory listing releases the GIL,
+    so the metadata latency of slow file systems is overlapped.
+
+    Results are published per directory; the consumer (_ordered_walk) picks
+    them up in os.walk order. Once max_ahead results are waiting to be
+    consumed, workers only scan the directory the consumer is waiting for, so
+    a slow consumer holds at most max_ahead + workers listings in memory.
+    """
+
+    def __init__(self, scan: ScanFunc, workers: int, max_ahead: int = 256):
+        self.scan = scan
+        self.max_ahead = max(1, max_ahead)
+        self.deques: List[Deque[Path]] = [deque() for _ in range(workers)]
+        self.results: Dict[Path, Tuple[Optional[Tuple[List[str], List[str]]], Optional[BaseException]]] = {}
+        lock = threading.Lock() # One lock, so that workers see how many results are waiting
+        self._work = threading.Condition(lock)
+        self._done = threading.Condition(lock)
+        self._pending = 0 # Queued or in-progress directories
+        self._wanted: Optional[Path] = None # Directory the consumer is waiting for
+        self._stop = False
+        self._threads = [threading.Thread(target=self._run, args=(i,), name=f"walker-{i}", daemon=True)
+                         for i in range(workers)]
+
+    def start(self, root: Path) -> None:
+        self._push(0, [root])
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self) -> None:
+        with self._work:
+            self._stop = True
+            self._work.notify_all()
+        for thread in self._threads:
+            thread.join()
+
+    def _push(self, worker: int, paths: List[Path]) -> None:
+        with self._work:
+            self._pending += len(paths)
+            self.deques[worker].extend(paths)
+            self._work.notify_all()
+
+    def _take_wanted(self) -> Optional[Path]:
+        """Remove the directory the consumer waits for from the deques (lock held)."""
+        wanted = self._wanted
+        if wanted is not None:
+            for queued in self.deques:
+                if wanted in queued:
+                    queued.remove(wanted)
+                    return wanted
+        return None
+
+    def _take(self, worker: int) -> Optional[Path]:
+        """Pop from the own tail or steal from another worker's head; None means stop."""
+        with self._work:
+            while True:
+                if self._stop:
+                    return None
+                if len(self.results) >= self.max_ahead:
+                    # Far enough ahead: only unblock the consumer, or wait until it catches up
+                    wanted = self._take_wanted()
+                    if wanted is not None:
+                        return wanted
+                    if self._pending == 0:
+                        return None
+                    self._work.wait()
+                    continue
+                own = self.deques[worker]
+                if own:
+                    return own.pop()
+                for offset in range(1, len(self.deques)):
+                    victim = self.deques[(worker + offset) % len(self.deques)]
+                    if victim:
+                        return victim.popleft()
+                if self._pending == 0:
+                    return None
+                self._work.wait()
+
+    def _run(self, worker: int) -> None:
+        while True:
+            dir_path = self._take(worker)
+            if dir_path is None:
+                return
+            try:
+                result, error = self.scan(dir_path), None
+            except BaseException as e: # Handed to the consumer, which decides
+                result, error = None, e
+            if result is not None and result[0]:
+                # Reverse, so that popping from the tail continues with the first subdirectory
+                self._push(worker, [dir_path / d for d in reversed(result[0])])
+            with self._done:
+                self.results[dir_path] = (result, error)
+                self._done.notify_all()
+            with self._work:
+                self._pending -= 1
+                if self._pending == 0:
+                    self._work.notify_all()
+
+    def result(self, dir_path: Path) -> Tuple[Optional[Tuple[List[str], List[str]]], Optional[BaseException]]:
+        """Wait for and remove the scan result of a directory."""
+        with self._done:
+            if dir_path not in self.results:
+                self._wanted = dir_path
+                self._work.notify_all()
+                while dir_path not in self.results:
+                    self._done.wait()
+                self._wanted = None
+            result = self.results.pop(dir_path)
+            self._work.notify_all() # A slot is free again
+            return result
+
+
+def _ordered_walk(root: Path, scan: ScanFunc, workers: int = 1,
+                  on_error: Optional[Callable[[Path, OSError], None]] = None) -> Iterator[Tuple[Path, List[str], List[str]]]:
+    """
+    Walk top-down in os.walk order and yield (dir_path, dirs, files).
+    With workers > 1 the directories are scanned ahead of the consumer by a
+    work-stealing thread pool; the output order is identical.
+    Directories that cannot be listed (OSError) are reported to on_error and skipped.
+    """
+    scanner = None
+    if workers > 1:
+        scanner = _WorkStealingScanner(scan, workers)
+        scanner.start(root)
+    try:
+        stack: List[Path] = [root]
+        while stack:
+            dir_path = stack.pop()
+            if scanner is None:
+                try:
+                    dirs, files = scan(dir_path)
+                except OSError as e:
+                    if on_error is not None:
+                        on_error(dir_path, e)
+                    continue
+            else:
+                result, error = scanner.result(dir_path)
+                if error is not None:
+                    if isinstance(error, OSError):
+                        if on_error is not None:
+                            on_error(dir_path, error)
+                        continue
+                    raise error
+                dirs, files = result
+
+            yield dir_path, dirs, files
+
+            # Push in reverse so the first subdirectory is walked next (os.walk order)
+            for d in reversed(dirs):
+                stack.append(dir_path / d)
+    finally:
+        if scanner is not None:
+            scanner.stop()
+
+
+def walk_project(config_manager, start_dir: Optional[str] = None, ignore_cache=None,
+                 workers: Optional[int] = None) -> Iterator[Tuple[Path, List[str]]]:
+    """
+    Walk the project top-down (same order as os.walk) and yield
+    (directory_path, included_file_names) for every directory that is not pruned
+    by the ignore rules.
+
+    Args:
+        config_manager: ConfigManager providing is_ignored().
+        start_dir: Directory to start from (defaults to the project root).
+        ignore_cache: Optional IgnoreDecisionCache. Directories whose mtime_ns and
+                      relevant rules are unchanged are replayed from the cache
+                      without listing them or evaluating any ignore rule.
+        workers: Number of threads scanning directories in parallel (1 = scan
+                 inline, None = [pipeline] walk_workers). Ignore pruning runs in
+                 the workers; the output order does not depend on this value.
+    """
+    project_dir = config_manager.project_dir
+    if workers is None:
+        workers = config_manager.get_pipeline_settings()['walk_workers']
+    root = Path(start_dir).resolve() if start_dir else project_dir
+
+    def scan(dir_path: Path) -> Tuple[List[str], List[str]]:
+        try:
+            rel_dir = dir_path.relative_to(project_dir).as_posix()
+            rel_dir = '' if rel_dir == '.' else rel_dir
+        except ValueError:
+            rel_dir = None  # Outside the project, never cached
+
+        cached = None
+        mtime_ns = None
+        if ignore_cache is not None and rel_dir is not None:
+            mtime_ns = os.stat(dir_path).st_mtime_ns
+            cached = ignore_cache.lookup(rel_dir, str(dir_path), mtime_ns)
+        if cached is not None:
+            return cached
+        dirs, files = _scan_directory(config_manager, dir_path)
+        if ignore_cache is not None and rel_dir is not None:
+            ignore_cache.store(rel_dir, str(dir_path), mtime_ns, dirs, files)
+        return dirs, files
+
+    def on_error(dir_path: Path, e: OSError) -> None:
+        # os.walk silently skips unreadable directories; log instead of failing the dump
+        log_error(str(project_dir), f"Cannot list directory {dir_path}: {e}")
+
+    for dir_path, _dirs, files in _ordered_walk(root, scan, workers, on_error):
+        yield dir_path, files
+
+
+def normalize_scopes(rel_paths: List[str]) -> List[str]:
+    """
+    Clean up subtree scopes (paths relative to the project root, forward
+    slashes): duplicates and scopes inside another scope are dropped, the
+    order of the remaining scopes is kept. '' (the root) covers everything.
+    """
+    cleaned = list(dict.fromkeys(p.strip('/') for p in rel_paths))
+    if '' in cleaned:
+        return ['']
+    return [p for p in cleaned
+            if not any(other != p and p.startswith(other + '/') for other in cleaned)]
+
+
+def find_ignored_ancestor(config_manager, rel_path: str) -> Optional[str]:
+    """
+    First path on the way from the project root to rel_path (inclusive) that the
+    ignore rules exclude, None if a full walk would reach rel_path.
+    """
+    parts = [part for part in rel_path.split('/') if part]
+    for depth in range(1, len(parts) + 1):
+        prefix = '/'.join(parts[:depth])
+        if config_manager.is_ignored(str(config_manager.project_dir / prefix)):
+            return prefix
+    return None
+
+
+def walk_subtrees(config_manager, scopes: List[str], ignore_cache=None,
+                  workers: Optional[int] = None) -> Iterator[Tuple[Path, List[str]]]:
+    """
+    Like walk_project, but only below the given scopes (normalized paths
+    relative to the project root, see normalize_scopes). A scope may be a
+    directory or a single file. The root's rules apply unchanged, so every
+    yielded file is exactly what a full walk would yield for that subtree;
+    scopes are expected to be checked with find_ignored_ancestor beforehand.
+    """
+    project_dir = config_manager.project_dir
+    for scope in scopes:
+        path = project_dir / scope if scope else project_dir
+        if path.is_dir() and not path.is_symlink():
+            yield from walk_project(config_manager, start_dir=str(path), ignore_cache=ignore_cache, workers=workers)
+        elif path.is_file():
+            yield path.parent, [path.name]
+
+
+def walk_directory(root: str, workers: int = 1, scan: Optional[ScanFunc] = None) -> Iterator[Tuple[Path, List[str]]]:
+    """
+    Walk a directory without ignore rules and yield (directory_path, file_names),
+    in the same order and with the same files as os.walk(root).
+
+    Args:
+        root: Directory to walk.
+        workers: Number of threads scanning directories in parallel (1 = scan inline).
+        scan: Replacement for the directory listing (used by the walker benchmark).
+    """
+    for dir_path, _dirs, files in _ordered_walk(Path(root), scan or _scan_raw, workers):
+        yield dir_path, files
+
+# --- END OF FILE utils/file_walker.py ---
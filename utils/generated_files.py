@@ -0,0 +1,196 @@
+# --- START OF FILE utils/generated_files.py ---
+import hashlib
+import json
+import posixpath
+import re
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Set
+
+from .json_cache import JsonCacheFile, drop_unseen
+
+PROBE_CHARS = 1024 # Only the start of a file is classified
+PROSE_EXTENSIONS = {'.md', '.rst', '.txt', '.adoc'} # Never checked for "generated" markers
+
+# Minified code: a very long line, almost no whitespace and many operators/punctuation
+MINIFIED_MIN_LINE = 500
+MINIFIED_MAX_WHITESPACE = 0.08
+MINIFIED_MIN_SYMBOLS = 0.18
+_SYMBOL_CHARS = frozenset('{}()[];,=:!&|?+-*/<>"\'.')
+
+_MINIFIED_SUFFIXES = ('.min.js', '.min.mjs', '.min.css', '-min.js', '.bundle.js')
+
+# Generation markers only count in the header comment block at the top of a file (see header_comments)
+_GENERATED_MARKER_RE = re.compile(r"""
+      @generated\b | \bDO\ NOT\ EDIT\b
+    | (?i:(?:this\ (?:file|code)\ (?:was|is|has\ been)\ |code\ )?
+          (?:auto(?:matically)?[- ]?)?generated\ (?:by|from|with|using)\b)
+""", re.X)
+_COMMENT_LINE_RE = re.compile(r"[ \t]*(?:#|//|/\*|\*|<!--|--|;|\(\*|<\?xml\b)")
+_BLOCK_COMMENTS = (('/*', '*/'), ('<!--', '-->'), ('(*', '*)'))
+
+# License banners of popular libraries that are often vendored into projects
+_VENDOR_BANNERS = (
+    ('jquery', r"jQuery (?:JavaScript Library )?v\d"),
+    ('lodash', r"@license\s+Lodash\b|\blodash\.com\b"),
+    ('underscore', r"Underscore\.js \d"),
+    ('backbone', r"Backbone\.js \d"),
+    ('react', r"@license React\b"),
+    ('vue', r"Vue\.js v\d"),
+    ('angular', r"@license Angular(?:JS)? v\d"),
+    ('bootstrap', r"Bootstrap v\d"),
+    ('popper', r"@popperjs/core|Popper\.js v\d"),
+    ('moment', r"\bmomentjs\.com\b|//! moment\.js"),
+    ('d3', r"\bd3js\.org\b"),
+    ('three', r"\bthreejs\.org\b|three\.js authors"),
+    ('chartjs', r"Chart\.js v\d"),
+    ('highlightjs', r"Highlight\.js v\d"),
+    ('dompurify', r"@license DOMPurify|DOMPurify \d"),
+    ('axios', r"axios v\d"),
+    ('core_js', r"\bcore-js\b.*\bzloirock\b"),
+    ('normalize_css', r"normalize\.css v\d"),
+    ('font_awesome', r"Font Awesome (?:Free|Pro) \d"),
+    ('tailwindcss', r"tailwindcss v\d"),
+)
+_VENDOR_BANNER_RE = re.compile("|".join(f"(?P<{name}>{pattern})" for name, pattern in _VENDOR_BANNERS))
+
+
+def probe_hash(head: str) -> str:
+    """Hash of the classified start of a file (first PROBE_CHARS characters), as used by vendored_hashes."""
+    return hashlib.blake2b(head[:PROBE_CHARS].encode('utf-8'), digest_size=16).hexdigest()
+
+
+def header_comments(head: str) -> str:
+    """Leading comment and blank lines of a file (including open block comments), where generators put their markers."""
+    lines = []
+    closing = None # End of the block comment a previous line opened
+    for line in head.split('\n'):
+        if closing is None:
+            if line.strip() and not _COMMENT_LINE_RE.match(line):
+                break
+            for opening, end in _BLOCK_COMMENTS:
+                start = line.find(opening)
+                if start != -1 and line.find(end, start + len(opening)) == -1:
+                    closing = end
+                    break
+        elif closing in line:
+            closing = None
+        lines.append(line)
+    return '\n'.join(lines)
+
+
+def classify_head(rel_path: str, head: str, hashes: Set[str] = frozenset()) -> Optional[str]:
+    """
+    Reason why a file looks generated, minified or vendored, judged from its
+    first PROBE_CHARS characters; None for a normal file.
+    """
+    head = head[:PROBE_CHARS]
+    name = rel_path.rsplit('/', 1)[-1].lower()
+    ext = posixpath.splitext(name)[1]
+    if name.endswith(_MINIFIED_SUFFIXES):
+        return "minified-name"
+    if ext == '.map' and head.lstrip().startswith('{') and '"mappings"' in head:
+        return "source-map"
+    if hashes and probe_hash(head) in hashes:
+        return "vendored-hash"
+    banner = _VENDOR_BANNER_RE.search(head)
+    if banner:
+        return f"vendored:{banner.lastgroup}"
+    if ext not in PROSE_EXTENSIONS and _GENERATED_MARKER_RE.search(header_comments(head)):
+        return "generated-marker"
+    if max(map(len, head.split('\n'))) >= MINIFIED_MIN_LINE:
+        whitespace = sum(head.count(c) for c in ' \t\n') / len(head)
+        symbols = sum(1 for c in head if c in _SYMBOL_CHARS) / len(head)
+        if whitespace <= MINIFIED_MAX_WHITESPACE and symbols >= MINIFIED_MIN_SYMBOLS:
+            return "minified-lines"
+    return None
+
+
+class GeneratedFileDetector:
+    """
+    Finds generated, minified and vendored files ([generated] in .dump_config)
+    from the first KB of their content and skips them or replaces them by a
+    one-line summary. Verdicts are cached by (size, mtime_ns) in
+    .dump/generated_cache.json, so known generated files are not even read on
+    later runs. Reasons are counted in DumpStats.generated_reasons.
+    """
+
+    CACHE_FILENAME = "generated_cache.json"
+    CACHE_VERSION = 1
+
+    def __init__(self, settings: Dict, dump_dir_path: Path, log_dir: str):
+        self.action = settings['action']
+        self.hashes: Set[str] = set(settings['vendored_hashes'])
+        self.allow_paths = settings['allow_paths']
+        self.log_dir = log_dir
+        self.cache_path = dump_dir_path / self.CACHE_FILENAME
+        # Verdicts depend on the rules and the configured hashes
+        self.fingerprint = hashlib.sha1(json.dumps([
+            _GENERATED_MARKER_RE.pattern, _COMMENT_LINE_RE.pattern, _VENDOR_BANNER_RE.pattern, _MINIFIED_SUFFIXES, PROBE_CHARS,
+            MINIFIED_MIN_LINE, MINIFIED_MAX_WHITESPACE, MINIFIED_MIN_SYMBOLS, sorted(self.hashes),
+        ]).encode('utf-8')).hexdigest()
+        self._cache_file = JsonCacheFile(self.cache_path, self.CACHE_VERSION, log_dir, "generated file cache", self.fingerprint)
+        self._cache: Dict[str, list] = self._cache_file.load() or {}
+        self._seen: Set[str] = set()
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    def save(self, prune_unseen: bool = True) -> None:
+        """Save the verdicts. Only pass prune_unseen=True after a dump of the complete tree."""
+        if prune_unseen and drop_unseen(self._cache, self._seen):
+            self._dirty = True
+        if self._dirty and self._cache_file.save(self._cache):
+            self._dirty = False
+
+    def reset(self) -> None:
+        """Forget which files were seen in the previous run (long-lived detectors)."""
+        with self._lock:
+            self._seen = set()
+
+    def _allowed(self, rel_path: str) -> bool:
+        from fnmatch import fnmatch
+        return any(fnmatch(rel_path, pattern) for pattern in self.allow_paths)
+
+    def cached_verdict(self, item) -> Optional[str]:
+        """
+        Verdict from the cache before the file is read: a reason, '' for a
+        normal file, None if unknown (the file has to be classified).
+        """
+        rel_path = item.rel_path
+        if rel_path is None or item.mtime_ns is None:
+            return None
+        if self._allowed(rel_path):
+            return ''
+        with self._lock:
+            entry = self._cache.get(rel_path)
+            if entry is None or entry[0] != item.size or entry[1] != item.mtime_ns:
+                return None
+            self._seen.add(rel_path)
+            return entry[2] or ''
+
+    def classify(self, item) -> str:
+        """Classify a read file from the start of its content; returns a reason or ''."""
+        rel_path = item.rel_path or item.path.name
+        if self._allowed(rel_path):
+            return ''
+        reason = classify_head(rel_path, item.content, self.hashes) or ''
+        if item.rel_path is not None and item.mtime_ns is not None:
+            with self._lock:
+                self._cache[item.rel_path] = [item.size, item.mtime_ns, reason or None]
+                self._seen.add(item.rel_path)
+                self._dirty = True
+        return reason
+
+    def apply(self, item, reason: str, stats) -> bool:
+        """Skip the file (returns False) or replace its content by a summary (counted, not logged)."""
+        item.generated = reason
+        stats.add_generated(reason)
+        if self.action == 'skip':
+            return False
+        item.content = f"[generated file omitted ({reason}): {item.size} bytes]\n"
+        item.content_hash = hashlib.blake2b(item.content.encode('utf-8'), digest_size=16).hexdigest()
+        item.data = None
+        item.omitted_bytes = 0
+        return True
+
+# --- END OF FILE utils/generated_files.py ---
@@ -0,0 +1,145 @@
+# --- START OF FILE utils/git_source.py ---
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import git
+
+from .dump_pipeline import DumpItem
+from .error_logger import log_error
+
+GIT_SYMLINK_MODE = 0o120000
+GIT_SUBMODULE_TYPE = 'commit'
+
+
+class GitObjectCache:
+    """
+    In-memory cache shared by all revisions dumped in one process.
+
+    * blobs: blob SHA -> raw content (LRU, bounded by total bytes). Files that did
+      not change between two tags have the same blob SHA and are read from the
+      object database only once.
+    * trees: (tree SHA, relative dir, rules fingerprint) -> (included blob entries,
+      included subtrees). Unchanged subtrees are not matched against the ignore
+      rules again.
+    """
+
+    def __init__(self, max_blob_bytes: int = 256 * 1024 * 1024):
+        self.max_blob_bytes = max_blob_bytes
+        self.blobs: "OrderedDict[str, bytes]" = OrderedDict()
+        self.blob_bytes = 0
+        self.trees: Dict[Tuple[str, str, str], Tuple[List[Tuple[str, str, int]], List[Tuple[str, str]]]] = {}
+        self.blob_hits = 0
+        self.blob_misses = 0
+        self._lock = threading.Lock() # Blobs are read from pipeline worker threads in async mode
+
+    def get_blob(self, hexsha: str) -> Optional[bytes]:
+        with self._lock:
+            data = self.blobs.get(hexsha)
+            if data is not None:
+                self.blobs.move_to_end(hexsha)
+                self.blob_hits += 1
+            else:
+                self.blob_misses += 1
+            return data
+
+    def put_blob(self, hexsha: str, data: bytes) -> None:
+        if len(data) > self.max_blob_bytes:
+            return
+        with self._lock:
+            if hexsha in self.blobs:
+                return
+            self.blobs[hexsha] = data
+            self.blob_bytes += len(data)
+            while self.blob_bytes > self.max_blob_bytes:
+                _, evicted = self.blobs.popitem(last=False)
+                self.blob_bytes -= len(evicted)
+
+
+class GitRevisionSource:
+    """
+    Pipeline source that walks the tree object of a git revision instead of the
+    working directory. Blob contents are streamed from loose/packed objects, no
+    checkout is needed. Sizes come from the object headers, so FilterStage can
+    apply max_file_size without reading the blob.
+
+    Item paths are virtual (project root / path in tree) so that the ignore rules
+    and the file headers work exactly like for the working tree.
+    """
+
+    def __init__(self, config_manager, rev: str, object_cache: Optional[GitObjectCache] = None):
+        self.config_manager = config_manager
+        self.project_dir: Path = config_manager.project_dir
+        self.rev = rev
+        self.object_cache = object_cache if object_cache is not None else GitObjectCache()
+        self._odb_lock = threading.Lock()
+        self._rules_fingerprint = config_manager.get_rules_fingerprint()
+
+        self.repo = git.Repo(str(self.project_dir), search_parent_directories=True)
+        self.commit = self.repo.commit(rev) # Raises BadName / ValueError for unknown revisions
+        self.root_tree = self._project_subtree()
+
+    def _project_subtree(self):
+        """Return the tree that corresponds to the project directory (it may be below the repo root)."""
+        repo_root = Path(self.repo.working_tree_dir).resolve()
+        rel = self.project_dir.relative_to(repo_root).as_posix()
+        if rel in ('', '.'):
+            return self.commit.tree
+        return self.commit.tree / rel
+
+    def _scan_tree(self, tree, rel_dir: str) -> Tuple[List[Tuple[str, str, int]], List[Tuple[str, str]]]:
+        """Apply the ignore rules to the direct children of a tree object (cached by tree SHA)."""
+        key = (tree.hexsha, rel_dir, self._rules_fingerprint)
+        cached = self.object_cache.trees.get(key)
+        if cached is not None:
+            return cached
+
+        blobs: List[Tuple[str, str, int]] = []
+        subtrees: List[Tuple[str, str]] = []
+        for obj in tree:
+            if obj.type == GIT_SUBMODULE_TYPE:
+                continue # Submodule commits are not part of this object database
+            rel_path = f"{rel_dir}/{obj.name}" if rel_dir else obj.name
+            if self.config_manager.is_ignored(str(self.project_dir / rel_path)):
+                continue
+            if obj.type == 'tree':
+                subtrees.append((obj.name, obj.hexsha))
+            elif obj.type == 'blob' and obj.mode != GIT_SYMLINK_MODE:
+                blobs.append((obj.name, obj.hexsha, obj.size))
+
+        self.object_cache.trees[key] = (blobs, subtrees)
+        return blobs, subtrees
+
+    def iter_items(self) -> Iterator[DumpItem]:
+        """Yield DumpItems top-down (files of a directory first, then its subdirectories)."""
+        index = 0
+        stack: List[Tuple[object, str]] = [(self.root_tree, '')]
+        while stack:
+            tree, rel_dir = stack.pop()
+            try:
+                blobs, subtrees = self._scan_tree(tree, rel_dir)
+            except Exception as e:
+                log_error(str(self.project_dir), f"Cannot read tree '{rel_dir or '.'}' of revision {self.rev}: {e}")
+                continue
+
+            for name, hexsha, size in blobs:
+                rel_path = f"{rel_dir}/{name}" if rel_dir else name
+                yield DumpItem(index=index, path=self.project_dir / rel_path, size=size, rel_path=rel_path,
+                               reader=self._read_blob, source_key=hexsha)
+                index += 1
+
+            for name, hexsha in reversed(subtrees):
+                stack.append((tree[name], f"{rel_dir}/{name}" if rel_dir else name))
+
+    def _read_blob(self, item: DumpItem) -> bytes:
+        """Stream the blob content from the object database (or the shared cache)."""
+        data = self.object_cache.get_blob(item.source_key)
+        if data is None:
+            # The git cat-file process behind repo.odb is not thread-safe
+            with self._odb_lock:
+                data = self.repo.odb.stream(bytes.fromhex(item.source_key)).read()
+            self.object_cache.put_blob(item.source_key, data)
+        return data
+
+# --- END OF FILE utils/git_source.py ---
@@ -0,0 +1,119 @@
+# --- START OF FILE utils/ignore_cache.py ---
+import hashlib
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from .json_cache import JsonCacheFile, drop_unseen
+
+
+class IgnoreDecisionCache:
+    """
+    Persistent cache of per-directory ignore decisions, stored as
+    .dump/ignore_cache.json in the project root.
+
+    Each entry maps a directory (relative to the project root, '' for the root)
+    to the list of included subdirectories and files. An entry is only replayed
+    if the directory's mtime_ns is unchanged (no entries added, removed or
+    renamed) and the hash of the rules that can affect its direct children is
+    unchanged.
+
+    Rule hashing:
+      * standard_patterns, custom_patterns and .gitignore patterns can match
+        anywhere, so they form one global hash shared by all entries.
+      * .dump_ignore entries and ignored_paths are path-scoped. Only the entries
+        whose parent is the cached directory are hashed into its key, so adding
+        'src/generated' to .dump_ignore only invalidates the entry for 'src'.
+    """
+
+    CACHE_FILENAME = "ignore_cache.json"
+    CACHE_VERSION = 1
+
+    def __init__(self, config_manager):
+        """
+        Initialize the cache for the project managed by config_manager.
+        Args:
+            config_manager: The ConfigManager whose rules decide what is ignored.
+        """
+        self.config_manager = config_manager
+        self.project_dir = config_manager.project_dir
+        self.cache_path = config_manager.dump_dir_path / self.CACHE_FILENAME
+        self._cache_file = JsonCacheFile(self.cache_path, self.CACHE_VERSION, str(self.project_dir), "ignore cache")
+        self.entries: Dict[str, Dict] = self._cache_file.load() or {}
+        self._touched: Set[str] = set()
+        self._dirty = False
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock() # lookup/store are called from parallel walker threads
+        self._prepare_rule_hashes()
+
+    # --- Persistence ---
+
+    def save(self, prune_untouched: bool = True) -> None:
+        """
+        Save the cache if it changed.
+        Args:
+            prune_untouched: Drop entries for directories that were not visited
+                             during this run (deleted or newly ignored directories).
+                             Only pass True after a walk of the complete tree.
+        """
+        if prune_untouched and drop_unseen(self.entries, self._touched):
+            self._dirty = True
+        if self._dirty and self._cache_file.save(self.entries):
+            self._dirty = False
+
+    # --- Rule hashing ---
+
+    def _prepare_rule_hashes(self) -> None:
+        """Pre-compute the global pattern hash and group path-scoped rules by parent directory."""
+        patterns = sorted(p.strip().replace('\\', '/') for p in self.config_manager.get_ignore_patterns())
+        self._global_hash = hashlib.sha1("\n".join(patterns).encode('utf-8')).hexdigest()
+
+        # .dump_ignore entries, grouped by their parent (relative, '' for root)
+        self._local_by_parent: Dict[str, List[str]] = {}
+        for rel_path in self.config_manager.local_ignore.ignored_paths:
+            parent = rel_path.rsplit('/', 1)[0] if '/' in rel_path else ''
+            self._local_by_parent.setdefault(parent, []).append(rel_path)
+
+        # ignored_paths (absolute), grouped by their absolute parent
+        self._global_by_parent: Dict[str, List[str]] = {}
+        for abs_path in self.config_manager.get_ignored_paths():
+            parent = str(Path(abs_path).parent)
+            self._global_by_parent.setdefault(parent, []).append(abs_path)
+
+    def _rules_hash(self, rel_dir: str, abs_dir: str) -> str:
+        """Hash of all rules that can influence decisions about the direct children of a directory."""
+        scoped = sorted(self._local_by_parent.get(rel_dir, [])) + ['|'] + sorted(self._global_by_parent.get(abs_dir, []))
+        return hashlib.sha1((self._global_hash + "\n" + "\n".join(scoped)).encode('utf-8')).hexdigest()
+
+    # --- Lookup / Store ---
+
+    def lookup(self, rel_dir: str, abs_dir: str, mtime_ns: int) -> Optional[Tuple[List[str], List[str]]]:
+        """
+        Return the cached (included_dirs, included_files) for a directory, or None
+        if there is no valid entry.
+        """
+        rules = self._rules_hash(rel_dir, abs_dir)
+        with self._lock:
+            self._touched.add(rel_dir)
+            entry = self.entries.get(rel_dir)
+            if entry and entry.get('mtime_ns') == mtime_ns and entry.get('rules') == rules:
+                self.hits += 1
+                return entry.get('dirs', []), entry.get('files', [])
+            self.misses += 1
+            return None
+
+    def store(self, rel_dir: str, abs_dir: str, mtime_ns: int, dirs: List[str], files: List[str]) -> None:
+        """Record the decisions made for the direct children of a directory."""
+        entry = {
+            'mtime_ns': mtime_ns,
+            'rules': self._rules_hash(rel_dir, abs_dir),
+            'dirs': list(dirs),
+            'files': list(files),
+        }
+        with self._lock:
+            self._touched.add(rel_dir)
+            self.entries[rel_dir] = entry
+            self._dirty = True
+
+# --- END OF FILE utils/ignore_cache.py ---
@@ -1,10 +1,11 @@
 # --- START OF FILE utils/ignore_manager.py ---
 import os
 from pathlib import Path
-from typing import Set, List
+from typing import Iterable, Set, List, Tuple
 
 # Importiere den Error Logger, der ebenfalls den .dump Ordner kennt
 from .error_logger import log_error
+from .file_lock import FileLock
 
 class IgnoreManager:
     """
@@ -26,6 +27,8 @@ class IgnoreManager:
         self.dump_dir_path = self.directory / self.DUMP_SUBDIR
         # Path to the ignore file inside the .dump directory
         self.ignore_path = self.dump_dir_path / self.IGNORE_FILENAME
+        # Guards read-modify-write cycles of the ignore file across processes
+        self.lock_path = self.dump_dir_path / (self.IGNORE_FILENAME + ".lock")
         # Load paths initially
         self.ignored_paths = self._load_ignored_paths()
 
@@ -72,13 +75,15 @@ class IgnoreManager:
         # Ensure the .dump directory exists before writing the file
         self._ensure_dump_dir_exists()
         try:
-            # Write the ignored paths to the file
-            with open(self.ignore_path, 'w', encoding='utf-8') as f:
+            # Write the ignored paths to a temp file and swap it in, so readers never see a partial file
+            tmp_path = self.ignore_path.with_name(self.IGNORE_FILENAME + ".tmp")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
                 f.write("# Local ignore patterns relative to project root\n")
                 f.write("# Use forward slashes (/), no leading/trailing slashes.\n\n")
                 # Write paths sorted alphabetically
                 for path in sorted(list(self.ignored_paths)):
                     f.write(f"{path}\n")
+            os.replace(tmp_path, self.ignore_path)
         except Exception as e:
             # Log error if saving fails
             log_error(str(self.directory), f"Failed to save ignore file {self.ignore_path}: {e}")
@@ -97,12 +102,39 @@ class IgnoreManager:
         The path is normalized before adding.
         """
         normalized_path = self._normalize_relative_path(relative_path)
-        # Add only if the normalized path is not empty and not already present
-        if normalized_path and normalized_path not in self.ignored_paths:
-            self.ignored_paths.add(normalized_path)
-            self.save_ignored_paths() # Save changes to the file
-        elif not normalized_path:
+        if not normalized_path:
              log_error(str(self.directory), f"Attempted to add an empty or invalid relative path to {self.ignore_path}")
+             return
+        self.add_paths([normalized_path])
+
+    def add_paths(self, relative_paths: Iterable[str]) -> Tuple[List[str], List[str]]:
+        """
+        Add many paths (relative to project root) in one locked read-modify-write
+        of the ignore file. The file is reloaded under the lock, so entries added
+        by concurrent processes are kept. Paths that are already ignored, either
+        exactly or through a parent entry (also one from the same batch), are skipped.
+
+        Returns:
+            (added, skipped) normalized relative paths.
+        """
+        normalized = {self._normalize_relative_path(p) for p in relative_paths}
+        normalized.discard('')
+        added: List[str] = []
+        skipped: List[str] = []
+        # Parents first, so 'a/b' is skipped when 'a' is in the same batch
+        ordered = sorted(normalized, key=lambda p: (p.count('/'), p))
+        self._ensure_dump_dir_exists()
+        with FileLock(self.lock_path):
+            self.ignored_paths = self._load_ignored_paths()
+            for path in ordered:
+                if self.is_ignored(path):
+                    skipped.append(path)
+                else:
+                    self.ignored_paths.add(path)
+                    added.append(path)
+            if added:
+                self.save_ignored_paths()
+        return added, skipped
 
 
     def is_ignored(self, relative_path_to_check: str) -> bool:
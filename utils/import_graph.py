@@ -0,0 +1,302 @@
+# --- START OF FILE utils/import_graph.py ---
+import ast
+import hashlib
+import os
+import posixpath
+import re
+from collections import deque
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from .error_logger import log_error
+from .file_walker import walk_project
+from .json_cache import JsonCacheFile, drop_unseen
+
+PYTHON_EXTENSIONS = ('.py', '.pyi')
+JS_EXTENSIONS = ('.ts', '.tsx', '.mts', '.cts', '.js', '.jsx', '.mjs', '.cjs')
+JAVA_EXTENSIONS = ('.java',)
+
+# JS/TS: one left-to-right pass. Comments and string literals are matched as
+# whole tokens so import-like text inside them is skipped; the import forms
+# capture the module specifier.
+_JS_TOKEN_RE = re.compile(r"""
+      //[^\n]*
+    | /\*.*?\*/
+    | \b(?:import|export)\b[^'"`;()]*?\bfrom\s*(['"])([^'"\n]+)\1
+    | \bimport\s*(['"])([^'"\n]+)\3
+    | \b(?:require|import)\s*\(\s*(['"])([^'"\n]+)\5\s*\)
+    | '(?:\\.|[^'\\\n])*'
+    | "(?:\\.|[^"\\\n])*"
+    | `(?:\\.|[^`\\])*`
+""", re.S | re.X)
+
+# Java: comments are removed first, then import declarations are matched per line
+_JAVA_COMMENT_RE = re.compile(r"//[^\n]*|/\*.*?\*/|\"(?:\\.|[^\"\\\n])*\"", re.S)
+_JAVA_IMPORT_RE = re.compile(r"^\s*import\s+(static\s+)?([\w.]+(?:\.\*)?)\s*;", re.M)
+
+
+def _parse_python(text: str) -> List[list]:
+    """Return [level, module, [names]] for every import statement (including nested ones)."""
+    tree = ast.parse(text)
+    imports: List[list] = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            imports.extend([0, alias.name, []] for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            imports.append([node.level, node.module or "", [alias.name for alias in node.names if alias.name != '*']])
+    return imports
+
+
+def _parse_js(text: str) -> List[str]:
+    """Return the module specifiers of import/export-from/require/import() statements."""
+    specifiers: List[str] = []
+    for match in _JS_TOKEN_RE.finditer(text):
+        specifier = match.group(2) or match.group(4) or match.group(6)
+        if specifier:
+            specifiers.append(specifier)
+    return specifiers
+
+
+def _parse_java(text: str) -> List[str]:
+    """Return the imported names; static imports keep their member name."""
+    stripped = _JAVA_COMMENT_RE.sub(lambda m: '""' if m.group(0).startswith('"') else ' ', text)
+    return [name for _static, name in _JAVA_IMPORT_RE.findall(stripped)]
+
+
+def parse_imports(rel_path: str, text: str) -> list:
+    """Extract the raw (unresolved) imports of a file based on its extension."""
+    ext = posixpath.splitext(rel_path)[1].lower()
+    if ext in PYTHON_EXTENSIONS:
+        return _parse_python(text)
+    if ext in JS_EXTENSIONS:
+        return _parse_js(text)
+    if ext in JAVA_EXTENSIONS:
+        return _parse_java(text)
+    return []
+
+
+class ImportGraph:
+    """
+    Import edges between project files, used to dump an entry point together
+    with everything it (transitively) imports.
+
+    Raw imports are parsed per file (Python via ast, JS/TS and Java via
+    lexical scanners) and cached in .dump/import_graph.json. A cache entry is
+    reused without reading the file if size and mtime_ns are unchanged, and
+    without re-parsing if the content hash is unchanged. Resolution against the
+    project layout is cheap and done on every run, so the cache stays valid when
+    files are added or removed.
+    """
+
+    CACHE_FILENAME = "import_graph.json"
+    CACHE_VERSION = 1
+
+    def __init__(self, config_manager, ignore_cache=None):
+        self.config_manager = config_manager
+        self.project_dir: Path = config_manager.project_dir
+        self.cache_path = config_manager.dump_dir_path / self.CACHE_FILENAME
+        # rel_path -> [size, mtime_ns, content_hash, raw imports]
+        self._cache: Dict[str, list] = {}
+        self._dirty = False
+        self.parsed = 0
+        self.reused = 0
+        self.unresolved = 0
+        self._cache_file = JsonCacheFile(self.cache_path, self.CACHE_VERSION, str(self.project_dir), "import graph cache")
+        self._cache = self._cache_file.load() or {}
+
+        # Every file that may be dumped (ignore rules applied)
+        self.files: Set[str] = set()
+        for dir_path, names in walk_project(config_manager, ignore_cache=ignore_cache):
+            for name in names:
+                self.files.add((dir_path / name).relative_to(self.project_dir).as_posix())
+        self._java_by_suffix: Optional[Dict[str, List[str]]] = None
+        self._python_roots = [""] + [root for root in ("src", "lib") if any(f.startswith(root + "/") for f in self.files)]
+
+    # --- Cache ---
+
+    def save(self) -> None:
+        """Write the edge cache atomically, dropping entries of files that no longer exist."""
+        if drop_unseen(self._cache, self.files):
+            self._dirty = True
+        if self._dirty and self._cache_file.save(self._cache):
+            self._dirty = False
+
+    def raw_imports(self, rel_path: str) -> list:
+        """Return the raw imports of a file, from the cache when possible."""
+        file_path = self.project_dir / rel_path
+        try:
+            st = os.stat(file_path)
+        except OSError:
+            return []
+        entry = self._cache.get(rel_path)
+        if entry is not None and entry[0] == st.st_size and entry[1] == st.st_mtime_ns:
+            self.reused += 1
+            return entry[3]
+
+        try:
+            with open(file_path, 'rb') as f:
+                data = f.read()
+        except OSError as e:
+            log_error(str(self.project_dir), f"Could not read {rel_path} for import analysis: {e}")
+            return []
+        content_hash = hashlib.blake2b(data, digest_size=16).hexdigest()
+        if entry is not None and entry[2] == content_hash:
+            imports = entry[3] # Touched but unchanged
+            self.reused += 1
+        else:
+            try:
+                imports = parse_imports(rel_path, data.decode('utf-8'))
+            except (UnicodeDecodeError, SyntaxError, ValueError) as e:
+                log_error(str(self.project_dir), f"Could not parse imports of {rel_path}: {e}")
+                imports = []
+            self.parsed += 1
+        self._cache[rel_path] = [st.st_size, st.st_mtime_ns, content_hash, imports]
+        self._dirty = True
+        return imports
+
+    # --- Resolution ---
+
+    def _python_module(self, module_path: str) -> Optional[str]:
+        """Find the file of a dotted module given as a relative path (a/b/c)."""
+        for candidate in (module_path + ".py", module_path + ".pyi", module_path + "/__init__.py"):
+            if candidate in self.files:
+                return candidate
+        return None
+
+    def _python_packages(self, base: str, module_path: str) -> List[str]:
+        """__init__.py files of the packages on the way to a module (they run on import)."""
+        inits = []
+        parts = module_path.split('/') if module_path else []
+        for i in range(1, len(parts) + 1):
+            init = posixpath.join(base, *parts[:i], "__init__.py")
+            if init in self.files:
+                inits.append(init)
+        return inits
+
+    def _resolve_python(self, rel_path: str, imports: list) -> List[str]:
+        file_dir = posixpath.dirname(rel_path)
+        resolved: List[str] = []
+        for level, module, names in imports:
+            module_path = module.replace('.', '/') if module else ""
+            if level:
+                base = file_dir
+                for _ in range(level - 1):
+                    base = posixpath.dirname(base)
+                bases = [base]
+            else:
+                # Absolute imports: source roots, then the importing file's directory (scripts)
+                bases = self._python_roots + ([file_dir] if file_dir not in self._python_roots else [])
+
+            found = False
+            for base in bases:
+                target = posixpath.join(base, module_path) if base and module_path else (base or module_path)
+                hits = []
+                # 'from pkg import name' may import the submodule pkg/name
+                for name in names:
+                    submodule = self._python_module(posixpath.join(target, name) if target else name)
+                    if submodule:
+                        hits.append(submodule)
+                module_file = self._python_module(target) if target else None
+                if module_file:
+                    hits.append(module_file)
+                if hits:
+                    resolved.extend(self._python_packages(base, module_path))
+                    resolved.extend(hits)
+                    found = True
+                    break
+            if not found:
+                self.unresolved += 1
+        return resolved
+
+    def _resolve_js(self, rel_path: str, specifiers: List[str]) -> List[str]:
+        file_dir = posixpath.dirname(rel_path)
+        resolved: List[str] = []
+        for specifier in specifiers:
+            if not specifier.startswith('.'):
+                continue # Package import (node_modules)
+            target = posixpath.normpath(posixpath.join(file_dir, specifier))
+            stem, ext = posixpath.splitext(target)
+            candidates = [target] + [target + e for e in JS_EXTENSIONS] + [target + "/index" + e for e in JS_EXTENSIONS]
+            if ext in ('.js', '.jsx', '.mjs', '.cjs'):
+                # TypeScript ESM imports name the compiled file ('./util.js' -> util.ts)
+                candidates += [stem + e for e in JS_EXTENSIONS]
+            match = next((c for c in candidates if c in self.files), None)
+            if match:
+                resolved.append(match)
+            else:
+                self.unresolved += 1
+        return resolved
+
+    def _java_index(self) -> Dict[str, List[str]]:
+        """Map every path suffix of .java files and their directories to the files."""
+        if self._java_by_suffix is None:
+            self._java_by_suffix = {}
+            for rel_path in self.files:
+                if not rel_path.endswith('.java'):
+                    continue
+                parts = rel_path.split('/')
+                for i in range(len(parts)):
+                    self._java_by_suffix.setdefault('/'.join(parts[i:]), []).append(rel_path)
+                    if i < len(parts) - 1:
+                        self._java_by_suffix.setdefault('/'.join(parts[i:-1]) + '/*', []).append(rel_path)
+        return self._java_by_suffix
+
+    def _resolve_java(self, rel_path: str, names: List[str]) -> List[str]:
+        index = self._java_index()
+        resolved: List[str] = []
+        for name in names:
+            parts = name.split('.')
+            if parts[-1] == '*':
+                hits = index.get('/'.join(parts[:-1]) + '/*', [])
+                # Also covers static imports of all members ('a.b.C.*')
+                hits = hits or index.get('/'.join(parts[:-1]) + '.java', [])
+            else:
+                hits = []
+                # Drop trailing components for static members and nested classes
+                while parts and not hits:
+                    hits = index.get('/'.join(parts) + '.java', [])
+                    parts = parts[:-1]
+            if hits:
+                resolved.extend(sorted(h for h in hits if h != rel_path))
+            else:
+                self.unresolved += 1
+        return resolved
+
+    def edges(self, rel_path: str) -> List[str]:
+        """Return the project files imported by a file (in import order, without duplicates)."""
+        ext = posixpath.splitext(rel_path)[1].lower()
+        if ext not in PYTHON_EXTENSIONS + JS_EXTENSIONS + JAVA_EXTENSIONS:
+            return []
+        imports = self.raw_imports(rel_path)
+        if ext in PYTHON_EXTENSIONS:
+            targets = self._resolve_python(rel_path, imports)
+        elif ext in JS_EXTENSIONS:
+            targets = self._resolve_js(rel_path, imports)
+        else:
+            targets = self._resolve_java(rel_path, imports)
+        return list(dict.fromkeys(t for t in targets if t != rel_path))
+
+    def closure(self, seeds: Iterable[str], max_depth: Optional[int] = None) -> List[Tuple[str, int]]:
+        """
+        Breadth-first transitive closure from the seed files.
+        Returns (rel_path, depth) pairs, seeds first, then by distance.
+        """
+        order: List[Tuple[str, int]] = []
+        seen: Set[str] = set()
+        queue = deque()
+        for seed in seeds:
+            if seed not in seen:
+                seen.add(seed)
+                queue.append((seed, 0))
+        while queue:
+            rel_path, depth = queue.popleft()
+            order.append((rel_path, depth))
+            if max_depth is not None and depth >= max_depth:
+                continue
+            for target in self.edges(rel_path):
+                if target not in seen:
+                    seen.add(target)
+                    queue.append((target, depth + 1))
+        return order
+
+# --- END OF FILE utils/import_graph.py ---
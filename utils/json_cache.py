@@ -0,0 +1,73 @@
+# --- START OF FILE utils/json_cache.py ---
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+from .error_logger import log_error
+
+
+class JsonCacheFile:
+    """
+    A versioned JSON cache file in .dump/, shared by the caches of the dump
+    pipeline. The file holds {'version', 'fingerprint', 'entries'}; entries
+    are only loaded if version and fingerprint (a hash of whatever rules the
+    cached values depend on, None if nothing) match, otherwise the cache
+    starts empty. Saving writes a temporary file and replaces the cache with
+    it, so an interrupted run never leaves a half-written cache behind.
+    """
+
+    def __init__(self, path: Path, version: int, log_dir: str, label: str, fingerprint: Optional[str] = None):
+        """
+        Args:
+            path: The cache file.
+            version: Format version; bump it when the layout of the entries changes.
+            log_dir: Directory whose .dump/dump_error.log receives load/save errors.
+            label: Name of the cache in error messages, e.g. 'outline cache'.
+            fingerprint: Hash of the rules the entries depend on, or None.
+        """
+        self.path = Path(path)
+        self.version = version
+        self.log_dir = log_dir
+        self.label = label
+        self.fingerprint = fingerprint
+
+    def load(self, entry_type: type = dict) -> Optional[Any]:
+        """The cached entries, or None if the file is missing, stale or invalid."""
+        if not self.path.exists():
+            return None
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') != self.version or data.get('fingerprint') != self.fingerprint:
+                return None
+            entries = data.get('entries')
+            return entries if isinstance(entries, entry_type) else None
+        except Exception as e:
+            log_error(self.log_dir, f"Failed to load {self.label} {self.path}: {e}. Starting with an empty cache.")
+            return None
+
+    def save(self, entries: Any) -> bool:
+        """Write the entries atomically. Returns False (after logging) if that failed."""
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix('.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'version': self.version, 'fingerprint': self.fingerprint, 'entries': entries},
+                          f, separators=(',', ':'))
+            os.replace(tmp_path, self.path)
+            return True
+        except Exception as e:
+            log_error(self.log_dir, f"Failed to save {self.label} {self.path}: {e}")
+            return False
+
+
+def drop_unseen(entries: Dict[str, Any], seen: Iterable[str]) -> bool:
+    """Drop the entries whose key is not in seen. Returns True if any were dropped."""
+    seen = seen if isinstance(seen, (set, frozenset, dict)) else set(seen)
+    stale = [key for key in entries if key not in seen]
+    for key in stale:
+        del entries[key]
+    return bool(stale)
+
+# --- END OF FILE utils/json_cache.py ---
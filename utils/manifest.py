@@ -0,0 +1,99 @@
+# --- START OF FILE utils/manifest.py ---
+import json
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+from .error_logger import log_error
+from .inventory import FileInventory, InventoryStats
+
+
+class DumpManifest:
+    """
+    Record of the files seen by the last dump of the working tree, stored as
+    .dump/manifest.inv (a FileInventory with size, mtime_ns and inode per file).
+    files is a read-only mapping relative path -> (size, mtime_ns).
+
+    Written by every full dump, used by delta dumps to find added, modified
+    and deleted files without reading any content. A loaded manifest is
+    memory mapped; close() it before a manifest is saved in the same process.
+    """
+
+    MANIFEST_FILENAME = "manifest.inv"
+    LEGACY_FILENAME = "manifest.json" # Format before the inventory, still read once
+    MANIFEST_VERSION = 2
+
+    def __init__(self, dump_dir_path: Path, project_dir: Path):
+        self.project_dir = project_dir
+        self.manifest_path = dump_dir_path / self.MANIFEST_FILENAME
+        self.inventory = FileInventory()
+        self.files = InventoryStats(self.inventory)
+        self.created: Optional[str] = None
+        self._lock = threading.Lock() # FilterStage records from several workers in async mode
+
+    @classmethod
+    def load(cls, dump_dir_path: Path, project_dir: Path) -> Optional["DumpManifest"]:
+        """Load the manifest of the previous dump, or None if there is none (or it is unreadable)."""
+        manifest = cls(dump_dir_path, project_dir)
+        if not manifest.manifest_path.exists():
+            return cls._load_legacy(manifest, dump_dir_path / cls.LEGACY_FILENAME)
+        try:
+            inventory = FileInventory.load(manifest.manifest_path)
+            if inventory.meta.get('version') != cls.MANIFEST_VERSION:
+                inventory.close()
+                return None
+            manifest.inventory = inventory
+            manifest.files = InventoryStats(inventory)
+            manifest.created = inventory.meta.get('created')
+            return manifest
+        except Exception as e:
+            log_error(str(project_dir), f"Failed to load manifest {manifest.manifest_path}: {e}")
+            return None
+
+    @classmethod
+    def _load_legacy(cls, manifest: "DumpManifest", legacy_path: Path) -> Optional["DumpManifest"]:
+        """Read a manifest.json of an older version, so the first delta after an update still works."""
+        if not legacy_path.exists():
+            return None
+        try:
+            with open(legacy_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') != 1:
+                return None
+            manifest.created = data.get('created')
+            for rel, v in data.get('files', {}).items():
+                manifest.inventory.add(rel, int(v[0]), int(v[1]))
+            return manifest
+        except Exception as e:
+            log_error(str(manifest.project_dir), f"Failed to load manifest {legacy_path}: {e}")
+            return None
+
+    def record(self, rel_path: str, size: int, mtime_ns: int, inode: int = 0) -> None:
+        """Record a file (relative path with forward slashes)."""
+        with self._lock:
+            self.inventory.add(rel_path, size, mtime_ns, inode)
+
+    def record_path(self, path: Path, size: int, mtime_ns: int, inode: int = 0) -> None:
+        """Record a file by its absolute path (ignored if it lies outside the project)."""
+        try:
+            rel_path = path.relative_to(self.project_dir).as_posix()
+        except ValueError:
+            return
+        self.record(rel_path, size, mtime_ns, inode)
+
+    def save(self) -> None:
+        """Write the manifest atomically."""
+        try:
+            self.manifest_path.parent.mkdir(parents=True, exist_ok=True)
+            self.created = datetime.now().isoformat()
+            self.inventory.meta = {'version': self.MANIFEST_VERSION, 'created': self.created}
+            self.inventory.save(self.manifest_path)
+        except Exception as e:
+            log_error(str(self.project_dir), f"Failed to save manifest {self.manifest_path}: {e}")
+
+    def close(self) -> None:
+        """Release the mapping of a loaded manifest."""
+        self.inventory.close()
+
+# --- END OF FILE utils/manifest.py ---
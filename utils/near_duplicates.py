@@ -0,0 +1,200 @@
+# --- START OF FILE utils/near_duplicates.py ---
+import difflib
+import hashlib
+import zlib
+from array import array
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+NUM_BINS = 64 # Signature length (one-permutation MinHash)
+BANDS = 16    # LSH bands of BANDS_ROWS bins each; candidates share at least one band
+BAND_ROWS = NUM_BINS // BANDS
+SHINGLE_LINES = 1 # Lines per shingle (non-blank, whitespace-normalized); 1: a changed line changes one shingle
+MAX_BUCKET = 32 # Representatives kept per LSH bucket (newest), bounds the comparisons per file
+ESTIMATE_MARGIN = 0.15 # Candidates estimated this far below the threshold are verified exactly
+MAX_VERIFIED = 3 # Best candidates per file that are verified exactly
+
+_MASK64 = (1 << 64) - 1
+_EMPTY_BIN = _MASK64 # Bin without any shingle (tiny files), never matches
+
+
+def _mix64(value: int) -> int:
+    """splitmix64 finalizer: spreads the bits of a combined line hash."""
+    value = (value ^ (value >> 30)) * 0xBF58476D1CE4E5B9 & _MASK64
+    value = (value ^ (value >> 27)) * 0x94D049BB133111EB & _MASK64
+    return value ^ (value >> 31)
+
+
+def minhash_signature(text: str) -> Tuple[Optional[array], int]:
+    """
+    One-permutation MinHash of the line shingles of a text: every shingle is
+    hashed once and kept as minimum of bin (hash % NUM_BINS), so the cost is
+    linear in the file size. Returns (signature, number of non-blank lines);
+    the signature is None if the text has fewer lines than one shingle.
+    """
+    line_hashes = [zlib.crc32(" ".join(line.split()).encode('utf-8'))
+                   for line in text.splitlines() if line.strip()]
+    if len(line_hashes) < SHINGLE_LINES:
+        return None, len(line_hashes)
+    bins = [_EMPTY_BIN] * NUM_BINS
+    for i in range(len(line_hashes) - SHINGLE_LINES + 1):
+        combined = 0
+        for h in line_hashes[i:i + SHINGLE_LINES]:
+            combined = (combined * 0x100000001B3 + h) & _MASK64
+        value = _mix64(combined)
+        slot = value % NUM_BINS
+        if value < bins[slot]:
+            bins[slot] = value
+    return array('Q', bins), len(line_hashes)
+
+
+def estimate_similarity(a: array, b: array) -> float:
+    """Estimated Jaccard similarity of two signatures (share of equal, non-empty bins)."""
+    equal = used = 0
+    for x, y in zip(a, b):
+        if x == _EMPTY_BIN and y == _EMPTY_BIN:
+            continue
+        used += 1
+        if x == y:
+            equal += 1
+    return equal / used if used else 0.0
+
+
+def _line_set(text: str) -> set:
+    return {" ".join(line.split()) for line in text.splitlines() if line.strip()}
+
+
+def exact_similarity(a: str, b: str) -> float:
+    """Jaccard similarity of the sets of non-blank, whitespace-normalized lines."""
+    lines_a, lines_b = _line_set(a), _line_set(b)
+    union = len(lines_a | lines_b)
+    return len(lines_a & lines_b) / union if union else 1.0
+
+
+class NearDuplicateIndex:
+    """
+    Collapses near-duplicate files ([near_duplicates] in .dump_config), e.g.
+    migrations, generated DTOs or copied test fixtures that differ in a few
+    lines. The first file of a cluster (in output order) is written in full;
+    later files whose estimated similarity to it reaches the threshold are
+    replaced by a unified diff against it ('diff') or by a reference only
+    ('reference').
+
+    Signatures are computed by TransformStage (signature()), clustering runs
+    in WriteStage (process()) so it sees the files in output order. Candidates
+    come from LSH buckets (BANDS bands of the MinHash signature), so every file
+    is compared to a handful of representatives instead of all previous files.
+    Representative contents (for diffs and exact verification) are kept up to
+    memory_mb; older ones fall back to the estimate and a reference.
+    """
+
+    def __init__(self, settings: Dict, log_dir: str):
+        self.threshold = settings['threshold']
+        self.mode = settings['mode']
+        self.min_lines = settings['min_lines']
+        self.max_diff_ratio = settings['max_diff_ratio']
+        self.memory_bytes = settings['memory_mb'] * 1024 * 1024
+        self.log_dir = log_dir
+        self._buckets: List[Dict[bytes, List[str]]] = [{} for _ in range(BANDS)]
+        self._signatures: Dict[str, array] = {} # Representative rel_path -> signature
+        self._contents: "OrderedDict[str, str]" = OrderedDict() # LRU of representative contents (diff mode)
+        self._content_bytes = 0
+        self.files_collapsed = 0
+        self.bytes_saved = 0
+
+    def signature(self, item) -> None:
+        """Compute the MinHash signature of the final content (in TransformStage)."""
+        if item.content is None or item.generated:
+            return
+        signature, lines = minhash_signature(item.content)
+        if signature is not None and lines >= self.min_lines:
+            item.minhash = signature
+
+    def _band_keys(self, signature: array) -> List[Optional[bytes]]:
+        """Bucket key per band; None for bands without any shingle (they would join all small files)."""
+        raw = signature.tobytes()
+        width = BAND_ROWS * signature.itemsize
+        empty = array('Q', [_EMPTY_BIN] * BAND_ROWS).tobytes()
+        keys = [raw[band * width:(band + 1) * width] for band in range(BANDS)]
+        return [None if key == empty else key for key in keys]
+
+    def _best_match(self, item, keys: List[bytes]) -> Tuple[Optional[str], float]:
+        """
+        Most similar representative and its similarity. Estimates from small
+        signatures are noisy, so the best candidates whose representative
+        content is still in memory are verified with the exact line similarity.
+        """
+        seen = set()
+        candidates = []
+        for band, key in enumerate(keys):
+            if key is None:
+                continue
+            for candidate in self._buckets[band].get(key, ()):
+                if candidate in seen:
+                    continue
+                seen.add(candidate)
+                similarity = estimate_similarity(item.minhash, self._signatures[candidate])
+                if similarity >= self.threshold - ESTIMATE_MARGIN:
+                    candidates.append((similarity, candidate))
+        candidates.sort(key=lambda entry: -entry[0])
+        best, best_similarity = None, 0.0
+        for estimate, candidate in candidates[:MAX_VERIFIED]:
+            content = self._contents.get(candidate)
+            similarity = exact_similarity(item.content, content) if content is not None else estimate
+            if similarity > best_similarity:
+                best, best_similarity = candidate, similarity
+        return best, best_similarity
+
+    def _remember(self, rel_path: str, signature: array, keys: List[bytes], content: str) -> None:
+        self._signatures[rel_path] = signature
+        for band, key in enumerate(keys):
+            if key is None:
+                continue
+            bucket = self._buckets[band].setdefault(key, [])
+            bucket.append(rel_path)
+            if len(bucket) > MAX_BUCKET:
+                del bucket[0]
+        if len(content) > self.memory_bytes:
+            return
+        self._contents[rel_path] = content
+        self._content_bytes += len(content)
+        while self._content_bytes > self.memory_bytes:
+            _, evicted = self._contents.popitem(last=False)
+            self._content_bytes -= len(evicted)
+
+    def _render(self, item, representative: str, similarity: float) -> Optional[str]:
+        """Replacement content for a near-duplicate, None to write it in full."""
+        note = f"[near-duplicate of {representative}, similarity {similarity:.0%}"
+        rep_content = self._contents.get(representative)
+        if rep_content is None or self.mode != 'diff':
+            return note + "; content omitted]\n"
+        self._contents.move_to_end(representative)
+        if rep_content == item.content:
+            return note + "; identical]\n"
+        diff = "".join(difflib.unified_diff(rep_content.splitlines(keepends=True), item.content.splitlines(keepends=True),
+                                            fromfile=representative, tofile=item.rel_path, n=2))
+        if len(diff) > len(item.content) * self.max_diff_ratio:
+            return None # Diff not much smaller than the file itself
+        if not diff.endswith("\n"):
+            diff += "\n"
+        return note + "; unified diff against it]\n" + diff
+
+    def process(self, item, stats) -> None:
+        """Collapse the item if it is a near-duplicate of an earlier file, else remember it (in WriteStage)."""
+        signature = item.minhash
+        if signature is None or item.rel_path is None:
+            return
+        keys = self._band_keys(signature)
+        representative, similarity = self._best_match(item, keys)
+        if representative is not None and similarity >= self.threshold:
+            content = self._render(item, representative, similarity)
+            if content is not None:
+                self.bytes_saved += len(item.content) - len(content)
+                item.content = content
+                item.content_hash = hashlib.blake2b(content.encode('utf-8'), digest_size=16).hexdigest()
+                self.files_collapsed += 1
+                stats.add('files_near_duplicate')
+                return
+        self._remember(item.rel_path, signature, keys, item.content)
+
+# --- END OF FILE utils/near_duplicates.py ---
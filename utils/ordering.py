@@ -0,0 +1,117 @@
+# --- START OF FILE utils/ordering.py ---
+import os
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+import git
+
+from .json_cache import JsonCacheFile
+from .manifest import DumpManifest
+
+ORDER_MODES = ('walk', 'sorted', 'stability')
+
+
+def path_sort_key(rel_path: str) -> List[str]:
+    """Sort key that keeps directories together ('a/b.py' before 'a.b/c.py')."""
+    return rel_path.split('/')
+
+
+class ChangeCounts:
+    """
+    How often each file changed in the last HISTORY_LIMIT commits
+    (git log --name-only), cached per HEAD in .dump/change_counts.json,
+    plus the files that are modified or untracked in the working tree.
+    """
+
+    CACHE_FILENAME = "change_counts.json"
+    CACHE_VERSION = 1
+    HISTORY_LIMIT = 1000
+
+    def __init__(self, project_dir: Path, dump_dir_path: Path, log_dir: str):
+        self.cache_path = dump_dir_path / self.CACHE_FILENAME
+        self.log_dir = log_dir
+        self.git_cmd = git.Git(str(project_dir))
+
+    def _cache_file(self, head: str) -> JsonCacheFile:
+        """The counts are valid for one HEAD, which serves as the fingerprint."""
+        return JsonCacheFile(self.cache_path, self.CACHE_VERSION, self.log_dir, "change counts", head)
+
+    def load(self) -> Tuple[Dict[str, int], Set[str]]:
+        """(commit count per relative path, paths changed in the working tree). Raises git errors."""
+        head = self.git_cmd.rev_parse('HEAD').strip()
+        cache_file = self._cache_file(head)
+        counts = cache_file.load()
+        if counts is None:
+            counts = {}
+            # --relative: paths relative to the project, which may be a subdirectory of the repo
+            log_output = self.git_cmd.log(f'-n{self.HISTORY_LIMIT}', '--format=', '--name-only', '-z',
+                                          '--relative', '--no-renames')
+            for rel_path in log_output.replace('\n', '\0').split('\0'):
+                if rel_path:
+                    counts[rel_path] = counts.get(rel_path, 0) + 1
+            cache_file.save(counts)
+        dirty = set(self.git_cmd.diff('--name-only', '-z', '--relative', 'HEAD').split('\0'))
+        dirty.update(self.git_cmd.ls_files('--others', '--exclude-standard', '-z').split('\0'))
+        dirty.discard('')
+        return counts, dirty
+
+
+class OutputOrder:
+    """
+    Order of the files in a dump ([output] order):
+
+    - walk: filesystem order as returned by the directory walk (may differ
+      between machines and runs).
+    - sorted: by relative path, directories kept together.
+    - stability: files that rarely change first, so that consecutive dumps
+      share a long identical prefix (provider-side prompt caching). Uses the
+      git history (commit count per file, working tree changes last) or, for
+      projects without git, the last manifest (files changed since the last
+      dump last, otherwise oldest modification time first; this costs one
+      extra stat per file). Ties are sorted by path.
+    """
+
+    def __init__(self, mode: str, config_manager, log_dir: str):
+        self.mode = mode
+        self.config_manager = config_manager
+        self.log_dir = log_dir
+        self.basis = mode
+        self._manifest: Optional[DumpManifest] = None # Loaded for the stability key, closed after sorting
+
+    def _stability_key(self):
+        """Sort key function for stability mode."""
+        project_dir = self.config_manager.project_dir
+        try:
+            counts, dirty = ChangeCounts(project_dir, self.config_manager.dump_dir_path, self.log_dir).load()
+            self.basis = "stability (git history)"
+            return lambda rel: (rel in dirty, counts.get(rel, 0), path_sort_key(rel))
+        except git.GitError:
+            pass # Not a git repository (or no commits, no git executable)
+        manifest = self._manifest = DumpManifest.load(self.config_manager.dump_dir_path, project_dir)
+        files = manifest.files if manifest is not None else {}
+        self.basis = "stability (last manifest)"
+
+        def key(rel: str):
+            # Files changed since the last dump (or new) last; otherwise the least recently modified first
+            try:
+                st = os.stat(project_dir / rel)
+                current = (st.st_size, st.st_mtime_ns)
+            except OSError:
+                current = (0, 0)
+            return (files.get(rel) != current, current[1], path_sort_key(rel))
+        return key
+
+    def sort(self, items: List) -> List:
+        """Sort DumpItems in place according to the mode and renumber their index."""
+        if self.mode == 'walk':
+            return items
+        key = self._stability_key() if self.mode == 'stability' else path_sort_key
+        items.sort(key=lambda item: key(item.rel_path or item.path.name))
+        if self._manifest is not None:
+            self._manifest.close() # The dump saves a new manifest over the mapped file
+            self._manifest = None
+        for index, item in enumerate(items):
+            item.index = index
+        return items
+
+# --- END OF FILE utils/ordering.py ---
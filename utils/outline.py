@@ -0,0 +1,331 @@
+# --- START OF FILE utils/outline.py ---
+import ast
+import fnmatch
+import posixpath
+import re
+import threading
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set
+
+from .error_logger import log_error
+from .import_graph import JAVA_EXTENSIONS, JS_EXTENSIONS, PYTHON_EXTENSIONS
+from .json_cache import JsonCacheFile, drop_unseen
+
+MAX_LINE_LENGTH = 160  # Longer constant lines are cut
+MAX_VALUE_LINES = 3    # Multi-line constants longer than this keep their first line only
+
+# JS/TS/Java: one left-to-right pass over the tokens that matter for nesting.
+# Comments, string and regex literals are matched whole so braces inside them
+# are not counted; doc comments are reduced to their first line. A slash that
+# starts no comment is a regex literal only in expression position (see
+# _regex_allowed), otherwise a division.
+_BRACE_TOKEN_RE = re.compile(r"""
+      (?P<doc>/\*\*(?!/).*?\*/)
+    | (?P<comment>//[^\n]*|/\*.*?\*/)
+    | \"\"\".*?\"\"\"
+    | '(?:\\.|[^'\\\n])*'
+    | "(?:\\.|[^"\\\n])*"
+    | `(?:\\.|[^`\\])*`
+    | (?P<brace>[{}])
+    | (?P<semi>;)
+    | (?P<slash>/)
+""", re.S | re.X)
+_REGEX_LITERAL_RE = re.compile(r"/(?:\\.|\[(?:\\.|[^\]\\\n])*\]|[^/\\\n\[])+/[A-Za-z]*")
+_REGEX_PRECEDERS = frozenset("(,=:[!&|?{};+-*%<>~^") # A regex literal may follow these, a division not
+_REGEX_KEYWORDS = frozenset(('return', 'typeof', 'case', 'do', 'else', 'in', 'of', 'new', 'delete', 'void',
+                             'throw', 'yield', 'await', 'instanceof'))
+
+# Import/export name lists ('import { a, b as c } from ...', 'export { x };') are kept as they are
+_NAME_LIST_RE = re.compile(r"(?:^|\n)[ \t]*(?:import\b[\w\s,*$]*|export(?:\s+type)?\s*)$")
+# A block whose header matches is kept (its members are outlined); any other block is a body and collapsed
+_KEEP_BLOCK_RE = re.compile(r"\b(?:class|interface|enum|record)\b|@interface\b|\b(?:namespace|module)\s+[\w.]+\s*$|\bdeclare\s+global\s*$")
+_BLANK_RUNS_RE = re.compile(r"\n[ \t]*(?:\n[ \t]*)+\n")
+
+
+def _first_doc_line(doc: str) -> str:
+    for line in doc.strip('/*').splitlines():
+        line = line.strip().lstrip('*').strip()
+        if line:
+            return line
+    return ""
+
+
+def _regex_allowed(text: str, index: int) -> bool:
+    """True if a slash at index is in expression position (after an operator, bracket or keyword)."""
+    i = index - 1
+    while i >= 0 and text[i] in ' \t\r\n':
+        i -= 1
+    if i < 0 or text[i] in _REGEX_PRECEDERS:
+        return True
+    if not (text[i].isalnum() or text[i] in '_$'):
+        return False # ')', ']', '}' or a literal: division
+    start = i
+    while start > 0 and (text[start - 1].isalnum() or text[start - 1] in '_$'):
+        start -= 1
+    return text[start:i + 1] in _REGEX_KEYWORDS
+
+
+def _brace_tokens(text: str) -> Iterator["re.Match"]:
+    """Tokens of _BRACE_TOKEN_RE; regex literals and divisions are consumed here."""
+    pos = 0
+    while True:
+        match = _BRACE_TOKEN_RE.search(text, pos)
+        if match is None:
+            return
+        pos = match.end()
+        if match.group('slash') is None:
+            yield match
+        elif _regex_allowed(text, match.start()):
+            literal = _REGEX_LITERAL_RE.match(text, match.start())
+            if literal is not None:
+                pos = literal.end()
+
+
+def outline_braces(text: str) -> str:
+    """
+    Outline of a JS/TS/Java file: top-level statements, class/interface/enum
+    members and signatures are kept, every other block (function and method
+    bodies, object literals, initializers) is collapsed to '{ ... }'. Import
+    and export name lists are kept.
+    """
+    out: List[str] = []
+    pos = 0         # Copied up to here
+    stmt_start = 0  # Start of the current statement header
+    tokens = _brace_tokens(text)
+    for match in tokens:
+        if match.group('comment') is not None:
+            out.append(text[pos:match.start()])
+            pos = match.end()
+        elif match.group('doc') is not None:
+            out.append(text[pos:match.start()])
+            first = _first_doc_line(match.group('doc'))
+            if first:
+                out.append(f"/** {first} */")
+            pos = match.end()
+            stmt_start = pos
+        elif match.group('semi') is not None:
+            stmt_start = match.end()
+        elif match.group('brace') == '}':
+            stmt_start = match.end()
+        elif match.group('brace') == '{':
+            header = text[stmt_start:match.start()]
+            if _KEEP_BLOCK_RE.search(header) or _NAME_LIST_RE.search(header):
+                stmt_start = match.end()
+                continue
+            out.append(text[pos:match.end()])
+            out.append(" ... }")
+            depth = 1
+            end = len(text)
+            for inner in tokens:
+                brace = inner.group('brace')
+                if brace == '{':
+                    depth += 1
+                elif brace == '}':
+                    depth -= 1
+                    if depth == 0:
+                        end = inner.end()
+                        break
+            pos = stmt_start = end
+    out.append(text[pos:])
+    outline = _BLANK_RUNS_RE.sub("\n\n", "".join(out))
+    return "\n".join(line.rstrip() for line in outline.split("\n")).strip("\n") + "\n"
+
+
+class _PythonOutliner:
+    """Builds the outline of one Python module from its AST and source lines."""
+
+    def __init__(self, text: str):
+        self.tree = ast.parse(text)
+        self.lines = text.split('\n')
+        self.out: List[str] = []
+
+    def _indent_of(self, lineno: int) -> str:
+        line = self.lines[lineno - 1]
+        return line[:len(line) - len(line.lstrip())]
+
+    def _emit_lines(self, start: int, end: int) -> None:
+        """Emit source lines start..end (1-based), shortened for long values."""
+        segment = self.lines[start - 1:end]
+        if len(segment) > MAX_VALUE_LINES:
+            segment = [segment[0] + " ..."]
+        for line in segment:
+            self.out.append(line if len(line) <= MAX_LINE_LENGTH else line[:MAX_LINE_LENGTH] + " ...")
+
+    def _emit_docstring(self, node, indent: str) -> bool:
+        docstring = ast.get_docstring(node, clean=True)
+        if not docstring:
+            return False
+        first = docstring.strip().splitlines()[0].strip()
+        self.out.append(f'{indent}"""{first}"""')
+        return True
+
+    def _body_indent(self, node) -> str:
+        return self._indent_of(node.body[0].lineno)
+
+    def _emit_header(self, node) -> None:
+        """Decorators and the signature lines of a def/class (up to the first body line)."""
+        start = node.decorator_list[0].lineno if node.decorator_list else node.lineno
+        end = max(node.lineno, node.body[0].lineno - 1)
+        header = self.lines[start - 1:end]
+        while len(header) > 1 and (not header[-1].strip() or header[-1].lstrip().startswith('#')):
+            header.pop() # Blank or comment lines between header and body
+        self.out.extend(header)
+
+    def _is_constant(self, node, in_class: bool) -> bool:
+        if in_class:
+            return True # Class attributes and fields (dataclasses, enums)
+        targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+        names = [t.id for t in targets if isinstance(t, ast.Name)]
+        return bool(names) and all(name.isupper() or name == '__all__' for name in names)
+
+    def emit_body(self, body: List[ast.stmt], in_class: bool = False, top_level: bool = False) -> int:
+        """Emit the outline of a statement list; returns the number of emitted lines."""
+        before = len(self.out)
+        for node in body:
+            if isinstance(node, (ast.Import, ast.ImportFrom)):
+                self._emit_lines(node.lineno, node.end_lineno)
+            elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                if top_level and self.out and self.out[-1] != "":
+                    self.out.append("")
+                self._emit_header(node)
+                if node.body[0].lineno > node.lineno or node.decorator_list:
+                    indent = self._body_indent(node)
+                    self._emit_docstring(node, indent)
+                    self.out.append(f"{indent}...")
+            elif isinstance(node, ast.ClassDef):
+                if top_level and self.out and self.out[-1] != "":
+                    self.out.append("")
+                self._emit_header(node)
+                indent = self._body_indent(node)
+                has_doc = self._emit_docstring(node, indent)
+                members = node.body[1:] if has_doc else node.body
+                if not self.emit_body(members, in_class=True) and not has_doc:
+                    self.out.append(f"{indent}...")
+            elif isinstance(node, (ast.Assign, ast.AnnAssign)) and self._is_constant(node, in_class):
+                self._emit_lines(node.lineno, node.end_lineno)
+            elif isinstance(node, (ast.If, ast.Try)) and not in_class:
+                # Conditional imports and definitions (try: import x / if TYPE_CHECKING: ...)
+                mark = len(self.out)
+                self.out.append(self.lines[node.lineno - 1])
+                if not self.emit_body(node.body):
+                    del self.out[mark:] # Nothing structural inside
+                    continue
+                for handler in getattr(node, 'handlers', []):
+                    self.out.append(self.lines[handler.lineno - 1])
+                    if not self.emit_body(handler.body):
+                        self.out.append(f"{self._body_indent(handler)}...")
+        return len(self.out) - before
+
+    def outline(self) -> str:
+        if self._emit_docstring(self.tree, ""):
+            self.out.append("")
+            body = self.tree.body[1:]
+        else:
+            body = self.tree.body
+        self.emit_body(body, top_level=True)
+        return "\n".join(self.out).strip("\n") + "\n"
+
+
+def outline_python(text: str) -> str:
+    """
+    Outline of a Python module: imports, module-level constants (UPPER_CASE and
+    __all__), class attributes, class and function signatures with decorators,
+    and the first line of every docstring. Bodies are replaced by '...'.
+    Raises SyntaxError if the module cannot be parsed.
+    """
+    return _PythonOutliner(text).outline()
+
+
+def outline_text(rel_path: str, text: str) -> Optional[str]:
+    """Outline of a file based on its extension, or None if the language is not supported."""
+    ext = posixpath.splitext(rel_path)[1].lower()
+    if ext in PYTHON_EXTENSIONS:
+        return outline_python(text)
+    if ext in JS_EXTENSIONS or ext in JAVA_EXTENSIONS:
+        return outline_braces(text)
+    return None
+
+
+class Outliner:
+    """
+    Replaces the content of supported files (Python, JS/TS, Java) by their
+    outline, for all files ([outline] enabled) or those matching [outline]
+    patterns. Outlines are cached by content hash in .dump/outline_cache.json,
+    so unchanged files are not parsed again. Files that cannot be parsed, were
+    truncated by a size policy or had secrets redacted are outlined without
+    the cache or kept in full.
+    """
+
+    CACHE_FILENAME = "outline_cache.json"
+    CACHE_VERSION = 1
+
+    def __init__(self, settings: Dict, dump_dir_path: Path, log_dir: str):
+        self.enabled = settings['enabled']
+        self.patterns = settings['patterns']
+        self.log_dir = log_dir
+        self.cache_path = dump_dir_path / self.CACHE_FILENAME
+        self.files_outlined = 0
+        self.parsed = 0
+        self.cached = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self._cache_file = JsonCacheFile(self.cache_path, self.CACHE_VERSION, log_dir, "outline cache")
+        self._cache: Dict[str, str] = self._cache_file.load() or {}
+        self._seen: Set[str] = set()
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    def reset(self) -> None:
+        """Forget the counters of the previous run (long-lived outliners)."""
+        with self._lock:
+            self.files_outlined = self.parsed = self.cached = 0
+            self.bytes_in = self.bytes_out = 0
+            self._seen = set()
+
+    def save(self, prune_unseen: bool = True) -> None:
+        """Save the cache. Only pass prune_unseen=True after a dump of the complete tree."""
+        if prune_unseen and drop_unseen(self._cache, self._seen):
+            self._dirty = True
+        if self._dirty and self._cache_file.save(self._cache):
+            self._dirty = False
+
+    def applies_to(self, rel_path: str) -> bool:
+        if self.enabled:
+            return True
+        file_name = rel_path.rsplit('/', 1)[-1]
+        return any(fnmatch.fnmatch(rel_path, p) or fnmatch.fnmatch(file_name, p) for p in self.patterns)
+
+    def process(self, item, stats) -> bool:
+        """Replace item.content by its outline if this file is outlined. Never drops a file."""
+        rel_path = item.rel_path or item.path.name
+        if item.content is None or item.omitted_bytes or not self.applies_to(rel_path):
+            return True
+        cacheable = item.content_hash is not None and not item.secrets_redacted
+        outline = self._cache.get(item.content_hash) if cacheable else None
+        if outline is not None:
+            with self._lock:
+                self._seen.add(item.content_hash)
+                self.cached += 1
+        else:
+            try:
+                outline = outline_text(rel_path, item.content)
+            except (SyntaxError, ValueError, RecursionError) as e:
+                log_error(self.log_dir, f"Cannot outline {rel_path}, dumping it in full: {e}")
+                return True
+            if outline is None:
+                return True # Language without outliner
+            with self._lock:
+                self.parsed += 1
+                if cacheable:
+                    self._cache[item.content_hash] = outline
+                    self._seen.add(item.content_hash)
+                    self._dirty = True
+        with self._lock:
+            self.files_outlined += 1
+            self.bytes_in += len(item.content)
+            self.bytes_out += len(outline)
+        item.content = outline
+        item.outlined = True
+        return True
+
+# --- END OF FILE utils/outline.py ---
@@ -0,0 +1,332 @@
+# --- START OF FILE utils/plan.py ---
+import heapq
+import os
+import posixpath
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .dump_pipeline import FILE_SEPARATOR, DumpItem
+from .error_logger import log_error
+from .file_walker import walk_directory
+from .inventory import FileInventory
+from .truncation import find_size_policy
+
+SAMPLE_LINE_BYTES = 80 # Assumed average line length for the 'sample' size policy
+EXTRACT_ESTIMATE_BYTES = 8 * 1024 # Assumed output of a format-specific extractor (cells, schema, first rows)
+REPORT_TOP = 10 # Rows per table in the plan report
+NOTE_FLAGS = {'skipped': 1, 'truncated': 2, 'extracted': 4, 'generated': 8} # Inventory flags per note kind
+
+
+class DumpPlan:
+    """
+    What a walked dump would contain, built from directory entries and stat
+    alone (no file is opened), stored as .dump/plan.inv (a FileInventory:
+    value is the estimate, tag the note, flags the note kind; the rest of the
+    plan is in its meta data).
+
+    The plan walk evaluates the ignore rules itself (instead of replaying the
+    ignore cache), so it can count which rule excluded how many entries; its
+    decisions are stored in the ignore cache, so the real dump replays them.
+    Every file that passes the rules is in the plan, in walk order, with an
+    estimate of the bytes it adds to the dump: the size for normal files, the
+    kept ranges for size policies, 0 for files dropped as too large and the
+    summary for files the generated file cache already knows. Secret
+    redaction and outlines are not estimated (they only shrink the output).
+
+    PlanSource feeds a plan into the pipeline, so a dump can start from it
+    without walking or evaluating any rule again.
+    """
+
+    PLAN_FILENAME = "plan.inv"
+    PLAN_VERSION = 2
+
+    def __init__(self, config_manager, scopes: Optional[List[str]] = None):
+        self.config_manager = config_manager
+        self.project_dir: Path = config_manager.project_dir
+        self.plan_path = config_manager.dump_dir_path / self.PLAN_FILENAME
+        self.scopes = scopes
+        self.rules = config_manager.get_rules_fingerprint()
+        self.created: Optional[str] = None
+        self.inventory = FileInventory() # Planned files in walk order
+        self.excluded: Dict[str, List[int]] = {} # Rule -> [files, directories, bytes of the excluded files]
+        self.unreadable = 0 # Directories that could not be listed, files that could not be stat'ed
+        self._lock = threading.Lock() # Directories are scanned from walker threads
+
+    # --- Walk ---
+
+    def _exclude(self, reason: str, entry: os.DirEntry, is_dir: bool) -> None:
+        size = 0
+        if not is_dir:
+            try:
+                size = entry.stat(follow_symlinks=False).st_size
+            except OSError:
+                pass
+        with self._lock:
+            counts = self.excluded.setdefault(reason, [0, 0, 0])
+            counts[1 if is_dir else 0] += 1
+            counts[2] += size
+
+    def _scan(self, dir_path: Path, ignore_cache) -> Tuple[List[str], List[Tuple[str, int, int, int]]]:
+        """
+        List a directory like file_walker._scan_directory, but record the rule behind
+        every exclusion and stat the included files. Returns (dirs, [(name, size, mtime_ns, inode)]).
+        """
+        dirs: List[str] = []
+        files: List[Tuple[str, int, int, int]] = []
+        names: List[str] = []
+        try:
+            mtime_ns = os.stat(dir_path).st_mtime_ns
+            with os.scandir(dir_path) as it:
+                for entry in it:
+                    try:
+                        is_dir = entry.is_dir()
+                    except OSError:
+                        is_dir = False
+                    reason = self.config_manager.ignore_reason(str(dir_path / entry.name))
+                    if reason is not None:
+                        self._exclude(reason, entry, is_dir)
+                        continue
+                    if is_dir:
+                        if not entry.is_symlink():
+                            dirs.append(entry.name)
+                        continue
+                    names.append(entry.name)
+                    try:
+                        st = entry.stat()
+                    except OSError as e:
+                        log_error(str(self.project_dir), f"Cannot stat {dir_path / entry.name} for the plan: {e}")
+                        with self._lock:
+                            self.unreadable += 1
+                        continue
+                    files.append((entry.name, st.st_size, st.st_mtime_ns, st.st_ino))
+        except OSError as e:
+            log_error(str(self.project_dir), f"Cannot list directory {dir_path}: {e}")
+            with self._lock:
+                self.unreadable += 1
+            return [], []
+        if ignore_cache is not None:
+            rel_dir = dir_path.relative_to(self.project_dir).as_posix()
+            ignore_cache.store('' if rel_dir == '.' else rel_dir, str(dir_path), mtime_ns, dirs, names)
+        return dirs, files
+
+    def _estimate(self, rel_path: str, size: int, mtime_ns: int, output_settings: Dict,
+                  extractors, generated) -> Tuple[int, str]:
+        """Estimated content bytes in the dump and a note, following FilterStage and ReadStage."""
+        if extractors is not None:
+            extractor = extractors.find(rel_path, size)
+            if extractor is not None:
+                return min(size, EXTRACT_ESTIMATE_BYTES), f"extracted:{extractor.name}"
+        estimate, note = size, ''
+        if size > output_settings['max_file_size']:
+            policy = find_size_policy(output_settings.get('size_policies', []), rel_path)
+            if policy is None or policy['mode'] == 'skip':
+                return 0, 'skipped:large'
+            if policy['mode'] == 'head':
+                kept = policy['head_bytes']
+            elif policy['mode'] == 'head_tail':
+                kept = policy['head_bytes'] + policy['tail_bytes']
+            else:
+                kept = policy['sample_lines'] * SAMPLE_LINE_BYTES
+            estimate, note = min(size, kept), f"truncated:{policy['mode']}"
+        if generated is not None:
+            verdict = generated.cached_verdict(DumpItem(index=0, path=self.project_dir / rel_path, size=size,
+                                                        mtime_ns=mtime_ns, rel_path=rel_path))
+            if verdict:
+                if generated.action == 'skip':
+                    return 0, f"skipped:{verdict}"
+                return len(f"[generated file omitted ({verdict}): {size} bytes]\n"), f"generated:{verdict}"
+        return estimate, note
+
+    def build(self, output_settings: Dict, comment_prefix: str = "#", extractors=None, generated=None,
+              ignore_cache=None, workers: int = 1) -> "DumpPlan":
+        """
+        Walk the project (or the scopes) and fill the plan. extractors and generated
+        are the ExtractorRegistry and GeneratedFileDetector the dump would use.
+        """
+        header_bytes = len(f"{comment_prefix} FILE: \n\n".encode('utf-8')) if output_settings['include_file_headers'] else 0
+        overhead = header_bytes + len(FILE_SEPARATOR)
+
+        def add(rel_path: str, size: int, mtime_ns: int, inode: int) -> None:
+            estimate, note = self._estimate(rel_path, size, mtime_ns, output_settings, extractors, generated)
+            if not note.startswith('skipped:'):
+                estimate += overhead + len(rel_path.encode('utf-8'))
+            self.inventory.add(rel_path, size, mtime_ns, inode, flags=NOTE_FLAGS.get(note.split(':', 1)[0], 0),
+                               tag=note, value=estimate)
+
+        scan = lambda dir_path: self._scan(dir_path, ignore_cache)
+        for scope in self.scopes if self.scopes is not None else ['']:
+            path = self.project_dir / scope if scope else self.project_dir
+            if path.is_dir() and not path.is_symlink():
+                for dir_path, entries in walk_directory(str(path), workers=workers, scan=scan):
+                    rel_dir = dir_path.relative_to(self.project_dir).as_posix()
+                    prefix = '' if rel_dir == '.' else rel_dir + '/'
+                    for name, size, mtime_ns, inode in entries:
+                        add(prefix + name, size, mtime_ns, inode)
+            elif path.is_file():
+                st = path.stat()
+                add(scope, st.st_size, st.st_mtime_ns, st.st_ino)
+        return self
+
+    # --- Report ---
+
+    def entries(self) -> Iterator[Tuple[str, int, int, str]]:
+        """(rel_path, size, estimated output bytes, note) per planned file, in walk order."""
+        inventory = self.inventory
+        for i in range(len(inventory)):
+            yield inventory.rel_path(i), inventory.sizes[i], inventory.values[i], inventory.tag(i)
+
+    @property
+    def estimated_bytes(self) -> int:
+        return sum(self.inventory.values)
+
+    def estimated_tokens(self, bytes_per_token: float) -> int:
+        return int(self.estimated_bytes / bytes_per_token)
+
+    def _group(self, rel_path: str) -> str:
+        """Directory a file is reported under: the first level below its scope (or the project root)."""
+        for scope in self.scopes if self.scopes is not None else ['']:
+            base = scope + '/' if scope else ''
+            if rel_path == scope or not rel_path.startswith(base):
+                continue
+            rest = rel_path[len(base):]
+            return base + rest.split('/', 1)[0] + '/' if '/' in rest else (scope or '.') + '/'
+        return posixpath.dirname(rel_path) + '/'
+
+    def report(self, bytes_per_token: float, max_tokens: int = 0) -> List[str]:
+        """Summary lines: totals, tokens by extension and directory, largest files, excluding rules."""
+        tokens = lambda size: int(size / bytes_per_token)
+        by_extension: Dict[str, List[int]] = {}
+        by_directory: Dict[str, List[int]] = {}
+        notes: Dict[str, int] = {}
+        for rel_path, _size, estimate, note in self.entries():
+            ext = posixpath.splitext(rel_path.rsplit('/', 1)[-1])[1].lower() or '(none)'
+            for table, key in ((by_extension, ext), (by_directory, self._group(rel_path))):
+                counts = table.setdefault(key, [0, 0])
+                counts[0] += 1
+                counts[1] += estimate
+            if note:
+                kind = note.split(':', 1)[0]
+                notes[kind] = notes.get(kind, 0) + 1
+
+        total = self.estimated_bytes
+        lines = [f"Files: {len(self.inventory)} ({sum(self.inventory.sizes)} bytes on disk)",
+                 f"Estimated output: {total} bytes, ~{tokens(total)} tokens ({bytes_per_token:g} bytes per token)"]
+        if max_tokens:
+            verdict = "EXCEEDED" if tokens(total) > max_tokens else "ok"
+            lines.append(f"Ceiling: {max_tokens} tokens ([plan] max_tokens) - {verdict}")
+        labels = (('skipped', "dropped (too large or generated)"), ('truncated', "truncated by a size policy"),
+                  ('extracted', "extracted (notebooks, data files)"), ('generated', "summarized (known generated files)"))
+        for kind, label in labels:
+            if notes.get(kind):
+                lines.append(f"  {notes[kind]} files {label}")
+        if self.unreadable:
+            lines.append(f"  {self.unreadable} files or directories could not be read (see dump_error.log)")
+
+        def table(title: str, rows: Dict[str, List[int]]) -> None:
+            lines.append("")
+            lines.append(f"{title} (top {REPORT_TOP} by tokens):")
+            for key, (count, size) in sorted(rows.items(), key=lambda row: (-row[1][1], row[0]))[:REPORT_TOP]:
+                share = size * 100 // max(1, total)
+                lines.append(f"  {tokens(size):>10} tokens {share:>3}%  {count:>7} files  {key}")
+
+        table("By extension", by_extension)
+        table("By directory", by_directory)
+        lines.append("")
+        lines.append(f"Largest files (top {REPORT_TOP}):")
+        values = self.inventory.values
+        for i in sorted(heapq.nlargest(REPORT_TOP, range(len(values)), key=values.__getitem__),
+                        key=lambda i: (-values[i], self.inventory.rel_path(i))):
+            rel_path, size, estimate, note = self.inventory.rel_path(i), self.inventory.sizes[i], values[i], self.inventory.tag(i)
+            lines.append(f"  {tokens(estimate):>10} tokens  {size:>10} bytes  {rel_path}" + (f"  ({note})" if note else ""))
+        lines.append("")
+        lines.append(f"Excluded by the ignore rules (top {REPORT_TOP}):")
+        if not self.excluded:
+            lines.append("  nothing")
+        for rule, (files, dirs, size) in sorted(self.excluded.items(), key=lambda row: (-(row[1][0] + row[1][1]), row[0]))[:REPORT_TOP]:
+            lines.append(f"  {files:>7} files {dirs:>6} dirs {size:>12} bytes  {rule}")
+        return lines
+
+    def write_report(self, report_path: Path, bytes_per_token: float, max_tokens: int = 0) -> None:
+        """Write the summary and the full file list (in dump order of a walk) to report_path."""
+        with open(report_path, 'w', encoding='utf-8') as f:
+            for line in self.report(bytes_per_token, max_tokens):
+                f.write(line + "\n")
+            f.write(f"\nFile list ({len(self.inventory)} files, estimated tokens, size, path):\n")
+            for rel_path, size, estimate, note in self.entries():
+                f.write(f"{int(estimate / bytes_per_token):>10} {size:>10}  {rel_path}" + (f"  ({note})" if note else "") + "\n")
+
+    # --- Persistence ---
+
+    def save(self) -> None:
+        """Write the plan atomically."""
+        try:
+            self.created = datetime.now().isoformat()
+            self.inventory.meta = {
+                'version': self.PLAN_VERSION,
+                'created': self.created,
+                'rules': self.rules,
+                'scopes': self.scopes,
+                'excluded': self.excluded,
+                'unreadable': self.unreadable,
+            }
+            self.inventory.save(self.plan_path)
+        except Exception as e:
+            log_error(str(self.project_dir), f"Failed to save plan {self.plan_path}: {e}")
+
+    @classmethod
+    def load(cls, config_manager) -> Optional["DumpPlan"]:
+        """Load the last saved plan, or None if there is none (or it is unreadable)."""
+        plan = cls(config_manager)
+        if not plan.plan_path.exists():
+            return None
+        try:
+            inventory = FileInventory.load(plan.plan_path)
+            data = inventory.meta
+            if data.get('version') != cls.PLAN_VERSION:
+                inventory.close()
+                return None
+            plan.inventory = inventory
+            plan.created = data.get('created')
+            plan.rules = data.get('rules')
+            plan.scopes = data.get('scopes')
+            plan.excluded = {rule: [int(v) for v in counts] for rule, counts in data.get('excluded', {}).items()}
+            plan.unreadable = int(data.get('unreadable', 0))
+            return plan
+        except Exception as e:
+            log_error(str(config_manager.project_dir), f"Failed to load plan {plan.plan_path}: {e}")
+            return None
+
+    def close(self) -> None:
+        """Release the mapping of a loaded plan."""
+        self.inventory.close()
+
+
+class PlanSource:
+    """
+    Produces the files of a DumpPlan, in the given OutputOrder (walk order if
+    None). Sizes are left to FilterStage, which stats every file again, so
+    files changed since the plan are dumped as they are now.
+    """
+
+    def __init__(self, plan: DumpPlan, order=None):
+        self.plan = plan
+        self.order = order
+        self.scopes = plan.scopes
+        self.complete = plan.scopes is None # True if the plan covers the whole project
+        self.total = len(plan.inventory)
+
+    def iter_items(self) -> Iterator[DumpItem]:
+        """Yield one DumpItem per planned file."""
+        project_dir = self.plan.project_dir
+        inventory = self.plan.inventory
+        items = []
+        for index in range(len(inventory)):
+            rel_path = inventory.rel_path(index)
+            items.append(DumpItem(index=index, path=project_dir / rel_path, rel_path=rel_path))
+        if self.order is not None:
+            items = self.order.sort(items)
+        return iter(items)
+
+# --- END OF FILE utils/plan.py ---
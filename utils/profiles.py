@@ -0,0 +1,112 @@
+# --- START OF FILE utils/profiles.py ---
+import fnmatch
+import re
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from .dump_pipeline import DumpItem, DumpStats, TransformStage, WriteStage
+
+
+def profile_dump_filename(name: str) -> str:
+    """Output file name for a profile, e.g. 'backend' -> 'dump_backend.txt'."""
+    return f"dump_{re.sub(r'[^A-Za-z0-9._-]+', '_', name)}.txt"
+
+
+def _matches_any(patterns: List[str], rel_path: str) -> bool:
+    """fnmatch against the relative path or the file name, like size policies; 'dir/' matches everything below dir."""
+    file_name = rel_path.rsplit('/', 1)[-1]
+    for pattern in patterns:
+        if pattern.endswith('/'):
+            if rel_path.startswith(pattern) or fnmatch.fnmatch(rel_path, pattern + '*'):
+                return True
+        elif fnmatch.fnmatch(rel_path, pattern) or fnmatch.fnmatch(file_name, pattern):
+            return True
+    return False
+
+
+class DumpProfile:
+    """
+    A named profile from [profiles.<name>] in .dump_config. Profiles narrow the
+    normal dump: a file must pass the regular ignore rules, match one of the
+    include patterns (if any) and none of the exclude patterns. max_file_size
+    and include_file_headers override the [output] settings for this profile;
+    max_file_size can only be lower than the global one, because every file is
+    read once with the global settings.
+    """
+
+    def __init__(self, name: str, settings: Dict, project_dir: Path, output_settings: Dict):
+        self.name = name
+        self.include: List[str] = settings['include']
+        self.exclude: List[str] = settings['exclude']
+        self.max_file_size: Optional[int] = settings['max_file_size']
+        if self.max_file_size is not None and self.max_file_size >= output_settings['max_file_size']:
+            self.max_file_size = None # Not narrower than the global limit, nothing to check
+        self.output_settings = dict(output_settings)
+        if settings['include_file_headers'] is not None:
+            self.output_settings['include_file_headers'] = settings['include_file_headers']
+        self.dump_path = project_dir / profile_dump_filename(name)
+
+    def wants_path(self, rel_path: str) -> bool:
+        """Path-only check (include/exclude), usable before the file is stat'ed."""
+        if self.include and not _matches_any(self.include, rel_path):
+            return False
+        return not _matches_any(self.exclude, rel_path)
+
+    def accepts(self, item: DumpItem) -> bool:
+        """Full check for a read file, including this profile's size limit."""
+        rel_path = item.rel_path or item.path.name
+        if not self.wants_path(rel_path):
+            return False
+        return self.max_file_size is None or item.size is None or item.size <= self.max_file_size
+
+
+class ProfileSource:
+    """
+    Wraps a source (normally WalkStage) and drops files that no profile wants,
+    before they are stat'ed or read. Items are renumbered so that the output
+    order stays contiguous for the async pipeline.
+    """
+
+    def __init__(self, source, profiles: List[DumpProfile]):
+        self.source = source
+        self.profiles = profiles
+
+    def iter_items(self) -> Iterator[DumpItem]:
+        index = 0
+        for item in self.source.iter_items():
+            rel_path = item.rel_path or item.path.name
+            if any(profile.wants_path(rel_path) for profile in self.profiles):
+                item.index = index
+                index += 1
+                yield item
+
+
+class ProfileFanOutStage:
+    """
+    Write stage for profile dumps: every file arrives read and transformed once
+    and is written to the dump of each profile that accepts it. Only the header
+    is rendered per profile (headers may be switched off per profile).
+    """
+
+    def __init__(self, profiles: List[DumpProfile], transforms: Dict[str, TransformStage],
+                 write_stages: Dict[str, WriteStage]):
+        self.profiles = profiles
+        self.transforms = transforms
+        self.write_stages = write_stages
+        self.stats: Dict[str, DumpStats] = {profile.name: DumpStats() for profile in profiles}
+
+    def process(self, item: DumpItem, stats: DumpStats) -> bool:
+        written = False
+        shared_header = item.header
+        for profile in self.profiles:
+            if not profile.accepts(item):
+                continue
+            item.header = self.transforms[profile.name].make_header(item)
+            self.write_stages[profile.name].process(item, self.stats[profile.name])
+            written = True
+        item.header = shared_header
+        if written:
+            stats.add('files_dumped')
+        return written
+
+# --- END OF FILE utils/profiles.py ---
@@ -0,0 +1,114 @@
+# --- START OF FILE utils/progress.py ---
+import sys
+import threading
+import time
+from typing import Callable, Dict, Optional, TextIO
+
+
+def _format_duration(seconds: float) -> str:
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f"{seconds // 3600}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+    return f"{seconds // 60}:{seconds % 60:02d}"
+
+
+class ProgressReporter:
+    """
+    Live progress line for long dumps: phase, files and output bytes per second
+    and an ETA. A background thread redraws the line at most every
+    UPDATE_INTERVAL seconds from counters polled via progress(), so the
+    pipeline itself never writes to the console per file.
+
+    Phases are also published to the single-flight status (if a flight is
+    given), so waiting processes see the same progress. Without a terminal
+    (output redirected, context menu) nothing is drawn.
+    """
+
+    UPDATE_INTERVAL = 0.25
+
+    def __init__(self, flight=None, stream: Optional[TextIO] = None, enabled: Optional[bool] = None):
+        self.flight = flight
+        self.stream = stream or sys.stdout
+        self.enabled = self.stream.isatty() if enabled is None else enabled
+        self._phase = ""
+        self._progress: Optional[Callable[[], Dict]] = None
+        self._total_files: Optional[Callable[[], Optional[int]]] = None
+        self._phase_started = time.monotonic()
+        self._first_done: Optional[float] = None # Rates are measured from the first finished file
+        self._width = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def set_phase(self, phase: str, progress: Optional[Callable[[], Dict]] = None,
+                  total_files: Optional[Callable[[], Optional[int]]] = None) -> None:
+        """
+        Start a phase. progress() returns counters ('files_done', 'bytes_written');
+        total_files() the expected number of files, None while unknown.
+        """
+        if self.flight is not None:
+            self.flight.set_phase(phase, progress)
+        with self._lock:
+            self._phase = phase
+            self._progress = progress
+            self._total_files = total_files
+            self._phase_started = time.monotonic()
+            self._first_done = None
+        if self.enabled and progress is not None and self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="dump-progress", daemon=True)
+            self._thread.start()
+
+    def render(self) -> str:
+        """Current progress line (without carriage return)."""
+        with self._lock:
+            phase, progress, total_files, started = self._phase, self._progress, self._total_files, self._phase_started
+        counters = progress() if progress is not None else {}
+        now = time.monotonic()
+        parts = [phase]
+        done = counters.get('files_done', 0)
+        if not done:
+            parts.append(f"collecting files ({_format_duration(now - started)})")
+            return " | ".join(parts)
+        if self._first_done is None:
+            self._first_done = now
+        elapsed = max(now - self._first_done, self.UPDATE_INTERVAL)
+        total = total_files() if total_files is not None else None
+        if total:
+            parts.append(f"{done}/{total} files ({min(done, total) * 100 // total}%)")
+        else:
+            parts.append(f"{done} files")
+        parts.append(f"{done / elapsed:.0f} files/s")
+        if 'bytes_written' in counters:
+            parts.append(f"{counters['bytes_written'] / elapsed / (1024 * 1024):.1f} MB/s")
+        if total and done:
+            remaining = max(0, total - done) * elapsed / done
+            parts.append(f"ETA {_format_duration(remaining)}")
+        return " | ".join(parts)
+
+    def _draw(self) -> None:
+        line = self.render()
+        padding = " " * max(0, self._width - len(line))
+        self._width = len(line)
+        self.stream.write(f"\r{line}{padding}")
+        self.stream.flush()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.UPDATE_INTERVAL):
+            try:
+                self._draw()
+            except Exception:
+                return # Never let the progress line break a dump
+
+    def stop(self) -> None:
+        """Stop redrawing and clear the progress line."""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        self._stop.clear()
+        self.stream.write("\r" + " " * self._width + "\r")
+        self.stream.flush()
+        self._width = 0
+
+# --- END OF FILE utils/progress.py ---
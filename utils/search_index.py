@@ -0,0 +1,455 @@
+# --- START OF FILE utils/search_index.py ---
+import math
+import mmap
+import os
+import re
+import struct
+import sys
+import time
+from array import array
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+import git
+
+from .delta import compute_git_delta
+from .error_logger import log_error
+from .file_walker import walk_project
+from .inventory import FileInventory
+from .json_cache import JsonCacheFile
+from .manifest import DumpManifest
+
+# Tokens are taken from identifiers; standalone numbers are ignored. Identifiers
+# are split into their parts (snake_case, camelCase, PascalCase, ACRONYMWord) and
+# the full identifier is kept as an additional token, so 'getUserName' matches
+# the queries "user name" and "getusername".
+_IDENTIFIER_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+_CAMEL_PART_RE = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|[0-9]+")
+MIN_TOKEN_LENGTH = 2
+
+# Postings file (.dump/search_postings.bin), little endian:
+#   header  : magic(8) generation(u64)
+#   postings: u64 per (term, document) pair, doc_id << 32 | term frequency,
+#             grouped by term; a term's postings are [start, start + count)
+#             with start and count from the term table (values and sizes).
+POSTINGS_MAGIC = b"GRBPST\x00\x01"
+_POSTINGS_HEADER = struct.Struct("<8sQ")
+_NATIVE_LITTLE = sys.byteorder == 'little'
+
+
+def tokenize(text: str) -> List[str]:
+    """Identifier-aware tokenizer used for documents and queries."""
+    tokens: List[str] = []
+    for identifier in _IDENTIFIER_RE.findall(text):
+        full = identifier.strip('_').lower()
+        parts = [p.lower() for chunk in identifier.split('_') if chunk for p in _CAMEL_PART_RE.findall(chunk)]
+        if len(full) >= MIN_TOKEN_LENGTH and parts != [full]:
+            tokens.append(full)
+        tokens.extend(p for p in parts if len(p) >= MIN_TOKEN_LENGTH and not p.isdigit())
+    return tokens
+
+
+@dataclass
+class SearchHit:
+    rel_path: str
+    score: float
+    size: int
+
+
+class SearchIndex:
+    """
+    Persistent BM25 inverted index over the project files. Runs fully offline.
+
+    The index has a read-only base and a small delta:
+        search_docs.inv      FileInventory of the base documents (size,
+                             mtime_ns, document length as value); the row is
+                             the document id
+        search_terms.inv     FileInventory used as term dictionary: one row
+                             per term (name = term, value = first posting,
+                             size = number of postings), found by its
+                             binary search
+        search_postings.bin  the postings of all terms, see POSTINGS_MAGIC
+        search_delta.json    documents indexed since the base was written
+                             (with their term frequencies), base documents
+                             that were removed or replaced, and the sync state
+    All base files are memory mapped; a query only reads the postings of its
+    terms. Updates only touch the delta, which is merged into a new base once
+    it exceeds MERGE_MIN_DOCS documents and MERGE_FRACTION of the base.
+
+    Changed files are found without walking the tree where possible: after a
+    dump, the manifest of that dump is compared with the index (no stat for
+    unchanged files), and in a git repository the files git reports as
+    changed since the commit of the last update are checked. The tree is
+    walked for the first index, when the ignore rules changed and, outside a
+    git repository, whenever there is no new manifest (every indexed file is
+    stat'ed and new files are found through the ignore cache).
+    """
+
+    DOCS_FILENAME = "search_docs.inv"
+    TERMS_FILENAME = "search_terms.inv"
+    POSTINGS_FILENAME = "search_postings.bin"
+    DELTA_FILENAME = "search_delta.json"
+    LEGACY_FILENAME = "search_index.json" # Single JSON file of older versions, removed on the first save
+    INDEX_VERSION = 2
+    MERGE_MIN_DOCS = 1000
+    MERGE_FRACTION = 0.05
+    K1 = 1.2
+    B = 0.75
+
+    def __init__(self, config_manager):
+        self.config_manager = config_manager
+        self.project_dir: Path = config_manager.project_dir
+        self.log_dir = str(self.project_dir)
+        dump_dir = config_manager.dump_dir_path
+        self.docs_path = dump_dir / self.DOCS_FILENAME
+        self.terms_path = dump_dir / self.TERMS_FILENAME
+        self.postings_path = dump_dir / self.POSTINGS_FILENAME
+        self.generation = 0
+        self.docs = FileInventory()
+        self.terms = FileInventory()
+        self._postings = array('Q')
+        self._postings_file = None
+        self._postings_map: Optional[mmap.mmap] = None
+        self._postings_view: Optional[memoryview] = None
+        self._total_length = 0 # Sum of the base document lengths
+        self._load_base()
+        self._delta_file = JsonCacheFile(dump_dir / self.DELTA_FILENAME, self.INDEX_VERSION, self.log_dir,
+                                         "search index", str(self.generation))
+        delta = self._delta_file.load() or {}
+        # rel_path -> [size, mtime_ns, document length, {term: frequency}]
+        self.delta_files: Dict[str, list] = delta.get('files', {})
+        self.removed: Set[int] = set(delta.get('removed', [])) # Base document ids no longer current
+        # rules: ignore rules fingerprint, manifest: 'created' of the synced
+        # manifest, head: commit of the last update, dirty: files git reported
+        # as changed then (checked again even if git no longer reports them)
+        self.sync: Dict = delta.get('sync', {})
+        self._dirty = False
+
+    # --- Persistence ---
+
+    def _load_base(self) -> None:
+        if not self.docs_path.exists():
+            return
+        try:
+            docs = FileInventory.load(self.docs_path)
+            terms = FileInventory.load(self.terms_path)
+            self.docs, self.terms = docs, terms
+            self._map_postings()
+            generation = docs.meta.get('generation')
+            if (docs.meta.get('version') != self.INDEX_VERSION or terms.meta.get('generation') != generation
+                    or self.generation != generation):
+                raise ValueError("index files do not belong together")
+            self._total_length = docs.meta.get('total_length', 0)
+        except Exception as e:
+            log_error(self.log_dir, f"Failed to load search index {self.docs_path}: {e}. Rebuilding it.")
+            self.close()
+            self.generation = 0
+
+    def _map_postings(self) -> None:
+        self._postings_file = open(self.postings_path, "rb")
+        self._postings_map = mmap.mmap(self._postings_file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.generation = _POSTINGS_HEADER.unpack_from(self._postings_map, 0)
+        body = memoryview(self._postings_map)[_POSTINGS_HEADER.size:]
+        if magic != POSTINGS_MAGIC or len(body) % 8:
+            body.release()
+            raise ValueError("not a postings file")
+        if _NATIVE_LITTLE:
+            self._postings_view = body
+            self._postings = body.cast('Q')
+        else:
+            self._postings = array('Q', bytes(body))
+            self._postings.byteswap()
+            body.release()
+
+    def close(self) -> None:
+        """Release the mappings of the base (required before it is rewritten)."""
+        self.docs.close()
+        self.terms.close()
+        self.docs, self.terms = FileInventory(), FileInventory()
+        if isinstance(self._postings, memoryview):
+            self._postings.release()
+        self._postings = array('Q')
+        if self._postings_view is not None:
+            self._postings_view.release()
+            self._postings_view = None
+        if self._postings_map is not None:
+            self._postings_map.close()
+            self._postings_map = None
+        if self._postings_file is not None:
+            self._postings_file.close()
+            self._postings_file = None
+        self._total_length = 0
+
+    def save(self) -> None:
+        """Save the delta, after merging it into a new base if it has grown too large."""
+        if not self._dirty:
+            return
+        try:
+            if len(self.delta_files) + len(self.removed) > max(self.MERGE_MIN_DOCS, len(self.docs) * self.MERGE_FRACTION):
+                self._merge()
+            if self._delta_file.save({'files': self.delta_files, 'removed': sorted(self.removed), 'sync': self.sync}):
+                self._dirty = False
+        except Exception as e:
+            log_error(self.log_dir, f"Failed to save search index {self.docs_path}: {e}")
+
+    def _merge(self) -> None:
+        """Write the current documents and postings as a new base and start an empty delta."""
+        docs = FileInventory()
+        new_ids = array('q')
+        total_length = 0
+        for doc_id in range(len(self.docs)):
+            if doc_id in self.removed:
+                new_ids.append(-1)
+                continue
+            length = self.docs.values[doc_id]
+            new_ids.append(docs.add(self.docs.rel_path(doc_id), self.docs.sizes[doc_id], self.docs.mtimes[doc_id],
+                                    value=length))
+            total_length += length
+        postings: Dict[str, List[int]] = {}
+        for term_id in range(len(self.terms)):
+            start, count = self.terms.values[term_id], self.terms.sizes[term_id]
+            packed = [new_ids[p >> 32] << 32 | (p & 0xFFFFFFFF) for p in self._postings[start:start + count]
+                      if new_ids[p >> 32] >= 0]
+            if packed:
+                postings[self.terms.rel_path(term_id)] = packed
+        for rel_path, (size, mtime_ns, length, counts) in self.delta_files.items():
+            doc_id = docs.add(rel_path, size, mtime_ns, value=length)
+            total_length += length
+            for term, tf in counts.items():
+                postings.setdefault(term, []).append(doc_id << 32 | tf)
+
+        generation = max(time.time_ns(), self.generation + 1)
+        terms = FileInventory({'version': self.INDEX_VERSION, 'generation': generation})
+        packed_postings = array('Q')
+        for term in sorted(postings):
+            terms.add(term, len(postings[term]), 0, value=len(packed_postings))
+            packed_postings.extend(postings[term])
+        docs.meta = {'version': self.INDEX_VERSION, 'generation': generation, 'total_length': total_length}
+
+        self.close()
+        if not _NATIVE_LITTLE:
+            packed_postings.byteswap()
+        tmp_path = self.postings_path.with_name(self.postings_path.name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(_POSTINGS_HEADER.pack(POSTINGS_MAGIC, generation))
+            f.write(packed_postings.tobytes())
+        os.replace(tmp_path, self.postings_path)
+        terms.save(self.terms_path)
+        docs.save(self.docs_path) # Last: a crash before leaves mismatching generations, i.e. a rebuild
+        legacy_path = self.config_manager.dump_dir_path / self.LEGACY_FILENAME
+        if legacy_path.exists():
+            legacy_path.unlink()
+
+        self.generation = generation
+        self._delta_file.fingerprint = str(generation)
+        self.delta_files, self.removed = {}, set()
+        self._load_base()
+
+    # --- Documents ---
+
+    def __len__(self) -> int:
+        return len(self.docs) - len(self.removed) + len(self.delta_files)
+
+    def _base_id(self, rel_path: str) -> Optional[int]:
+        doc_id = self.docs.find(rel_path)
+        return None if doc_id is None or doc_id in self.removed else doc_id
+
+    def _stats(self, rel_path: str) -> Optional[Tuple[int, int]]:
+        """(size, mtime_ns) the file was indexed with, None if it is not indexed."""
+        entry = self.delta_files.get(rel_path)
+        if entry is not None:
+            return entry[0], entry[1]
+        doc_id = self._base_id(rel_path)
+        return None if doc_id is None else (self.docs.sizes[doc_id], self.docs.mtimes[doc_id])
+
+    def paths(self) -> Iterator[str]:
+        """Relative paths of all indexed files."""
+        for doc_id in range(len(self.docs)):
+            if doc_id not in self.removed:
+                yield self.docs.rel_path(doc_id)
+        yield from list(self.delta_files)
+
+    def _remove(self, rel_path: str) -> bool:
+        removed = self.delta_files.pop(rel_path, None) is not None
+        doc_id = self._base_id(rel_path)
+        if doc_id is not None:
+            self.removed.add(doc_id)
+            removed = True
+        self._dirty = self._dirty or removed
+        return removed
+
+    def _index_file(self, rel_path: str, max_file_size: int) -> bool:
+        """(Re)index a file; returns False (after removing it from the index) if it no longer exists."""
+        file_path = self.project_dir / rel_path
+        try:
+            st = os.stat(file_path)
+        except OSError:
+            self._remove(rel_path)
+            return False
+        self._remove(rel_path)
+        text = ""  # Too large, binary or unreadable files are recorded without terms
+        if st.st_size <= max_file_size:
+            try:
+                with open(file_path, 'rb') as f:
+                    text = f.read().decode('utf-8')
+            except (OSError, UnicodeDecodeError):
+                pass
+        counts = Counter(tokenize(text))
+        self.delta_files[rel_path] = [st.st_size, st.st_mtime_ns, sum(counts.values()), dict(counts)]
+        self._dirty = True
+        return True
+
+    # --- Incremental update ---
+
+    def update(self, max_file_size: int, ignore_cache=None) -> Tuple[int, int]:
+        """
+        Bring the index up to date with the working tree (see the class
+        docstring for how changes are found). Returns (files re-indexed, files removed).
+        """
+        rules = self.config_manager.get_rules_fingerprint()
+        head = self._git_head()
+        before = dict(self.sync)
+        manifest = DumpManifest.load(self.config_manager.dump_dir_path, self.project_dir)
+        try:
+            if rules != self.sync.get('rules'):
+                counts = self._sync_walk(max_file_size, ignore_cache)
+                self.sync['rules'] = rules
+            elif manifest is not None and manifest.created != self.sync.get('manifest'):
+                counts = self._sync_manifest(manifest, max_file_size)
+            elif head is None:  # Without git nothing else reports edits or new files
+                counts = self._sync_walk(max_file_size, ignore_cache)
+            else:
+                counts = (0, 0)
+            self.sync['manifest'] = manifest.created if manifest is not None else None
+        finally:
+            if manifest is not None:
+                manifest.close()
+        if head is not None:
+            git_counts = self._sync_git(head, max_file_size)
+            counts = (counts[0] + git_counts[0], counts[1] + git_counts[1])
+        self._dirty = self._dirty or self.sync != before
+        return counts
+
+    def _sync_walk(self, max_file_size: int, ignore_cache) -> Tuple[int, int]:
+        """Compare every file of the tree (walk and stat) with the index."""
+        seen = set()
+        reindexed = 0
+        for dir_path, files in walk_project(self.config_manager, ignore_cache=ignore_cache):
+            for file in files:
+                file_path = dir_path / file
+                try:
+                    st = os.stat(file_path)
+                except OSError:
+                    continue
+                rel_path = file_path.relative_to(self.project_dir).as_posix()
+                seen.add(rel_path)
+                if self._stats(rel_path) != (st.st_size, st.st_mtime_ns):
+                    reindexed += self._index_file(rel_path, max_file_size)
+        removed = [rel for rel in self.paths() if rel not in seen]
+        for rel_path in removed:
+            self._remove(rel_path)
+        return reindexed, len(removed)
+
+    def _sync_manifest(self, manifest: DumpManifest, max_file_size: int) -> Tuple[int, int]:
+        """Compare the files recorded by the last dump with the index; unchanged files are not even stat'ed."""
+        inventory = manifest.inventory
+        reindexed = 0
+        for i in range(len(inventory)):
+            rel_path = inventory.rel_path(i)
+            if self._stats(rel_path) != (inventory.sizes[i], inventory.mtimes[i]):
+                reindexed += self._index_file(rel_path, max_file_size)
+        removed = [rel for rel in self.paths() if inventory.find(rel) is None]
+        for rel_path in removed:
+            self._remove(rel_path)
+        return reindexed, len(removed)
+
+    def _git_head(self) -> Optional[str]:
+        """Commit checked out in the project's git repository, None outside git (or without commits)."""
+        try:
+            return git.Repo(str(self.project_dir), search_parent_directories=True).head.commit.hexsha
+        except (git.InvalidGitRepositoryError, git.NoSuchPathError, ValueError):
+            return None
+
+    def _sync_git(self, head: str, max_file_size: int) -> Tuple[int, int]:
+        """Check the files git reports as changed since the commit of the last update (plus untracked files)."""
+        try:
+            delta = compute_git_delta(self.config_manager, self.sync.get('head') or head)
+        except git.GitCommandError:
+            delta = compute_git_delta(self.config_manager, head) # Commit of the last update no longer exists
+        reindexed = removed = 0
+        for rel_path in sorted(set(delta.changed) | set(delta.deleted) | set(self.sync.get('dirty', []))):
+            try:
+                st = os.stat(self.project_dir / rel_path)
+            except OSError:
+                removed += self._remove(rel_path)
+                continue
+            if self._stats(rel_path) != (st.st_size, st.st_mtime_ns):
+                reindexed += self._index_file(rel_path, max_file_size)
+        self.sync['head'] = head
+        self.sync['dirty'] = sorted(delta.changed)
+        return reindexed, removed
+
+    # --- Query ---
+
+    def _postings_of(self, term: str) -> List[Tuple[object, int, int]]:
+        """(document key, term frequency, document length) per current document containing the term."""
+        docs = []
+        term_id = self.terms.find(term)
+        if term_id is not None:
+            start, count = self.terms.values[term_id], self.terms.sizes[term_id]
+            for packed in self._postings[start:start + count]:
+                doc_id = packed >> 32
+                if doc_id not in self.removed:
+                    docs.append((doc_id, packed & 0xFFFFFFFF, self.docs.values[doc_id]))
+        for rel_path, entry in self.delta_files.items():
+            tf = entry[3].get(term)
+            if tf:
+                docs.append((rel_path, tf, entry[2]))
+        return docs
+
+    def search(self, query: str, limit: Optional[int] = None) -> List[SearchHit]:
+        """Rank files by BM25 relevance for the query (highest first)."""
+        terms = set(tokenize(query))
+        n_docs = len(self)
+        if not terms or not n_docs:
+            return []
+        total_length = (self._total_length - sum(self.docs.values[doc_id] for doc_id in self.removed)
+                        + sum(entry[2] for entry in self.delta_files.values()))
+        avg_len = total_length / n_docs or 1.0
+
+        scores: Dict[object, float] = {}
+        for term in terms:
+            docs = self._postings_of(term)
+            if not docs:
+                continue
+            idf = math.log(1 + (n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+            for key, tf, doc_len in docs:
+                norm = tf * (self.K1 + 1) / (tf + self.K1 * (1 - self.B + self.B * doc_len / avg_len))
+                scores[key] = scores.get(key, 0.0) + idf * norm
+
+        hits = []
+        for key, score in scores.items():
+            if isinstance(key, str):
+                hits.append(SearchHit(key, score, self.delta_files[key][0]))
+            else:
+                hits.append(SearchHit(self.docs.rel_path(key), score, self.docs.sizes[key]))
+        hits.sort(key=lambda hit: (-hit.score, hit.rel_path))
+        return hits[:limit] if limit is not None else hits
+
+
+def select_within_budget(hits: List[SearchHit], budget_bytes: int, max_files: Optional[int] = None) -> List[SearchHit]:
+    """Pick the best ranked files whose total size fits into the byte budget."""
+    selected: List[SearchHit] = []
+    total = 0
+    for hit in hits:
+        if max_files is not None and len(selected) >= max_files:
+            break
+        if total + hit.size > budget_bytes:
+            continue
+        selected.append(hit)
+        total += hit.size
+    return selected
+
+# --- END OF FILE utils/search_index.py ---
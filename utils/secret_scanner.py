@@ -0,0 +1,308 @@
+# --- START OF FILE utils/secret_scanner.py ---
+import fnmatch
+import hashlib
+import json
+import math
+import os
+import re
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Pattern, Set, Tuple
+
+from .error_logger import log_error
+from .json_cache import JsonCacheFile
+
+
+@dataclass(frozen=True)
+class SecretRule:
+    """
+    A kind of secret. The scanner only looks at lines that contain one of the
+    anchors (exact literals; lowercase literals matched against the lowercased
+    content if ignore_case is set); the pattern is then matched on that line.
+    If the pattern has a group named 'secret', only that part is redacted.
+    """
+    name: str
+    anchors: Tuple[str, ...]
+    pattern: Pattern
+    check_entropy: bool = False  # The secret must reach [secrets] entropy_threshold
+    block: bool = False        # Match may span several lines (PEM blocks)
+    ignore_case: bool = False  # Anchors are matched case-insensitively
+
+
+# Values of keyword assignments that are references or placeholders, not secrets
+_PLACEHOLDER = re.compile(r'^(?:\$\{?|%\(|\{\{|<|os\.|process\.env|env\b|getenv|settings\.|config\.|self\.|none$|null$|true$|false$|x{4,}|\*{4,})', re.I)
+
+DEFAULT_RULES: Tuple[SecretRule, ...] = (
+    SecretRule('private_key', ('PRIVATE KEY-----',),
+               re.compile(r'-----BEGIN[A-Z ]*PRIVATE KEY-----[\s\S]*?(?:-----END[A-Z ]*PRIVATE KEY-----|\Z)'), block=True),
+    SecretRule('aws_access_key_id', ('AKIA', 'ASIA'), re.compile(r'\b(?:AKIA|ASIA)[0-9A-Z]{16}\b')),
+    SecretRule('github_token', ('ghp_', 'gho_', 'ghu_', 'ghs_', 'ghr_', 'github_pat_'),
+               re.compile(r'\b(?:gh[pousr]_[A-Za-z0-9]{36,}|github_pat_[A-Za-z0-9_]{50,})\b')),
+    SecretRule('slack_token', ('xox',), re.compile(r'\bxox[abposr]-[A-Za-z0-9-]{10,}')),
+    SecretRule('sk_api_key', ('sk-',), re.compile(r'\bsk-(?:ant-|proj-)?[A-Za-z0-9_-]{20,}')),
+    SecretRule('stripe_key', ('_live_',), re.compile(r'\b[rs]k_live_[0-9A-Za-z]{20,}')),
+    SecretRule('google_api_key', ('AIza',), re.compile(r'\bAIza[0-9A-Za-z_-]{35}')),
+    SecretRule('jwt', ('eyJ',), re.compile(r'\beyJ[A-Za-z0-9_-]{8,}\.eyJ[A-Za-z0-9_-]{8,}\.[A-Za-z0-9_-]{8,}')),
+    SecretRule('url_credentials', ('://',),
+               re.compile(r'\b[A-Za-z][A-Za-z0-9+.-]*://[^\s/:@"\'<>]+:(?P<secret>[^\s/@"\'<>]{3,})@')),
+    SecretRule('keyword_assignment', ('passw', 'secret', 'token', 'api_key', 'apikey', 'credential'),
+               re.compile(r'(?i)[\w.-]*(?:passw(?:or)?d|secret|token|api_?key|credentials?)[\w.-]*["\']?\s*(?::=|=>|[:=])\s*'
+                          r'(?P<q>["\'`]?)(?P<secret>[^\s"\'`,;]{8,})(?P=q)'), check_entropy=True, ignore_case=True),
+)
+
+
+def _find(data: bytes, search, start: int) -> Optional[Tuple[int, bytes]]:
+    """Position and text of the next anchor hit of a search (literal or regex), or None."""
+    if isinstance(search, bytes):
+        pos = data.find(search, start)
+        return None if pos == -1 else (pos, search)
+    match = search.search(data, start)
+    return None if match is None else (match.start(), match.group())
+
+
+def shannon_entropy(value: str) -> float:
+    """Shannon entropy of a string in bits per character."""
+    if not value:
+        return 0.0
+    length = len(value)
+    return -sum(n / length * math.log2(n / length) for n in Counter(value).values())
+
+
+@dataclass
+class SecretFinding:
+    """A secret found in a dumped file (the secret itself is never stored)."""
+    rel_path: str
+    line: int
+    rule: str
+
+
+class SecretScanner:
+    """
+    Finds secrets in file contents before they are written to the dump.
+
+    Scanning is linear per file: the raw content is searched for the exact
+    anchor literals of all rules (one literal-prefixed search per group of
+    anchors with a common prefix) and, for case-insensitive rules, lowercased
+    once; only lines that contain an anchor are decoded and checked with the
+    rule patterns, and keyword assignments additionally need a high-entropy value.
+    Files whose content hash was scanned clean before are skipped entirely
+    (.dump/secret_scan_cache.json, invalidated when the rules change).
+
+    Actions ([secrets] action):
+        redact  - replace each secret with [REDACTED:<rule>] (default)
+        drop    - leave files with secrets out of the dump
+        report  - only report findings, the content is dumped unchanged
+    """
+
+    CACHE_FILENAME = "secret_scan_cache.json"
+    CACHE_VERSION = 1
+
+    def __init__(self, settings: Dict, dump_dir_path: Path, log_dir: str,
+                 rules: Tuple[SecretRule, ...] = DEFAULT_RULES):
+        self.action = settings['action']
+        self.entropy_threshold = settings['entropy_threshold']
+        self.allow_paths = settings['allow_paths']
+        self.rules = rules
+        self.log_dir = log_dir
+        self.cache_path = dump_dir_path / self.CACHE_FILENAME
+        self.findings: List[SecretFinding] = []
+        self.files_scanned = 0
+        self.files_cached = 0
+        self._lock = threading.Lock()
+
+        # Anchors sharing a leading literal are searched as one regex with
+        # that literal as prefix; a single anchor is a plain substring search.
+        # The number of passes over a file is the number of groups.
+        groups: Dict[Tuple[bool, bytes], Dict[bytes, List[int]]] = {}
+        for index, rule in enumerate(rules):
+            for anchor in rule.anchors:
+                anchor_bytes = anchor.lower().encode('ascii') if rule.ignore_case else anchor.encode('ascii')
+                rule_indices = groups.setdefault((rule.ignore_case, anchor_bytes[:1]), {}).setdefault(anchor_bytes, [])
+                if index not in rule_indices:
+                    rule_indices.append(index)
+        self._searches: List[Tuple[bool, object, Dict[bytes, List[int]]]] = []
+        for (ignore_case, _first), anchors in groups.items():
+            if len(anchors) == 1:
+                self._searches.append((ignore_case, next(iter(anchors)), anchors))
+                continue
+            prefix = bytes(os.path.commonprefix(list(anchors)))
+            rest = sorted((anchor[len(prefix):] for anchor in anchors), key=len, reverse=True)
+            pattern = re.compile(re.escape(prefix) + b'(?:' + b'|'.join(map(re.escape, rest)) + b')')
+            self._searches.append((ignore_case, pattern, anchors))
+
+        self._fingerprint = hashlib.sha1(json.dumps(
+            [[r.name, list(r.anchors), r.pattern.pattern, r.check_entropy, r.ignore_case] for r in rules] + [self.entropy_threshold]
+        ).encode('utf-8')).hexdigest()
+        self._cache_file = JsonCacheFile(self.cache_path, self.CACHE_VERSION, log_dir, "secret scan cache", self._fingerprint)
+        self._clean: Set[str] = set(self._cache_file.load(list) or [])
+        self._seen_clean: Set[str] = set()
+
+    # --- Verdict cache ---
+
+    def save(self, prune_unseen: bool = True) -> None:
+        """
+        Save the hashes of the files scanned clean.
+        Args:
+            prune_unseen: Drop hashes of files not seen in this run. Only pass
+                          True after a dump of the complete tree.
+        """
+        clean = set(self._seen_clean) if prune_unseen else self._clean | self._seen_clean
+        if clean != self._clean and self._cache_file.save(sorted(clean)):
+            self._clean = clean
+
+    def reset(self) -> None:
+        """Forget the findings and counters of the previous run (long-lived scanners)."""
+        with self._lock:
+            self.findings = []
+            self.files_scanned = 0
+            self.files_cached = 0
+            self._seen_clean = set()
+
+    # --- Scanning ---
+
+    def _accept(self, rule: SecretRule, match) -> bool:
+        """Reject placeholders and low-entropy values for rules that require entropy."""
+        if 'secret' not in match.re.groupindex:
+            return True
+        value = match.group('secret')
+        if rule.name == 'url_credentials' and _PLACEHOLDER.match(value):
+            return False
+        if rule.check_entropy:
+            if _PLACEHOLDER.match(value) or ('(' in value and not match.group('q')):
+                return False # Function call or reference, e.g. password=get_password()
+            return shannon_entropy(value) >= self.entropy_threshold
+        return True
+
+    def scan(self, text: str, raw: Optional[bytes] = None) -> List[Tuple[int, int, str, int]]:
+        """
+        Find secrets in text. Returns (start, end, rule name, line number)
+        tuples with character offsets into text, sorted and non-overlapping.
+        If the raw file bytes are given, the prefilter runs on them, so clean
+        files are never re-encoded.
+        """
+        content = raw if raw is not None else text.encode('utf-8')
+        lowered = content.lower() if any(ignore_case for ignore_case, _s, _a in self._searches) else None
+        present = [(ignore_case, search, anchors) for ignore_case, search, anchors in self._searches
+                   if _find(lowered if ignore_case else content, search, 0)]
+        if not present:
+            return []
+        data = content if raw is None else text.encode('utf-8')
+        if data != content and lowered is not None:
+            lowered = data.lower()
+
+        # Line start -> rule indices, for every line containing an anchor
+        candidates: Dict[int, Set[int]] = {}
+        for ignore_case, search, anchors in present:
+            haystack = lowered if ignore_case else data
+            hit = _find(haystack, search, 0)
+            while hit:
+                pos, anchor = hit
+                line_start = haystack.rfind(b'\n', 0, pos) + 1
+                candidates.setdefault(line_start, set()).update(anchors[anchor])
+                line_end = haystack.find(b'\n', pos + len(anchor))
+                hit = None if line_end == -1 else _find(haystack, search, line_end)
+        if not candidates:
+            return []
+
+        spans: List[Tuple[int, int, str, int]] = []
+        line_no, counted, char_base = 1, 0, 0 # Line number and character offset of byte position 'counted'
+        covered_until = 0 # End of the last multi-line match (bytes)
+        for line_start in sorted(candidates):
+            if line_start < covered_until:
+                continue
+            segment = data[counted:line_start]
+            line_no += segment.count(b'\n')
+            char_base += len(segment) if segment.isascii() else len(segment.decode('utf-8'))
+            counted = line_start
+            line_end = data.find(b'\n', line_start)
+            line_end = len(data) if line_end == -1 else line_end
+            for index in sorted(candidates[line_start]):
+                rule = self.rules[index]
+                window_end = line_end
+                if rule.block:
+                    end_marker = data.find(b'-----END', line_start)
+                    end_marker = -1 if end_marker == -1 else data.find(b'KEY-----', end_marker)
+                    window_end = len(data) if end_marker == -1 else end_marker + len(b'KEY-----')
+                window = data[line_start:window_end].decode('utf-8')
+                for match in rule.pattern.finditer(window):
+                    if not self._accept(rule, match):
+                        continue
+                    group = 'secret' if 'secret' in match.re.groupindex else 0
+                    spans.append((char_base + match.start(group), char_base + match.end(group), rule.name, line_no))
+                    if rule.block:
+                        covered_until = line_start + len(window[:match.end()].encode('utf-8'))
+
+        spans.sort()
+        merged: List[Tuple[int, int, str, int]] = []
+        for span in spans:
+            if merged and span[0] < merged[-1][1]:
+                if span[1] > merged[-1][1]:
+                    merged[-1] = (merged[-1][0], span[1], merged[-1][2], merged[-1][3])
+                continue
+            merged.append(span)
+        return merged
+
+    @staticmethod
+    def redact(text: str, spans: List[Tuple[int, int, str, int]]) -> str:
+        """Replace every span with a [REDACTED:<rule>] marker."""
+        pieces = []
+        last = 0
+        for start, end, rule, _line in spans:
+            pieces.append(text[last:start])
+            pieces.append(f"[REDACTED:{rule}]")
+            last = end
+        pieces.append(text[last:])
+        return "".join(pieces)
+
+    def is_allowed(self, rel_path: str) -> bool:
+        return any(fnmatch.fnmatch(rel_path, pattern) for pattern in self.allow_paths)
+
+    def process(self, item, stats) -> bool:
+        """
+        Scan a DumpItem's content and apply the configured action.
+        Returns False if the file must be dropped. Sets item.secrets_redacted.
+        """
+        rel_path = item.rel_path or item.path.name
+        if item.content is None or self.is_allowed(rel_path):
+            return True
+        if item.content_hash is not None and item.content_hash in self._clean:
+            with self._lock:
+                self._seen_clean.add(item.content_hash)
+                self.files_cached += 1
+            return True
+
+        spans = self.scan(item.content, item.data)
+        with self._lock:
+            self.files_scanned += 1
+            if not spans:
+                if item.content_hash is not None:
+                    self._seen_clean.add(item.content_hash)
+                return True
+            self.findings.extend(SecretFinding(rel_path, line, rule) for _s, _e, rule, line in spans)
+        stats.add('secrets_found', len(spans))
+        for _start, _end, rule, line in spans:
+            log_error(self.log_dir, f"Secret found ({rule}) in {rel_path}:{line}, action '{self.action}'")
+
+        if self.action == 'drop':
+            stats.add('files_dropped_secrets')
+            return False
+        if self.action == 'redact':
+            item.content = self.redact(item.content, spans)
+            item.secrets_redacted = len(spans)
+        return True
+
+    def print_report(self, limit: int = 50) -> None:
+        """Print the findings (path:line and rule, never the secret)."""
+        if not self.findings:
+            return
+        files = len({f.rel_path for f in self.findings})
+        verb = {'redact': 'redacted', 'drop': 'files dropped', 'report': 'NOT redacted'}[self.action]
+        print(f"  Secrets: {len(self.findings)} found in {files} files ({verb})")
+        for finding in sorted(self.findings, key=lambda f: (f.rel_path, f.line))[:limit]:
+            print(f"    {finding.rel_path}:{finding.line}  {finding.rule}")
+        if len(self.findings) > limit:
+            print(f"    ... and {len(self.findings) - limit} more (see dump_error.log)")
+
+# --- END OF FILE utils/secret_scanner.py ---
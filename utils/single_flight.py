@@ -0,0 +1,244 @@
+# --- START OF FILE utils/single_flight.py ---
+import hashlib
+import json
+import os
+import socket
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+from .error_logger import log_error
+from .file_lock import FileLock
+
+
+# Files that decide what a dump contains, relative to the project root
+CONFIG_FILES = (".dump/.dump_config", ".dump/.dump_ignore", ".gitignore")
+
+
+def config_fingerprint(project_dir: Path) -> str:
+    """
+    Hash of the configuration and ignore rules of a project (the raw bytes of
+    CONFIG_FILES). Reads the files only, so it can run before the dump lock is
+    taken without creating or rewriting the config.
+    """
+    digest = hashlib.sha1()
+    for rel_path in CONFIG_FILES:
+        try:
+            data = (project_dir / rel_path).read_bytes()
+        except OSError:
+            data = None
+        digest.update(f"{rel_path}:{'-' if data is None else len(data)}\n".encode('utf-8'))
+        digest.update(data or b'')
+    return digest.hexdigest()
+
+
+def dump_request_key(project_dir: Path, **request) -> str:
+    """
+    Stable hash of a dump request: its parameters (mode, revision, query, ...)
+    plus the config_fingerprint of the project, so a run with other settings
+    or ignore rules is never reused.
+    """
+    request = dict(request, project=str(project_dir), config=config_fingerprint(project_dir))
+    return hashlib.sha1(json.dumps(request, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+def _pid_alive(pid: int) -> bool:
+    """Best effort check whether a process with this PID exists on this machine."""
+    if pid <= 0:
+        return False
+    if os.name == 'nt':
+        import ctypes
+        PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+        STILL_ACTIVE = 259
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+        if not handle:
+            return False
+        try:
+            exit_code = ctypes.c_ulong()
+            return bool(kernel32.GetExitCodeProcess(handle, ctypes.byref(exit_code))) and exit_code.value == STILL_ACTIVE
+        finally:
+            kernel32.CloseHandle(handle)
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True # Exists, owned by another user
+    return True
+
+
+class DumpSingleFlight:
+    """
+    Coordinates concurrent create_dump runs of the same project.
+
+    Only one run at a time holds .dump/dump.lock (an OS-level lock, released by
+    the operating system if the owner dies). The owner publishes its PID, the
+    request key and its progress in .dump/dump_status.json and refreshes it
+    periodically (heartbeat). Another request waits for the lock and shows the
+    owner's progress; if the finished run had the same request key, its result
+    is reused instead of dumping again.
+
+    A status file that still says "running" while nobody holds the lock, or
+    whose heartbeat stopped while the owner PID is gone, belongs to a crashed
+    run and is reported as stale.
+
+    Usage:
+        flight = DumpSingleFlight(dump_dir_path, key)
+        reused = flight.acquire_or_wait()
+        if reused is None:
+            try:
+                ... dump ...
+                flight.finish(True, dump_path)
+            finally:
+                flight.release()
+    """
+
+    LOCK_FILENAME = "dump.lock"
+    STATUS_FILENAME = "dump_status.json"
+    HEARTBEAT_SECONDS = 2.0
+    STALE_AFTER_SECONDS = 60.0
+    POLL_SECONDS = 0.5
+
+    def __init__(self, dump_dir_path: Path, key: str):
+        self.dump_dir_path = dump_dir_path
+        self.key = key
+        self.lock = FileLock(dump_dir_path / self.LOCK_FILENAME, timeout=None)
+        self.status_path = dump_dir_path / self.STATUS_FILENAME
+        self.requested = time.time()
+        self._status: Dict = {}
+        self._progress: Optional[Callable[[], Dict]] = None
+        self._status_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._heartbeat: Optional[threading.Thread] = None
+
+    # --- Status file ---
+
+    def read_status(self) -> Dict:
+        """Read the status file (empty dict if it is missing or being replaced)."""
+        try:
+            with open(self.status_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_status(self) -> None:
+        with self._status_lock:
+            status = dict(self._status)
+            if self._progress is not None and status.get('state') == 'running':
+                try:
+                    status['progress'] = dict(status.get('progress', {}), **self._progress())
+                except Exception:
+                    pass # Progress is informational only
+            status['heartbeat'] = time.time()
+            tmp_path = self.status_path.with_name(f"{self.STATUS_FILENAME}.{os.getpid()}.tmp")
+            try:
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(status, f)
+                os.replace(tmp_path, self.status_path)
+            except OSError as e:
+                log_error(str(self.dump_dir_path.parent), f"Failed to write dump status {self.status_path}: {e}")
+
+    def _heartbeat_loop(self) -> None:
+        while not self._stop.wait(self.HEARTBEAT_SECONDS):
+            self._write_status()
+
+    def is_stale(self, status: Dict) -> bool:
+        """True if a 'running' status belongs to an owner that is gone."""
+        if status.get('state') != 'running':
+            return False
+        if status.get('host') == socket.gethostname() and not _pid_alive(int(status.get('pid', 0))):
+            return True
+        return time.time() - float(status.get('heartbeat', 0)) > self.STALE_AFTER_SECONDS
+
+    # --- Protocol ---
+
+    def _reusable(self, status: Dict) -> bool:
+        """A run with the same request key finished successfully after this request was made."""
+        return (status.get('state') == 'done' and status.get('key') == self.key
+                and float(status.get('finished', 0)) >= self.requested
+                and Path(status.get('dump_path', '')).exists())
+
+    def acquire_or_wait(self) -> Optional[Dict]:
+        """
+        Take the dump lock, waiting for a running dump if necessary.
+        Returns None if the caller owns the lock and must dump, or the status of
+        a concurrent identical run whose result can be reused (lock not held).
+        """
+        announced = False
+        warned_stale = False
+        last_progress = None
+        while not self.lock.try_acquire():
+            status = self.read_status()
+            if not announced:
+                print(f"Another dump of this project is running (PID {status.get('pid', '?')}). Waiting for it to finish...")
+                announced = True
+            progress = status.get('progress')
+            if progress and progress != last_progress:
+                print(f"  ... {progress.get('phase', 'running')}: {progress.get('files_dumped', 0)} files written")
+                last_progress = progress
+            if not warned_stale and self.is_stale(status):
+                print(f"  Warning: dump lock owner PID {status.get('pid')} seems to be gone but the lock is still held.")
+                warned_stale = True
+            time.sleep(self.POLL_SECONDS)
+
+        status = self.read_status()
+        if announced and self._reusable(status):
+            self.lock.release()
+            return status
+        if status.get('state') == 'running':
+            # Nobody holds the lock, so the previous owner died mid-run
+            print(f"Note: Previous dump (PID {status.get('pid')}, started {status.get('started_iso', '?')}) did not finish. Its status was stale.")
+            log_error(str(self.dump_dir_path.parent),
+                      f"Stale dump status from PID {status.get('pid')} found; previous run did not finish.")
+
+        self._status = {
+            'state': 'running',
+            'pid': os.getpid(),
+            'host': socket.gethostname(),
+            'key': self.key,
+            'started': time.time(),
+            'started_iso': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'progress': {'phase': 'starting'},
+        }
+        self._write_status()
+        self._stop.clear()
+        self._heartbeat = threading.Thread(target=self._heartbeat_loop, name="dump-heartbeat", daemon=True)
+        self._heartbeat.start()
+        return None
+
+    def set_phase(self, phase: str, progress: Optional[Callable[[], Dict]] = None) -> None:
+        """Publish the current phase; progress() is polled by the heartbeat for live counters."""
+        with self._status_lock:
+            self._status['progress'] = {'phase': phase}
+            if progress is not None:
+                self._progress = progress
+        self._write_status()
+
+    def finish(self, success: bool, dump_path: Optional[Path] = None, **result) -> None:
+        """Record the outcome of the run (reusable by waiting identical requests if successful)."""
+        self._stop_heartbeat()
+        with self._status_lock:
+            self._progress = None
+            self._status.update(result)
+            self._status['state'] = 'done' if success else 'failed'
+            self._status['finished'] = time.time()
+            if dump_path is not None:
+                self._status['dump_path'] = str(dump_path)
+        self._write_status()
+
+    def _stop_heartbeat(self) -> None:
+        if self._heartbeat is not None:
+            self._stop.set()
+            self._heartbeat.join()
+            self._heartbeat = None
+
+    def release(self) -> None:
+        """Release the lock; a run that did not call finish() is recorded as failed."""
+        if self._status.get('state') == 'running':
+            self.finish(False)
+        self._stop_heartbeat()
+        self.lock.release()
+
+# --- END OF FILE utils/single_flight.py ---
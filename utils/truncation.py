@@ -0,0 +1,149 @@
+# --- START OF FILE utils/truncation.py ---
+import fnmatch
+from typing import BinaryIO, Dict, List, Optional, Tuple
+
+from .file_utils import decode_text
+
+# Size policy modes for files larger than max_file_size
+SIZE_POLICY_MODES = ('skip', 'head', 'head_tail', 'sample')
+
+SAMPLE_WINDOW_BYTES = 4096 # Max bytes read per sampled line
+
+
+def find_size_policy(policies: List[Dict], rel_path: str) -> Optional[Dict]:
+    """
+    Return the first policy whose pattern matches the relative path or the file
+    name (fnmatch style, like the ignore patterns), or None.
+    """
+    file_name = rel_path.rsplit('/', 1)[-1]
+    for policy in policies:
+        pattern = policy['pattern']
+        if fnmatch.fnmatch(rel_path, pattern) or fnmatch.fnmatch(file_name, pattern):
+            return policy
+    return None
+
+
+def _trim_partial_utf8_end(data: bytes) -> bytes:
+    """Drop an incomplete UTF-8 sequence at the end of a cut."""
+    for i in range(1, min(4, len(data)) + 1):
+        byte = data[-i]
+        if byte & 0xC0 != 0x80: # Lead byte or ASCII
+            if byte < 0x80:
+                expected = 1
+            elif byte >= 0xF0:
+                expected = 4
+            elif byte >= 0xE0:
+                expected = 3
+            else:
+                expected = 2
+            return data if i >= expected else data[:-i]
+    return data
+
+
+def _trim_partial_utf8_start(data: bytes) -> Tuple[int, bytes]:
+    """Drop continuation bytes at the start of a cut. Returns (bytes dropped, data)."""
+    skip = 0
+    while skip < min(3, len(data)) and data[skip] & 0xC0 == 0x80:
+        skip += 1
+    return skip, data[skip:]
+
+
+def _read_head(f: BinaryIO, limit: int) -> bytes:
+    """Read up to limit bytes from the start, cut after the last complete line."""
+    f.seek(0)
+    data = f.read(limit)
+    newline = data.rfind(b'\n')
+    if newline >= 0:
+        return data[:newline + 1]
+    return _trim_partial_utf8_end(data)
+
+
+def _read_tail(f: BinaryIO, size: int, start: int) -> Tuple[int, bytes]:
+    """Read from start to the end of the file, beginning at the next complete line."""
+    if start >= size:
+        return size, b''
+    f.seek(max(0, start - 1))
+    data = f.read(size - max(0, start - 1))
+    if start == 0:
+        return 0, data
+    # data[0] is the byte before start: if it is a newline, start is a line start
+    newline = data.find(b'\n')
+    if newline >= 0:
+        return start - 1 + newline + 1, data[newline + 1:]
+    skip, data = _trim_partial_utf8_start(data[1:])
+    return start + skip, data
+
+
+def _read_samples(f: BinaryIO, size: int, count: int) -> List[Tuple[int, bytes]]:
+    """Read count complete lines at evenly spaced offsets."""
+    pieces: List[Tuple[int, bytes]] = []
+    last_end = 0
+    for k in range(max(1, count)):
+        pos = k * size // max(1, count)
+        if pos < last_end:
+            continue
+        f.seek(pos)
+        window = f.read(SAMPLE_WINDOW_BYTES)
+        if not window:
+            break
+        start = 0
+        if pos > 0:
+            # Move to the beginning of the next line
+            newline = window.find(b'\n')
+            if newline < 0:
+                continue
+            start = newline + 1
+        end = window.find(b'\n', start)
+        line = window[start:end + 1] if end >= 0 else _trim_partial_utf8_end(window[start:])
+        if line:
+            pieces.append((pos + start, line))
+            last_end = pos + start + len(line)
+    return pieces
+
+
+def read_truncated(f: BinaryIO, size: int, policy: Dict) -> List[Tuple[int, bytes]]:
+    """
+    Read only the byte ranges a size policy keeps from a seekable binary file.
+    Returns a list of (offset, data) pieces in file order; cuts are moved to line
+    boundaries so that no line (and no UTF-8 sequence) is split.
+    """
+    mode = policy['mode']
+    if mode == 'head':
+        return [(0, _read_head(f, policy['head_bytes']))]
+    if mode == 'head_tail':
+        head = _read_head(f, policy['head_bytes'])
+        tail_start, tail = _read_tail(f, size, max(len(head), size - policy['tail_bytes']))
+        return [(0, head), (tail_start, tail)] if tail else [(0, head)]
+    if mode == 'sample':
+        return _read_samples(f, size, policy['sample_lines'])
+    raise ValueError(f"Unsupported size policy mode '{mode}'")
+
+
+def elision_marker(omitted: int) -> str:
+    return f"[... {omitted} bytes omitted ...]\n"
+
+
+def render_truncated(pieces: List[Tuple[int, bytes]], size: int) -> Tuple[str, int]:
+    """
+    Decode the kept pieces and insert an elision marker for every gap.
+    Returns (text, omitted byte count). Raises UnicodeDecodeError for non UTF-8 content.
+    """
+    parts: List[str] = []
+    position = 0
+    omitted = 0
+    for offset, data in pieces:
+        if offset > position:
+            if parts and not parts[-1].endswith('\n'):
+                parts.append('\n')
+            parts.append(elision_marker(offset - position))
+            omitted += offset - position
+        parts.append(decode_text(data))
+        position = offset + len(data)
+    if position < size:
+        if parts and not parts[-1].endswith('\n'):
+            parts.append('\n')
+        parts.append(elision_marker(size - position))
+        omitted += size - position
+    return ''.join(parts), omitted
+
+# --- END OF FILE utils/truncation.py ---